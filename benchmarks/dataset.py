@@ -0,0 +1,67 @@
+"""
+ベンチマーク用データセット
+
+シード固定の料理コーパスから、フェイク Notion に投入する
+実績履歴・未処理の実績入力・既存の提案を決定的に生成します。
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from src.data_generator import DAILY_CATEGORIES, DISH_CORPUS
+
+# ベンチマークの基準日（土曜日）。週次フローはこの翌週を生成する。
+ANCHOR_DATE = date(2024, 1, 13)
+
+
+@dataclass
+class BenchmarkDataset:
+    """フェイク Notion に投入するデータ"""
+
+    history: list[tuple[date, str, str]]  # (日付, 料理名, 区分)
+    raw_inputs: list[tuple[date, str]]  # (日付, 食べたもの)
+    proposals: list[tuple[date, str, str, str]]  # (日付, 料理名, 区分, ステータス)
+
+
+def build_dataset(
+    history_rows: int,
+    backlog_records: int,
+    seed: int = 0,
+    anchor: date = ANCHOR_DATE,
+) -> BenchmarkDataset:
+    """
+    シード固定でデータセットを生成します。
+
+    Args:
+        history_rows: 実績履歴の行数（1日3品として過去に遡る）
+        backlog_records: 未処理の実績入力数
+        seed: 乱数シード
+        anchor: 基準日
+
+    Returns:
+        生成したデータセット
+    """
+    rng = random.Random(seed)
+    categories = DAILY_CATEGORIES
+
+    history = []
+    for i in range(history_rows):
+        eaten = anchor - timedelta(days=1 + i // len(categories))
+        category = categories[i % len(categories)]
+        history.append((eaten, rng.choice(DISH_CORPUS[category]).name, category))
+
+    raw_inputs = []
+    for i in range(backlog_records):
+        eaten = anchor - timedelta(days=i % 14)
+        names = [rng.choice(DISH_CORPUS[c]).name for c in categories]
+        raw_inputs.append((eaten, "、".join(names)))
+
+    # 次週の水曜は外食予定、月曜の主菜は確定済み
+    next_monday = anchor + timedelta(days=(7 - anchor.weekday()) % 7 or 7)
+    proposals = [
+        (next_monday + timedelta(days=2), "外食", "その他", "外食・予定あり"),
+        (next_monday, "鮭の塩焼き", "主菜", "確定"),
+    ]
+
+    return BenchmarkDataset(history=history, raw_inputs=raw_inputs, proposals=proposals)
@@ -0,0 +1,581 @@
+"""
+外部サービスのフェイク実装
+
+Notion / OpenAI / Slack の SDK・HTTP 呼び出しを置き換え、
+ネットワークなしで決定的に動作するフェイクを提供します。
+レイテンシと 429（レート制限）の注入、API 呼び出しの記録に対応しています。
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+import openai
+from notion_client.errors import APIErrorCode, APIResponseError
+
+try:
+    # openai SDK のバージョンによっては httpx のフォークを使用している
+    import httpx2 as _openai_httpx
+except ImportError:
+    _openai_httpx = httpx
+
+from src.data_generator import CATEGORY_BY_DISH, DISH_CORPUS
+
+NOTION_PAGE_SIZE = 100
+
+DB_ID_PROPOSED = "fake-db-proposed"
+DB_ID_RAW = "fake-db-raw"
+DB_ID_STRUCTURED = "fake-db-structured"
+
+# 作成時に省略されたプロパティの値（Notion はスキーマの全プロパティを返す）
+EMPTY_PROPERTIES: dict[str, dict[str, Any]] = {
+    DB_ID_PROPOSED: {"買い物リスト": {"rich_text": []}},
+}
+
+# フェイクの last_edited_time の起点（書き込みごとに1分進める）
+EDIT_EPOCH = datetime(2024, 1, 1)
+
+
+@dataclass
+class FakeServiceConfig:
+    """フェイクサービスの振る舞い設定"""
+
+    latency_ms: float = 0.0  # 1呼び出しあたりの基本レイテンシ
+    jitter_ms: float = 0.0  # レイテンシの揺らぎ（一様分布の幅）
+    rate_limit_ratio: float = 0.0  # 429 を返す確率（0.0〜1.0）
+    retry_after_seconds: int = 1  # 429 の Retry-After
+
+
+@dataclass
+class CallRecord:
+    """API 呼び出し1回分の記録"""
+
+    service: str
+    method: str
+    duration: float
+    outcome: str  # "ok" / "rate_limited" / "error"
+
+
+@dataclass
+class CallRecorder:
+    """フェイクへの API 呼び出しを記録する"""
+
+    records: list[CallRecord] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, record: CallRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def snapshot(self) -> list[CallRecord]:
+        with self._lock:
+            return list(self.records)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+
+class _FakeService:
+    """レイテンシと 429 の注入を共通化した基底クラス"""
+
+    service_name = ""
+
+    def __init__(
+        self, config: FakeServiceConfig, recorder: CallRecorder, seed: int
+    ):
+        self.config = config
+        self.recorder = recorder
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _call(self, method: str, extra_latency_ms: float = 0.0) -> Iterator[None]:
+        """呼び出し1回分のレイテンシ・429注入・記録を行う"""
+        with self._lock:
+            jitter = self._random.uniform(0.0, self.config.jitter_ms)
+            rate_limited = self._random.random() < self.config.rate_limit_ratio
+
+        start = time.perf_counter()
+        delay = (self.config.latency_ms + jitter + extra_latency_ms) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+        outcome = "ok"
+        try:
+            if rate_limited:
+                outcome = "rate_limited"
+                raise self._rate_limit_error()
+            yield
+        except Exception:
+            if outcome == "ok":
+                outcome = "error"
+            raise
+        finally:
+            self.recorder.add(
+                CallRecord(
+                    service=self.service_name,
+                    method=method,
+                    duration=time.perf_counter() - start,
+                    outcome=outcome,
+                )
+            )
+
+    def _rate_limit_error(self) -> Exception:
+        raise NotImplementedError
+
+
+# =============================================================================
+# Notion
+# =============================================================================
+
+
+class FakeNotionStore:
+    """フェイク Notion のデータベース（database_id -> page_id -> page）"""
+
+    def __init__(self) -> None:
+        self.databases: dict[str, dict[str, dict[str, Any]]] = {
+            DB_ID_PROPOSED: {},
+            DB_ID_RAW: {},
+            DB_ID_STRUCTURED: {},
+        }
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._edits = 0
+
+    def edited_time(self) -> str:
+        """書き込みのたびに進む last_edited_time（呼び出し側でロックを取る）"""
+        self._edits += 1
+        return (EDIT_EPOCH + timedelta(minutes=self._edits)).isoformat() + ".000Z"
+
+    def insert(self, database_id: str, properties: dict[str, Any]) -> str:
+        """作成リクエスト形式のプロパティからページを追加する"""
+        with self._lock:
+            self._next_id += 1
+            page_id = str(uuid.UUID(int=self._next_id))
+            edited = self.edited_time()
+        page = {
+            "id": page_id,
+            "last_edited_time": edited,
+            "archived": False,
+            "properties": {
+                name: _to_response_property(value)
+                for name, value in {
+                    **EMPTY_PROPERTIES.get(database_id, {}),
+                    **properties,
+                }.items()
+            },
+        }
+        with self._lock:
+            self.databases[database_id][page_id] = page
+        return page_id
+
+    def count(self, database_id: str) -> int:
+        with self._lock:
+            return sum(
+                1
+                for page in self.databases[database_id].values()
+                if not page["archived"]
+            )
+
+
+def _to_response_property(value: dict[str, Any]) -> dict[str, Any]:
+    """作成リクエストのプロパティ値を、クエリ結果の形式に変換する"""
+    for key in ("title", "rich_text"):
+        if key in value:
+            return {
+                key: [
+                    {"plain_text": item["text"]["content"], **item}
+                    for item in value[key]
+                ]
+            }
+    return dict(value)
+
+
+def _property_date(page: dict[str, Any]) -> str:
+    date_value = page["properties"].get("日付", {}).get("date")
+    return date_value["start"] if date_value else ""
+
+
+def _matches(page: dict[str, Any], query_filter: dict[str, Any] | None) -> bool:
+    """アプリが使用する範囲の Notion フィルタを評価する"""
+    if not query_filter:
+        return True
+    if "and" in query_filter:
+        return all(_matches(page, f) for f in query_filter["and"])
+    if "or" in query_filter:
+        return any(_matches(page, f) for f in query_filter["or"])
+
+    prop = page["properties"].get(query_filter["property"], {})
+    if "date" in query_filter:
+        value = _property_date(page)
+        condition = query_filter["date"]
+        if "equals" in condition:
+            return value == condition["equals"]
+        if "on_or_after" in condition:
+            return value >= condition["on_or_after"]
+        if "on_or_before" in condition:
+            return value <= condition["on_or_before"]
+    if "checkbox" in query_filter:
+        return prop.get("checkbox", False) == query_filter["checkbox"]["equals"]
+    if "rich_text" in query_filter:
+        texts = prop.get("rich_text", [])
+        text = texts[0]["plain_text"] if texts else ""
+        return text == query_filter["rich_text"].get("equals", text)
+    return True
+
+
+class _FakeDatabases:
+    def __init__(self, owner: "FakeNotionClient"):
+        self._owner = owner
+
+    def query(
+        self,
+        database_id: str,
+        filter: dict[str, Any] | None = None,
+        sorts: list[dict[str, Any]] | None = None,
+        start_cursor: str | None = None,
+        page_size: int = NOTION_PAGE_SIZE,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        owner = self._owner
+        with owner._call("databases.query"):
+            with owner.store._lock:
+                pages = [
+                    page
+                    for page in owner.store.databases[database_id].values()
+                    if not page["archived"] and _matches(page, filter)
+                ]
+            for sort in reversed(sorts or []):
+                pages.sort(
+                    key=_property_date,
+                    reverse=sort.get("direction") == "descending",
+                )
+
+            offset = int(start_cursor) if start_cursor else 0
+            page_size = min(page_size, NOTION_PAGE_SIZE)
+            chunk = pages[offset : offset + page_size]
+            has_more = offset + page_size < len(pages)
+            return {
+                "object": "list",
+                "results": chunk,
+                "has_more": has_more,
+                "next_cursor": str(offset + page_size) if has_more else None,
+            }
+
+    def retrieve(self, database_id: str, **kwargs: Any) -> dict[str, Any]:
+        with self._owner._call("databases.retrieve"):
+            return {"object": "database", "id": database_id}
+
+
+class _FakePages:
+    def __init__(self, owner: "FakeNotionClient"):
+        self._owner = owner
+
+    def create(
+        self, parent: dict[str, Any], properties: dict[str, Any], **kwargs: Any
+    ) -> dict[str, Any]:
+        owner = self._owner
+        with owner._call("pages.create"):
+            page_id = owner.store.insert(parent["database_id"], properties)
+            with owner.store._lock:
+                page = owner.store.databases[parent["database_id"]][page_id]
+            return {
+                "object": "page",
+                "id": page_id,
+                "last_edited_time": page["last_edited_time"],
+            }
+
+    def update(self, page_id: str, **kwargs: Any) -> dict[str, Any]:
+        owner = self._owner
+        with owner._call("pages.update"):
+            with owner.store._lock:
+                for pages in owner.store.databases.values():
+                    if page_id in pages:
+                        page = pages[page_id]
+                        break
+                else:
+                    raise KeyError(page_id)
+                if "archived" in kwargs:
+                    page["archived"] = kwargs["archived"]
+                for name, value in (kwargs.get("properties") or {}).items():
+                    page["properties"][name] = _to_response_property(value)
+                page["last_edited_time"] = owner.store.edited_time()
+            return {
+                "object": "page",
+                "id": page_id,
+                "last_edited_time": page["last_edited_time"],
+            }
+
+
+class FakeNotionClient(_FakeService):
+    """notion_client.Client の代替"""
+
+    service_name = "notion"
+
+    def __init__(
+        self,
+        store: FakeNotionStore,
+        config: FakeServiceConfig,
+        recorder: CallRecorder,
+        seed: int = 0,
+    ):
+        super().__init__(config, recorder, seed)
+        self.store = store
+        self.databases = _FakeDatabases(self)
+        self.pages = _FakePages(self)
+
+    def _rate_limit_error(self) -> Exception:
+        response = httpx.Response(
+            429,
+            headers={"retry-after": str(self.config.retry_after_seconds)},
+            request=httpx.Request("POST", "https://api.notion.com/v1/"),
+        )
+        return APIResponseError(
+            response, "Rate limited (fake)", APIErrorCode.RateLimited
+        )
+
+
+# =============================================================================
+# OpenAI
+# =============================================================================
+
+
+@dataclass
+class _Message:
+    content: str | None
+
+
+@dataclass
+class _Choice:
+    message: _Message
+
+
+@dataclass
+class _Usage:
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+@dataclass
+class _Completion:
+    choices: list[_Choice]
+    usage: _Usage
+
+
+_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAIClient"):
+        self._owner = owner
+
+    def create(
+        self, model: str, messages: list[dict[str, str]], **kwargs: Any
+    ) -> _Completion:
+        owner = self._owner
+        prompt = messages[-1]["content"]
+        content, items = owner.respond(prompt)
+        with owner._call(
+            "chat.completions.create",
+            extra_latency_ms=owner.per_item_latency_ms * items,
+        ):
+            prompt_tokens = len(prompt) // 2
+            completion_tokens = len(content) // 2
+            return _Completion(
+                choices=[_Choice(message=_Message(content=content))],
+                usage=_Usage(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    total_tokens=prompt_tokens + completion_tokens,
+                ),
+            )
+
+
+class _FakeChat:
+    def __init__(self, owner: "FakeOpenAIClient"):
+        self.completions = _FakeCompletions(owner)
+
+
+class FakeOpenAIClient(_FakeService):
+    """
+    openai.OpenAI の代替。
+
+    プロンプトの種類（構造化 / 献立生成 / 接続テスト）を判別し、
+    決定的なレスポンスを返します。cassette を与えると記録済みの
+    レスポンスをプロンプト単位で再生します。
+    """
+
+    service_name = "openai"
+
+    def __init__(
+        self,
+        config: FakeServiceConfig,
+        recorder: CallRecorder,
+        seed: int = 0,
+        per_item_latency_ms: float = 0.0,
+        cassette: dict[str, str] | None = None,
+    ):
+        super().__init__(config, recorder, seed)
+        self.chat = _FakeChat(self)
+        self.per_item_latency_ms = per_item_latency_ms
+        self.cassette = cassette or {}
+        self._seed = seed
+
+    def respond(self, prompt: str) -> tuple[str, int]:
+        """プロンプトに対するレスポンス本文と出力アイテム数を返す"""
+        if prompt in self.cassette:
+            content = self.cassette[prompt]
+            return content, content.count("dish_name")
+
+        if "食事記録:" in prompt:
+            return self._structure_response(prompt)
+        if "生成対象日" in prompt:
+            return self._menu_response(prompt)
+        return "Hello", 0
+
+    def _structure_response(self, prompt: str) -> tuple[str, int]:
+        line = next(
+            (text for text in prompt.splitlines() if text.startswith("食事記録:")), ""
+        )
+        raw_text = line.removeprefix("食事記録:").strip()
+        dishes = [
+            {"dish_name": name, "category": CATEGORY_BY_DISH.get(name, "その他")}
+            for name in re.split(r"[、,]", raw_text)
+            if name.strip()
+        ]
+        return json.dumps({"dishes": dishes}, ensure_ascii=False), len(dishes)
+
+    def _menu_response(self, prompt: str) -> tuple[str, int]:
+        section = prompt.split("生成対象日", 1)[1].split("#", 1)[0]
+        dates = _DATE_PATTERN.findall(section)
+        rng = random.Random(f"{self._seed}:{','.join(dates)}")
+        menu = []
+        for date_str in dates:
+            for category in ("主菜", "副菜", "汁物"):
+                dish = rng.choice(DISH_CORPUS[category])
+                menu.append(
+                    {
+                        "date": date_str,
+                        "dish_name": dish.name,
+                        "category": category,
+                        "shopping_list": ", ".join(dish.ingredients),
+                    }
+                )
+        return json.dumps({"menu": menu}, ensure_ascii=False), len(menu)
+
+    def _rate_limit_error(self) -> Exception:
+        response = _openai_httpx.Response(
+            429,
+            headers={"retry-after": str(self.config.retry_after_seconds)},
+            request=_openai_httpx.Request(
+                "POST", "https://api.openai.com/v1/chat/completions"
+            ),
+        )
+        return openai.RateLimitError(
+            "Rate limited (fake)", response=response, body=None
+        )
+
+
+# =============================================================================
+# Slack
+# =============================================================================
+
+
+@dataclass
+class FakeHTTPResponse:
+    """requests.Response の最小限の代替"""
+
+    status_code: int
+    headers: dict[str, str] = field(default_factory=dict)
+    text: str = "ok"
+
+
+class FakeSlackWebhook(_FakeService):
+    """Slack Incoming Webhook への POST の代替（requests.Session として差し替える）"""
+
+    service_name = "slack"
+
+    def __init__(
+        self, config: FakeServiceConfig, recorder: CallRecorder, seed: int = 0
+    ):
+        super().__init__(config, recorder, seed)
+        self.payloads: list[dict[str, Any]] = []
+
+    def post(self, url: str, json: dict[str, Any], **kwargs: Any) -> FakeHTTPResponse:
+        try:
+            with self._call("webhook.post"):
+                self.payloads.append(json)
+                return FakeHTTPResponse(status_code=200)
+        except _SlackRateLimited as e:
+            return e.response
+
+    def _rate_limit_error(self) -> Exception:
+        return _SlackRateLimited(
+            FakeHTTPResponse(
+                status_code=429,
+                headers={"Retry-After": str(self.config.retry_after_seconds)},
+                text="rate_limited",
+            )
+        )
+
+
+class _SlackRateLimited(Exception):
+    """Webhook は例外ではなく 429 レスポンスを返すため、内部でのみ使う"""
+
+    def __init__(self, response: FakeHTTPResponse):
+        super().__init__("rate_limited")
+        self.response = response
+
+
+# =============================================================================
+# Wiring
+# =============================================================================
+
+
+@dataclass
+class FakeServices:
+    """フェイクサービス一式"""
+
+    store: FakeNotionStore
+    notion: FakeNotionClient
+    openai: FakeOpenAIClient
+    slack: FakeSlackWebhook
+    recorder: CallRecorder
+
+
+@contextmanager
+def fake_environment(services: FakeServices) -> Iterator[FakeServices]:
+    """
+    アプリケーションの外部呼び出しをフェイクに差し替える。
+
+    src.main の run_* 関数はクライアントを内部で生成するため、
+    SDK のコンストラクタと設定値をモジュール単位で置き換えます。
+    """
+    with (
+        patch("src.main.validate_config", return_value=[]),
+        patch("src.notion_client.Client", return_value=services.notion),
+        patch("src.notion_client.NOTION_TOKEN", "fake-token"),
+        patch("src.notion_client.DB_ID_PROPOSED", DB_ID_PROPOSED),
+        patch("src.notion_client.DB_ID_RAW", DB_ID_RAW),
+        patch("src.notion_client.DB_ID_STRUCTURED", DB_ID_STRUCTURED),
+        # 書き込みのレイテンシ・429 は FakeServiceConfig で与えるため、クライアント側の
+        # レート制限は外す
+        patch("src.notion_client.NOTION_WRITE_RATE", 0.0),
+        patch("src.openai_client.OpenAI", return_value=services.openai),
+        patch("src.openai_client.OPENAI_API_KEY", "fake-key"),
+        patch("src.slack_client.SLACK_WEBHOOK_URL", "https://hooks.slack.invalid"),
+        patch("src.slack_client.shared_session", return_value=services.slack),
+    ):
+        yield services
@@ -0,0 +1,155 @@
+"""
+実績履歴のメモリベンチマーク
+
+同じ実績履歴を次の3通りで保持したときの確保メモリを tracemalloc で
+計測します。
+
+- plain: __slots__ のないデータクラスのリスト（変更前の StructuredActualHistory）
+- slots: StructuredActualHistory（__slots__ あり）のリスト
+- columns: HistoryColumns
+
+Notion のレスポンスから変換したレコードと同じく、ページIDと料理名・区分は
+レコードごとに別の文字列として作ります。
+
+実行方法:
+    python -m benchmarks.memory --history-rows 100000
+    python -m benchmarks.memory --output memory.json
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from benchmarks.dataset import build_dataset
+from src.history_store import HistoryColumns
+from src.notion_client import StructuredActualHistory
+
+LAYOUTS = ("plain", "slots", "columns")
+
+
+@dataclass
+class _PlainHistory:
+    """__slots__ のない実績履歴（比較用）"""
+
+    id: str | None
+    dish_name: str
+    date: date
+    category: str
+
+
+def _copy(text: str) -> str:
+    # JSON から読んだ文字列と同じく、同じ内容でも別のオブジェクトにする
+    return text.encode().decode()
+
+
+def _rows(history_rows: int, seed: int) -> list[tuple[str, str, int, str]]:
+    dataset = build_dataset(history_rows=history_rows, backlog_records=0, seed=seed)
+    return [
+        (str(uuid.UUID(int=i + 1)), name, eaten.toordinal(), category)
+        for i, (eaten, name, category) in enumerate(dataset.history)
+    ]
+
+
+def _build(layout: str, rows: list[tuple[str, str, int, str]]) -> Any:
+    if layout == "columns":
+        columns = HistoryColumns()
+        for page_id, name, day, category in rows:
+            columns.add(_copy(page_id), _copy(name), date.fromordinal(day), _copy(category))
+        return columns
+    record_type = _PlainHistory if layout == "plain" else StructuredActualHistory
+    return [
+        record_type(
+            id=_copy(page_id),
+            dish_name=_copy(name),
+            date=date.fromordinal(day),
+            category=_copy(category),
+        )
+        for page_id, name, day, category in rows
+    ]
+
+
+def measure(build: Callable[[], Any]) -> int:
+    """
+    build() が返すオブジェクトが保持しているメモリ（バイト）を計測します。
+
+    Args:
+        build: 計測対象を作る関数
+
+    Returns:
+        作成後に確保されたままのバイト数
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = build()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def run_memory_benchmark(history_rows: int, seed: int = 0) -> dict[str, Any]:
+    """
+    3通りの保持方法のメモリを計測します。
+
+    Args:
+        history_rows: 実績履歴の行数
+        seed: 乱数シード
+
+    Returns:
+        レポート（layouts: 保持方法 -> {bytes, bytes_per_row}）
+    """
+    rows = _rows(history_rows, seed)
+    layouts = {}
+    for layout in LAYOUTS:
+        size = measure(lambda layout=layout: _build(layout, rows))
+        layouts[layout] = {
+            "bytes": size,
+            "bytes_per_row": size / history_rows if history_rows else 0.0,
+        }
+    return {"history_rows": history_rows, "seed": seed, "layouts": layouts}
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """レポートを表形式の文字列にします。"""
+    baseline = report["layouts"]["plain"]["bytes"] or 1
+    lines = [
+        f"history rows: {report['history_rows']}",
+        f"{'layout':<10}{'MiB':>10}{'B/row':>10}{'vs plain':>10}",
+    ]
+    for layout, result in report["layouts"].items():
+        lines.append(
+            f"{layout:<10}{result['bytes'] / 2**20:>10.2f}"
+            f"{result['bytes_per_row']:>10.1f}{result['bytes'] / baseline:>10.0%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Dinner-Aide history memory benchmark")
+    parser.add_argument("--history-rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="レポートの JSON 出力先")
+    args = parser.parse_args(argv)
+
+    report = run_memory_benchmark(args.history_rows, args.seed)
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
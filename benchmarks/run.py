@@ -0,0 +1,377 @@
+"""
+オフラインベンチマーク
+
+フェイクの Notion / OpenAI / Slack に対して run_weekly_generation と
+run_daily_reminder を繰り返し実行し、スループット・レイテンシ（p50/p99）・
+API 呼び出し数をフローごとに集計します。
+
+実行方法:
+    python -m benchmarks.run --history-rows 10000 --backlog 500
+    python -m benchmarks.run --output after.json --compare before.json
+    python -m benchmarks.run --snapshot ./snapshot
+"""
+
+import argparse
+import json
+import logging
+import math
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from benchmarks.dataset import ANCHOR_DATE, BenchmarkDataset, build_dataset
+from benchmarks.fakes import (
+    DB_ID_PROPOSED,
+    DB_ID_RAW,
+    DB_ID_STRUCTURED,
+    CallRecorder,
+    FakeNotionClient,
+    FakeNotionStore,
+    FakeOpenAIClient,
+    FakeServiceConfig,
+    FakeServices,
+    FakeSlackWebhook,
+    fake_environment,
+)
+from src import resilience
+from src.notion_client import (
+    NotionRecord,
+    ProposedDish,
+    RawActualInput,
+    StructuredActualHistory,
+)
+from src.snapshot import TABLES, iter_snapshot, read_manifest
+
+FLOWS = ("weekly", "daily")
+
+
+@dataclass
+class BenchmarkConfig:
+    """ベンチマークの設定"""
+
+    history_rows: int = 10_000
+    backlog_records: int = 500
+    iterations: int = 3
+    seed: int = 0
+    notion: FakeServiceConfig = field(default_factory=FakeServiceConfig)
+    openai: FakeServiceConfig = field(default_factory=FakeServiceConfig)
+    slack: FakeServiceConfig = field(default_factory=FakeServiceConfig)
+    openai_per_item_latency_ms: float = 0.0
+    cassette: dict[str, str] | None = None
+    # export したスナップショットのディレクトリ（指定時は合成データの代わりに使う）
+    snapshot: str | None = None
+
+
+def _insert(store: FakeNotionStore, record: NotionRecord) -> None:
+    """レコードを Notion のプロパティ形式でフェイク Notion に投入する"""
+    day = {"date": {"start": record.date.isoformat()}}
+    if isinstance(record, StructuredActualHistory):
+        store.insert(
+            DB_ID_STRUCTURED,
+            {
+                "料理名": {"title": [{"text": {"content": record.dish_name}}]},
+                "日付": day,
+                "区分": {"multi_select": [{"name": record.category}]},
+            },
+        )
+    elif isinstance(record, RawActualInput):
+        store.insert(
+            DB_ID_RAW,
+            {
+                "食べたもの": {"title": [{"text": {"content": record.food_eaten}}]},
+                "日付": day,
+                "処理済み": {"checkbox": record.is_processed},
+            },
+        )
+    else:
+        shopping = record.shopping_list
+        store.insert(
+            DB_ID_PROPOSED,
+            {
+                "料理名": {"title": [{"text": {"content": record.dish_name}}]},
+                "日付": day,
+                "区分": {"multi_select": [{"name": record.category}]},
+                "ステータス": {"multi_select": [{"name": record.status}]},
+                "買い物リスト": {
+                    "rich_text": [{"text": {"content": shopping}}] if shopping else []
+                },
+            },
+        )
+
+
+def load_store(dataset: BenchmarkDataset) -> FakeNotionStore:
+    """データセットをフェイク Notion に投入する"""
+    store = FakeNotionStore()
+    for eaten, dish_name, category in dataset.history:
+        _insert(store, StructuredActualHistory(None, dish_name, eaten, category))
+    for eaten, food_eaten in dataset.raw_inputs:
+        _insert(store, RawActualInput(None, eaten, food_eaten))
+    for planned, dish_name, category, status in dataset.proposals:
+        _insert(store, ProposedDish(None, dish_name, planned, category, status))
+    return store
+
+
+def load_snapshot_store(snapshot_dir: str) -> FakeNotionStore:
+    """`python -m src.main export` のスナップショットをフェイク Notion に投入する"""
+    path = Path(snapshot_dir)
+    manifest = read_manifest(path)
+    store = FakeNotionStore()
+    for table in TABLES:
+        for record in iter_snapshot(path, table, manifest):
+            _insert(store, record)
+    return store
+
+
+def snapshot_anchor(snapshot_dir: str) -> date:
+    """スナップショットの最後の実績の日付（ベンチマークの基準日にする）"""
+    last = max(
+        (record.date for record in iter_snapshot(Path(snapshot_dir), "structured")),
+        default=None,
+    )
+    return last or ANCHOR_DATE
+
+
+def build_services(config: BenchmarkConfig, dataset: BenchmarkDataset) -> FakeServices:
+    """設定に従ってフェイクサービス一式を組み立てる"""
+    recorder = CallRecorder()
+    store = load_snapshot_store(config.snapshot) if config.snapshot else load_store(dataset)
+    return FakeServices(
+        store=store,
+        notion=FakeNotionClient(store, config.notion, recorder, seed=config.seed),
+        openai=FakeOpenAIClient(
+            config.openai,
+            recorder,
+            seed=config.seed,
+            per_item_latency_ms=config.openai_per_item_latency_ms,
+            cassette=config.cassette,
+        ),
+        slack=FakeSlackWebhook(config.slack, recorder, seed=config.seed),
+        recorder=recorder,
+    )
+
+
+def percentile(values: list[float], q: float) -> float:
+    """最近傍順位法によるパーセンタイル（q は 0〜100）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _flow_runner(flow: str, anchor: date = ANCHOR_DATE) -> Callable[[], int]:
+    from src.main import run_daily_reminder, run_weekly_generation
+
+    if flow == "weekly":
+        return lambda: run_weekly_generation(anchor)
+    # 日次は基準日の翌週月曜（確定済みの献立がある日）を対象にする
+    target = anchor + timedelta(days=2)
+    return lambda: run_daily_reminder(target)
+
+
+def run_flow(flow: str, config: BenchmarkConfig) -> dict[str, Any]:
+    """
+    1つのフローを指定回数実行して集計します。
+
+    各イテレーションはデータセットを新たに投入した状態から開始するため、
+    日次フローは毎回同じ量の未処理レコードを処理します。
+    """
+    dataset = build_dataset(
+        config.history_rows if not config.snapshot else 0,
+        config.backlog_records if not config.snapshot else 0,
+        seed=config.seed,
+    )
+    anchor = snapshot_anchor(config.snapshot) if config.snapshot else ANCHOR_DATE
+    durations: list[float] = []
+    exit_codes: list[int] = []
+    created = 0
+    calls: Counter[str] = Counter()
+    outcomes: Counter[str] = Counter()
+    call_latencies: dict[str, list[float]] = {}
+
+    for _ in range(config.iterations):
+        services = build_services(config, dataset)
+        before = {
+            db: services.store.count(db)
+            for db in (DB_ID_PROPOSED, DB_ID_STRUCTURED)
+        }
+        runner = _flow_runner(flow, anchor)
+        # 各イテレーションを1回の実行とみなし、リトライの予算とサーキットブレーカーを戻す
+        resilience.reset()
+
+        with fake_environment(services):
+            start = time.perf_counter()
+            exit_codes.append(runner())
+            durations.append(time.perf_counter() - start)
+
+        created += sum(
+            max(0, services.store.count(db) - count) for db, count in before.items()
+        )
+        for record in services.recorder.snapshot():
+            key = f"{record.service}.{record.method}"
+            calls[key] += 1
+            outcomes[f"{record.service}.{record.outcome}"] += 1
+            call_latencies.setdefault(record.service, []).append(record.duration)
+
+    total_seconds = sum(durations)
+    iterations = config.iterations
+    return {
+        "iterations": iterations,
+        "exit_codes": exit_codes,
+        "duration_p50_ms": percentile(durations, 50) * 1000,
+        "duration_p99_ms": percentile(durations, 99) * 1000,
+        "runs_per_second": iterations / total_seconds if total_seconds else 0.0,
+        "records_per_second": created / total_seconds if total_seconds else 0.0,
+        "records_created_per_run": created / iterations,
+        "api_calls_per_run": {
+            key: count / iterations for key, count in sorted(calls.items())
+        },
+        "api_outcomes_per_run": {
+            key: count / iterations for key, count in sorted(outcomes.items())
+        },
+        "api_latency_ms": {
+            service: {
+                "p50": percentile(values, 50) * 1000,
+                "p99": percentile(values, 99) * 1000,
+            }
+            for service, values in sorted(call_latencies.items())
+        },
+    }
+
+
+def run_benchmark(
+    config: BenchmarkConfig, flows: tuple[str, ...] = FLOWS
+) -> dict[str, Any]:
+    """全フローのベンチマークを実行し、レポートを返す"""
+    config_dict = asdict(config)
+    config_dict.pop("cassette")
+    return {
+        "config": config_dict,
+        "flows": {flow: run_flow(flow, config) for flow in flows},
+    }
+
+
+def format_report(report: dict[str, Any], baseline: dict[str, Any] | None = None) -> str:
+    """レポートを人間向けの表形式に整形する"""
+    lines = []
+    for flow, stats in report["flows"].items():
+        base = (baseline or {}).get("flows", {}).get(flow)
+        lines.append(f"== {flow} ({stats['iterations']} iterations)")
+        for key in (
+            "duration_p50_ms",
+            "duration_p99_ms",
+            "runs_per_second",
+            "records_per_second",
+        ):
+            line = f"  {key:<22} {stats[key]:12.2f}"
+            if base and base.get(key):
+                change = (stats[key] - base[key]) / base[key] * 100
+                line += f"  ({change:+.1f}% vs baseline {base[key]:.2f})"
+            lines.append(line)
+        lines.append("  api calls per run:")
+        for key, count in stats["api_calls_per_run"].items():
+            line = f"    {key:<34} {count:10.1f}"
+            if base:
+                line += f"  (baseline {base['api_calls_per_run'].get(key, 0):.1f})"
+            lines.append(line)
+        lines.append("  api outcomes per run:")
+        for key, count in stats["api_outcomes_per_run"].items():
+            lines.append(f"    {key:<34} {count:10.1f}")
+        lines.append("  api latency (ms):")
+        for service, latency in stats["api_latency_ms"].items():
+            lines.append(
+                f"    {service:<10} p50={latency['p50']:8.2f} p99={latency['p99']:8.2f}"
+            )
+    return "\n".join(lines)
+
+
+def _service_config(latency: float, jitter: float, rate_limit: float) -> FakeServiceConfig:
+    return FakeServiceConfig(
+        latency_ms=latency, jitter_ms=jitter, rate_limit_ratio=rate_limit
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Dinner-Aide offline benchmark")
+    parser.add_argument("--history-rows", type=int, default=10_000)
+    parser.add_argument("--backlog", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--flows", nargs="+", choices=FLOWS, default=list(FLOWS))
+    for service in ("notion", "openai", "slack"):
+        parser.add_argument(f"--{service}-latency-ms", type=float, default=0.0)
+        parser.add_argument(f"--{service}-jitter-ms", type=float, default=0.0)
+        parser.add_argument(
+            f"--{service}-rate-limit",
+            type=float,
+            default=0.0,
+            help="429 を返す確率（0.0〜1.0）",
+        )
+    parser.add_argument(
+        "--openai-per-item-latency-ms",
+        type=float,
+        default=0.0,
+        help="出力アイテム1件あたりの追加レイテンシ（出力トークン相当）",
+    )
+    parser.add_argument(
+        "--cassette", help="プロンプト -> レスポンス本文 の記録済み JSON"
+    )
+    parser.add_argument(
+        "--snapshot",
+        help="合成データの代わりに使うスナップショット（python -m src.main export の出力先）",
+    )
+    parser.add_argument("--output", help="レポートの JSON 出力先")
+    parser.add_argument("--compare", help="比較対象のレポート JSON")
+    parser.add_argument("--verbose", action="store_true", help="アプリのログを表示")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    cassette = None
+    if args.cassette:
+        with open(args.cassette, encoding="utf-8") as f:
+            cassette = json.load(f)
+
+    config = BenchmarkConfig(
+        history_rows=args.history_rows,
+        backlog_records=args.backlog,
+        iterations=args.iterations,
+        seed=args.seed,
+        notion=_service_config(
+            args.notion_latency_ms, args.notion_jitter_ms, args.notion_rate_limit
+        ),
+        openai=_service_config(
+            args.openai_latency_ms, args.openai_jitter_ms, args.openai_rate_limit
+        ),
+        slack=_service_config(
+            args.slack_latency_ms, args.slack_jitter_ms, args.slack_rate_limit
+        ),
+        openai_per_item_latency_ms=args.openai_per_item_latency_ms,
+        cassette=cassette,
+        snapshot=args.snapshot,
+    )
+
+    report = run_benchmark(config, tuple(args.flows))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(format_report(report, baseline))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
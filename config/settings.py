@@ -35,17 +35,63 @@ DB_ID_PROPOSED = os.getenv("DB_ID_PROPOSED", "")  # 提案メニューテーブ
 DB_ID_RAW = os.getenv("DB_ID_RAW", "")  # 実績入力テーブル
 DB_ID_STRUCTURED = os.getenv("DB_ID_STRUCTURED", "")  # 実績履歴テーブル
 
+# 一括書き込み時のリクエストレート（Notion APIの平均上限は 3 req/s）と並列数
+NOTION_WRITE_RATE = float(os.getenv("NOTION_WRITE_RATE", "3"))
+NOTION_WRITE_WORKERS = int(os.getenv("NOTION_WRITE_WORKERS", "4"))
+
+# 作成したページの冪等キーを記録する SQLite のパス。設定するとリトライ・再実行で
+# 同じ提案メニュー・実績履歴を作成しない（空なら記録しない）
+WRITE_INDEX_PATH = os.getenv("WRITE_INDEX_PATH", "")
+# 冪等キーを保存するテキストプロパティ名（提案メニュー・実績履歴テーブルに作成して非表示にする）。
+# 設定するとタイムアウトした作成も、作成済みかを確認してからリトライする（空なら保存しない）
+NOTION_IDEMPOTENCY_PROPERTY = os.getenv("NOTION_IDEMPOTENCY_PROPERTY", "")
+# 提案メニューの冪等キーに含める実行ID（空なら GITHUB_RUN_ID、それもなければ献立の週）
+RUN_ID = os.getenv("RUN_ID", "") or os.getenv("GITHUB_RUN_ID", "")
+
 # =============================================================================
 # OpenAI API Configuration
 # =============================================================================
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+# タスクごとに最初に使うモデル（空なら OPENAI_MODEL）。結果の確認に通らなかった
+# 場合だけ OPENAI_MODEL で依頼し直す
+OPENAI_STRUCTURE_MODEL = os.getenv("OPENAI_STRUCTURE_MODEL", "gpt-4o-mini")
+OPENAI_MENU_MODEL = os.getenv("OPENAI_MENU_MODEL", "")
+# 1回の依頼のタイムアウト（秒）。実行の締め切りが近い場合は残り時間で打ち切る
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+# 応答がこの秒数（通常時の p95 程度）を過ぎたら同じ依頼をもう1件送り、先に返った
+# 有効な応答を使う（0ならヘッジしない）
+OPENAI_HEDGE_AFTER_SECONDS = float(os.getenv("OPENAI_HEDGE_AFTER_SECONDS", "0"))
+
+# 実行全体の時間の予算（秒）。OpenAI への依頼は残り時間で打ち切る（0なら予算なし）
+RUN_BUDGET_SECONDS = float(os.getenv("RUN_BUDGET_SECONDS", "0"))
+
+# =============================================================================
+# API Resilience Configuration
+# =============================================================================
+
+# Notion / OpenAI の 429 / 5xx / タイムアウト / 接続エラー時の最大リトライ回数
+CLIENT_MAX_RETRIES = int(os.getenv("CLIENT_MAX_RETRIES", "3"))
+# 実行全体で全サービス合わせて許すリトライ回数
+RETRY_BUDGET_PER_RUN = int(os.getenv("RETRY_BUDGET_PER_RUN", "20"))
+# この回数続けて失敗したサービスへの呼び出しを、指定秒数のあいだ送らない（0なら止めない）
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
 
 # =============================================================================
 # Slack Configuration
 # =============================================================================
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL", "")
 
+# 429 / 5xx / 接続エラー時の最大リトライ回数と、一斉送信時の同時送信数
+SLACK_MAX_RETRIES = int(os.getenv("SLACK_MAX_RETRIES", "3"))
+SLACK_MAX_CONCURRENCY = int(os.getenv("SLACK_MAX_CONCURRENCY", "4"))
+
+# 通知アウトボックス（SQLite）のパス。設定すると通知はキュー経由で配信される（空なら即時送信）
+SLACK_OUTBOX_PATH = os.getenv("SLACK_OUTBOX_PATH", "")
+# 実行終了時にアウトボックスの配信を待つ最大秒数（残りは次回または deliver コマンドで配信）
+SLACK_OUTBOX_FLUSH_SECONDS = float(os.getenv("SLACK_OUTBOX_FLUSH_SECONDS", "5"))
+
 # =============================================================================
 # User Dietary Preferences (ユーザーの食事の好み・制限)
 # =============================================================================
@@ -84,6 +130,33 @@ WEEK_END_DAY = 6  # 日曜日
 # 過去の実績を何週間分参照するか
 HISTORY_WEEKS = 2
 
+# 献立生成のプロンプトに添える食事の傾向（メイン食材の頻度など）を何週間分で集計するか
+HISTORY_SUMMARY_WEEKS = 8
+
+# 献立をまずカタログ（実績履歴＋定番料理）の候補で埋め、残りの枠だけをAIに依頼するか
+MENU_CATALOG_ENABLED = os.getenv("MENU_CATALOG_ENABLED", "false").lower() == "true"
+# カタログ作成・頻度の評価に使う実績の週数
+CATALOG_HISTORY_WEEKS = int(os.getenv("CATALOG_HISTORY_WEEKS", "26"))
+
+# 日ごとの予定の指紋（SQLite）のパス。設定すると weekly の実行のたびに記録し、
+# weekly --incremental で前回から変わった日だけを作り直す（空なら記録しない）
+PLAN_STATE_PATH = os.getenv("PLAN_STATE_PATH", "")
+
+# 次週の献立の下書き（JSON）のパス。設定すると日次の実行で木曜以降に下書きを作り、
+# 週次の実行で検証して使う（空なら下書きを作らない）
+MENU_DRAFT_PATH = os.getenv("MENU_DRAFT_PATH", "")
+# 下書きを作り始める曜日（0: 月曜 〜 6: 日曜）
+MENU_DRAFT_FROM_WEEKDAY = int(os.getenv("MENU_DRAFT_FROM_WEEKDAY", "3"))
+
+# 献立を並列に生成する単位の日数。1〜2にすると数日ずつ並列にAIへ依頼し、
+# 結果をまとめて検証する（0なら1週分を1回で依頼する）
+MENU_PARALLEL_DAYS = int(os.getenv("MENU_PARALLEL_DAYS", "0"))
+# 並列に依頼する最大数
+MENU_PARALLEL_WORKERS = int(os.getenv("MENU_PARALLEL_WORKERS", "4"))
+
+# 生成した主菜を履歴の料理の近似重複とみなす類似度（0.0〜1.0）
+DISH_SIMILARITY_THRESHOLD = 0.6
+
 # 1日あたりの献立構成
 DAILY_MENU_STRUCTURE = {
     "主菜": 1,  # 1品
@@ -101,32 +174,48 @@ DISH_CATEGORIES = ["主菜", "副菜", "汁物", "その他"]
 # =============================================================================
 DISH_STATUSES = ["提案", "確定", "外食・予定あり"]
 
+# =============================================================================
+# Observability (トレーシング・メトリクス)
+# =============================================================================
+# --trace 指定時にスパンを書き出す OTLP/JSON ファイル
+TRACE_FILE = os.getenv("TRACE_FILE", "trace.json")
+
+# 実行終了時にメトリクスを書き出す Prometheus textfile（空なら書き出さない）
+# 例: /var/lib/node_exporter/textfile_collector/dinner_aide.prom
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")
+
 # =============================================================================
 # Validation
 # =============================================================================
-def validate_config() -> list[str]:
+def validate_config(services: list[str] | None = None) -> list[str]:
     """
     設定の妥当性を検証し、エラーメッセージのリストを返す。
     空リストが返れば設定は有効。
+
+    Args:
+        services: 検証対象のサービス（"notion", "openai", "slack"）。
+                  省略時は全サービスを検証します。
     """
+    targets = set(services) if services is not None else {"notion", "openai", "slack"}
     errors = []
 
-    if not NOTION_TOKEN:
-        errors.append("NOTION_TOKEN is not set")
+    if "notion" in targets:
+        if not NOTION_TOKEN:
+            errors.append("NOTION_TOKEN is not set")
 
-    if not DB_ID_PROPOSED:
-        errors.append("DB_ID_PROPOSED is not set")
+        if not DB_ID_PROPOSED:
+            errors.append("DB_ID_PROPOSED is not set")
 
-    if not DB_ID_RAW:
-        errors.append("DB_ID_RAW is not set")
+        if not DB_ID_RAW:
+            errors.append("DB_ID_RAW is not set")
 
-    if not DB_ID_STRUCTURED:
-        errors.append("DB_ID_STRUCTURED is not set")
+        if not DB_ID_STRUCTURED:
+            errors.append("DB_ID_STRUCTURED is not set")
 
-    if not OPENAI_API_KEY:
+    if "openai" in targets and not OPENAI_API_KEY:
         errors.append("OPENAI_API_KEY is not set")
 
-    if not SLACK_WEBHOOK_URL:
+    if "slack" in targets and not SLACK_WEBHOOK_URL:
         errors.append("SLACK_WEBHOOK_URL is not set")
 
     return errors
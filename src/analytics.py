@@ -0,0 +1,294 @@
+"""
+実績履歴の集計
+
+実績履歴を列指向の配列（日付は通日の整数、料理名・区分・メイン食材は
+コード化した整数）に読み込み、頻度・最後に食べた日・移動窓の集計を
+NumPy の配列演算で行います。「魚をどのくらい食べているか」
+「60日以上食べていない料理は何か」にレコードを1件ずつ走査せずに答えます。
+"""
+
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.history_index import DishRecord, main_ingredient_of
+from src.history_store import HistoryColumns
+from src.ingredients import fold
+
+# 集計の軸
+AXES = ("dish", "category", "main")
+
+# プロンプト用サマリーで「しばらく食べていない定番」とみなす日数と最少回数
+STALE_DAYS = 28
+STALE_MIN_COUNT = 2
+
+
+class _Labels:
+    """文字列 -> 整数コードの対応（同じ文字列は1つにまとめる）"""
+
+    def __init__(self, normalise=None):
+        self.names: list[str] = []
+        self._codes: dict[str, int] = {}
+        self._normalise = normalise
+
+    def code(self, name: str) -> int:
+        key = self._normalise(name) if self._normalise else name
+        code = self._codes.get(key)
+        if code is None:
+            code = len(self.names)
+            self._codes[key] = code
+            self.names.append(name)
+        return code
+
+
+class HistoryFrame:
+    """
+    実績履歴の列指向表現。
+    """
+
+    def __init__(
+        self,
+        days: np.ndarray,
+        codes: dict[str, np.ndarray],
+        labels: dict[str, list[str]],
+    ):
+        """
+        Args:
+            days: 日付（date.toordinal() の値）
+            codes: 軸（"dish", "category", "main"）ごとのコード列
+            labels: 軸ごとのコード -> 表示名
+        """
+        self.days = days
+        self._codes = codes
+        self._labels = labels
+
+    @classmethod
+    def from_records(cls, records: Iterable[DishRecord]) -> "HistoryFrame":
+        """
+        レコードから列を作ります。
+
+        Args:
+            records: StructuredActualHistory など（HistoryColumns なら
+                     料理名・区分の文字列表から変換し、レコードを作りません）
+
+        Returns:
+            列指向の実績履歴
+        """
+        if isinstance(records, HistoryColumns):
+            return cls._from_columns(records)
+
+        dishes = _Labels(fold)
+        categories = _Labels()
+        mains = _Labels()
+        days: list[int] = []
+        dish_codes: list[int] = []
+        category_codes: list[int] = []
+        main_codes: list[int] = []
+        for record in records:
+            days.append(record.date.toordinal())
+            dish_codes.append(dishes.code(record.dish_name))
+            category_codes.append(categories.code(record.category))
+            main_codes.append(mains.code(main_ingredient_of(record.dish_name) or ""))
+        return cls(
+            days=np.array(days, dtype=np.int32),
+            codes={
+                "dish": np.array(dish_codes, dtype=np.int32),
+                "category": np.array(category_codes, dtype=np.int32),
+                "main": np.array(main_codes, dtype=np.int32),
+            },
+            labels={"dish": dishes.names, "category": categories.names, "main": mains.names},
+        )
+
+    @classmethod
+    def _from_columns(cls, columns: HistoryColumns) -> "HistoryFrame":
+        dishes = _Labels(fold)
+        categories = _Labels()
+        mains = _Labels()
+        dish_map = np.array(
+            [dishes.code(name) for name in columns.dish_names], dtype=np.int32
+        )
+        main_map = np.array(
+            [mains.code(main_ingredient_of(name) or "") for name in columns.dish_names],
+            dtype=np.int32,
+        )
+        category_map = np.array(
+            [categories.code(name) for name in columns.categories], dtype=np.int32
+        )
+        dish_codes = np.asarray(columns.dish_codes, dtype=np.intp)
+        category_codes = np.asarray(columns.category_codes, dtype=np.intp)
+        return cls(
+            days=np.asarray(columns.days, dtype=np.int32),
+            codes={
+                "dish": dish_map[dish_codes],
+                "category": category_map[category_codes],
+                "main": main_map[dish_codes],
+            },
+            labels={"dish": dishes.names, "category": categories.names, "main": mains.names},
+        )
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def labels(self, by: str) -> list[str]:
+        """軸の表示名（コード順）を返します。"""
+        return self._labels[by]
+
+    def _mask(self, since: date | None, until: date | None) -> np.ndarray:
+        mask = np.ones(len(self.days), dtype=bool)
+        if since is not None:
+            mask &= self.days >= since.toordinal()
+        if until is not None:
+            mask &= self.days <= until.toordinal()
+        return mask
+
+    def frequency(
+        self, by: str = "dish", since: date | None = None, until: date | None = None
+    ) -> dict[str, int]:
+        """
+        期間内に食べた回数を多い順に返します。
+
+        Args:
+            by: 集計の軸（"dish", "category", "main"）
+            since: 開始日（含む）
+            until: 終了日（含む）
+
+        Returns:
+            表示名 -> 回数（0回と、メイン食材が不明なものは除く）
+        """
+        labels = self._labels[by]
+        counts = np.bincount(
+            self._codes[by][self._mask(since, until)], minlength=len(labels)
+        )
+        order = np.argsort(-counts, kind="stable")
+        return {labels[i]: int(counts[i]) for i in order if counts[i] and labels[i]}
+
+    def last_seen(self, by: str = "dish") -> dict[str, date]:
+        """
+        最後に食べた日を返します。
+
+        Args:
+            by: 集計の軸
+
+        Returns:
+            表示名 -> 最後に食べた日
+        """
+        labels = self._labels[by]
+        last = np.full(len(labels), -1, dtype=np.int64)
+        np.maximum.at(last, self._codes[by], self.days)
+        return {
+            labels[i]: date.fromordinal(int(day))
+            for i, day in enumerate(last)
+            if day >= 0 and labels[i]
+        }
+
+    def stale(
+        self, days: int, reference: date, by: str = "dish", min_count: int = 1
+    ) -> list[tuple[str, date]]:
+        """
+        days 日以上食べていないものを、最後に食べた日が古い順に返します。
+
+        Args:
+            days: 日数
+            reference: 基準日
+            by: 集計の軸
+            min_count: 対象とする最少回数（定番だけに絞る場合に指定）
+
+        Returns:
+            (表示名, 最後に食べた日) のリスト
+        """
+        labels = self._labels[by]
+        codes = self._codes[by]
+        last = np.full(len(labels), -1, dtype=np.int64)
+        np.maximum.at(last, codes, self.days)
+        counts = np.bincount(codes, minlength=len(labels))
+        selected = np.flatnonzero(
+            (last >= 0) & (last <= reference.toordinal() - days) & (counts >= min_count)
+        )
+        selected = selected[np.argsort(last[selected], kind="stable")]
+        return [
+            (labels[i], date.fromordinal(int(last[i]))) for i in selected if labels[i]
+        ]
+
+    def rolling_counts(
+        self, label: str, by: str = "main", window: int = 7,
+        start: date | None = None, end: date | None = None,
+    ) -> tuple[list[date], np.ndarray]:
+        """
+        日ごとに、その日で終わる window 日間に食べた回数を返します。
+
+        Args:
+            label: 対象の表示名（例: "魚"）
+            by: 集計の軸
+            window: 窓の日数
+            start: 最初の日（省略時は履歴の最初の日）
+            end: 最後の日（省略時は履歴の最後の日）
+
+        Returns:
+            (日付のリスト, 回数の配列)
+        """
+        if not len(self.days):
+            return [], np.array([], dtype=np.int64)
+        first = start.toordinal() if start else int(self.days.min())
+        last = end.toordinal() if end else int(self.days.max())
+        labels = self._labels[by]
+        if label not in labels or last < first:
+            span = max(last - first + 1, 0)
+            return [date.fromordinal(first + i) for i in range(span)], np.zeros(span, dtype=np.int64)
+
+        # 窓の分だけ前から数え始め、累積和の差で窓内の回数を求める
+        origin = first - window + 1
+        selected = (self._codes[by] == labels.index(label)) & (self.days >= origin) & (
+            self.days <= last
+        )
+        daily = np.bincount(self.days[selected] - origin, minlength=last - origin + 1)
+        cumulative = np.concatenate([[0], np.cumsum(daily)])
+        counts = cumulative[window:] - cumulative[:-window]
+        return [date.fromordinal(first + i) for i in range(len(counts))], counts
+
+    def category_balance(
+        self, since: date | None = None, until: date | None = None
+    ) -> dict[str, float]:
+        """
+        区分ごとの割合を返します。
+
+        Returns:
+            区分 -> 割合（0.0〜1.0、多い順）
+        """
+        counts = self.frequency("category", since, until)
+        total = sum(counts.values())
+        return {k: v / total for k, v in counts.items()} if total else {}
+
+    def summary(self, reference: date, weeks: int) -> str:
+        """
+        献立生成のプロンプト用に、直近の傾向を数行にまとめます。
+
+        Args:
+            reference: 基準日
+            weeks: 集計する週数
+
+        Returns:
+            サマリー（履歴がなければ空文字列）
+        """
+        since = reference - timedelta(weeks=weeks)
+        mains = self.frequency("main", since, reference)
+        if not mains:
+            return ""
+
+        lines = [
+            f"- メイン食材（直近{weeks}週）: "
+            + "、".join(f"{name} {count}回" for name, count in mains.items())
+        ]
+        balance = self.category_balance(since, reference)
+        if balance:
+            lines.append(
+                "- 区分の割合: "
+                + "、".join(f"{name} {share:.0%}" for name, share in balance.items())
+            )
+        stale = self.stale(STALE_DAYS, reference, min_count=STALE_MIN_COUNT)
+        if stale:
+            lines.append(
+                f"- しばらく食べていない定番（{STALE_DAYS}日以上）: "
+                + "、".join(f"{name}（{d.strftime('%m/%d')}）" for name, d in stale[:5])
+            )
+        return "\n".join(lines)
@@ -0,0 +1,176 @@
+"""
+献立候補のカタログ
+
+実績履歴と定番料理のコーパスから、区分・メイン食材・旬・調理時間を持つ
+料理カタログを作ります。週間献立はまずこのカタログから候補を組み立て、
+AIには埋められなかった枠だけを依頼します。
+"""
+
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from src.data_generator import DISH_CORPUS, season_of
+from src.history_index import DishRecord, main_ingredient_of
+from src.ingredients import fold
+
+SEASONS = ("春", "夏", "秋", "冬")
+
+# カタログに載せる区分（「その他」は外食などのため対象外）
+CATALOG_CATEGORIES = ("主菜", "副菜", "汁物")
+
+# 区分ごとの標準の調理時間（分）
+DEFAULT_COOK_MINUTES = {"主菜": 30, "副菜": 15, "汁物": 15}
+
+# 標準と異なる料理の調理時間（分）
+COOK_MINUTES: dict[str, int] = {
+    "鶏の唐揚げ": 35,
+    "アジフライ": 35,
+    "ハンバーグ": 35,
+    "肉じゃが": 40,
+    "カレーライス": 50,
+    "キムチ鍋": 25,
+    "サバの味噌煮": 25,
+    "揚げ出し豆腐": 25,
+    "きんぴらごぼう": 20,
+    "かぼちゃの煮物": 25,
+    "ひじきの煮物": 25,
+    "切り干し大根の煮物": 25,
+    "豚汁": 30,
+    "けんちん汁": 40,
+    "ミネストローネ": 30,
+    "冷奴": 5,
+    "きゅうりの浅漬け": 10,
+}
+
+# 履歴から旬を推定するのに必要な最少回数と、旬とみなす季節の割合
+_MIN_SEASON_SAMPLES = 4
+_SEASON_SHARE = 0.4
+
+
+@dataclass(frozen=True)
+class CatalogDish:
+    """カタログの料理"""
+
+    name: str
+    category: str  # 主菜/副菜/汁物
+    main_ingredient: str  # メイン食材（判定できなければ空）
+    seasons: tuple[str, ...]  # 旬の季節（空なら通年）
+    cook_minutes: int
+    shopping_list: str = ""
+    curated: bool = False  # 定番料理のコーパス由来か
+
+
+def cook_minutes_of(name: str, category: str) -> int:
+    """料理の調理時間（分）の目安を返します。"""
+    return COOK_MINUTES.get(name, DEFAULT_COOK_MINUTES.get(category, 30))
+
+
+def infer_seasons(dates: Iterable) -> tuple[str, ...]:
+    """
+    食べた日付から旬の季節を推定します。
+
+    Args:
+        dates: 食べた日付
+
+    Returns:
+        食べた回数の割合が大きい季節（回数が少ない、または通年なら空）
+    """
+    counts = Counter(season_of(d) for d in dates)
+    total = sum(counts.values())
+    if total < _MIN_SEASON_SAMPLES:
+        return ()
+    seasons = tuple(s for s in SEASONS if counts[s] / total >= _SEASON_SHARE)
+    return seasons if len(seasons) < len(SEASONS) else ()
+
+
+class DishCatalog:
+    """
+    料理カタログ。
+
+    同じ料理名（表記揺れは正規化して照合）は1件にまとめ、
+    コーパスの情報を履歴から推定した情報より優先します。
+    """
+
+    def __init__(self, dishes: Iterable[CatalogDish] = ()):
+        self._dishes: dict[str, CatalogDish] = {}
+        for dish in dishes:
+            self.add(dish)
+
+    @classmethod
+    def build(
+        cls, history: Iterable[DishRecord] = (), include_curated: bool = True
+    ) -> "DishCatalog":
+        """
+        実績履歴とコーパスからカタログを作ります。
+
+        Args:
+            history: 実績履歴（StructuredActualHistory など）
+            include_curated: 定番料理のコーパスを含めるか
+
+        Returns:
+            カタログ
+        """
+        catalog = cls()
+        if include_curated:
+            for dishes in DISH_CORPUS.values():
+                for corpus_dish in dishes:
+                    shopping_list = ", ".join(corpus_dish.ingredients)
+                    catalog.add(
+                        CatalogDish(
+                            name=corpus_dish.name,
+                            category=corpus_dish.category,
+                            main_ingredient=main_ingredient_of(corpus_dish.name, shopping_list)
+                            or corpus_dish.main_ingredient,
+                            seasons=corpus_dish.seasons,
+                            cook_minutes=cook_minutes_of(corpus_dish.name, corpus_dish.category),
+                            shopping_list=shopping_list,
+                            curated=True,
+                        )
+                    )
+
+        eaten: dict[str, list] = {}
+        first: dict[str, DishRecord] = {}
+        for record in history:
+            if record.category not in CATALOG_CATEGORIES:
+                continue
+            key = fold(record.dish_name)
+            eaten.setdefault(key, []).append(record.date)
+            first.setdefault(key, record)
+        for key, dates in eaten.items():
+            record = first[key]
+            catalog.add(
+                CatalogDish(
+                    name=record.dish_name,
+                    category=record.category,
+                    main_ingredient=main_ingredient_of(record.dish_name) or "",
+                    seasons=infer_seasons(dates),
+                    cook_minutes=cook_minutes_of(record.dish_name, record.category),
+                )
+            )
+        return catalog
+
+    def add(self, dish: CatalogDish) -> None:
+        """料理を追加します（同じ料理がコーパス由来なら上書きしません）。"""
+        key = fold(dish.name)
+        current = self._dishes.get(key)
+        if current is not None and current.curated and not dish.curated:
+            return
+        self._dishes[key] = dish
+
+    def get(self, name: str) -> CatalogDish | None:
+        """料理名で検索します。"""
+        return self._dishes.get(fold(name))
+
+    def by_category(self, category: str) -> list[CatalogDish]:
+        """区分の料理を名前順で返します。"""
+        return sorted(
+            (d for d in self._dishes.values() if d.category == category),
+            key=lambda d: d.name,
+        )
+
+    def __len__(self) -> int:
+        return len(self._dishes)
+
+    def __iter__(self) -> Iterator[CatalogDish]:
+        return iter(self._dishes.values())
@@ -14,6 +14,7 @@ from src.notion_client import NotionClientWrapper
 from src.openai_client import OpenAIClientWrapper
 from src.preprocessor import ActualDataPreprocessor
 from src.slack_client import SlackClientWrapper
+from src.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +57,7 @@ class DailyReminderSender:
         self.openai = openai_client or OpenAIClientWrapper()
         self.slack = slack_client or SlackClientWrapper()
 
+    @traced("daily.send_reminder")
     def send_reminder(self, target_date: date | None = None) -> DailyReminderResult:
         """
         日次リマインダーを送信します。
@@ -0,0 +1,326 @@
+"""
+合成データ生成器
+
+シード固定の料理コーパスから、複数年分の実績履歴・提案・実績入力を
+決定的に生成します。負荷試験・容量試験用のデータ投入に使用します。
+"""
+
+import json
+import logging
+import random
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+from src.notion_client import (
+    NotionRecord,
+    ProposedDish,
+    RawActualInput,
+    StructuredActualHistory,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CorpusDish:
+    """コーパスの料理"""
+
+    name: str
+    category: str  # 主菜/副菜/汁物
+    main_ingredient: str  # メイン食材（鶏肉/豚肉/牛肉/魚/豆腐/卵/野菜 など）
+    ingredients: tuple[str, ...]  # 買い物リスト用の食材
+    seasons: tuple[str, ...] = ()  # 旬の季節（空なら通年）
+
+
+def _dish(
+    name: str, category: str, main: str, ingredients: str, seasons: str = ""
+) -> CorpusDish:
+    return CorpusDish(
+        name=name,
+        category=category,
+        main_ingredient=main,
+        ingredients=tuple(ingredients.split("、")),
+        seasons=tuple(seasons.split("、")) if seasons else (),
+    )
+
+
+DISH_CORPUS: dict[str, list[CorpusDish]] = {
+    "主菜": [
+        _dish("鶏の唐揚げ", "主菜", "鶏肉", "鶏もも肉 300g、片栗粉、醤油、生姜"),
+        _dish("チキン南蛮", "主菜", "鶏肉", "鶏むね肉 300g、卵 2個、タルタルソース"),
+        _dish("鶏の照り焼き", "主菜", "鶏肉", "鶏もも肉 300g、醤油、みりん"),
+        _dish("親子丼", "主菜", "鶏肉", "鶏もも肉 200g、卵 3個、玉ねぎ 1個"),
+        _dish("豚の生姜焼き", "主菜", "豚肉", "豚ロース 300g、玉ねぎ 1個、生姜"),
+        _dish("回鍋肉", "主菜", "豚肉", "豚バラ肉 200g、キャベツ 1/4玉、ピーマン 2個", "春"),
+        _dish("麻婆豆腐", "主菜", "豚肉", "豚ひき肉 150g、木綿豆腐 1丁、長ねぎ"),
+        _dish("キムチ鍋", "主菜", "豚肉", "豚バラ肉 200g、白菜キムチ 200g、豆腐 1丁", "秋、冬"),
+        _dish("豚しゃぶサラダ", "主菜", "豚肉", "豚ロース 200g、レタス 1/2玉、トマト 1個", "夏"),
+        _dish("肉じゃが", "主菜", "牛肉", "牛こま切れ肉 200g、じゃがいも 3個、玉ねぎ 1個"),
+        _dish("カレーライス", "主菜", "牛肉", "牛こま切れ肉 250g、じゃがいも 2個、にんじん 1本"),
+        _dish("ハンバーグ", "主菜", "合いびき肉", "合いびき肉 300g、玉ねぎ 1個、卵 1個"),
+        _dish("すき焼き", "主菜", "牛肉", "牛薄切り肉 300g、白菜 1/4個、春菊 1束", "冬"),
+        _dish("鮭の塩焼き", "主菜", "魚", "生鮭 2切れ、大根 1/4本", "秋"),
+        _dish("サバの味噌煮", "主菜", "魚", "サバ 2切れ、生姜、味噌", "秋、冬"),
+        _dish("ぶりの照り焼き", "主菜", "魚", "ぶり 2切れ、醤油、みりん", "冬"),
+        _dish("アジフライ", "主菜", "魚", "アジ 4尾、パン粉、卵 1個", "夏"),
+        _dish("さんまの塩焼き", "主菜", "魚", "さんま 2尾、大根 1/4本、すだち", "秋"),
+        _dish("鰹のたたき", "主菜", "魚", "鰹 1さく、玉ねぎ 1/2個、にんにく", "春、夏"),
+        _dish("ゴーヤチャンプルー", "主菜", "豆腐", "ゴーヤ 1本、木綿豆腐 1丁、豚バラ肉 100g", "夏"),
+        _dish("揚げ出し豆腐", "主菜", "豆腐", "絹豆腐 1丁、片栗粉、大根 1/4本"),
+        _dish("オムライス", "主菜", "卵", "卵 4個、鶏もも肉 150g、玉ねぎ 1/2個"),
+    ],
+    "副菜": [
+        _dish("ほうれん草のおひたし", "副菜", "野菜", "ほうれん草 1束、かつお節", "冬"),
+        _dish("ポテトサラダ", "副菜", "野菜", "じゃがいも 2個、きゅうり 1本、マヨネーズ"),
+        _dish("きんぴらごぼう", "副菜", "野菜", "ごぼう 1本、にんじん 1/2本", "秋、冬"),
+        _dish("冷奴", "副菜", "豆腐", "絹豆腐 1丁、長ねぎ", "夏"),
+        _dish("ひじきの煮物", "副菜", "海藻", "ひじき 20g、にんじん 1/3本、油揚げ 1枚"),
+        _dish("小松菜の胡麻和え", "副菜", "野菜", "小松菜 1束、すりごま"),
+        _dish("トマトサラダ", "副菜", "野菜", "トマト 2個、玉ねぎ 1/4個", "夏"),
+        _dish("切り干し大根の煮物", "副菜", "野菜", "切り干し大根 30g、にんじん 1/3本"),
+        _dish("菜の花の辛子和え", "副菜", "野菜", "菜の花 1束、練り辛子", "春"),
+        _dish("なすの揚げびたし", "副菜", "野菜", "なす 3本、めんつゆ", "夏"),
+        _dish("かぼちゃの煮物", "副菜", "野菜", "かぼちゃ 1/4個、醤油、みりん", "秋"),
+        _dish("きゅうりの浅漬け", "副菜", "野菜", "きゅうり 2本、塩昆布", "夏"),
+    ],
+    "汁物": [
+        _dish("豆腐とわかめの味噌汁", "汁物", "豆腐", "豆腐 1/2丁、わかめ、味噌"),
+        _dish("豚汁", "汁物", "豚肉", "豚バラ肉 100g、大根 1/4本、にんじん 1/2本、味噌", "秋、冬"),
+        _dish("わかめスープ", "汁物", "海藻", "わかめ、長ねぎ、鶏がらスープの素"),
+        _dish("けんちん汁", "汁物", "野菜", "大根 1/4本、ごぼう 1/2本、里芋 3個", "冬"),
+        _dish("コーンスープ", "汁物", "野菜", "コーン缶 1缶、牛乳 300ml"),
+        _dish("なめこの味噌汁", "汁物", "きのこ", "なめこ 1袋、長ねぎ、味噌", "秋"),
+        _dish("あさりの味噌汁", "汁物", "魚介", "あさり 200g、長ねぎ、味噌", "春"),
+        _dish("ミネストローネ", "汁物", "野菜", "トマト缶 1缶、玉ねぎ 1/2個、キャベツ 1/8玉"),
+        _dish("冷や汁", "汁物", "魚", "アジの干物 1枚、きゅうり 1本、味噌", "夏"),
+        _dish("卵スープ", "汁物", "卵", "卵 2個、長ねぎ、鶏がらスープの素"),
+    ],
+}
+
+CATEGORY_BY_DISH: dict[str, str] = {
+    dish.name: dish.category
+    for dishes in DISH_CORPUS.values()
+    for dish in dishes
+}
+
+# 外食日の実績として記録される料理（区分は「その他」）
+EATING_OUT_DISHES = ["焼肉", "寿司", "ラーメン", "ピザ", "お好み焼き", "ファミレス"]
+
+DAILY_CATEGORIES = ("主菜", "副菜", "汁物")
+
+# 月 -> 季節
+_SEASON_BY_MONTH = {
+    1: "冬", 2: "冬", 3: "春", 4: "春", 5: "春", 6: "夏",
+    7: "夏", 8: "夏", 9: "秋", 10: "秋", 11: "秋", 12: "冬",
+}
+
+
+def season_of(target_date: date) -> str:
+    """日付から季節（春/夏/秋/冬）を返す"""
+    return _SEASON_BY_MONTH[target_date.month]
+
+
+@dataclass
+class SyntheticDataset:
+    """生成した合成データ"""
+
+    history: list[StructuredActualHistory]
+    proposals: list[ProposedDish]
+    raw_inputs: list[RawActualInput]
+
+    def records(self, tables: Iterable[str]) -> Iterator[NotionRecord]:
+        """指定テーブル（"structured", "proposed", "raw"）のレコードを順に返す"""
+        sources = {
+            "structured": self.history,
+            "proposed": self.proposals,
+            "raw": self.raw_inputs,
+        }
+        for table in tables:
+            yield from sources[table]
+
+    def count(self, tables: Iterable[str]) -> int:
+        """指定テーブルのレコード数"""
+        return sum(1 for _ in self.records(tables))
+
+
+class SyntheticDataGenerator:
+    """
+    合成データ生成器。
+
+    - 季節の料理を優先する
+    - 主菜のメイン食材を2日連続させない
+    - 直近1週間に食べた料理は選ばれにくくする
+    - 一定の割合で外食日を挟む
+    """
+
+    def __init__(self, seed: int = 0, eating_out_ratio: float = 0.08):
+        """
+        生成器を初期化します。
+
+        Args:
+            seed: 乱数シード
+            eating_out_ratio: 外食日の割合
+        """
+        self.seed = seed
+        self.eating_out_ratio = eating_out_ratio
+
+    def generate(
+        self, end_date: date, years: float, raw_backlog_days: int = 7
+    ) -> SyntheticDataset:
+        """
+        end_date までの years 年分のデータを生成します。
+
+        最後の raw_backlog_days 日分は未処理の実績入力のみとし、
+        それ以前の日は実績履歴・確定済みの提案・処理済みの実績入力を持ちます。
+
+        Args:
+            end_date: 最終日
+            years: 生成する年数
+            raw_backlog_days: 未処理のまま残す日数
+
+        Returns:
+            生成したデータセット
+        """
+        rng = random.Random(self.seed)
+        days = max(1, round(years * 365))
+        start_date = end_date - timedelta(days=days - 1)
+        backlog_start = end_date - timedelta(days=raw_backlog_days - 1)
+
+        history: list[StructuredActualHistory] = []
+        proposals: list[ProposedDish] = []
+        raw_inputs: list[RawActualInput] = []
+        last_eaten: dict[str, date] = {}
+        previous_main = ""
+
+        for offset in range(days):
+            current = start_date + timedelta(days=offset)
+            is_backlog = current >= backlog_start
+
+            if rng.random() < self.eating_out_ratio:
+                dish_name = rng.choice(EATING_OUT_DISHES)
+                previous_main = ""
+                raw_inputs.append(
+                    RawActualInput(
+                        id=None,
+                        date=current,
+                        food_eaten=f"外食（{dish_name}）",
+                        is_processed=not is_backlog,
+                    )
+                )
+                if not is_backlog:
+                    history.append(
+                        StructuredActualHistory(
+                            id=None, dish_name=dish_name, date=current, category="その他"
+                        )
+                    )
+                    proposals.append(
+                        ProposedDish(
+                            id=None,
+                            dish_name="外食",
+                            date=current,
+                            category="その他",
+                            status="外食・予定あり",
+                        )
+                    )
+                continue
+
+            day_dishes = [
+                self._pick(rng, category, current, last_eaten, previous_main)
+                for category in DAILY_CATEGORIES
+            ]
+            previous_main = day_dishes[0].main_ingredient
+            for dish in day_dishes:
+                last_eaten[dish.name] = current
+
+            raw_inputs.append(
+                RawActualInput(
+                    id=None,
+                    date=current,
+                    food_eaten="、".join(d.name for d in day_dishes),
+                    is_processed=not is_backlog,
+                )
+            )
+            if is_backlog:
+                continue
+
+            for dish in day_dishes:
+                history.append(
+                    StructuredActualHistory(
+                        id=None, dish_name=dish.name, date=current, category=dish.category
+                    )
+                )
+                proposals.append(
+                    ProposedDish(
+                        id=None,
+                        dish_name=dish.name,
+                        date=current,
+                        category=dish.category,
+                        status="確定",
+                        shopping_list=", ".join(dish.ingredients),
+                    )
+                )
+
+        return SyntheticDataset(
+            history=history, proposals=proposals, raw_inputs=raw_inputs
+        )
+
+    def _pick(
+        self,
+        rng: random.Random,
+        category: str,
+        current: date,
+        last_eaten: dict[str, date],
+        previous_main: str,
+    ) -> CorpusDish:
+        """季節・直近の実績・前日のメイン食材を考慮して1品選ぶ"""
+        season = season_of(current)
+        candidates = DISH_CORPUS[category]
+        weights = []
+        for dish in candidates:
+            weight = 1.0
+            if dish.seasons:
+                weight *= 3.0 if season in dish.seasons else 0.2
+            eaten = last_eaten.get(dish.name)
+            if eaten and (current - eaten).days <= 7:
+                weight *= 0.1
+            if category == "主菜" and dish.main_ingredient == previous_main:
+                weight = 0.0
+            weights.append(weight)
+        if not any(weights):
+            weights = [1.0] * len(candidates)
+        return rng.choices(candidates, weights=weights, k=1)[0]
+
+
+def write_local(
+    dataset: SyntheticDataset, output_dir: Path, tables: Iterable[str]
+) -> dict[str, int]:
+    """
+    合成データをローカルの JSONL ファイルに書き出します。
+
+    Args:
+        dataset: 書き出すデータセット
+        output_dir: 出力ディレクトリ（テーブルごとに <table>.jsonl を作成）
+        tables: 書き出すテーブル
+
+    Returns:
+        テーブルごとの書き出し件数
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for table in tables:
+        path = output_dir / f"{table}.jsonl"
+        count = 0
+        with path.open("w", encoding="utf-8") as f:
+            for record in dataset.records([table]):
+                row = {
+                    key: value.isoformat() if isinstance(value, date) else value
+                    for key, value in asdict(record).items()
+                    if key not in ("id", "last_edited", "idempotency_key")
+                }
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += 1
+        counts[table] = count
+        logger.info(f"Wrote {count} records to {path}")
+    return counts
@@ -0,0 +1,77 @@
+"""
+実行の締め切り
+
+コマンド全体の実行時間の予算（--budget / RUN_BUDGET_SECONDS）を締め切りとして
+contextvars で保持し、外部API呼び出しのタイムアウトを残り時間で打ち切ります。
+
+スレッドをまたぐ場合は、トレーシングと同じく contextvars.copy_context() で
+文脈を引き継いでください。
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 締め切り（time.monotonic() の値）。設定されていなければNone
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """実行の締め切りを過ぎた"""
+
+
+@contextmanager
+def deadline_scope(seconds: float | None) -> Iterator[None]:
+    """
+    ブロックの中の締め切りを設定します。
+
+    外側にもっと早い締め切りがある場合はそちらを優先します。
+
+    Args:
+        seconds: 今からの残り時間（None または 0 以下なら締め切りを設定しない）
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """
+    締め切りまでの残り時間（秒）を返します。
+
+    Returns:
+        残り時間（締め切りがなければNone、過ぎていれば0以下）
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def timeout_for(default: float) -> float:
+    """
+    1回の呼び出しのタイムアウトを、締め切りまでの残り時間で打ち切って返します。
+
+    Args:
+        default: 締め切りがない場合のタイムアウト（秒）
+
+    Returns:
+        タイムアウト（秒）
+
+    Raises:
+        DeadlineExceeded: 締め切りを過ぎている場合
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("run budget exhausted")
+    return min(default, left)
@@ -0,0 +1,246 @@
+"""
+料理名の類似検出
+
+「鶏の唐揚げ」と「唐揚げ」のような表記違いの同じ料理を、正規化した
+料理名の文字 2-gram の MinHash と LSH（Locality Sensitive Hashing）で
+検出します。問い合わせは同じバケットに入った候補だけを比較するため、
+履歴が増えても全件比較にはなりません。
+"""
+
+import random
+import re
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+
+from config.settings import DISH_SIMILARITY_THRESHOLD
+from src.history_index import DishRecord, main_ingredient_of
+from src.ingredients import fold
+
+# LSH のバンド数と1バンドあたりの行数（類似度0.6で約99%、0.2で約15%が候補になる）
+NUM_BANDS = 20
+ROWS_PER_BAND = 3
+
+# 重複を検出する区分（副菜・汁物は定番の繰り返しが多いため対象外）
+DUPLICATE_CHECK_CATEGORIES = ("主菜",)
+
+# 料理名の比較で無視する文字
+_NOISE = re.compile(r"[の・「」『』()\[\]【】]")
+
+# 2^61 - 1（メルセンヌ素数）
+_PRIME = (1 << 61) - 1
+
+
+def normalise(dish_name: str) -> str:
+    """
+    比較用に料理名を正規化します（NFKC・ひらがな化・助詞や括弧の除去）。
+
+    Args:
+        dish_name: 料理名
+
+    Returns:
+        正規化した料理名
+    """
+    return _NOISE.sub("", fold(dish_name))
+
+
+def shingles(key: str) -> frozenset[str]:
+    """正規化した料理名の文字 2-gram の集合（1文字ならその文字）。"""
+    if len(key) < 2:
+        return frozenset([key]) if key else frozenset()
+    return frozenset(key[i : i + 2] for i in range(len(key) - 1))
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """
+    2-gram 集合の類似度。
+
+    Jaccard 係数と包含率（小さい方の集合に対する共通部分の割合）の平均で、
+    「唐揚げ」⊂「鶏唐揚げ」のように一方が他方を含む名前を高めに評価します。
+    """
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    jaccard = common / len(a | b)
+    containment = common / min(len(a), len(b))
+    return (jaccard + containment) / 2
+
+
+class MinHasher:
+    """2-gram 集合の MinHash 署名を計算します。"""
+
+    def __init__(self, num_perm: int = NUM_BANDS * ROWS_PER_BAND, seed: int = 1):
+        rng = random.Random(seed)
+        self._params = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)
+        ]
+
+    def signature(self, grams: frozenset[str]) -> tuple[int, ...]:
+        """
+        署名を計算します。
+
+        Args:
+            grams: 2-gram 集合（空でないこと）
+
+        Returns:
+            ハッシュ関数ごとの最小値
+        """
+        hashes = [zlib.crc32(g.encode("utf-8")) for g in grams]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._params)
+
+
+@dataclass
+class _Entry:
+    dish_name: str
+    grams: frozenset[str]
+    main: str | None
+    last_date: date | None
+
+
+@dataclass
+class SimilarDish:
+    """類似する既存の料理"""
+
+    dish_name: str
+    similarity: float
+    date: date | None  # 最後に食べた（予定の）日
+
+
+@dataclass
+class NearDuplicate:
+    """生成した献立と類似する料理"""
+
+    date: date
+    dish_name: str
+    similar: SimilarDish
+
+    @property
+    def message(self) -> str:
+        when = f"（{self.similar.date.strftime('%m/%d')}）" if self.similar.date else ""
+        return (
+            f"{self.date.strftime('%m/%d')} {self.dish_name}: "
+            f"最近の「{self.similar.dish_name}」{when}と似ています"
+            f"（類似度 {self.similar.similarity:.2f}）"
+        )
+
+
+class DishSimilarityIndex:
+    """
+    料理名の近似重複を検出する LSH インデックス。
+    """
+
+    def __init__(
+        self,
+        threshold: float = DISH_SIMILARITY_THRESHOLD,
+        bands: int = NUM_BANDS,
+        rows: int = ROWS_PER_BAND,
+    ):
+        """
+        インデックスを初期化します。
+
+        Args:
+            threshold: 近似重複とみなす類似度の下限
+            bands: LSH のバンド数
+            rows: 1バンドあたりの行数
+        """
+        self.threshold = threshold
+        self._rows = rows
+        self._hasher = MinHasher(bands * rows)
+        self._entries: dict[str, _Entry] = {}
+        self._buckets: dict[tuple[int, tuple[int, ...]], set[str]] = {}
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[DishRecord], threshold: float = DISH_SIMILARITY_THRESHOLD
+    ) -> "DishSimilarityIndex":
+        """レコードからインデックスを作ります。"""
+        index = cls(threshold=threshold)
+        for record in records:
+            index.add(record.dish_name, record.date)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, dish_name: str, day: date | None = None) -> None:
+        """
+        料理名を追加します。同じ料理名は最後の日付だけを更新します。
+
+        Args:
+            dish_name: 料理名
+            day: 食べた（予定の）日
+        """
+        key = normalise(dish_name)
+        if not key:
+            return
+        entry = self._entries.get(key)
+        if entry is not None:
+            if day and (entry.last_date is None or day > entry.last_date):
+                entry.last_date = day
+            return
+
+        grams = shingles(key)
+        self._entries[key] = _Entry(dish_name, grams, main_ingredient_of(dish_name), day)
+        for band in self._bands(grams):
+            self._buckets.setdefault(band, set()).add(key)
+
+    def query(self, dish_name: str) -> SimilarDish | None:
+        """
+        最も類似する登録済みの料理を返します。
+
+        Args:
+            dish_name: 料理名
+
+        Returns:
+            類似度が閾値以上の料理（なければNone）。メイン食材が
+            異なると判定できる料理（豚の生姜焼きと鶏の生姜焼きなど）は除きます。
+        """
+        key = normalise(dish_name)
+        if not key:
+            return None
+        exact = self._entries.get(key)
+        if exact is not None:
+            return SimilarDish(exact.dish_name, 1.0, exact.last_date)
+
+        grams = shingles(key)
+        main = main_ingredient_of(dish_name)
+        candidates: set[str] = set()
+        for band in self._bands(grams):
+            candidates |= self._buckets.get(band, set())
+
+        best: SimilarDish | None = None
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            if main and entry.main and main != entry.main:
+                continue
+            score = similarity(grams, entry.grams)
+            if score >= self.threshold and (best is None or score > best.similarity):
+                best = SimilarDish(entry.dish_name, score, entry.last_date)
+        return best
+
+    def check(self, records: Iterable[DishRecord]) -> list[NearDuplicate]:
+        """
+        献立を日付順に検証しながら追加します（同じ週の中での重複も検出）。
+
+        Args:
+            records: 検証する献立（GeneratedMenuItem など）
+
+        Returns:
+            既存の料理と近似重複する献立のリスト
+        """
+        duplicates = []
+        for record in sorted(records, key=lambda r: r.date):
+            if record.category in DUPLICATE_CHECK_CATEGORIES:
+                similar = self.query(record.dish_name)
+                if similar:
+                    duplicates.append(NearDuplicate(record.date, record.dish_name, similar))
+            self.add(record.dish_name, record.date)
+        return duplicates
+
+    def _bands(self, grams: frozenset[str]) -> list[tuple[int, tuple[int, ...]]]:
+        signature = self._hasher.signature(grams)
+        return [
+            (i, signature[start : start + self._rows])
+            for i, start in enumerate(range(0, len(signature), self._rows))
+        ]
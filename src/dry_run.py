@@ -0,0 +1,285 @@
+"""
+ドライラン（書き込みなしの実行計画）
+
+weekly / daily を --dry-run で実行すると、Notion の読み取りと献立・構造化の計算
+（OpenAI への依頼を含む）はそのまま行い、書き込みは実行せずに計画として記録します。
+
+- Notion: 作成・更新・アーカイブを記録し、以降の読み取りに反映します
+  （アーカイブしたはずの提案は返さず、作成したはずの提案・履歴は返す）。
+- Slack: 送信する JSON をそのまま記録します。
+- ローカルの状態（差分生成の指紋・献立の下書き）: 保存・削除を記録します。
+
+記録した計画は JSON で出力し、本番データでの生成結果の確認や差分の比較に使います。
+"""
+
+import itertools
+import json
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any
+
+from src.history_store import HistoryColumns
+from src.notion_client import (
+    BulkWriteResult,
+    NotionClientWrapper,
+    NotionRecord,
+    ProposedDish,
+    RawActualInput,
+    StructuredActualHistory,
+)
+
+# 計画に表示するテーブル名
+TABLE_NAMES = {
+    ProposedDish: "Proposed_Dishes",
+    RawActualInput: "Raw_Actual_Input",
+    StructuredActualHistory: "Structured_Actual_History",
+}
+
+# 書き込みを伴わないため、そのまま元のクライアントに委譲する属性
+READ_ONLY_ATTRIBUTES = frozenset(
+    {
+        "db_proposed",
+        "db_raw",
+        "db_structured",
+        "get_database_url",
+        "get_proposed_database_url",
+        "get_raw_input_database_url",
+        "test_connection",
+    }
+)
+
+
+@dataclass
+class DryRunPlan:
+    """ドライランで記録した書き込みの計画"""
+
+    command: str
+    operations: list[dict[str, Any]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, service: str, action: str, **details: Any) -> None:
+        """
+        書き込みを1件記録します。
+
+        Args:
+            service: 書き込み先（"notion" / "slack" / "local"）
+            action: 操作（"create" / "update" / "archive" / "post" / "save" / "clear"）
+            **details: 操作の内容
+        """
+        with self._lock:
+            self.operations.append({"service": service, "action": action, **details})
+
+    def enqueue(
+        self, webhook_url: str, payload: dict[str, Any], dedup_key: str | None = None
+    ) -> bool:
+        """Slack の送信を記録します（通知アウトボックスの代わりに使います）。"""
+        self.add("slack", "post", payload=payload)
+        return True
+
+    def summary(self) -> dict[str, int]:
+        """操作ごとの件数（"notion.create" など）"""
+        counts: dict[str, int] = {}
+        for op in self.operations:
+            key = f"{op['service']}.{op['action']}"
+            counts[key] = counts.get(key, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def to_json(self) -> str:
+        """計画を JSON 文字列に変換します。"""
+        return json.dumps(
+            {
+                "command": self.command,
+                "summary": self.summary(),
+                "operations": self.operations,
+            },
+            ensure_ascii=False,
+            indent=2,
+            default=str,
+        )
+
+
+class DryRunNotion:
+    """
+    書き込みを記録するだけの NotionClientWrapper。
+
+    読み取りは元のクライアントに任せ、記録した書き込みを結果に反映します。
+    ここで定義していないメソッドは READ_ONLY_ATTRIBUTES のものだけを委譲し、
+    それ以外（書き込みの可能性があるもの）は AttributeError にします。
+    """
+
+    def __init__(self, notion: NotionClientWrapper, plan: DryRunPlan):
+        """
+        Args:
+            notion: 読み取りに使うクライアント
+            plan: 書き込みを記録する計画
+        """
+        self._notion = notion
+        self._plan = plan
+        self._ids = itertools.count(1)
+        self._created: list[NotionRecord] = []
+        self._archived: set[str] = set()
+        self._processed: set[str] = set()
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in READ_ONLY_ATTRIBUTES:
+            raise AttributeError(f"{name} is not available in a dry run")
+        return getattr(self._notion, name)
+
+    # 読み取り（記録した書き込みを反映）
+
+    def get_proposed_dishes_by_date_range(
+        self, start_date: date, end_date: date
+    ) -> list[ProposedDish]:
+        """提案メニューを取得します（アーカイブ・作成の予定を反映）。"""
+        dishes = self._notion.get_proposed_dishes_by_date_range(start_date, end_date)
+        return self._overlay(dishes, ProposedDish, start_date, end_date)
+
+    def get_proposed_dishes_by_date(self, target_date: date) -> list[ProposedDish]:
+        """指定日の提案メニューを取得します（アーカイブ・作成の予定を反映）。"""
+        dishes = self._notion.get_proposed_dishes_by_date(target_date)
+        return self._overlay(dishes, ProposedDish, target_date, target_date)
+
+    def get_structured_history_by_date_range(
+        self, start_date: date, end_date: date
+    ) -> list[StructuredActualHistory]:
+        """実績履歴を取得します（作成の予定を反映）。"""
+        history = self._notion.get_structured_history_by_date_range(start_date, end_date)
+        return self._overlay(history, StructuredActualHistory, start_date, end_date)
+
+    def get_structured_history_columns(
+        self, start_date: date, end_date: date
+    ) -> HistoryColumns:
+        """実績履歴を列に詰めた形で取得します（作成の予定を反映）。"""
+        history = self._notion.get_structured_history_columns(start_date, end_date)
+        created = self._overlay([], StructuredActualHistory, start_date, end_date)
+        # 元の列と同じく日付の新しい順にする
+        created.sort(key=lambda r: r.date, reverse=True)
+        return HistoryColumns.from_records([*created, *history])
+
+    def get_unprocessed_raw_inputs(self) -> list[RawActualInput]:
+        """未処理の実績入力を取得します（処理済みにする予定のものを除く）。"""
+        return [
+            raw
+            for raw in self._notion.get_unprocessed_raw_inputs()
+            if raw.id not in self._processed
+        ]
+
+    def _overlay(
+        self, records: list, record_type: type, start_date: date, end_date: date
+    ) -> list:
+        kept = [r for r in records if r.id not in self._archived]
+        created = [
+            r
+            for r in self._created
+            if isinstance(r, record_type) and start_date <= r.date <= end_date
+        ]
+        return kept + created
+
+    # 書き込み（記録のみ）
+
+    def create_proposed_dish(self, dish: ProposedDish) -> str:
+        """提案メニューの作成を記録します。"""
+        return self._record_create(dish)
+
+    def create_structured_history(self, history: StructuredActualHistory) -> str:
+        """実績履歴の作成を記録します。"""
+        return self._record_create(history)
+
+    def bulk_create(self, records: Iterable[NotionRecord], **kwargs: Any) -> BulkWriteResult:
+        """複数のレコードの作成を記録します。"""
+        result = BulkWriteResult()
+        for record in records:
+            record.id = self._record_create(record)
+            result.created += 1
+        return result
+
+    def update_proposed_dish_status(self, page_id: str, new_status: str) -> None:
+        """提案メニューのステータス変更を記録します。"""
+        self._plan.add(
+            "notion",
+            "update",
+            table=TABLE_NAMES[ProposedDish],
+            page_id=page_id,
+            properties={"ステータス": {"multi_select": [{"name": new_status}]}},
+        )
+
+    def mark_raw_input_as_processed(self, page_id: str) -> None:
+        """実績入力を処理済みにする更新を記録します。"""
+        self._processed.add(page_id)
+        self._plan.add(
+            "notion",
+            "update",
+            table=TABLE_NAMES[RawActualInput],
+            page_id=page_id,
+            properties={"処理済み": {"checkbox": True}},
+        )
+
+    def delete_proposed_dishes_by_date_range(
+        self, start_date: date, end_date: date, status_filter: str = "提案"
+    ) -> tuple[int, int]:
+        """指定した日付範囲・ステータスの提案メニューのアーカイブを記録します。"""
+        dishes = self.get_proposed_dishes_by_date_range(start_date, end_date)
+        return self.delete_proposed_dishes([d for d in dishes if d.status == status_filter])
+
+    def delete_proposed_dishes(self, dishes: Iterable[ProposedDish]) -> tuple[int, int]:
+        """提案メニューのアーカイブを記録します。"""
+        archived = 0
+        for dish in dishes:
+            if not dish.id:
+                continue
+            self._archived.add(dish.id)
+            self._plan.add(
+                "notion",
+                "archive",
+                table=TABLE_NAMES[ProposedDish],
+                page_id=dish.id,
+                dish_name=dish.dish_name,
+                date=dish.date,
+            )
+            archived += 1
+        return archived, 0
+
+    def _record_create(self, record: NotionRecord) -> str:
+        database_id, properties = self._notion._build_create_request(record)
+        page_id = f"dry-run-{next(self._ids)}"
+        self._created.append(record)
+        self._plan.add(
+            "notion",
+            "create",
+            table=TABLE_NAMES[type(record)],
+            database_id=database_id,
+            page_id=page_id,
+            properties=properties,
+        )
+        return page_id
+
+
+class DryRunStore:
+    """
+    保存・削除を記録するだけのローカルの状態（PlanStateStore / DraftCache）。
+    """
+
+    def __init__(self, store: Any, name: str, plan: DryRunPlan):
+        """
+        Args:
+            store: 読み取りに使う元のストア
+            name: 計画に表示する名前（"plan_state" / "menu_draft"）
+            plan: 書き込みを記録する計画
+        """
+        self._store = store
+        self._name = name
+        self._plan = plan
+
+    def load(self, *args: Any, **kwargs: Any) -> Any:
+        """元のストアから読み込みます。"""
+        return self._store.load(*args, **kwargs)
+
+    def save(self, value: Any) -> None:
+        """保存を記録します。"""
+        self._plan.add("local", "save", target=self._name, path=str(self._store.path))
+
+    def clear(self) -> None:
+        """削除を記録します。"""
+        self._plan.add("local", "clear", target=self._name, path=str(self._store.path))
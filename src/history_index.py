@@ -0,0 +1,260 @@
+"""
+食事履歴の転置インデックス
+
+実績履歴・提案メニューから「料理名 → 日付」「メイン食材 → 日付」の索引を
+作ります。「豚肉を最後に食べたのはいつか」「前日の主菜と同じメイン食材か」を
+履歴のリストを走査せずに定数時間で答えられるため、献立の検証や
+候補の絞り込みで何度問い合わせても履歴の長さに比例した時間はかかりません。
+
+索引はレコードを1件ずつ追加して育てるため、保存した献立をその場で
+追加して続きの検証に使えます。
+"""
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Protocol
+
+from src.ingredients import fold, parse_ingredient, split_shopping_list
+
+# メイン食材 -> 料理名・食材名に含まれるキーワード（上から順に評価）
+MAIN_INGREDIENTS: dict[str, tuple[str, ...]] = {
+    "ひき肉": (
+        "ひき肉", "挽き肉", "挽肉", "ミンチ", "ハンバーグ", "そぼろ", "餃子",
+        "ぎょうざ", "麻婆", "ミートソース", "メンチ",
+    ),
+    "鶏肉": (
+        "鶏", "とり肉", "チキン", "ささみ", "手羽", "親子丼", "焼き鳥",
+        "唐揚げ", "から揚げ", "からあげ",
+    ),
+    "豚肉": (
+        "豚", "ポーク", "生姜焼き", "しょうが焼き", "とんかつ", "角煮",
+        "ベーコン", "回鍋肉",
+    ),
+    "牛肉": ("牛", "ビーフ", "すき焼き", "プルコギ"),
+    "魚": (
+        "鮭", "さけ", "サーモン", "さば", "鯖", "ぶり", "鰤", "たら", "鱈",
+        "あじ", "鯵", "いわし", "鰯", "さんま", "秋刀魚", "かじき", "まぐろ",
+        "鮪", "かつお", "鰹", "刺身", "魚",
+    ),
+    "魚介": ("えび", "海老", "いか", "たこ", "あさり", "ほたて", "帆立", "牡蠣"),
+    "卵": ("卵", "玉子", "たまご", "オムレツ", "オムライス"),
+    "豆腐": ("豆腐", "厚揚げ", "油揚げ"),
+}
+
+# キーワードに一致してもメイン食材ではない表記（判定前に取り除く）
+_NOT_MAIN = ("牛乳", "鶏がら", "鶏ガラ")
+
+# 連続を避ける対象の区分
+ROTATION_CATEGORIES = ("主菜",)
+
+# 買い物リストからメイン食材を推定するときに見る売り場
+_MAIN_SECTIONS = ("精肉", "鮮魚")
+
+_MAIN_PATTERNS = [
+    (re.compile("|".join(re.escape(fold(k)) for k in sorted(keys, key=len, reverse=True))), name)
+    for name, keys in MAIN_INGREDIENTS.items()
+]
+_NOT_MAIN_PATTERN = re.compile("|".join(re.escape(fold(k)) for k in _NOT_MAIN))
+
+
+class DishRecord(Protocol):
+    """索引に追加できるレコード（StructuredActualHistory / ProposedDish など）"""
+
+    date: date
+    dish_name: str
+    category: str
+
+
+def _match_main(text: str) -> str | None:
+    key = _NOT_MAIN_PATTERN.sub("", fold(text))
+    for pattern, name in _MAIN_PATTERNS:
+        if pattern.search(key):
+            return name
+    return None
+
+
+@lru_cache(maxsize=4096)
+def main_ingredient_of(dish_name: str, shopping_list: str = "") -> str | None:
+    """
+    料理のメイン食材を推定します。
+
+    料理名から判定し、判定できなければ買い物リストの精肉・鮮魚の食材から
+    判定します。
+
+    Args:
+        dish_name: 料理名
+        shopping_list: 買い物リスト（カンマ区切り）
+
+    Returns:
+        メイン食材（「鶏肉」「豚肉」「魚」など。判定できなければNone）
+    """
+    main = _match_main(dish_name)
+    if main or not shopping_list:
+        return main
+    for part in split_shopping_list(shopping_list):
+        ingredient = parse_ingredient(part)
+        if ingredient and ingredient.section in _MAIN_SECTIONS:
+            main = _match_main(ingredient.name)
+            if main:
+                return main
+    return None
+
+
+@dataclass
+class RotationViolation:
+    """メイン食材の連続"""
+
+    date: date
+    dish_name: str
+    ingredient: str
+    conflict_date: date  # 同じメイン食材の主菜がある隣の日
+
+    @property
+    def message(self) -> str:
+        return (
+            f"{self.date.strftime('%m/%d')} {self.dish_name}: "
+            f"{self.ingredient}が{self.conflict_date.strftime('%m/%d')}の主菜と連続しています"
+        )
+
+
+class HistoryIndex:
+    """
+    料理名・メイン食材から食べた日付を引く転置インデックス。
+
+    最終日は追加時に更新して保持するため、last_eaten() / last_served() /
+    rotation_conflict() は履歴の件数に関係なく定数時間です。
+    """
+
+    def __init__(self) -> None:
+        self._dish_dates: dict[str, list[date]] = {}
+        self._ingredient_dates: dict[str, list[date]] = {}
+        self._last_dish: dict[str, date] = {}
+        self._last_ingredient: dict[str, date] = {}
+        # 日付 -> その日の主菜のメイン食材
+        self._mains_by_date: dict[date, set[str]] = {}
+        self._seen: set[tuple[date, str]] = set()
+
+    @classmethod
+    def from_records(cls, records: Iterable[DishRecord]) -> "HistoryIndex":
+        """レコードから索引を作ります。"""
+        index = cls()
+        index.add_all(records)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(
+        self, day: date, dish_name: str, category: str = "", shopping_list: str = ""
+    ) -> str | None:
+        """
+        料理を1件追加します。同じ日・同じ料理名の重複は無視します。
+
+        Args:
+            day: 食べた日（予定日）
+            dish_name: 料理名
+            category: 区分
+            shopping_list: 買い物リスト（メイン食材の推定に使用）
+
+        Returns:
+            推定したメイン食材（判定できなければNone）
+        """
+        key = fold(dish_name)
+        main = main_ingredient_of(dish_name, shopping_list)
+        if not key or (day, key) in self._seen:
+            return main
+        self._seen.add((day, key))
+
+        self._dish_dates.setdefault(key, []).append(day)
+        if day > self._last_dish.get(key, date.min):
+            self._last_dish[key] = day
+
+        if main:
+            self._ingredient_dates.setdefault(main, []).append(day)
+            if day > self._last_ingredient.get(main, date.min):
+                self._last_ingredient[main] = day
+            if category in ROTATION_CATEGORIES:
+                self._mains_by_date.setdefault(day, set()).add(main)
+        return main
+
+    def add_all(self, records: Iterable[DishRecord]) -> None:
+        """
+        レコードをまとめて追加します。
+
+        Args:
+            records: StructuredActualHistory / ProposedDish / GeneratedMenuItem など
+        """
+        for record in records:
+            self.add(
+                record.date,
+                record.dish_name,
+                record.category,
+                getattr(record, "shopping_list", ""),
+            )
+
+    def last_eaten(self, ingredient: str) -> date | None:
+        """メイン食材を最後に食べた日を返します（なければNone）。"""
+        return self._last_ingredient.get(ingredient)
+
+    def last_served(self, dish_name: str) -> date | None:
+        """料理を最後に食べた日を返します（表記揺れは正規化して照合）。"""
+        return self._last_dish.get(fold(dish_name))
+
+    def count_served(self, dish_name: str) -> int:
+        """料理を食べた回数を返します。"""
+        return len(self._dish_dates.get(fold(dish_name), ()))
+
+    def recently_served(self, dish_name: str, since: date) -> bool:
+        """since 以降に同じ料理を食べたかを返します。"""
+        last = self.last_served(dish_name)
+        return last is not None and last >= since
+
+    def dates_of(self, ingredient: str) -> list[date]:
+        """メイン食材を食べた日付を昇順で返します。"""
+        return sorted(self._ingredient_dates.get(ingredient, []))
+
+    def main_ingredients_on(self, day: date) -> set[str]:
+        """その日の主菜のメイン食材を返します。"""
+        return set(self._mains_by_date.get(day, ()))
+
+    def rotation_conflict(self, day: date, ingredient: str) -> date | None:
+        """
+        前日・翌日の主菜に同じメイン食材があるかを調べます。
+
+        Args:
+            day: 対象日
+            ingredient: メイン食材
+
+        Returns:
+            同じメイン食材の主菜がある日（なければNone）
+        """
+        for neighbour in (day - timedelta(days=1), day + timedelta(days=1)):
+            if ingredient in self._mains_by_date.get(neighbour, ()):
+                return neighbour
+        return None
+
+    def check(self, records: Iterable[DishRecord]) -> list[RotationViolation]:
+        """
+        献立を日付順に検証しながら索引に追加します。
+
+        Args:
+            records: 検証する献立（GeneratedMenuItem など）
+
+        Returns:
+            メイン食材が前後の日の主菜と連続している献立のリスト
+        """
+        violations = []
+        for record in sorted(records, key=lambda r: r.date):
+            shopping_list = getattr(record, "shopping_list", "")
+            if record.category in ROTATION_CATEGORIES:
+                main = main_ingredient_of(record.dish_name, shopping_list)
+                conflict = main and self.rotation_conflict(record.date, main)
+                if conflict:
+                    violations.append(
+                        RotationViolation(record.date, record.dish_name, main, conflict)
+                    )
+            self.add(record.date, record.dish_name, record.category, shopping_list)
+        return violations
@@ -0,0 +1,148 @@
+"""
+実績履歴のコンパクトな保持
+
+実績履歴を StructuredActualHistory のリストで持つと、1件ごとにレコード・
+date・ページIDの文字列が作られ、同じ料理名もページごとに別の文字列になります。
+HistoryColumns は日付を通日の整数、料理名・区分を重複なく持つ文字列表の
+コード、ページIDを16バイトの値として array に詰めて保持し、レコードは
+読み出すときに作ります。何年分の履歴でもリストの数分の1のメモリで済みます。
+"""
+
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date
+from uuid import UUID
+
+from src.notion_client import StructuredActualHistory
+
+# ページIDがないレコードの値
+_NO_ID = bytes(16)
+
+
+class _Strings:
+    """文字列 -> 整数コードの対応（同じ文字列は1つだけ持つ）"""
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = len(self.names)
+            self._codes[name] = code
+            self.names.append(name)
+        return code
+
+
+class HistoryColumns(Sequence[StructuredActualHistory]):
+    """
+    列ごとに配列へ詰めた実績履歴。
+
+    StructuredActualHistory のシーケンスとして振る舞うため、HistoryIndex /
+    DishCatalog / HistoryFrame などリストを受け取る処理にそのまま渡せます。
+    読み出したレコードはその場で作るコピーなので、変更しても元の列には
+    反映されません。
+    """
+
+    def __init__(self) -> None:
+        self.days = array("i")  # date.toordinal() の値
+        self.dish_codes = array("I")
+        self.category_codes = array("H")
+        self._ids = bytearray()  # UUID 16バイト（なければ0）
+        self._other_ids: dict[int, str] = {}  # UUID 形式でないID
+        self._dishes = _Strings()
+        self._categories = _Strings()
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[StructuredActualHistory]
+    ) -> "HistoryColumns":
+        """レコードから列を作ります。"""
+        columns = cls()
+        columns.extend(records)
+        return columns
+
+    @property
+    def dish_names(self) -> list[str]:
+        """料理名（コード順）"""
+        return self._dishes.names
+
+    @property
+    def categories(self) -> list[str]:
+        """区分（コード順）"""
+        return self._categories.names
+
+    def append(self, record: StructuredActualHistory) -> None:
+        """
+        レコードを1件追加します。
+
+        Args:
+            record: 実績履歴
+        """
+        self.add(record.id, record.dish_name, record.date, record.category)
+
+    def add(self, page_id: str | None, dish_name: str, day: date, category: str) -> None:
+        """
+        レコードを作らずに1件追加します。
+
+        Args:
+            page_id: Notion page ID
+            dish_name: 料理名
+            day: 食べた日
+            category: 区分
+        """
+        position = len(self.days)
+        self.days.append(day.toordinal())
+        self.dish_codes.append(self._dishes.code(dish_name))
+        self.category_codes.append(self._categories.code(category))
+        self._ids += self._pack_id(position, page_id)
+
+    def extend(self, records: Iterable[StructuredActualHistory]) -> None:
+        """レコードをまとめて追加します。"""
+        for record in records:
+            self.append(record)
+
+    def _pack_id(self, position: int, page_id: str | None) -> bytes:
+        if page_id is None:
+            return _NO_ID
+        try:
+            packed = UUID(page_id)
+        except ValueError:
+            packed = None
+        # 表記が変わるID（ハイフンなし・大文字など）はそのまま持つ
+        if packed is None or str(packed) != page_id or packed.bytes == _NO_ID:
+            self._other_ids[position] = page_id
+            return _NO_ID
+        return packed.bytes
+
+    def _id_at(self, position: int) -> str | None:
+        other = self._other_ids.get(position)
+        if other is not None:
+            return other
+        packed = bytes(self._ids[position * 16 : (position + 1) * 16])
+        return None if packed == _NO_ID else str(UUID(bytes=packed))
+
+    def _record(self, position: int) -> StructuredActualHistory:
+        return StructuredActualHistory(
+            id=self._id_at(position),
+            dish_name=self._dishes.names[self.dish_codes[position]],
+            date=date.fromordinal(self.days[position]),
+            category=self._categories.names[self.category_codes[position]],
+        )
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._record(i) for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("history index out of range")
+        return self._record(item)
+
+    def __iter__(self) -> Iterator[StructuredActualHistory]:
+        for position in range(len(self.days)):
+            yield self._record(position)
@@ -0,0 +1,145 @@
+"""
+書き込みの冪等キー
+
+提案メニュー・実績履歴の作成に、内容と実行から決まるキーを付けます。
+
+- 作成したページのキーは SQLite の書き込みインデックスに記録し、同じキーの作成は
+  Notion に問い合わせずにスキップします（リトライ・再実行で行が増えない）。
+- NOTION_IDEMPOTENCY_PROPERTY を設定すると、キーを Notion の非表示のプロパティにも
+  保存します。タイムアウトした作成をリトライする前に、そのキーのページが
+  作成済みかを1回だけ問い合わせます。
+
+提案メニューのキーは実行ID（RUN_ID、GitHub Actions では GITHUB_RUN_ID）を含むため、
+別の実行で同じ料理を提案し直した場合は新しいページを作成します。実行IDが未設定の
+場合は対象の週から決まる値を使うため、手元での再実行でも同じ週の提案は重なりません。
+実績履歴のキーは元の実績入力のページIDを含むため、実行をまたいで同じになります。
+"""
+
+import hashlib
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from config.settings import RUN_ID
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS written_pages (
+    idempotency_key TEXT PRIMARY KEY,
+    page_id TEXT NOT NULL,
+    database_id TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS written_pages_page ON written_pages (page_id);
+"""
+
+def run_id(default: str) -> str:
+    """
+    現在の実行ID。
+
+    Args:
+        default: RUN_ID が未設定の場合に使う値（対象の週など、再実行しても変わらない値）
+
+    Returns:
+        RUN_ID（未設定なら default）
+    """
+    return RUN_ID or default
+
+
+def idempotency_key(*parts: object) -> str:
+    """
+    冪等キーを計算します。
+
+    Args:
+        *parts: キーに含める値（日付・区分・料理名・実行IDなど）
+
+    Returns:
+        32文字の16進文字列
+    """
+    text = "\x1f".join(str(part) for part in parts)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class WriteIndex:
+    """
+    作成済みのページの冪等キーを記録する SQLite。
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        インデックスを開きます（なければ作成します）。
+
+        Args:
+            path: SQLite ファイルのパス
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> str | None:
+        """
+        キーで作成済みのページIDを返します。
+
+        Args:
+            key: 冪等キー
+
+        Returns:
+            ページID（記録がなければNone）
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT page_id FROM written_pages WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, key: str, page_id: str, database_id: str) -> None:
+        """
+        作成したページを記録します。
+
+        Args:
+            key: 冪等キー
+            page_id: 作成したページのID
+            database_id: 作成先のデータベースID
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO written_pages "
+                "(idempotency_key, page_id, database_id, created_at) VALUES (?, ?, ?, ?)",
+                (key, page_id, database_id, time.time()),
+            )
+
+    def discard_pages(self, page_ids: Iterable[str]) -> int:
+        """
+        アーカイブしたページの記録を削除します（同じキーで作り直せるようにする）。
+
+        Args:
+            page_ids: ページID
+
+        Returns:
+            削除した記録の数
+        """
+        ids = [(page_id,) for page_id in page_ids]
+        if not ids:
+            return 0
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            before = conn.total_changes
+            conn.executemany("DELETE FROM written_pages WHERE page_id = ?", ids)
+            removed = conn.total_changes - before
+            conn.execute("COMMIT")
+        return removed
+
+    def count(self) -> int:
+        """記録されているページの数"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM written_pages").fetchone()[0]
@@ -0,0 +1,272 @@
+"""
+実績入力の一括取り込み
+
+他のアプリに残していた食事の記録（CSV / JSON）を読み込み、実績入力
+（Raw_Actual_Input）としてまとめて作成します。
+
+- ファイルは1行ずつ読み込み、作成はレート制限付きで並列に行います。
+- 食べたものは NFKC 正規化・空白の整理をしてから保存します。
+- (日付, 表記揺れを吸収した食べたもの) が既存の実績入力やファイル内の前の行と
+  同じものは重複として飛ばします。同じファイルを再度取り込んでも増えません。
+"""
+
+import csv
+import itertools
+import json
+import logging
+import re
+import unicodedata
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from src.ingredients import fold
+from src.notion_client import NotionClientWrapper, RawActualInput
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("auto", "csv", "json", "jsonl")
+
+# 列名（先に見つかったものを使う）
+DATE_FIELDS = ("date", "日付", "eaten_date", "day")
+TEXT_FIELDS = ("food_eaten", "食べたもの", "food", "meal", "text", "note")
+
+# 2024-01-15 / 2024/1/15 / 2024.1.15 / 2024年1月15日（時刻が続いてもよい）
+_DATE_PATTERN = re.compile(r"^(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})")
+
+# 不正な行として記録するエラーの最大件数
+MAX_ERRORS = 100
+
+
+class IngestError(Exception):
+    """ファイルを読み込めない場合のエラー"""
+
+
+@dataclass
+class IngestResult:
+    """取り込みの結果"""
+
+    read: int = 0  # 読み込んだ行数
+    created: int = 0  # 作成した件数
+    failed: int = 0  # 作成に失敗した件数
+    duplicates: int = 0  # 既存の実績入力・ファイル内の重複で飛ばした件数
+    invalid: int = 0  # 日付・食べたものが読めずに飛ばした件数
+    errors: list[str] = field(default_factory=list)  # エラーメッセージリスト
+
+
+def normalize_text(text: str) -> str:
+    """
+    保存する食べたものを整えます（NFKC 正規化・連続する空白を1つに）。
+
+    Args:
+        text: 食べたもの
+
+    Returns:
+        整えた文字列
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def dedup_key(eaten: date, text: str) -> tuple[date, str]:
+    """
+    重複判定のキーを返します。
+
+    Args:
+        eaten: 食べた日
+        text: 食べたもの
+
+    Returns:
+        (日付, 表記揺れを吸収した食べたもの)
+    """
+    return eaten, fold(text)
+
+
+def parse_date(value: Any) -> date:
+    """
+    日付を読み取ります。
+
+    Args:
+        value: 日付の文字列
+
+    Returns:
+        日付
+
+    Raises:
+        ValueError: 日付として読めない場合
+    """
+    text = unicodedata.normalize("NFKC", str(value or "")).strip()
+    match = _DATE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"invalid date: {value!r}")
+    year, month, day = (int(part) for part in match.groups())
+    return date(year, month, day)
+
+
+def parse_entry(row: dict[str, Any]) -> RawActualInput:
+    """
+    1行を作成用の実績入力に変換します。
+
+    Args:
+        row: 列名 -> 値
+
+    Returns:
+        実績入力（id なし）
+
+    Raises:
+        ValueError: 日付・食べたものがない、または読めない場合
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object, got {type(row).__name__}")
+    eaten = parse_date(_first(row, DATE_FIELDS))
+    text = normalize_text(str(_first(row, TEXT_FIELDS) or ""))
+    if not text:
+        raise ValueError("missing food_eaten")
+    return RawActualInput(id=None, date=eaten, food_eaten=text)
+
+
+def _first(row: dict[str, Any], names: tuple[str, ...]) -> Any:
+    for name in names:
+        if row.get(name) not in (None, ""):
+            return row[name]
+    return None
+
+
+def read_rows(path: Path, fmt: str = "auto") -> Iterator[tuple[int, Any]]:
+    """
+    ファイルの行を順に返します。
+
+    Args:
+        path: CSV / JSON / JSON Lines のファイル
+        fmt: 形式（"auto" は拡張子と先頭の文字で判定）
+
+    Returns:
+        (行番号, 行) のイテレータ
+
+    Raises:
+        IngestError: ファイルを読み込めない場合
+    """
+    fmt = _detect_format(path) if fmt == "auto" else fmt
+    try:
+        # Excel が付ける BOM を読み飛ばす
+        with path.open(encoding="utf-8-sig", newline="") as f:
+            if fmt == "csv":
+                reader = csv.DictReader(f)
+                columns = set(reader.fieldnames or ())
+                if not columns & set(DATE_FIELDS) or not columns & set(TEXT_FIELDS):
+                    raise IngestError(
+                        f"{path}: CSV needs a date column ({', '.join(DATE_FIELDS)}) "
+                        f"and a food column ({', '.join(TEXT_FIELDS)})"
+                    )
+                for row in reader:
+                    yield reader.line_num, row
+            elif fmt == "json":
+                # JSON 配列は全体を読み込む（大きなファイルは JSON Lines を推奨）
+                rows = json.load(f)
+                if not isinstance(rows, list):
+                    raise IngestError(f"{path}: expected a JSON array")
+                yield from enumerate(rows, start=1)
+            else:
+                for line_num, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield line_num, json.loads(line)
+                    except ValueError:
+                        yield line_num, None
+    except OSError as e:
+        raise IngestError(f"Cannot read {path}: {e}") from e
+    except (ValueError, csv.Error) as e:
+        raise IngestError(f"Cannot parse {path}: {e}") from e
+
+
+def _detect_format(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".json":
+        # 先頭が "[" なら配列、それ以外は JSON Lines とみなす
+        try:
+            with path.open(encoding="utf-8-sig") as f:
+                head = f.read(4096).lstrip()
+        except OSError as e:
+            raise IngestError(f"Cannot read {path}: {e}") from e
+        return "json" if head.startswith("[") else "jsonl"
+    raise IngestError(f"{path}: cannot detect the format, use --format csv/json/jsonl")
+
+
+def ingest_file(
+    notion: NotionClientWrapper,
+    path: Path,
+    fmt: str = "auto",
+    rate_per_second: float | None = None,
+    max_workers: int | None = None,
+    on_progress: Callable[[int, int, int], None] | None = None,
+) -> IngestResult:
+    """
+    ファイルの食事の記録を実績入力として取り込みます。
+
+    既存の実績入力の重複判定キーを読み込んでから、ファイルを1行ずつ読み、
+    重複していない行だけを bulk_create で作成します。
+
+    Args:
+        notion: 書き込み先のクライアント
+        path: 取り込むファイル
+        fmt: 形式（"auto" / "csv" / "json" / "jsonl"）
+        rate_per_second: 1秒あたりの最大リクエスト数（省略時は設定値）
+        max_workers: 並列数（省略時は設定値）
+        on_progress: (成功数, 失敗数, スキップ数) の増分で呼ばれる
+
+    Returns:
+        取り込みの結果
+
+    Raises:
+        IngestError: ファイルを読み込めない場合
+    """
+    rows = read_rows(path, fmt)
+    # 列名の誤りなどは既存の実績入力を読む前に失敗させる
+    first = next(rows, None)
+
+    seen = {dedup_key(raw.date, raw.food_eaten) for raw in notion.iter_records("raw")}
+    logger.info(f"Loaded {len(seen)} existing raw input keys")
+    result = IngestResult()
+
+    def skip() -> None:
+        if on_progress:
+            on_progress(0, 0, 1)
+
+    def entries() -> Iterator[RawActualInput]:
+        if first is None:
+            return
+        for line_num, row in itertools.chain([first], rows):
+            result.read += 1
+            try:
+                entry = parse_entry(row)
+            except ValueError as e:
+                result.invalid += 1
+                if len(result.errors) < MAX_ERRORS:
+                    result.errors.append(f"line {line_num}: {e}")
+                logger.warning(f"Skipping line {line_num} of {path}: {e}")
+                skip()
+                continue
+            key = dedup_key(entry.date, entry.food_eaten)
+            if key in seen:
+                result.duplicates += 1
+                skip()
+                continue
+            seen.add(key)
+            yield entry
+
+    written = notion.bulk_create(
+        entries(),
+        rate_per_second=rate_per_second,
+        max_workers=max_workers,
+        on_progress=(lambda ok, failed: on_progress(ok, failed, 0)) if on_progress else None,
+    )
+    result.created = written.created
+    result.failed = written.failed
+    result.errors.extend(written.errors[:MAX_ERRORS])
+    return result
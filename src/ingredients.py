@@ -0,0 +1,412 @@
+"""
+食材の正規化と買い物リストの集計
+
+「鶏もも肉 300g」「鶏もも肉200g」「とりもも肉 1/2kg」のような表記揺れを
+NFKC 正規化・同義語・単位換算で揃え、同じ食材の分量を合算して
+売り場ごとにまとめます。
+
+同義語・単位・売り場の対応表はインポート時に辞書と正規表現にまとめ、
+文字列の解析結果はキャッシュするため、複数週・複数世帯分の集計でも
+同じ表記の解析は一度だけになります。
+"""
+
+import re
+import unicodedata
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from fractions import Fraction
+from functools import lru_cache
+
+# =============================================================================
+# Tables
+# =============================================================================
+
+# 代表名 -> 別表記
+SYNONYMS: dict[str, tuple[str, ...]] = {
+    "鶏もも肉": ("鶏もも", "とりもも肉", "鳥もも肉", "鶏モモ肉", "とりもも"),
+    "鶏むね肉": ("鶏むね", "とりむね肉", "鳥むね肉", "鶏胸肉", "鶏ムネ肉"),
+    "豚バラ肉": ("豚バラ", "豚ばら肉", "豚バラ薄切り肉"),
+    "豚こま切れ肉": ("豚こま", "豚小間切れ肉", "豚こま肉"),
+    "牛こま切れ肉": ("牛こま", "牛小間切れ肉", "牛こま肉"),
+    "合いびき肉": ("合挽き肉", "合びき肉", "合い挽き肉", "あいびき肉"),
+    "豚ひき肉": ("豚挽き肉", "豚ミンチ"),
+    "鶏ひき肉": ("鶏挽き肉", "鶏ミンチ"),
+    "生鮭": ("鮭", "さけ", "サケ", "生さけ"),
+    "サバ": ("さば", "鯖"),
+    "アジ": ("あじ", "鯵"),
+    "ぶり": ("ブリ", "鰤"),
+    "さんま": ("サンマ", "秋刀魚"),
+    "玉ねぎ": ("たまねぎ", "玉葱", "タマネギ"),
+    "にんじん": ("人参", "ニンジン"),
+    "じゃがいも": ("ジャガイモ", "馬鈴薯"),
+    "長ねぎ": ("長ネギ", "ねぎ", "ネギ", "白ねぎ", "葱"),
+    "生姜": ("しょうが", "ショウガ", "しょうが(チューブ)"),
+    "にんにく": ("ニンニク", "大蒜"),
+    "キャベツ": ("きゃべつ",),
+    "大根": ("だいこん", "ダイコン"),
+    "卵": ("たまご", "玉子", "鶏卵", "タマゴ"),
+    "豆腐": ("とうふ",),
+    "醤油": ("しょうゆ", "しょう油", "正油"),
+    "味噌": ("みそ", "ミソ"),
+    "砂糖": ("さとう",),
+    "酒": ("料理酒", "日本酒"),
+}
+
+# 単位 -> (集計用の単位, 換算係数)
+UNITS: dict[str, tuple[str, Fraction]] = {
+    "g": ("g", Fraction(1)),
+    "グラム": ("g", Fraction(1)),
+    "kg": ("g", Fraction(1000)),
+    "キロ": ("g", Fraction(1000)),
+    "ml": ("ml", Fraction(1)),
+    "ミリリットル": ("ml", Fraction(1)),
+    "cc": ("ml", Fraction(1)),
+    "l": ("ml", Fraction(1000)),
+    "リットル": ("ml", Fraction(1000)),
+    "カップ": ("ml", Fraction(200)),
+    "大さじ": ("ml", Fraction(15)),
+    "小さじ": ("ml", Fraction(5)),
+    "個": ("個", Fraction(1)),
+    "こ": ("個", Fraction(1)),
+    "本": ("本", Fraction(1)),
+    "枚": ("枚", Fraction(1)),
+    "袋": ("袋", Fraction(1)),
+    "パック": ("パック", Fraction(1)),
+    "丁": ("丁", Fraction(1)),
+    "束": ("束", Fraction(1)),
+    "株": ("株", Fraction(1)),
+    "玉": ("玉", Fraction(1)),
+    "片": ("片", Fraction(1)),
+    "かけ": ("かけ", Fraction(1)),
+    "缶": ("缶", Fraction(1)),
+    "尾": ("尾", Fraction(1)),
+    "匹": ("尾", Fraction(1)),
+    "切れ": ("切れ", Fraction(1)),
+    "切": ("切れ", Fraction(1)),
+    "さく": ("さく", Fraction(1)),
+    "房": ("房", Fraction(1)),
+}
+
+# 分量を表さない表記（解析時に取り除く）
+VAGUE_AMOUNTS = ("少々", "適量", "適宜", "お好みで", "少量")
+
+# 売り場の表示順
+SECTION_ORDER = (
+    "青果",
+    "精肉",
+    "鮮魚",
+    "乳製品・卵",
+    "豆腐・日配",
+    "乾物・缶詰",
+    "調味料・粉類",
+    "その他",
+)
+
+# 売り場が名前だけで決まる食材（部分一致だと誤判定しやすいもの）
+EXACT_SECTIONS: dict[str, str] = {
+    "塩": "調味料・粉類",
+    "酢": "調味料・粉類",
+    "酒": "調味料・粉類",
+    "サラダ油": "調味料・粉類",
+    "ごま油": "調味料・粉類",
+    "オリーブオイル": "調味料・粉類",
+    "塩昆布": "乾物・缶詰",
+    "塩鮭": "鮮魚",
+}
+
+# 売り場の判定ルール（上から順に評価し、食材名にキーワードを含めば該当）
+_SECTION_RULES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("調味料・粉類", (
+        "の素", "ソース", "醤油", "味噌", "みりん", "めんつゆ", "マヨネーズ",
+        "ケチャップ", "砂糖", "粉", "だし", "ごま", "オイル",
+        "辛子", "わさび", "胡椒", "こしょう", "ルウ", "ルー",
+    )),
+    ("乾物・缶詰", (
+        "缶", "ひじき", "わかめ", "昆布", "かつお節", "切り干し", "乾燥", "春雨",
+        "海苔", "のり",
+    )),
+    ("豆腐・日配", (
+        "豆腐", "油揚げ", "厚揚げ", "納豆", "こんにゃく", "キムチ", "ちくわ",
+        "かまぼこ", "はんぺん", "麺", "うどん", "そば",
+    )),
+    ("乳製品・卵", ("卵", "牛乳", "チーズ", "バター", "ヨーグルト", "生クリーム")),
+    ("鮮魚", (
+        "鮭", "サバ", "アジ", "ぶり", "さんま", "鰹", "かつお", "あさり", "しじみ",
+        "えび", "海老", "いか", "たこ", "たら", "鱈", "まぐろ", "干物", "魚", "刺身",
+        "ほたて", "牡蠣",
+    )),
+    ("精肉", ("肉", "ひき", "ベーコン", "ハム", "ソーセージ", "ロース", "ウインナー")),
+    ("青果", (
+        "ねぎ", "玉ねぎ", "にんじん", "じゃがいも", "キャベツ", "白菜", "大根",
+        "ほうれん草", "小松菜", "春菊", "菜の花", "トマト", "きゅうり", "なす",
+        "ピーマン", "ゴーヤ", "かぼちゃ", "ごぼう", "里芋", "レタス", "もやし",
+        "ブロッコリー", "生姜", "にんにく", "すだち", "レモン", "きのこ", "しめじ",
+        "えのき", "しいたけ", "舞茸", "なめこ", "エリンギ", "芋", "菜", "豆苗",
+    )),
+)
+
+
+def fold(text: str) -> str:
+    """
+    表記揺れを吸収した比較用のキーを返します。
+    NFKC 正規化・小文字化・空白除去・カタカナのひらがな化を行います。
+
+    Args:
+        text: 食材名
+
+    Returns:
+        比較用のキー
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(text.split())
+    return "".join(
+        chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c for c in text
+    )
+
+
+# 比較用キー -> 代表名
+_CANONICAL: dict[str, str] = {}
+for _name, _aliases in SYNONYMS.items():
+    for _alias in (_name, *_aliases):
+        _CANONICAL[fold(_alias)] = _name
+
+_EXACT_SECTIONS = {fold(name): section for name, section in EXACT_SECTIONS.items()}
+
+# 売り場判定: (比較用キーワード, 売り場) を長いキーワード優先で1つの正規表現に
+_SECTION_PATTERNS = [
+    (re.compile("|".join(re.escape(fold(k)) for k in sorted(keys, key=len, reverse=True))), section)
+    for section, keys in _SECTION_RULES
+]
+
+# 「300」「0.5」「1/2」「1と1/2」
+_NUMBER = r"\d+(?:\.\d+|/\d+|と\d+/\d+)?"
+_UNIT_ALTERNATION = "|".join(
+    re.escape(u) for u in sorted(UNITS, key=len, reverse=True)
+)
+# 「醤油 大さじ2」「牛乳 カップ1/2」
+_PREFIX_UNIT = re.compile(
+    rf"^(?P<name>.+?)\s*(?P<unit>大さじ|小さじ|カップ)\s*(?P<qty>{_NUMBER})$"
+)
+# 「鶏もも肉 300g」「鶏もも肉200g」「卵 3」
+_SUFFIX_UNIT = re.compile(
+    rf"^(?P<name>.+?)\s*(?P<qty>{_NUMBER})\s*(?P<unit>{_UNIT_ALTERNATION})?$",
+    re.IGNORECASE,
+)
+_NOTE = re.compile(r"[(（][^)）]*[)）]")
+_SEPARATORS = re.compile(r"[,、，\n]")
+
+
+# =============================================================================
+# Parsing
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class Ingredient:
+    """解析した食材1件"""
+
+    name: str  # 代表名（同義語がなければ元の表記）
+    key: str  # 集計用のキー
+    quantity: Fraction | None  # 集計用の単位での分量（不明ならNone）
+    unit: str  # 集計用の単位（"g", "ml", "個" など。不明なら空）
+    section: str  # 売り場
+
+
+@lru_cache(maxsize=8192)
+def parse_ingredient(raw: str) -> Ingredient | None:
+    """
+    「鶏もも肉 300g」のような表記を解析します。
+
+    Args:
+        raw: 食材の表記
+
+    Returns:
+        解析結果（空の表記ならNone）
+    """
+    text = unicodedata.normalize("NFKC", raw)
+    text = _NOTE.sub("", text)
+    for vague in VAGUE_AMOUNTS:
+        text = text.replace(vague, "")
+    text = " ".join(text.split())
+    if not text:
+        return None
+
+    quantity: Fraction | None = None
+    unit = ""
+    name = text
+    match = _PREFIX_UNIT.match(text) or _SUFFIX_UNIT.match(text)
+    if match and match.group("name").strip():
+        name = match.group("name").strip()
+        # 単位のない数（「卵 3」）は個数として扱う
+        raw_unit = (match.group("unit") or "個").lower()
+        unit, factor = UNITS[raw_unit]
+        whole, _, rest = match.group("qty").partition("と")
+        quantity = (Fraction(whole) + Fraction(rest or 0)) * factor
+
+    key = fold(name)
+    canonical = _CANONICAL.get(key, name)
+    return Ingredient(
+        name=canonical,
+        key=fold(canonical),
+        quantity=quantity,
+        unit=unit,
+        section=section_of(canonical),
+    )
+
+
+@lru_cache(maxsize=4096)
+def section_of(name: str) -> str:
+    """
+    食材名から売り場を判定します。
+
+    Args:
+        name: 食材名
+
+    Returns:
+        売り場名（判定できなければ「その他」）
+    """
+    key = fold(name)
+    if key in _EXACT_SECTIONS:
+        return _EXACT_SECTIONS[key]
+    for pattern, section in _SECTION_PATTERNS:
+        if pattern.search(key):
+            return section
+    return "その他"
+
+
+def split_shopping_list(text: str) -> list[str]:
+    """カンマ・読点・改行区切りの買い物リストを分割します。"""
+    return [part.strip() for part in _SEPARATORS.split(text) if part.strip()]
+
+
+# =============================================================================
+# Aggregation
+# =============================================================================
+
+
+@dataclass
+class ShoppingItem:
+    """集計済みの食材"""
+
+    name: str
+    section: str
+    quantities: dict[str, Fraction] = field(default_factory=dict)  # 単位 -> 合計
+    unquantified: bool = False  # 分量なしの表記があったか
+
+    def display(self) -> str:
+        """「鶏もも肉 500g」「玉ねぎ 1と3/4個 + 200g」のような表示"""
+        amounts = [format_quantity(q, unit) for unit, q in self.quantities.items()]
+        if not amounts:
+            return self.name
+        return f"{self.name} {' + '.join(amounts)}"
+
+
+class ShoppingList:
+    """
+    買い物リストの集計器。
+    同じ食材・同じ次元の単位の分量を合算します。
+    """
+
+    def __init__(self) -> None:
+        self._items: dict[str, ShoppingItem] = {}
+
+    def add(self, raw: str) -> None:
+        """
+        食材を1件追加します。
+
+        Args:
+            raw: 「鶏もも肉 300g」のような表記
+        """
+        ingredient = parse_ingredient(raw)
+        if ingredient is None:
+            return
+        item = self._items.get(ingredient.key)
+        if item is None:
+            item = ShoppingItem(name=ingredient.name, section=ingredient.section)
+            self._items[ingredient.key] = item
+        if ingredient.quantity is None:
+            item.unquantified = True
+        else:
+            item.quantities[ingredient.unit] = (
+                item.quantities.get(ingredient.unit, Fraction(0)) + ingredient.quantity
+            )
+
+    def add_text(self, text: str) -> None:
+        """
+        カンマ区切りの買い物リストをまとめて追加します。
+
+        Args:
+            text: 「玉ねぎ 1個, にんじん 1/2本」のような文字列
+        """
+        for part in split_shopping_list(text):
+            self.add(part)
+
+    def extend(self, texts: Iterable[str]) -> None:
+        """複数の買い物リストを追加します。"""
+        for text in texts:
+            self.add_text(text)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def by_section(self) -> dict[str, list[ShoppingItem]]:
+        """
+        売り場ごとの食材を、売り場の表示順・食材名順で返します。
+
+        Returns:
+            売り場名 -> 食材のリスト
+        """
+        grouped: dict[str, list[ShoppingItem]] = {}
+        for item in sorted(self._items.values(), key=lambda i: i.name):
+            grouped.setdefault(item.section, []).append(item)
+        return {
+            section: grouped[section] for section in SECTION_ORDER if section in grouped
+        }
+
+    def format_lines(self) -> list[str]:
+        """
+        売り場ごとに1行ずつ整形します。
+
+        Returns:
+            「*青果*: 玉ねぎ 2個, にんじん 1本」のような行のリスト
+        """
+        return [
+            f"*{section}*: {', '.join(item.display() for item in items)}"
+            for section, items in self.by_section().items()
+        ]
+
+
+def format_quantity(quantity: Fraction, unit: str) -> str:
+    """
+    分量を表示用の文字列にします。
+
+    Args:
+        quantity: 集計用の単位での分量
+        unit: 集計用の単位
+
+    Returns:
+        「1.2kg」「大さじ2」「1と1/2個」のような文字列
+    """
+    if unit == "g" and quantity >= 1000:
+        return f"{float(quantity / 1000):g}kg"
+    if unit == "ml":
+        if quantity >= 1000:
+            return f"{float(quantity / 1000):g}L"
+        if quantity <= 45 and quantity.denominator == 1 and quantity % 5 == 0:
+            tablespoons, teaspoons = divmod(int(quantity), 15)
+            parts = []
+            if tablespoons:
+                parts.append(f"大さじ{tablespoons}")
+            if teaspoons:
+                parts.append(f"小さじ{teaspoons // 5}")
+            return "+".join(parts)
+    if quantity.denominator == 1:
+        number = str(quantity.numerator)
+    elif unit in ("g", "ml"):
+        number = f"{float(quantity):g}"
+    elif quantity > 1:
+        whole, rest = divmod(quantity, 1)
+        number = f"{whole}と{rest}"
+    else:
+        number = str(quantity)
+    return f"{number}{unit}"
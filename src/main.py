@@ -7,15 +7,31 @@ GitHub Actionsまたはコマンドラインから実行されます。
 import argparse
 import logging
 import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import date
 
-from config.settings import is_development, is_production, ENV, validate_config
-from src.daily_reminder import DailyReminderSender
-from src.menu_generator import WeeklyMenuGenerator
-from src.notion_client import NotionClientWrapper
-from src.openai_client import OpenAIClientWrapper
-from src.preprocessor import ActualDataPreprocessor
-from src.slack_client import SlackClientWrapper
+from config.settings import (
+    is_development,
+    is_production,
+    ENV,
+    MENU_DRAFT_FROM_WEEKDAY,
+    MENU_DRAFT_PATH,
+    METRICS_TEXTFILE,
+    PLAN_STATE_PATH,
+    RUN_BUDGET_SECONDS,
+    SLACK_OUTBOX_FLUSH_SECONDS,
+    SLACK_OUTBOX_PATH,
+    TRACE_FILE,
+    validate_config,
+)
+from src import metrics
+from src.deadline import deadline_scope
+from src.tracing import tracer
+
+# 外部SDK（openai, notion_client, requests）を含むクライアントモジュールは
+# 起動時間を抑えるため、各サブコマンドの中で必要な分だけ遅延インポートします。
 
 # ログ設定
 logging.basicConfig(
@@ -24,9 +40,150 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 遅延インポートの所要時間（ラベル -> 秒）。--startup-profile で出力します。
+_IMPORT_TIMINGS: dict[str, float] = {}
+
+# 実行中に起動したアウトボックスの配信ワーカー。終了時に配信を待ってから停止します。
+_OUTBOX_WORKERS: list = []
+
+
+@contextmanager
+def _import_timer(label: str) -> Iterator[None]:
+    """
+    ブロック内のインポートに要した時間を記録します。
+
+    Args:
+        label: 計測結果のラベル（例: "notion"）
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _IMPORT_TIMINGS[label] = (
+            _IMPORT_TIMINGS.get(label, 0.0) + time.perf_counter() - start
+        )
+
+
+def _log_startup_profile(total_seconds: float) -> None:
+    """
+    遅延インポートの所要時間をログに出力します。
+
+    Args:
+        total_seconds: コマンド全体の実行時間
+    """
+    logger.info("-" * 30)
+    logger.info("Startup profile (lazy imports):")
+    if not _IMPORT_TIMINGS:
+        logger.info("  (no client modules imported)")
+    for label, seconds in sorted(
+        _IMPORT_TIMINGS.items(), key=lambda kv: kv[1], reverse=True
+    ):
+        logger.info(f"  {label:<12} {seconds * 1000:8.1f} ms")
+    imports_total = sum(_IMPORT_TIMINGS.values())
+    logger.info(f"  {'imports':<12} {imports_total * 1000:8.1f} ms")
+    logger.info(f"  {'command':<12} {total_seconds * 1000:8.1f} ms")
+    logger.info("-" * 30)
+
+
+def _write_trace(path: str) -> None:
+    """
+    記録したスパンをファイルに書き出し、フレームグラフ風のサマリーを出力します。
+
+    Args:
+        path: OTLP/JSON の出力先
+    """
+    try:
+        tracer.export_json(path)
+    except OSError as e:
+        logger.error(f"Failed to write trace file {path}: {e}")
+    else:
+        logger.info(f"Trace written to {path} ({len(tracer.spans)} spans)")
+
+    logger.info("-" * 30)
+    logger.info("Trace summary:")
+    for line in tracer.format_summary().splitlines():
+        logger.info(f"  {line}")
+    logger.info("-" * 30)
+
+
+def _write_metrics(path: str) -> None:
+    """
+    メトリクスを Prometheus textfile に書き出します。
+
+    Args:
+        path: 出力先（*.prom）
+    """
+    try:
+        metrics.registry.write_textfile(path)
+        logger.info(f"Metrics written to {path}")
+    except OSError as e:
+        logger.error(f"Failed to write metrics file {path}: {e}")
+
+
+def _attach_outbox(slack) -> None:
+    """
+    SLACK_OUTBOX_PATH が設定されていれば、通知をアウトボックス経由にし、
+    バックグラウンドの配信ワーカーを起動します。
+
+    Args:
+        slack: Slackクライアント
+    """
+    if not SLACK_OUTBOX_PATH:
+        return
+    from src.outbox import NotificationOutbox, OutboxWorker
+
+    slack.outbox = NotificationOutbox(SLACK_OUTBOX_PATH)
+    worker = OutboxWorker(slack.outbox, slack.deliver)
+    worker.start()
+    _OUTBOX_WORKERS.append(worker)
+
+
+def _stop_outbox_workers() -> None:
+    """配信ワーカーを最大 SLACK_OUTBOX_FLUSH_SECONDS 秒待ってから停止します。"""
+    while _OUTBOX_WORKERS:
+        worker = _OUTBOX_WORKERS.pop()
+        result = worker.stop(SLACK_OUTBOX_FLUSH_SECONDS)
+        counts = worker.outbox.counts()
+        logger.info(
+            f"Outbox: sent={result.sent}, retrying={result.retried}, "
+            f"failed={result.failed}, pending={counts['pending'] + counts['sending']}"
+        )
+        if counts["pending"] + counts["sending"] > 0:
+            logger.info("Undelivered notifications remain in the outbox; run `deliver` to send them")
+
+
+def _start_dry_run(command: str, notion, slack):
+    """
+    ドライランを開始します。Slack の送信は計画に記録するだけにします。
+
+    Args:
+        command: サブコマンド名
+        notion: Notionクライアント（読み取りは実際に行う）
+        slack: Slackクライアント
+
+    Returns:
+        書き込みを記録する計画
+    """
+    from src.dry_run import DryRunPlan
+
+    logger.info("Dry run: Notion, Slack and local state will not be written")
+    plan = DryRunPlan(command)
+    slack.outbox = plan
+    return plan
+
+
+def _finish_dry_run(plan) -> None:
+    """記録した計画を JSON で標準出力に書き出します。"""
+    logger.info(f"Dry run plan: {plan.summary()}")
+    print(plan.to_json())
+
 
 def run_weekly_generation(
-    reference_date: date | None = None, from_today: bool = False
+    reference_date: date | None = None,
+    from_today: bool = False,
+    weeks: int = 1,
+    incremental: bool = False,
+    dry_run: bool = False,
 ) -> int:
     """
     週間献立生成フローを実行します。
@@ -37,6 +194,9 @@ def run_weekly_generation(
     Args:
         reference_date: 基準日（テスト用）
         from_today: Trueの場合、基準日から7日間の献立を生成
+        weeks: 生成する週数
+        incremental: Trueの場合、前回から変わった日だけを作り直す
+        dry_run: Trueの場合、書き込みは行わず計画を JSON で標準出力に出す
 
     Returns:
         終了コード（0: 成功, 1: 失敗）
@@ -47,11 +207,27 @@ def run_weekly_generation(
 
     # 設定の検証
     errors = validate_config()
+    if incremental and not PLAN_STATE_PATH:
+        errors.append("PLAN_STATE_PATH is required for --incremental")
     if errors:
         for error in errors:
             logger.error(f"Configuration error: {error}")
         return 1
 
+    with _import_timer("notion"):
+        from src.notion_client import NotionClientWrapper
+    with _import_timer("openai"):
+        from src.openai_client import OpenAIClientWrapper
+    with _import_timer("slack"):
+        from src.slack_client import SlackClientWrapper
+    with _import_timer("generators"):
+        from src.menu_draft import DraftCache
+        from src.menu_generator import WeeklyMenuGenerator
+        from src.plan_state import PlanStateStore
+        from src.preprocessor import ActualDataPreprocessor
+        if dry_run:
+            from src.dry_run import DryRunNotion, DryRunStore
+
     # クライアントの初期化
     try:
         notion = NotionClientWrapper()
@@ -60,6 +236,11 @@ def run_weekly_generation(
     except Exception as e:
         logger.error(f"Failed to initialize clients: {e}")
         return 1
+    plan = _start_dry_run("weekly", notion, slack) if dry_run else None
+    if plan:
+        notion = DryRunNotion(notion, plan)
+    else:
+        _attach_outbox(slack)
 
     # Step 1: 実績データの構造化
     logger.info("-" * 30)
@@ -70,6 +251,7 @@ def run_weekly_generation(
         notion_client=notion, openai_client=openai
     )
     preprocess_result = preprocessor.process_all_unprocessed()
+    metrics.record_preprocessing(preprocess_result, flow="weekly")
 
     logger.info(
         f"Preprocessing complete: "
@@ -86,19 +268,32 @@ def run_weekly_generation(
     logger.info("Step 2-3: Generating menu and notifying")
     logger.info("-" * 30)
 
+    plan_state = PlanStateStore(PLAN_STATE_PATH) if PLAN_STATE_PATH else None
+    drafts = DraftCache(MENU_DRAFT_PATH) if MENU_DRAFT_PATH else None
+    if plan:
+        plan_state = plan_state and DryRunStore(plan_state, "plan_state", plan)
+        drafts = drafts and DryRunStore(drafts, "menu_draft", plan)
     generator = WeeklyMenuGenerator(
         notion_client=notion,
         openai_client=openai,
         slack_client=slack,
+        plan_state=plan_state,
+        drafts=drafts,
     )
 
-    generation_result = generator.generate_for_next_week(reference_date, from_today=from_today)
+    generation_result = generator.generate_for_next_week(
+        reference_date, from_today=from_today, weeks=weeks, incremental=incremental
+    )
+    metrics.record_menu_generation(generation_result)
 
     if generation_result.skipped:
         logger.info(f"Menu generation skipped: {generation_result.skip_reason}")
     else:
         logger.info(f"Generated {generation_result.generated_count} menu items")
 
+    for warning in generation_result.warnings:
+        logger.warning(f"Generation warning: {warning}")
+
     if generation_result.errors:
         for error in generation_result.errors:
             logger.error(f"Generation error: {error}")
@@ -107,11 +302,14 @@ def run_weekly_generation(
     logger.info("Weekly menu generation flow completed")
     logger.info("=" * 50)
 
+    if plan:
+        _finish_dry_run(plan)
+
     # エラーがあっても部分的に成功していれば0を返す
     return 0
 
 
-def run_daily_reminder(target_date: date | None = None) -> int:
+def run_daily_reminder(target_date: date | None = None, dry_run: bool = False) -> int:
     """
     日次リマインダーを実行します。
 
@@ -120,6 +318,7 @@ def run_daily_reminder(target_date: date | None = None) -> int:
 
     Args:
         target_date: 対象日（テスト用）
+        dry_run: Trueの場合、書き込みは行わず計画を JSON で標準出力に出す
 
     Returns:
         終了コード（0: 成功, 1: 失敗）
@@ -135,6 +334,17 @@ def run_daily_reminder(target_date: date | None = None) -> int:
             logger.error(f"Configuration error: {error}")
         return 1
 
+    with _import_timer("notion"):
+        from src.notion_client import NotionClientWrapper
+    with _import_timer("openai"):
+        from src.openai_client import OpenAIClientWrapper
+    with _import_timer("slack"):
+        from src.slack_client import SlackClientWrapper
+    with _import_timer("generators"):
+        from src.daily_reminder import DailyReminderSender
+        if dry_run:
+            from src.dry_run import DryRunNotion
+
     # クライアントの初期化
     try:
         notion = NotionClientWrapper()
@@ -143,6 +353,11 @@ def run_daily_reminder(target_date: date | None = None) -> int:
     except Exception as e:
         logger.error(f"Failed to initialize clients: {e}")
         return 1
+    plan = _start_dry_run("daily", notion, slack) if dry_run else None
+    if plan:
+        notion = DryRunNotion(notion, plan)
+    else:
+        _attach_outbox(slack)
 
     # リマインダー送信（内部で実績の構造化も実行）
     sender = DailyReminderSender(
@@ -152,6 +367,10 @@ def run_daily_reminder(target_date: date | None = None) -> int:
     )
 
     result = sender.send_reminder(target_date)
+    metrics.record_daily_reminder(result)
+    _prepare_menu_draft(notion, openai, slack, target_date, plan=plan)
+    if plan:
+        _finish_dry_run(plan)
 
     # 構造化処理の結果をログ出力
     if result.preprocessed_count > 0 or result.structured_count > 0:
@@ -168,17 +387,155 @@ def run_daily_reminder(target_date: date | None = None) -> int:
         return 1
 
 
-def test_connections() -> int:
+def _prepare_menu_draft(notion, openai, slack, target_date: date | None, plan=None) -> None:
+    """
+    MENU_DRAFT_PATH が設定されていれば、木曜以降は次週の献立の下書きを作ります。
+
+    リマインダーの送信後に行い、失敗しても日次の実行は成功として扱います。
+    ドライランの計画が渡された場合は、下書きの保存を計画に記録するだけにします。
+    """
+    today = target_date or date.today()
+    if not MENU_DRAFT_PATH or today.weekday() < MENU_DRAFT_FROM_WEEKDAY:
+        return
+
+    with _import_timer("generators"):
+        from src.menu_draft import DraftCache
+        from src.menu_generator import WeeklyMenuGenerator
+
+    drafts = DraftCache(MENU_DRAFT_PATH)
+    if plan:
+        from src.dry_run import DryRunStore
+
+        drafts = DryRunStore(drafts, "menu_draft", plan)
+    generator = WeeklyMenuGenerator(
+        notion_client=notion,
+        openai_client=openai,
+        slack_client=slack,
+        drafts=drafts,
+    )
+    try:
+        generator.prepare_draft(today)
+    except Exception as e:
+        logger.warning(f"Failed to prepare next week's menu draft: {e}")
+
+
+def deliver_outbox(retry_failed: bool = False) -> int:
     """
-    全てのサービスへの接続をテストします。
+    アウトボックスに溜まった通知を配信します。
+
+    Args:
+        retry_failed: 再送を諦めた通知も再び配信対象にする
+
+    Returns:
+        終了コード（0: すべて配信済み, 1: 未配信あり）
+    """
+    if not SLACK_OUTBOX_PATH:
+        logger.error("SLACK_OUTBOX_PATH is not set")
+        return 1
+
+    errors = validate_config(["slack"])
+    if errors:
+        for error in errors:
+            logger.error(f"Configuration error: {error}")
+        return 1
+
+    with _import_timer("slack"):
+        from src.outbox import NotificationOutbox
+        from src.slack_client import SlackClientWrapper
+
+    outbox = NotificationOutbox(SLACK_OUTBOX_PATH)
+    if retry_failed:
+        logger.info(f"Requeued {outbox.requeue_failed()} failed notifications")
+
+    slack = SlackClientWrapper()
+    result = outbox.drain(slack.deliver)
+    counts = outbox.counts()
+    logger.info(
+        f"Delivered {result.sent}, retrying {result.retried}, gave up {result.failed}; "
+        f"pending={counts['pending'] + counts['sending']}, failed={counts['failed']}"
+    )
+    return 0 if counts["pending"] + counts["sending"] + counts["failed"] == 0 else 1
+
+
+def show_stats(
+    reference_date: date | None = None, weeks: int = 52, stale_days: int = 60
+) -> int:
+    """
+    実績履歴の集計（頻度・最後に食べた日・区分の割合）を出力します。
+
+    Args:
+        reference_date: 基準日（省略時は今日）
+        weeks: 集計する週数
+        stale_days: 「しばらく食べていない」とみなす日数
+
+    Returns:
+        終了コード（0: 成功, 1: 失敗）
+    """
+    from datetime import timedelta
+
+    errors = validate_config(["notion"])
+    if errors:
+        for error in errors:
+            logger.error(f"Configuration error: {error}")
+        return 1
+
+    with _import_timer("notion"):
+        from src.notion_client import NotionClientWrapper
+    with _import_timer("analytics"):
+        from src.analytics import HistoryFrame
+
+    today = reference_date or date.today()
+    since = today - timedelta(weeks=weeks)
+    try:
+        history = NotionClientWrapper().get_structured_history_columns(since, today)
+    except Exception as e:
+        logger.error(f"Failed to fetch history: {e}")
+        return 1
+
+    frame = HistoryFrame.from_records(history)
+    logger.info("=" * 50)
+    logger.info(f"History stats: {since.isoformat()} - {today.isoformat()} ({len(frame)} dishes)")
+    logger.info("=" * 50)
+    if not len(frame):
+        return 0
+
+    logger.info("Category balance:")
+    for name, share in frame.category_balance().items():
+        logger.info(f"  {name:<8} {share:6.1%}")
+
+    logger.info("Main ingredients:")
+    for name, count in frame.frequency("main").items():
+        _, recent = frame.rolling_counts(name, window=28, start=today, end=today)
+        logger.info(f"  {name:<8} {count:4d} (last 4 weeks: {int(recent[-1])})")
+
+    logger.info("Top dishes:")
+    last_seen = frame.last_seen()
+    for name, count in list(frame.frequency("dish").items())[:10]:
+        logger.info(f"  {name:<16} {count:4d} (last: {last_seen[name].isoformat()})")
+
+    stale = frame.stale(stale_days, today)
+    logger.info(f"Not eaten in {stale_days} days: {len(stale)}")
+    for name, last in stale[:20]:
+        logger.info(f"  {name:<16} (last: {last.isoformat()})")
+    return 0
+
+
+def test_connections(services: list[str] | None = None) -> int:
+    """
+    サービスへの接続をテストします。
+
+    Args:
+        services: テスト対象のサービス（"notion", "openai", "slack"）。
+                  省略時は全サービス。
 
     Returns:
         終了コード（0: 成功, 1: 失敗）
     """
-    logger.info("Testing connections to all services...")
+    targets = services or ["notion", "openai", "slack"]
+    logger.info(f"Testing connections to: {', '.join(targets)}")
 
     # 設定の検証
-    errors = validate_config()
+    errors = validate_config(targets)
     if errors:
         for error in errors:
             logger.error(f"Configuration error: {error}")
@@ -187,42 +544,66 @@ def test_connections() -> int:
     all_passed = True
 
     # Notion
+    if "notion" in targets:
+        all_passed = _test_notion_connection() and all_passed
+
+    # OpenAI
+    if "openai" in targets:
+        all_passed = _test_openai_connection() and all_passed
+
+    # Slack
+    if "slack" in targets:
+        all_passed = _test_slack_connection() and all_passed
+
+    return 0 if all_passed else 1
+
+
+def _test_notion_connection() -> bool:
+    """Notionへの接続をテストします。"""
+    with _import_timer("notion"):
+        from src.notion_client import NotionClientWrapper
+
     try:
         notion = NotionClientWrapper()
         if notion.test_connection():
             logger.info("✓ Notion connection: OK")
-        else:
-            logger.error("✗ Notion connection: FAILED")
-            all_passed = False
+            return True
+        logger.error("✗ Notion connection: FAILED")
     except Exception as e:
         logger.error(f"✗ Notion connection: FAILED - {e}")
-        all_passed = False
+    return False
+
+
+def _test_openai_connection() -> bool:
+    """OpenAIへの接続をテストします。"""
+    with _import_timer("openai"):
+        from src.openai_client import OpenAIClientWrapper
 
-    # OpenAI
     try:
         openai = OpenAIClientWrapper()
         if openai.test_connection():
             logger.info("✓ OpenAI connection: OK")
-        else:
-            logger.error("✗ OpenAI connection: FAILED")
-            all_passed = False
+            return True
+        logger.error("✗ OpenAI connection: FAILED")
     except Exception as e:
         logger.error(f"✗ OpenAI connection: FAILED - {e}")
-        all_passed = False
+    return False
+
+
+def _test_slack_connection() -> bool:
+    """Slackへの接続をテストします。"""
+    with _import_timer("slack"):
+        from src.slack_client import SlackClientWrapper
 
-    # Slack
     try:
         slack = SlackClientWrapper()
         if slack.test_connection():
             logger.info("✓ Slack connection: OK")
-        else:
-            logger.error("✗ Slack connection: FAILED")
-            all_passed = False
+            return True
+        logger.error("✗ Slack connection: FAILED")
     except Exception as e:
         logger.error(f"✗ Slack connection: FAILED - {e}")
-        all_passed = False
-
-    return 0 if all_passed else 1
+    return False
 
 
 def reset_databases(tables: list[str] | None = None, force: bool = False) -> int:
@@ -268,6 +649,9 @@ def reset_databases(tables: list[str] | None = None, force: bool = False) -> int
             return 0
 
     # クライアント初期化
+    with _import_timer("notion"):
+        from src.notion_client import NotionClientWrapper
+
     try:
         notion = NotionClientWrapper()
     except Exception as e:
@@ -338,6 +722,9 @@ def seed_test_data() -> int:
     logger.info("Seeding Test Data (Development Environment Only)")
     logger.info("=" * 50)
 
+    with _import_timer("notion"):
+        from src.notion_client import NotionClientWrapper
+
     try:
         notion = NotionClientWrapper()
     except Exception as e:
@@ -369,14 +756,315 @@ def seed_test_data() -> int:
     return 0
 
 
-def main() -> int:
+def seed_scaled_data(
+    years: float,
+    seed: int = 0,
+    tables: list[str] | None = None,
+    raw_backlog_days: int = 7,
+    rate: float | None = None,
+    workers: int | None = None,
+    output_dir: str | None = None,
+) -> int:
+    """
+    負荷試験用の合成データ（複数年分）を投入します。
+
+    検証環境（ENV=development）でのみ実行可能です。
+    output_dir を指定した場合は Notion ではなくローカルの JSONL に書き出します。
+
+    Args:
+        years: 生成する年数
+        seed: 乱数シード
+        tables: 投入するテーブル（"structured", "proposed", "raw"）
+        raw_backlog_days: 未処理の実績入力として残す日数
+        rate: Notionへの書き込みレート（req/s、省略時は設定値）
+        workers: Notionへの書き込み並列数（省略時は設定値）
+        output_dir: ローカル出力先ディレクトリ
+
+    Returns:
+        終了コード（0: 成功, 1: 失敗）
+    """
+    from pathlib import Path
+
+    if is_production():
+        logger.error("BLOCKED: Cannot seed test data in production environment!")
+        return 1
+
+    tables = tables or ["structured", "proposed", "raw"]
+
+    logger.info("=" * 50)
+    logger.info(f"Seeding {years} years of synthetic data (seed={seed})")
+    logger.info("=" * 50)
+
+    with _import_timer("notion"):
+        from src.data_generator import SyntheticDataGenerator, write_local
+        from src.notion_client import NotionClientWrapper
+        from src.progress import ProgressReporter
+
+    dataset = SyntheticDataGenerator(seed=seed).generate(
+        end_date=date.today(), years=years, raw_backlog_days=raw_backlog_days
+    )
+    total = dataset.count(tables)
+    logger.info(
+        f"Generated: history={len(dataset.history)}, "
+        f"proposals={len(dataset.proposals)}, raw={len(dataset.raw_inputs)}"
+    )
+
+    if output_dir:
+        write_local(dataset, Path(output_dir), tables)
+        return 0
+
+    try:
+        notion = NotionClientWrapper()
+    except Exception as e:
+        logger.error(f"Failed to initialize Notion client: {e}")
+        return 1
+
+    progress = ProgressReporter("Seeding", total=total)
+    result = notion.bulk_create(
+        dataset.records(tables),
+        rate_per_second=rate,
+        max_workers=workers,
+        on_progress=lambda ok, failed: progress.update(done=ok, failed=failed),
+    )
+    progress.report()
+
+    logger.info("-" * 30)
+    logger.info(f"Created {result.created} records, failed {result.failed}")
+    logger.info("=" * 50)
+
+    return 0 if result.failed == 0 else 1
+
+
+def export_databases(
+    output_dir: str,
+    tables: list[str] | None = None,
+    fmt: str = "jsonl",
+    compression: str = "auto",
+) -> int:
+    """
+    3つのデータベースをスナップショットに書き出します。
+
+    Args:
+        output_dir: 出力ディレクトリ
+        tables: 書き出すテーブル（"structured", "raw", "proposed"、省略時はすべて）
+        fmt: 形式（"jsonl" / "parquet"）
+        compression: jsonl の圧縮方式（"auto" / "zstd" / "gzip" / "none"）
+
+    Returns:
+        終了コード（0: 成功, 1: 失敗）
+    """
+    from pathlib import Path
+
+    with _import_timer("notion"):
+        from src.notion_client import NotionClientWrapper
+        from src.progress import ProgressReporter
+        from src.snapshot import TABLES, SnapshotError, export_snapshot
+
+    try:
+        notion = NotionClientWrapper()
+    except Exception as e:
+        logger.error(f"Failed to initialize Notion client: {e}")
+        return 1
+
+    progress = ProgressReporter("Exporting")
+    try:
+        manifest = export_snapshot(
+            notion,
+            Path(output_dir),
+            tables=tables or TABLES,
+            fmt=fmt,
+            compression=compression,
+            on_progress=lambda n: progress.update(done=n),
+        )
+    except SnapshotError as e:
+        logger.error(str(e))
+        return 1
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        return 1
+    progress.report()
+
+    rows = {table: entry["rows"] for table, entry in manifest.tables.items()}
+    logger.info(f"Exported snapshot to {output_dir} ({manifest.format}/{manifest.compression}): {rows}")
+    return 0
+
+
+def import_databases(
+    input_dir: str,
+    tables: list[str] | None = None,
+    rate: float | None = None,
+    workers: int | None = None,
+    resume: bool = True,
+) -> int:
+    """
+    スナップショットをデータベースに取り込みます（中断した場合は続きから再開）。
+
+    Args:
+        input_dir: スナップショットのディレクトリ
+        tables: 取り込むテーブル（省略時はすべて）
+        rate: Notionへの書き込みレート（req/s、省略時は設定値）
+        workers: Notionへの書き込み並列数（省略時は設定値）
+        resume: Falseの場合、前回の進み具合を無視して最初から取り込む
+
+    Returns:
+        終了コード（0: 成功, 1: 失敗）
+    """
+    from pathlib import Path
+
+    with _import_timer("notion"):
+        from src.notion_client import NotionClientWrapper
+        from src.progress import ProgressReporter
+        from src.snapshot import TABLES, SnapshotError, import_snapshot, read_manifest
+
+    try:
+        manifest = read_manifest(Path(input_dir))
+    except SnapshotError as e:
+        logger.error(str(e))
+        return 1
+
+    try:
+        notion = NotionClientWrapper()
+    except Exception as e:
+        logger.error(f"Failed to initialize Notion client: {e}")
+        return 1
+
+    tables = tables or list(TABLES)
+    total = sum(
+        entry["rows"] for table, entry in manifest.tables.items() if table in tables
+    )
+    progress = ProgressReporter("Importing", total=total)
+    try:
+        result = import_snapshot(
+            notion,
+            Path(input_dir),
+            tables=tables,
+            rate_per_second=rate,
+            max_workers=workers,
+            resume=resume,
+            on_progress=lambda ok, failed, skipped: progress.update(
+                done=ok, failed=failed, skipped=skipped
+            ),
+        )
+    except SnapshotError as e:
+        logger.error(str(e))
+        return 1
+    except Exception as e:
+        logger.error(f"Import failed: {e}")
+        return 1
+    progress.report()
+
+    logger.info(
+        f"Imported {result.created} records, failed {result.failed}, "
+        f"skipped {result.skipped} already imported"
+    )
+    if result.failed:
+        logger.info("Run the same import command again to retry the failed records")
+    return 0 if result.failed == 0 else 1
+
+
+def ingest_raw_inputs(
+    input_path: str,
+    fmt: str = "auto",
+    rate: float | None = None,
+    workers: int | None = None,
+) -> int:
+    """
+    CSV / JSON の食事の記録を実績入力として一括で取り込みます。
+
+    既存の実績入力・ファイル内の行と (日付, 食べたもの) が重複する行は飛ばします。
+
+    Args:
+        input_path: 取り込むファイル
+        fmt: 形式（"auto" / "csv" / "json" / "jsonl"）
+        rate: Notionへの書き込みレート（req/s、省略時は設定値）
+        workers: Notionへの書き込み並列数（省略時は設定値）
+
+    Returns:
+        終了コード（0: 成功, 1: 失敗）
+    """
+    from pathlib import Path
+
+    with _import_timer("notion"):
+        from src.ingest import IngestError, ingest_file
+        from src.notion_client import NotionClientWrapper
+        from src.progress import ProgressReporter
+
+    try:
+        notion = NotionClientWrapper()
+    except Exception as e:
+        logger.error(f"Failed to initialize Notion client: {e}")
+        return 1
+
+    progress = ProgressReporter("Ingesting")
+    try:
+        result = ingest_file(
+            notion,
+            Path(input_path),
+            fmt=fmt,
+            rate_per_second=rate,
+            max_workers=workers,
+            on_progress=lambda ok, failed, skipped: progress.update(
+                done=ok, failed=failed, skipped=skipped
+            ),
+        )
+    except IngestError as e:
+        logger.error(str(e))
+        return 1
+    except Exception as e:
+        logger.error(f"Ingest failed: {e}")
+        return 1
+    progress.report()
+
+    logger.info(
+        f"Ingested {result.created} of {result.read} rows in {progress.elapsed:.1f}s "
+        f"({progress.rate:.1f} rec/s): skipped {result.duplicates} duplicates "
+        f"and {result.invalid} invalid rows, failed {result.failed}"
+    )
+    if result.failed:
+        logger.info("Run the same ingest command again to retry the failed rows")
+    return 0 if result.failed == 0 else 1
+
+
+def main(argv: list[str] | None = None) -> int:
     """
     メインエントリーポイント。
     コマンドライン引数に応じて処理を分岐します。
+
+    Args:
+        argv: コマンドライン引数（省略時は sys.argv）
     """
     parser = argparse.ArgumentParser(
         description="Dinner-Aide: 献立自動生成・管理システム"
     )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="遅延インポートの所要時間を終了時に出力",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="各ステージと外部API呼び出しのスパンを記録し、終了時にサマリーを出力",
+    )
+    parser.add_argument(
+        "--trace-file",
+        type=str,
+        default=TRACE_FILE,
+        help=f"スパンの出力先（OTLP/JSON、デフォルト: {TRACE_FILE}）",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=METRICS_TEXTFILE,
+        help="終了時にメトリクスを書き出す Prometheus textfile（デフォルト: METRICS_TEXTFILE）",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=RUN_BUDGET_SECONDS,
+        metavar="SECONDS",
+        help="実行全体の時間の予算。OpenAI への依頼は残り時間で打ち切る（デフォルト: RUN_BUDGET_SECONDS、0なら予算なし）",
+    )
 
     subparsers = parser.add_subparsers(dest="command", help="実行するコマンド")
 
@@ -395,6 +1083,22 @@ def main() -> int:
         action="store_true",
         help="今日から7日間の献立を生成（手動実行用）",
     )
+    weekly_parser.add_argument(
+        "--weeks",
+        type=int,
+        default=1,
+        help="生成する週数（既存予定・実績の取得と保存は1回にまとめる）",
+    )
+    weekly_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="既存の提案を残し、空いている日と前回から前後の日の予定が変わった日だけを作り直す",
+    )
+    weekly_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="読み取りと献立の生成だけを行い、Notion・Slack への書き込みの計画を JSON で出力",
+    )
 
     # daily コマンド
     daily_parser = subparsers.add_parser(
@@ -406,9 +1110,145 @@ def main() -> int:
         default=None,
         help="対象日（YYYY-MM-DD形式、テスト用）",
     )
+    daily_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="読み取りと実績の構造化だけを行い、Notion・Slack への書き込みの計画を JSON で出力",
+    )
+
+    # stats コマンド
+    stats_parser = subparsers.add_parser("stats", help="実績履歴の集計を表示")
+    stats_parser.add_argument(
+        "--date",
+        type=str,
+        default=None,
+        help="基準日（YYYY-MM-DD形式、デフォルト: 今日）",
+    )
+    stats_parser.add_argument(
+        "--weeks",
+        type=int,
+        default=52,
+        help="集計する週数（デフォルト: 52）",
+    )
+    stats_parser.add_argument(
+        "--stale-days",
+        type=int,
+        default=60,
+        help="しばらく食べていないとみなす日数（デフォルト: 60）",
+    )
 
     # test コマンド
-    subparsers.add_parser("test", help="接続テストを実行")
+    test_parser = subparsers.add_parser("test", help="接続テストを実行")
+    test_parser.add_argument(
+        "--services",
+        type=str,
+        nargs="+",
+        default=None,
+        choices=["notion", "openai", "slack"],
+        help="テストするサービス（デフォルト: すべて）",
+    )
+
+    # deliver コマンド
+    deliver_parser = subparsers.add_parser(
+        "deliver", help="通知アウトボックスの未配信分を送信"
+    )
+    deliver_parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="再送を諦めた通知も再送する",
+    )
+
+    # export / import コマンド
+    export_parser = subparsers.add_parser(
+        "export", help="データベースをスナップショット（JSONL / Parquet）に書き出す"
+    )
+    export_parser.add_argument(
+        "--output", type=str, required=True, help="スナップショットの出力先ディレクトリ"
+    )
+    export_parser.add_argument(
+        "--tables",
+        type=str,
+        nargs="+",
+        default=None,
+        choices=["structured", "raw", "proposed"],
+        help="書き出すテーブル（デフォルト: すべて）",
+    )
+    export_parser.add_argument(
+        "--format",
+        type=str,
+        default="jsonl",
+        choices=["jsonl", "parquet"],
+        help="形式（デフォルト: jsonl。parquet には pyarrow が必要）",
+    )
+    export_parser.add_argument(
+        "--compression",
+        type=str,
+        default="auto",
+        choices=["auto", "zstd", "gzip", "none"],
+        help="jsonl の圧縮方式（デフォルト: zstandard があれば zstd、なければ gzip）",
+    )
+
+    import_parser = subparsers.add_parser(
+        "import", help="スナップショットをデータベースに取り込む"
+    )
+    import_parser.add_argument(
+        "--input", type=str, required=True, help="スナップショットのディレクトリ"
+    )
+    import_parser.add_argument(
+        "--tables",
+        type=str,
+        nargs="+",
+        default=None,
+        choices=["structured", "raw", "proposed"],
+        help="取り込むテーブル（デフォルト: すべて）",
+    )
+    import_parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Notionへの書き込みレート req/s（デフォルト: NOTION_WRITE_RATE）",
+    )
+    import_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Notionへの書き込み並列数（デフォルト: NOTION_WRITE_WORKERS）",
+    )
+    import_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="前回の取り込みの続きからではなく、最初から取り込む",
+    )
+
+    # ingest コマンド
+    ingest_parser = subparsers.add_parser(
+        "ingest", help="CSV / JSON の食事の記録を実績入力として一括で取り込む"
+    )
+    ingest_parser.add_argument(
+        "--input",
+        type=str,
+        required=True,
+        help="取り込むファイル（列: date / 日付 と food_eaten / 食べたもの など）",
+    )
+    ingest_parser.add_argument(
+        "--format",
+        type=str,
+        default="auto",
+        choices=["auto", "csv", "json", "jsonl"],
+        help="形式（デフォルト: 拡張子から判定）",
+    )
+    ingest_parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Notionへの書き込みレート req/s（デフォルト: NOTION_WRITE_RATE）",
+    )
+    ingest_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Notionへの書き込み並列数（デフォルト: NOTION_WRITE_WORKERS）",
+    )
 
     # reset コマンド（検証環境専用）
     reset_parser = subparsers.add_parser(
@@ -429,12 +1269,91 @@ def main() -> int:
     )
 
     # seed コマンド（検証環境専用）
-    subparsers.add_parser(
+    seed_parser = subparsers.add_parser(
         "seed", help="テストデータを投入（検証環境専用）"
     )
+    seed_parser.add_argument(
+        "--scale",
+        type=float,
+        default=None,
+        metavar="YEARS",
+        help="指定した年数分の合成データを生成して投入（負荷試験用）",
+    )
+    seed_parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="合成データの乱数シード（デフォルト: 0）",
+    )
+    seed_parser.add_argument(
+        "--tables",
+        type=str,
+        nargs="+",
+        default=["structured", "proposed", "raw"],
+        choices=["structured", "proposed", "raw"],
+        help="合成データを投入するテーブル（デフォルト: すべて）",
+    )
+    seed_parser.add_argument(
+        "--backlog-days",
+        type=int,
+        default=7,
+        help="未処理の実績入力として残す日数（デフォルト: 7）",
+    )
+    seed_parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Notionへの書き込みレート req/s（デフォルト: NOTION_WRITE_RATE）",
+    )
+    seed_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Notionへの書き込み並列数（デフォルト: NOTION_WRITE_WORKERS）",
+    )
+    seed_parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Notionの代わりにローカルのディレクトリへJSONLで書き出す",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
+    if args.trace:
+        tracer.enable()
+
+    command = args.command or "help"
+    exit_code = 1
+    started = time.perf_counter()
+    try:
+        with tracer.span(f"command.{command}"), deadline_scope(args.budget):
+            exit_code = _dispatch(parser, args)
+        return exit_code
+    finally:
+        _stop_outbox_workers()
+        elapsed = time.perf_counter() - started
+        if args.startup_profile:
+            _log_startup_profile(elapsed)
+        if args.trace:
+            tracer.disable()
+            _write_trace(args.trace_file)
+        if args.metrics_file:
+            metrics.record_run(command, elapsed, exit_code)
+            _write_metrics(args.metrics_file)
+
+
+def _dispatch(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """
+    サブコマンドに応じて処理を分岐します。
+
+    Args:
+        parser: ヘルプ表示用のパーサー
+        args: パース済みの引数
+
+    Returns:
+        終了コード
+    """
     if args.command == "weekly":
         ref_date = None
         if args.date:
@@ -443,8 +1362,18 @@ def main() -> int:
             except ValueError:
                 logger.error(f"Invalid date format: {args.date}")
                 return 1
+        weeks = getattr(args, "weeks", 1)
+        if weeks < 1:
+            logger.error(f"Invalid number of weeks: {weeks}")
+            return 1
         from_today = getattr(args, "from_today", False)
-        return run_weekly_generation(ref_date, from_today=from_today)
+        return run_weekly_generation(
+            ref_date,
+            from_today=from_today,
+            weeks=weeks,
+            incremental=getattr(args, "incremental", False),
+            dry_run=getattr(args, "dry_run", False),
+        )
 
     elif args.command == "daily":
         target = None
@@ -454,15 +1383,57 @@ def main() -> int:
             except ValueError:
                 logger.error(f"Invalid date format: {args.date}")
                 return 1
-        return run_daily_reminder(target)
+        return run_daily_reminder(target, dry_run=getattr(args, "dry_run", False))
+
+    elif args.command == "stats":
+        ref_date = None
+        if args.date:
+            try:
+                ref_date = date.fromisoformat(args.date)
+            except ValueError:
+                logger.error(f"Invalid date format: {args.date}")
+                return 1
+        return show_stats(ref_date, weeks=args.weeks, stale_days=args.stale_days)
 
     elif args.command == "test":
-        return test_connections()
+        return test_connections(services=args.services)
+
+    elif args.command == "deliver":
+        return deliver_outbox(retry_failed=args.retry_failed)
+
+    elif args.command == "export":
+        return export_databases(
+            args.output, tables=args.tables, fmt=args.format, compression=args.compression
+        )
+
+    elif args.command == "import":
+        return import_databases(
+            args.input,
+            tables=args.tables,
+            rate=args.rate,
+            workers=args.workers,
+            resume=not args.restart,
+        )
+
+    elif args.command == "ingest":
+        return ingest_raw_inputs(
+            args.input, fmt=args.format, rate=args.rate, workers=args.workers
+        )
 
     elif args.command == "reset":
         return reset_databases(tables=args.tables, force=args.force)
 
     elif args.command == "seed":
+        if args.scale is not None:
+            return seed_scaled_data(
+                years=args.scale,
+                seed=args.seed,
+                tables=args.tables,
+                raw_backlog_days=args.backlog_days,
+                rate=args.rate,
+                workers=args.workers,
+                output_dir=args.output,
+            )
         return seed_test_data()
 
     else:
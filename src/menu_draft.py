@@ -0,0 +1,140 @@
+"""
+次週の献立の下書き
+
+日次リマインダーの実行時（木曜以降）に次週の献立を先に生成してローカルに
+保存しておき、週次の実行では最新の予定・実績で下書きを検証して、そのまま
+使えればAIを呼ばずに保存・通知します。
+
+下書きは作成時点の「週の確定済みの予定」の指紋を持ち、週次の実行時に
+指紋が変わっている（確定・外食の予定が増えたなど）場合や、下書きの作成後に
+食べた料理と重複・連続する場合は使わずに生成し直します。
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from src.notion_client import ProposedDish
+from src.openai_client import GeneratedMenuItem
+
+logger = logging.getLogger(__name__)
+
+# 下書きの形式のバージョン（互換性のない変更をしたら上げる）
+DRAFT_VERSION = 1
+
+
+@dataclass
+class MenuDraft:
+    """次週の献立の下書き"""
+
+    week_start: date  # 対象週の月曜日
+    created_on: date  # 作成日（これより後の実績を新しい入力とみなす）
+    inputs: str  # 作成時点の週の確定済みの予定の指紋
+    items: list[GeneratedMenuItem]
+
+
+def fixed_plans_key(dishes: list[ProposedDish]) -> str:
+    """
+    週の確定済みの予定（「提案」以外）の指紋を計算します。
+
+    Args:
+        dishes: 週の予定
+
+    Returns:
+        指紋（16進文字列）
+    """
+    rows = sorted(
+        f"{d.date.isoformat()}\t{d.category}\t{d.dish_name}\t{d.status}"
+        for d in dishes
+        if d.status != "提案"
+    )
+    return hashlib.sha256("\n".join(rows).encode("utf-8")).hexdigest()[:16]
+
+
+def _to_json(draft: MenuDraft) -> dict[str, Any]:
+    return {
+        "version": DRAFT_VERSION,
+        "week_start": draft.week_start.isoformat(),
+        "created_on": draft.created_on.isoformat(),
+        "inputs": draft.inputs,
+        "items": [
+            {
+                "date": item.date.isoformat(),
+                "dish_name": item.dish_name,
+                "category": item.category,
+                "shopping_list": item.shopping_list,
+            }
+            for item in draft.items
+        ],
+    }
+
+
+def _from_json(data: dict[str, Any]) -> MenuDraft:
+    return MenuDraft(
+        week_start=date.fromisoformat(data["week_start"]),
+        created_on=date.fromisoformat(data["created_on"]),
+        inputs=data["inputs"],
+        items=[
+            GeneratedMenuItem(
+                date=date.fromisoformat(item["date"]),
+                dish_name=item["dish_name"],
+                category=item["category"],
+                shopping_list=item.get("shopping_list", ""),
+            )
+            for item in data["items"]
+        ],
+    )
+
+
+class DraftCache:
+    """
+    下書きを1件だけ保持する JSON ファイル。
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Args:
+            path: JSON ファイルのパス
+        """
+        self.path = Path(path)
+
+    def load(self, week_start: date) -> MenuDraft | None:
+        """
+        対象週の下書きを読み込みます。
+
+        Args:
+            week_start: 対象週の月曜日
+
+        Returns:
+            下書き（ない・別の週・読めない場合はNone）
+        """
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable menu draft {self.path}: {e}")
+            return None
+        if data.get("version") != DRAFT_VERSION or data.get("week_start") != week_start.isoformat():
+            return None
+        try:
+            return _from_json(data)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed menu draft {self.path}: {e}")
+            return None
+
+    def save(self, draft: MenuDraft) -> None:
+        """下書きを保存します（前の下書きは置き換えます）。"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(_to_json(draft), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        """下書きを削除します。"""
+        self.path.unlink(missing_ok=True)
@@ -4,14 +4,42 @@
 既存の予定を尊重しつつ、空いた枠をAIで埋める「差分生成」を行います。
 """
 
+import contextvars
 import logging
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import date, timedelta
 
-from config.settings import HISTORY_WEEKS
+from config.settings import (
+    CATALOG_HISTORY_WEEKS,
+    DAILY_MENU_STRUCTURE,
+    HISTORY_SUMMARY_WEEKS,
+    HISTORY_WEEKS,
+    MENU_CATALOG_ENABLED,
+    MENU_PARALLEL_DAYS,
+    MENU_PARALLEL_WORKERS,
+)
+from src.analytics import HistoryFrame
+from src.catalog import DishCatalog
+from src.dish_similarity import (
+    DUPLICATE_CHECK_CATEGORIES,
+    DishSimilarityIndex,
+    NearDuplicate,
+)
+from src.history_index import (
+    ROTATION_CATEGORIES,
+    HistoryIndex,
+    RotationViolation,
+    main_ingredient_of,
+)
+from src.idempotency import idempotency_key, run_id
+from src.menu_draft import DraftCache, MenuDraft, fixed_plans_key
+from src.menu_scorer import CandidateScorer
 from src.notion_client import NotionClientWrapper, ProposedDish
 from src.openai_client import GeneratedMenuItem, OpenAIClientWrapper
+from src.plan_state import PlanStateStore, fingerprint_days, plan_incremental
 from src.slack_client import SlackClientWrapper
+from src.tracing import set_attributes, span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +52,18 @@ class MenuGenerationResult:
     skipped: bool  # 生成をスキップしたか
     skip_reason: str  # スキップ理由
     errors: list[str]  # エラーメッセージリスト
+    warnings: list[str] = field(default_factory=list)  # 検証の警告（保存は行う）
+
+
+@dataclass
+class _Generation:
+    """献立の生成・検証の結果"""
+
+    items: list[GeneratedMenuItem] = field(default_factory=list)
+    violations: list[RotationViolation] = field(default_factory=list)
+    duplicates: list[NearDuplicate] = field(default_factory=list)
+    error: Exception | None = None  # 最後に失敗した週の生成エラー
+    from_draft: bool = False  # 下書きをそのまま使ったか
 
 
 class WeeklyMenuGenerator:
@@ -43,6 +83,10 @@ class WeeklyMenuGenerator:
         notion_client: NotionClientWrapper | None = None,
         openai_client: OpenAIClientWrapper | None = None,
         slack_client: SlackClientWrapper | None = None,
+        use_catalog: bool | None = None,
+        plan_state: PlanStateStore | None = None,
+        drafts: DraftCache | None = None,
+        parallel_days: int | None = None,
     ):
         """
         生成器を初期化します。
@@ -51,21 +95,45 @@ class WeeklyMenuGenerator:
             notion_client: Notionクライアント
             openai_client: OpenAIクライアント
             slack_client: Slackクライアント
+            use_catalog: カタログの候補で枠を埋め、残りだけをAIに依頼するか
+                        （省略時は設定 MENU_CATALOG_ENABLED）
+            plan_state: 日ごとの指紋のストア（指定すると実行のたびに記録し、
+                        差分生成で使用）
+            drafts: 次週の献立の下書きのキャッシュ（指定すると週次の自動実行で
+                    使える下書きがあればAIを呼ばずに使用）
+            parallel_days: 並列にAIへ依頼する単位の日数（0なら1週分を1回で依頼、
+                           省略時は設定 MENU_PARALLEL_DAYS）
         """
         self.notion = notion_client or NotionClientWrapper()
         self.openai = openai_client or OpenAIClientWrapper()
         self.slack = slack_client or SlackClientWrapper()
+        self.use_catalog = MENU_CATALOG_ENABLED if use_catalog is None else use_catalog
+        self.plan_state = plan_state
+        self.drafts = drafts
+        self.parallel_days = MENU_PARALLEL_DAYS if parallel_days is None else parallel_days
 
+    @traced("weekly.generate_for_next_week")
     def generate_for_next_week(
-        self, reference_date: date | None = None, from_today: bool = False
+        self,
+        reference_date: date | None = None,
+        from_today: bool = False,
+        weeks: int = 1,
+        incremental: bool = False,
     ) -> MenuGenerationResult:
         """
         献立を生成します。
 
+        複数週の場合も既存の予定・実績の取得と保存・通知は1回で行い、
+        週をまたぐメイン食材の連続や重複も検証します。
+
         Args:
             reference_date: 基準日（省略時は今日）
             from_today: Trueの場合、基準日から7日間の献立を生成。
                        Falseの場合、次週（月曜〜日曜）の献立を生成。
+            weeks: 生成する週数（2以上なら続く週もまとめて生成）
+            incremental: Trueの場合、既存の提案は削除せず、予定がない日と
+                        前回の実行から前後の日の予定が変わった「提案」の日だけを
+                        作り直す（plan_state が必要）
 
         Returns:
             生成結果
@@ -75,10 +143,11 @@ class WeeklyMenuGenerator:
         if from_today:
             # 手動実行モード: 今日から7日間
             start_date = today
-            end_date = today + timedelta(days=6)
         else:
             # 自動実行モード: 次週の月曜〜日曜
-            start_date, end_date = self._get_next_week_range(today)
+            start_date, _ = self._get_next_week_range(today)
+        end_date = start_date + timedelta(days=7 * weeks - 1)
+        set_attributes(weeks=weeks)
 
         logger.info(
             f"Generating menu for {start_date.isoformat()} to {end_date.isoformat()}"
@@ -86,8 +155,16 @@ class WeeklyMenuGenerator:
 
         errors: list[str] = []
 
+        if incremental and self.plan_state is None:
+            return MenuGenerationResult(
+                generated_count=0,
+                skipped=True,
+                skip_reason="差分生成には PLAN_STATE_PATH の設定が必要です",
+                errors=["差分生成には PLAN_STATE_PATH の設定が必要です"],
+            )
+
         # Step 0: 自動実行モードの場合、既存の「提案」ステータスのデータを削除（上書き）
-        if not from_today:
+        if not from_today and not incremental:
             try:
                 deleted, failed = self.notion.delete_proposed_dishes_by_date_range(
                     start_date, end_date, status_filter="提案"
@@ -103,10 +180,11 @@ class WeeklyMenuGenerator:
                 logger.error(f"Failed to delete existing proposals: {e}")
                 errors.append(f"既存提案の削除に失敗: {e}")
 
-        # Step 1: 既存の予定を取得
+        # Step 1: 既存の予定を取得（指紋を記録する場合は前後の日の分も）
+        margin = timedelta(days=1 if self.plan_state else 0)
         try:
-            existing_dishes = self.notion.get_proposed_dishes_by_date_range(
-                start_date, end_date
+            planned_dishes = self.notion.get_proposed_dishes_by_date_range(
+                start_date - margin, end_date + margin
             )
         except Exception as e:
             logger.error(f"Failed to fetch existing dishes: {e}")
@@ -117,15 +195,43 @@ class WeeklyMenuGenerator:
                 errors=[str(e)],
             )
 
+        existing_dishes = [d for d in planned_dishes if start_date <= d.date <= end_date]
+
         # Step 2: 空いている日付を特定
-        dates_with_plans = self._get_dates_with_plans(existing_dishes)
         all_dates = self._get_date_range(start_date, end_date)
-        dates_to_fill = [d for d in all_dates if d not in dates_with_plans]
+        replaced: list[ProposedDish] = []
+        if incremental:
+            plan = plan_incremental(all_dates, planned_dishes, self.plan_state.load(all_dates))
+            dates_to_fill = plan.dates_to_fill
+            regenerate = set(plan.regenerate)
+            replaced = [
+                d for d in existing_dishes if d.date in regenerate and d.status == "提案"
+            ]
+            # 作り直す日の提案は、既存の予定としてAIや検証に渡さない
+            existing_dishes = [d for d in existing_dishes if d not in replaced]
+            planned_dishes = [d for d in planned_dishes if d not in replaced]
+            logger.info(
+                f"Incremental: {len(plan.fill)} empty days, "
+                f"{len(plan.regenerate)} days to regenerate, {len(plan.kept)} unchanged"
+            )
+            set_attributes(regenerated_days=len(plan.regenerate))
+        else:
+            dates_with_plans = self._get_dates_with_plans(existing_dishes)
+            dates_to_fill = [d for d in all_dates if d not in dates_with_plans]
+            logger.info(
+                f"Dates with existing plans: {len(dates_with_plans)}, "
+                f"Dates to fill: {len(dates_to_fill)}"
+            )
 
-        logger.info(
-            f"Dates with existing plans: {len(dates_with_plans)}, "
-            f"Dates to fill: {len(dates_to_fill)}"
-        )
+        # 差分生成で変わった日がない場合は、通知もせずに終了
+        if incremental and not dates_to_fill:
+            self._record_plan_state(all_dates, planned_dishes)
+            return MenuGenerationResult(
+                generated_count=0,
+                skipped=True,
+                skip_reason="前回から変わった日はありません",
+                errors=errors,
+            )
 
         # すべての日に予定がある場合はスキップ
         if not dates_to_fill:
@@ -142,6 +248,7 @@ class WeeklyMenuGenerator:
             self._send_weekly_notification(
                 existing_dishes, start_date, end_date, errors
             )
+            self._record_plan_state(all_dates, planned_dishes)
 
             return MenuGenerationResult(
                 generated_count=0,
@@ -150,17 +257,181 @@ class WeeklyMenuGenerator:
                 errors=errors,
             )
 
-        # Step 3: 過去の実績を取得
+        # 週次の自動実行では、日次の実行で作った下書きを最新の予定で検証して使う
+        use_draft = self.drafts is not None and not (from_today or incremental) and weeks == 1
+        draft = self.drafts.load(start_date) if use_draft else None
+        if draft is not None and draft.inputs != fixed_plans_key(existing_dishes):
+            logger.info("Discarding menu draft: fixed plans changed")
+            set_attributes(draft="stale")
+            draft = None
+
+        generation = self._generate_items(
+            today, start_date, dates_to_fill, existing_dishes, errors, draft
+        )
+        generated_items = generation.items
+        violations = generation.violations
+        duplicates = generation.duplicates
+
+        if not generated_items and generation.error is not None:
+            return MenuGenerationResult(
+                generated_count=0,
+                skipped=True,
+                skip_reason=f"献立生成に失敗: {generation.error}",
+                errors=[str(generation.error)],
+            )
+
+        if not generated_items:
+            logger.warning("No menu items were generated")
+            return MenuGenerationResult(
+                generated_count=0,
+                skipped=True,
+                skip_reason="AIから献立が生成されませんでした",
+                errors=["AIから献立が生成されませんでした"],
+            )
+
+        warnings = [v.message for v in violations] + [d.message for d in duplicates]
+        for warning in warnings:
+            logger.warning(f"Menu check: {warning}")
+        set_attributes(
+            rotation_violations=len(violations), near_duplicates=len(duplicates)
+        )
+
+        # Step 5: Notionに一括保存（差分生成では作り直した日の古い提案を削除）
+        saved_dishes = self._save_proposals(generated_items, errors)
+        if replaced:
+            saved_dates = {dish.date for dish in saved_dishes}
+            # 同じ料理を作り直した場合は冪等キーが一致して元のページを使うため、削除しない
+            saved_ids = {dish.id for dish in saved_dishes}
+            stale = [d for d in replaced if d.date in saved_dates and d.id not in saved_ids]
+            deleted, failed = self.notion.delete_proposed_dishes(stale)
+            logger.info(f"Replaced {deleted} proposals (failed: {failed})")
+            if failed:
+                errors.append(f"作り直した日の古い提案の削除に一部失敗: {failed}件")
+            planned_dishes += [d for d in replaced if d.date not in saved_dates]
+        self._record_plan_state(all_dates, planned_dishes + saved_dishes)
+        if use_draft:
+            self.drafts.clear()
+
+        # Step 6: Slackに通知（既存 + 新規生成分）
+        all_dishes = existing_dishes + saved_dishes
+        self._send_weekly_notification(all_dishes, start_date, end_date, errors)
+
+        return MenuGenerationResult(
+            generated_count=len(saved_dishes),
+            skipped=False,
+            skip_reason="",
+            errors=errors,
+            warnings=warnings,
+        )
+
+    @traced("weekly.prepare_draft")
+    def prepare_draft(self, reference_date: date | None = None) -> MenuDraft | None:
+        """
+        次週（月曜〜日曜）の献立の下書きを作り、キャッシュに保存します。
+
+        週次の自動実行と同じ手順で生成しますが、Notion には書き込みません。
+        次週が生成済み（「提案」がある）の場合や、キャッシュの下書きが
+        週の確定済みの予定と一致している場合は何もしません。
+
+        Args:
+            reference_date: 基準日（省略時は今日）
+
+        Returns:
+            作成した下書き（作成しなかった場合はNone）
+        """
+        if self.drafts is None:
+            return None
+        today = reference_date or date.today()
+        start_date, end_date = self._get_next_week_range(today)
+
+        existing_dishes = self.notion.get_proposed_dishes_by_date_range(start_date, end_date)
+        if any(dish.status == "提案" for dish in existing_dishes):
+            logger.info("Next week already has proposals; skipping menu draft")
+            return None
+
+        inputs = fixed_plans_key(existing_dishes)
+        cached = self.drafts.load(start_date)
+        if cached is not None and cached.inputs == inputs:
+            logger.info("Menu draft is up to date")
+            return None
+
+        dates_with_plans = self._get_dates_with_plans(existing_dishes)
+        dates_to_fill = [
+            d for d in self._get_date_range(start_date, end_date) if d not in dates_with_plans
+        ]
+        if not dates_to_fill:
+            return None
+
+        errors: list[str] = []
+        generation = self._generate_items(
+            today, start_date, dates_to_fill, existing_dishes, errors
+        )
+        if generation.error is not None or errors or not generation.items:
+            logger.warning(f"Menu draft was not saved: {generation.error or errors}")
+            return None
+
+        draft = MenuDraft(
+            week_start=start_date, created_on=today, inputs=inputs, items=generation.items
+        )
+        self.drafts.save(draft)
+        set_attributes(draft_items=len(draft.items))
+        logger.info(f"Saved menu draft for {start_date.isoformat()} ({len(draft.items)} items)")
+        return draft
+
+    def _generate_items(
+        self,
+        today: date,
+        start_date: date,
+        dates_to_fill: list[date],
+        existing_dishes: list[ProposedDish],
+        errors: list[str],
+        draft: MenuDraft | None = None,
+    ) -> "_Generation":
+        """
+        過去の実績を取得し、空いている日の献立を生成・検証します。
+
+        複数週は1週ずつ生成し、前の週の献立を次の週に渡します。下書きが
+        指定され、最新の実績でも使える場合はAIを呼ばずに下書きを使います。
+
+        Returns:
+            生成結果（献立・検証結果・生成エラー）
+        """
+        # Step 3: 過去の実績を取得（傾向の集計・カタログ用に長めに1回で取得）
         history_start = today - timedelta(weeks=HISTORY_WEEKS)
+        fetch_weeks = max(
+            HISTORY_WEEKS,
+            HISTORY_SUMMARY_WEEKS,
+            CATALOG_HISTORY_WEEKS if self.use_catalog else 0,
+        )
         try:
-            recent_history = self.notion.get_structured_history_by_date_range(
-                history_start, today
+            history = self.notion.get_structured_history_by_date_range(
+                today - timedelta(weeks=fetch_weeks), today
             )
         except Exception as e:
             logger.warning(f"Failed to fetch history, continuing without it: {e}")
-            recent_history = []
-
-        # Step 4: AIで献立を生成
+            history = []
+        recent_history = [h for h in history if h.date >= history_start]
+
+        # 履歴と既存の予定からメイン食材・料理名の索引を作る
+        index = HistoryIndex.from_records(history)
+        index.add_all(existing_dishes)
+        similar_dishes = DishSimilarityIndex.from_records(recent_history + existing_dishes)
+        result = _Generation()
+
+        if draft is not None:
+            reason = self._draft_conflict(draft, dates_to_fill, index, similar_dishes)
+            if reason is None:
+                logger.info(f"Publishing menu draft from {draft.created_on.isoformat()}")
+                set_attributes(draft="used")
+                result.violations = index.check(draft.items)
+                result.duplicates = similar_dishes.check(draft.items)
+                result.items = list(draft.items)
+                result.from_draft = True
+                return result
+            logger.info(f"Discarding menu draft: {reason}")
+            set_attributes(draft="stale")
+
+        # Step 4: AIで献立を生成（複数週は1週ずつ生成し、前の週の献立を次の週に渡す）
         existing_plans = [
             {
                 "date": dish.date.isoformat(),
@@ -180,64 +451,278 @@ class WeeklyMenuGenerator:
             for h in recent_history
         ]
 
-        try:
-            generated_items = self.openai.generate_weekly_menu(
-                dates_to_fill=dates_to_fill,
-                existing_plans=existing_plans,
-                recent_history=history_data,
-            )
-        except Exception as e:
-            logger.error(f"Failed to generate menu: {e}")
-            return MenuGenerationResult(
-                generated_count=0,
-                skipped=True,
-                skip_reason=f"献立生成に失敗: {e}",
-                errors=[str(e)],
+        if self.use_catalog:
+            scorer = CandidateScorer(DishCatalog.build(history), index)
+        else:
+            history_summary = HistoryFrame.from_records(history).summary(
+                today, HISTORY_SUMMARY_WEEKS
             )
 
-        if not generated_items:
-            logger.warning("No menu items were generated")
-            return MenuGenerationResult(
-                generated_count=0,
-                skipped=True,
-                skip_reason="AIから献立が生成されませんでした",
-                errors=["AIから献立が生成されませんでした"],
-            )
+        weeks = self._split_weeks(dates_to_fill, start_date)
+        for week_dates in weeks:
+            planned = existing_plans + _as_plans(result.items)
+            try:
+                with span("weekly.generate_week", start=week_dates[0].isoformat()):
+                    if self.use_catalog:
+                        items = self._generate_with_catalog(
+                            week_dates, scorer, planned, history_data, errors
+                        )
+                    elif 0 < self.parallel_days < len(week_dates):
+                        items = self._generate_parallel(
+                            week_dates, planned, history_data, history_summary, errors
+                        )
+                    else:
+                        items = self.openai.generate_weekly_menu(
+                            dates_to_fill=week_dates,
+                            existing_plans=planned,
+                            recent_history=history_data,
+                            history_summary=history_summary,
+                        )
+            except Exception as e:
+                logger.error(f"Failed to generate menu from {week_dates[0]}: {e}")
+                result.error = e
+                if len(weeks) > 1:
+                    errors.append(f"献立生成に失敗: {week_dates[0].isoformat()}〜 - {e}")
+                continue
+
+            # Step 4.5: メイン食材の連続と最近の料理との重複を検証
+            # （警告のみ。空き日を作らないよう保存は行う。検証した献立は索引に
+            # 追加されるため、次の週の検証・候補選びにも反映される）
+            result.violations += index.check(items)
+            result.duplicates += similar_dishes.check(items)
+            result.items += items
+        return result
+
+    def _generate_parallel(
+        self,
+        dates_to_fill: list[date],
+        planned: list[dict],
+        history_data: list[dict],
+        history_summary: str,
+        errors: list[str],
+    ) -> list[GeneratedMenuItem]:
+        """
+        parallel_days 日ずつ並列にAIへ依頼し、結果をまとめて検証します。
 
-        # Step 5: Notionに保存
-        saved_count = 0
-        saved_dishes: list[ProposedDish] = []
+        各依頼には決まっている予定を渡しますが、並列に生成している隣の日の
+        献立は渡せません。そのため、まとめた献立の中でメイン食材が連続・
+        近似重複した日と生成できなかった日は、ほかの日の献立を予定として渡して
+        1回で作り直します。作り直しに失敗した場合は元の献立を残します。
 
-        for item in generated_items:
-            try:
-                dish = ProposedDish(
-                    id=None,
-                    dish_name=item.dish_name,
-                    date=item.date,
-                    category=item.category,
-                    status="提案",
-                    shopping_list=item.shopping_list,
+        Returns:
+            生成された献立アイテムのリスト
+        """
+        chunks = [
+            dates_to_fill[i : i + self.parallel_days]
+            for i in range(0, len(dates_to_fill), self.parallel_days)
+        ]
+
+        def generate(chunk: list[date]) -> list[GeneratedMenuItem]:
+            with span("weekly.generate_chunk", start=chunk[0].isoformat(), days=len(chunk)):
+                return self.openai.generate_weekly_menu(
+                    dates_to_fill=chunk,
+                    existing_plans=planned,
+                    recent_history=history_data,
+                    history_summary=history_summary,
                 )
-                page_id = self.notion.create_proposed_dish(dish)
-                dish.id = page_id
-                saved_dishes.append(dish)
-                saved_count += 1
-                logger.info(f"Saved dish: {item.dish_name} for {item.date}")
+
+        workers = max(1, min(MENU_PARALLEL_WORKERS, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, generate, chunk)
+                for chunk in chunks
+            ]
+
+        results: list[list[GeneratedMenuItem]] = []
+        first_error: Exception | None = None
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.append(future.result())
             except Exception as e:
-                logger.error(f"Failed to save dish {item.dish_name}: {e}")
-                errors.append(f"保存に失敗: {item.dish_name} - {e}")
+                logger.warning(f"Failed to generate menu for {chunk[0].isoformat()}: {e}")
+                first_error = first_error or e
+                results.append([])
+
+        items, repair = _merge_chunks(chunks, results)
+        set_attributes(parallel_chunks=len(chunks), repaired_days=len(repair))
+        if not repair:
+            return items
+
+        # Step 4.2: 連続・重複した日と生成できなかった日を、ほかの日を予定として作り直す
+        logger.info(f"Regenerating {len(repair)} days after merging parallel results")
+        repair_set = set(repair)
+        kept = [item for item in items if item.date not in repair_set]
+        try:
+            with span("weekly.repair", days=len(repair)):
+                fixed = self.openai.generate_weekly_menu(
+                    dates_to_fill=repair,
+                    existing_plans=planned + _as_plans(kept),
+                    recent_history=history_data,
+                    history_summary=history_summary,
+                )
+        except Exception as e:
+            if not items:
+                raise first_error or e
+            logger.error(f"Failed to regenerate conflicting days: {e}")
+            errors.append(f"献立の作り直しに失敗: {e}")
+            return items
+        fixed = [item for item in fixed if item.date in repair_set]
+        fixed_dates = {item.date for item in fixed}
+        # 作り直せなかった日は元の献立を残す
+        return sorted(
+            kept + fixed + [item for item in items if item.date in repair_set - fixed_dates],
+            key=lambda item: item.date,
+        )
 
-        # Step 6: Slackに通知（既存 + 新規生成分）
-        all_dishes = existing_dishes + saved_dishes
-        self._send_weekly_notification(all_dishes, start_date, end_date, errors)
+    def _draft_conflict(
+        self,
+        draft: MenuDraft,
+        dates_to_fill: list[date],
+        index: HistoryIndex,
+        similar_dishes: DishSimilarityIndex,
+    ) -> str | None:
+        """
+        下書きが最新の予定・実績でも使えるかを調べます。
 
-        return MenuGenerationResult(
-            generated_count=saved_count,
-            skipped=False,
-            skip_reason="",
-            errors=errors,
+        下書きの作成後に食べた料理とのメイン食材の連続・近似重複だけを見ます
+        （作成時点までの実績との関係は作成時と変わらないため）。
+
+        Returns:
+            使えない理由（使える場合はNone）
+        """
+        if sorted({item.date for item in draft.items}) != dates_to_fill:
+            return "dates to fill changed"
+        for item in draft.items:
+            if item.category in ROTATION_CATEGORIES:
+                main = main_ingredient_of(item.dish_name, item.shopping_list)
+                conflict = main and index.rotation_conflict(item.date, main)
+                if conflict and conflict > draft.created_on:
+                    return f"{item.dish_name} follows {main} eaten on {conflict.isoformat()}"
+            if item.category in DUPLICATE_CHECK_CATEGORIES:
+                similar = similar_dishes.query(item.dish_name)
+                if similar and similar.date and similar.date > draft.created_on:
+                    return f"{item.dish_name} is similar to {similar.dish_name} ({similar.date.isoformat()})"
+        return None
+
+    def _record_plan_state(self, days: list[date], dishes: list[ProposedDish]) -> None:
+        """
+        実行後の予定の指紋を記録します（plan_state がなければ何もしません）。
+
+        記録に失敗しても献立の生成は成功として扱い、次回の差分生成では
+        記録がない日として残します。
+        """
+        if self.plan_state is None:
+            return
+        try:
+            self.plan_state.save(fingerprint_days(days, dishes))
+        except Exception as e:
+            logger.warning(f"Failed to record plan state: {e}")
+
+    def _split_weeks(self, dates: list[date], start_date: date) -> list[list[date]]:
+        """
+        日付を開始日から7日ごとの週に分けます。
+
+        Args:
+            dates: 日付のリスト（昇順）
+            start_date: 期間の開始日
+
+        Returns:
+            週ごとの日付のリスト（日付がない週は含まない）
+        """
+        weeks: dict[int, list[date]] = {}
+        for day in dates:
+            weeks.setdefault((day - start_date).days // 7, []).append(day)
+        return [weeks[week] for week in sorted(weeks)]
+
+    @traced("weekly.save")
+    def _save_proposals(
+        self, items: list[GeneratedMenuItem], errors: list[str]
+    ) -> list[ProposedDish]:
+        """
+        生成した献立を「提案」として一括で保存します。
+
+        冪等キーは (日付, 区分, 料理名, 実行ID) から作るため、同じ実行の
+        リトライ・再実行では同じ提案を重ねて作成しません。実行IDが未設定の場合は
+        献立の週（月曜日の日付）を使います。
+
+        Returns:
+            保存に成功した献立（id 設定済み）
+        """
+        dishes = [
+            ProposedDish(
+                id=None,
+                dish_name=item.dish_name,
+                date=item.date,
+                category=item.category,
+                status="提案",
+                shopping_list=item.shopping_list,
+                idempotency_key=idempotency_key(
+                    "proposed",
+                    item.date.isoformat(),
+                    item.category,
+                    item.dish_name,
+                    run_id(_week_of(item.date)),
+                ),
+            )
+            for item in items
+        ]
+        set_attributes(items=len(dishes))
+        result = self.notion.bulk_create(dishes)
+        for error in result.errors:
+            errors.append(f"保存に失敗: {error}")
+        logger.info(f"Saved {result.created} dishes (failed: {result.failed})")
+        return [dish for dish in dishes if dish.id]
+
+    def _generate_with_catalog(
+        self,
+        dates_to_fill: list[date],
+        scorer: CandidateScorer,
+        existing_plans: list[dict],
+        history_data: list[dict],
+        errors: list[str],
+    ) -> list[GeneratedMenuItem]:
+        """
+        カタログの候補で枠を埋め、候補がない枠だけをAIで生成します。
+
+        AIの生成に失敗した場合もカタログの候補は返します。
+
+        Returns:
+            生成された献立アイテムのリスト
+        """
+        slots = [(d, category) for d in dates_to_fill for category in DAILY_MENU_STRUCTURE]
+        proposal = scorer.propose(slots)
+
+        items = [
+            GeneratedMenuItem(
+                date=day,
+                dish_name=dish.name,
+                category=dish.category,
+                shopping_list=dish.shopping_list,
+            )
+            for (day, _), dish in sorted(proposal.picks.items())
+        ]
+        logger.info(
+            f"Catalog ({len(scorer.catalog)} dishes) filled {len(items)} of {len(slots)} slots"
+        )
+        set_attributes(
+            catalog_size=len(scorer.catalog),
+            catalog_picks=len(items),
+            open_slots=len(proposal.open_slots),
         )
 
+        if proposal.open_slots:
+            planned = existing_plans + _as_plans(items)
+            try:
+                items += self.openai.fill_menu_slots(
+                    proposal.open_slots, planned, history_data
+                )
+            except Exception as e:
+                if not items:
+                    raise
+                logger.error(f"Failed to fill open slots: {e}")
+                errors.append(f"空き枠の生成に失敗: {e}")
+        return items
+
     def _get_next_week_range(self, reference_date: date) -> tuple[date, date]:
         """
         次週の月曜日から日曜日の範囲を取得します。
@@ -280,6 +765,7 @@ class WeeklyMenuGenerator:
                 dates_with_confirmed.add(dish.date)
         return dates_with_confirmed
 
+    @traced("weekly.notify")
     def _send_weekly_notification(
         self,
         dishes: list[ProposedDish],
@@ -316,3 +802,55 @@ class WeeklyMenuGenerator:
         except Exception as e:
             logger.error(f"Failed to send Slack notification: {e}")
             errors.append(f"Slack通知の送信に失敗: {e}")
+
+
+def _as_plans(items: list[GeneratedMenuItem]) -> list[dict]:
+    """生成した献立をAIに渡す「提案」の予定に変換します。"""
+    return [
+        {
+            "date": item.date.isoformat(),
+            "dish_name": item.dish_name,
+            "category": item.category,
+            "status": "提案",
+        }
+        for item in items
+    ]
+
+
+def _week_of(day: date) -> str:
+    """RUN_ID が未設定の場合の実行ID（献立の週の月曜日）"""
+    return f"week-{(day - timedelta(days=day.weekday())).isoformat()}"
+
+
+def _merge_chunks(
+    chunks: list[list[date]], results: list[list[GeneratedMenuItem]]
+) -> tuple[list[GeneratedMenuItem], list[date]]:
+    """
+    並列に生成した献立をまとめ、作り直す日を決めます。
+
+    依頼していない日付の献立と、同じ日・同じ区分の2品目は捨てます。
+
+    Args:
+        chunks: 依頼ごとの日付
+        results: 依頼ごとの生成結果
+
+    Returns:
+        (まとめた献立, 作り直す日（連続・近似重複した日と献立がない日）)
+    """
+    items: list[GeneratedMenuItem] = []
+    seen: set[tuple[date, str]] = set()
+    for chunk, generated in zip(chunks, results):
+        requested = set(chunk)
+        for item in generated:
+            key = (item.date, item.category)
+            if item.date in requested and key not in seen:
+                seen.add(key)
+                items.append(item)
+    items.sort(key=lambda item: item.date)
+
+    # まとめた献立の中だけで検証する（履歴・既存の予定との関係は依頼時に渡している）
+    repair = {v.date for v in HistoryIndex().check(items)}
+    repair |= {d.date for d in DishSimilarityIndex().check(items)}
+    generated_dates = {item.date for item in items}
+    repair |= {day for chunk in chunks for day in chunk if day not in generated_dates}
+    return items, sorted(repair)
@@ -0,0 +1,177 @@
+"""
+献立候補のスコアリング
+
+カタログの料理を区分ごとに NumPy の配列にまとめ、直近に食べた日・
+食べた回数・旬・調理時間の評価と、最近食べた料理・メイン食材の連続の
+除外を配列演算でまとめて行い、空いている枠に候補を割り当てます。
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+
+from src.catalog import SEASONS, CatalogDish, DishCatalog
+from src.data_generator import season_of
+from src.history_index import ROTATION_CATEGORIES, HistoryIndex
+
+# 同じ料理を選ばない日数（前後とも）
+AVOID_RECENT_DAYS = 14
+# これより前に食べた料理は「最近」の減点なし
+RECENCY_HORIZON_DAYS = 42
+# 優先する調理時間の上限（分）
+MAX_COOK_MINUTES = 30
+
+# 評価項目の重み
+DEFAULT_WEIGHTS = {
+    "recency": 1.0,  # 最後に食べてからの日数
+    "frequency": 0.6,  # よく食べる（好まれている）料理
+    "season": 0.8,  # 旬
+    "cook_time": 0.4,  # 調理時間が上限以内
+}
+
+# 同点の並びを週ごとに変えるための揺らぎの幅
+_JITTER = 0.05
+
+# 最後に食べた日がない料理の「日数」
+_NEVER = float(RECENCY_HORIZON_DAYS)
+
+
+@dataclass
+class WeekProposal:
+    """候補の割り当て結果"""
+
+    picks: dict[tuple[date, str], CatalogDish] = field(default_factory=dict)
+    open_slots: list[tuple[date, str]] = field(default_factory=list)  # 候補がない枠
+
+
+class _CategoryArrays:
+    """1区分の料理の特徴量"""
+
+    def __init__(self, dishes: list[CatalogDish], index: HistoryIndex):
+        self.dishes = dishes
+        self.names = [d.name for d in dishes]
+        self.mains = np.array([d.main_ingredient for d in dishes], dtype=object)
+        self.year_round = np.array([not d.seasons for d in dishes], dtype=bool)
+        self.seasons = {
+            season: np.array([season in d.seasons for d in dishes], dtype=bool)
+            for season in SEASONS
+        }
+        self.quick = np.array([d.cook_minutes <= MAX_COOK_MINUTES for d in dishes])
+        self.counts = np.array([index.count_served(n) for n in self.names], dtype=float)
+        last = [index.last_served(n) for n in self.names]
+        self.last = np.array(
+            [d.toordinal() if d else np.nan for d in last], dtype=float
+        )
+
+
+class CandidateScorer:
+    """
+    カタログから週の献立候補を組み立てます。
+
+    選んだ料理は HistoryIndex に追加するため、同じ週の続く枠の評価
+    （最近食べた料理・メイン食材の連続）にも反映されます。
+    """
+
+    def __init__(
+        self,
+        catalog: DishCatalog,
+        index: HistoryIndex,
+        weights: dict[str, float] | None = None,
+        seed: int | None = None,
+    ):
+        """
+        スコアラーを初期化します。
+
+        Args:
+            catalog: 料理カタログ
+            index: 実績・既存の予定の索引（選んだ料理が追加されます）
+            weights: 評価項目の重み（省略時は DEFAULT_WEIGHTS）
+            seed: 揺らぎの乱数シード（省略時は最初の枠の日付から決める）
+        """
+        self.catalog = catalog
+        self.index = index
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.seed = seed
+        self._arrays = {
+            category: _CategoryArrays(catalog.by_category(category), index)
+            for category in sorted({dish.category for dish in catalog})
+        }
+
+    def scores(self, day: date, category: str) -> np.ndarray:
+        """
+        その日・その区分の全候補のスコアを返します。
+
+        Args:
+            day: 対象日
+            category: 区分
+
+        Returns:
+            候補ごとのスコア（選べない候補は -inf）
+        """
+        arrays = self._arrays.get(category)
+        if arrays is None:
+            return np.array([])
+
+        distance = np.abs(day.toordinal() - arrays.last)
+        distance = np.where(np.isnan(distance), _NEVER, distance)
+        recency = np.clip(distance, 0, RECENCY_HORIZON_DAYS) / RECENCY_HORIZON_DAYS
+
+        max_count = arrays.counts.max(initial=0)
+        frequency = (
+            np.log1p(arrays.counts) / np.log1p(max_count) if max_count else arrays.counts
+        )
+        season = np.where(
+            arrays.seasons[season_of(day)], 1.0, np.where(arrays.year_round, 0.5, 0.0)
+        )
+
+        w = self.weights
+        score = (
+            w["recency"] * recency
+            + w["frequency"] * frequency
+            + w["season"] * season
+            + w["cook_time"] * arrays.quick
+        )
+
+        blocked = distance < AVOID_RECENT_DAYS
+        if category in ROTATION_CATEGORIES:
+            neighbours = self.index.main_ingredients_on(
+                date.fromordinal(day.toordinal() - 1)
+            ) | self.index.main_ingredients_on(date.fromordinal(day.toordinal() + 1))
+            if neighbours:
+                blocked |= np.isin(arrays.mains, list(neighbours))
+        return np.where(blocked, -np.inf, score)
+
+    def propose(self, slots: list[tuple[date, str]]) -> WeekProposal:
+        """
+        枠に候補を割り当てます。
+
+        Args:
+            slots: (日付, 区分) のリスト
+
+        Returns:
+            割り当て結果（候補がない枠は open_slots）
+        """
+        proposal = WeekProposal()
+        if not slots:
+            return proposal
+        slots = sorted(slots)
+        seed = self.seed if self.seed is not None else slots[0][0].toordinal()
+        rng = np.random.default_rng(seed)
+
+        for day, category in slots:
+            score = self.scores(day, category)
+            if score.size:
+                score = score + rng.uniform(0, _JITTER, size=score.size)
+            if not score.size or not np.isfinite(score.max()):
+                proposal.open_slots.append((day, category))
+                continue
+
+            i = int(np.argmax(score))
+            arrays = self._arrays[category]
+            dish = arrays.dishes[i]
+            proposal.picks[(day, category)] = dish
+            self.index.add(day, dish.name, dish.category, dish.shopping_list)
+            arrays.last[i] = np.fmax(arrays.last[i], day.toordinal())
+            arrays.counts[i] += 1
+        return proposal
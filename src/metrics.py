@@ -0,0 +1,509 @@
+"""
+メトリクス
+
+実行時間・外部API呼び出し・エラー数・未処理件数などを集計し、
+Prometheus の textfile collector 形式で書き出します。
+
+外部API呼び出しのメトリクスは、トレーシングのスパン（kind=CLIENT）から
+自動的に記録されます。
+"""
+
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from src.tracing import SPAN_KIND_CLIENT, Span, tracer
+
+if TYPE_CHECKING:
+    # 実行時にはクライアントSDKを読み込まない（起動時間を抑えるため）
+    from src.daily_reminder import DailyReminderResult
+    from src.menu_generator import MenuGenerationResult
+    from src.preprocessor import PreprocessingResult
+
+NAMESPACE = "dinner_aide"
+
+# 外部API呼び出しの所要時間のバケット（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = tuple[str, ...]
+
+
+class _Metric:
+    """メトリクスの基底クラス"""
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(
+                f"{self.name} expects labels {self.labels}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _format_labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> list[str]:
+        """サンプル行のリストを返します。"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """HELP/TYPE 行を含むテキストを返します。"""
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """単調増加するカウンター"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        カウンターを加算します。
+
+        Args:
+            amount: 加算量（0以上）
+            **labels: ラベル
+        """
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """現在値を返します。"""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """任意に上下する値"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        値を設定します。
+
+        Args:
+            value: 設定する値
+            **labels: ラベル
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels: str) -> float | None:
+        """現在値を返します（未設定ならNone）。"""
+        return self._values.get(self._key(labels))
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """値の分布（累積バケット・合計・件数）"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # ラベル -> (バケットごとの件数, 合計, 件数)
+        self._values: dict[LabelValues, tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        値を1件記録します。
+
+        Args:
+            value: 観測値
+            **labels: ラベル
+        """
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        """記録件数を返します。"""
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (k, (list(c), t, n)) for k, (c, t, n) in self._values.items()
+            )
+        lines = []
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = self._format_labels(key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {bucket_count}")
+            inf = self._format_labels(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """メトリクスの登録・出力を行うレジストリ"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labels != metric.labels:
+                raise ValueError(f"Metric {metric.name} already registered")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+        """カウンターを登録して返します（登録済みなら既存のものを返します）。"""
+        return self._register(Counter(name, help_text, labels))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Gauge:
+        """ゲージを登録して返します（登録済みなら既存のものを返します）。"""
+        return self._register(Gauge(name, help_text, labels))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """ヒストグラムを登録して返します（登録済みなら既存のものを返します）。"""
+        return self._register(  # type: ignore[return-value]
+            Histogram(name, help_text, labels, buckets)
+        )
+
+    def render(self) -> str:
+        """値が記録されたメトリクスを Prometheus のテキスト形式で返します。"""
+        blocks = [
+            m.render() for m in self._metrics.values() if m.samples()
+        ]
+        return "\n".join(blocks) + "\n" if blocks else ""
+
+    def write_textfile(self, path: str | Path) -> None:
+        """
+        Prometheus の textfile collector 用ファイルを書き出します。
+
+        収集中に書きかけのファイルが読まれないよう、
+        同じディレクトリの一時ファイルに書いてから置き換えます。
+
+        Args:
+            path: 出力先（*.prom）
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+registry = MetricsRegistry()
+
+CLIENT_CALLS = registry.counter(
+    f"{NAMESPACE}_client_calls_total",
+    "External API calls by service, method and outcome.",
+    ("service", "method", "outcome"),
+)
+CLIENT_CALL_DURATION = registry.histogram(
+    f"{NAMESPACE}_client_call_duration_seconds",
+    "External API call duration in seconds.",
+    ("service", "method"),
+)
+RUN_DURATION = registry.gauge(
+    f"{NAMESPACE}_run_duration_seconds",
+    "Duration of the last run in seconds.",
+    ("command",),
+)
+RUN_SUCCESS = registry.gauge(
+    f"{NAMESPACE}_run_success",
+    "Whether the last run exited with code 0 (1) or not (0).",
+    ("command",),
+)
+RUN_LAST_TIMESTAMP = registry.gauge(
+    f"{NAMESPACE}_run_last_timestamp_seconds",
+    "Unix time when the last run finished.",
+    ("command",),
+)
+UNPROCESSED_BACKLOG = registry.gauge(
+    f"{NAMESPACE}_unprocessed_backlog_records",
+    "Unprocessed raw actual inputs found at the start of preprocessing.",
+)
+PREPROCESS_PROCESSED = registry.gauge(
+    f"{NAMESPACE}_preprocess_processed_records",
+    "Raw inputs processed in the last run (PreprocessingResult.processed_count).",
+    ("flow",),
+)
+PREPROCESS_CREATED = registry.gauge(
+    f"{NAMESPACE}_preprocess_created_records",
+    "Structured history records created in the last run (PreprocessingResult.created_count).",
+    ("flow",),
+)
+PREPROCESS_ERRORS = registry.gauge(
+    f"{NAMESPACE}_preprocess_errors",
+    "Errors in the last preprocessing run (len(PreprocessingResult.errors)).",
+    ("flow",),
+)
+MENU_GENERATED = registry.gauge(
+    f"{NAMESPACE}_menu_generated_items",
+    "Menu items generated in the last run (MenuGenerationResult.generated_count).",
+)
+MENU_SKIPPED = registry.gauge(
+    f"{NAMESPACE}_menu_skipped",
+    "Whether menu generation was skipped in the last run (MenuGenerationResult.skipped).",
+)
+MENU_ERRORS = registry.gauge(
+    f"{NAMESPACE}_menu_errors",
+    "Errors in the last menu generation (len(MenuGenerationResult.errors)).",
+)
+REMINDER_SENT = registry.gauge(
+    f"{NAMESPACE}_reminder_sent",
+    "Whether the last daily reminder was sent (DailyReminderResult.sent).",
+)
+REMINDER_MENU_ITEMS = registry.gauge(
+    f"{NAMESPACE}_reminder_menu_items",
+    "Menu items included in the last daily reminder (DailyReminderResult.menu_count).",
+)
+MODEL_TASKS = registry.counter(
+    f"{NAMESPACE}_model_tasks_total",
+    "OpenAI tasks by task and the model tier that produced the result (fast / main).",
+    ("task", "tier"),
+)
+MODEL_ESCALATIONS = registry.counter(
+    f"{NAMESPACE}_model_escalations_total",
+    "OpenAI tasks escalated from the fast model to the main model, by reason.",
+    ("task", "reason"),
+)
+
+OPENAI_HEDGES = registry.counter(
+    f"{NAMESPACE}_openai_hedges_total",
+    "OpenAI requests sent twice because the first was slow, by which attempt answered first.",
+    ("task", "winner"),
+)
+
+CLIENT_RETRIES = registry.counter(
+    f"{NAMESPACE}_client_retries_total",
+    "External API calls retried after a transient error, by service and reason.",
+    ("service", "reason"),
+)
+
+CIRCUIT_OPENS = registry.counter(
+    f"{NAMESPACE}_circuit_opens_total",
+    "Times a service's circuit breaker opened after repeated failures.",
+    ("service",),
+)
+
+CIRCUIT_REJECTIONS = registry.counter(
+    f"{NAMESPACE}_circuit_rejections_total",
+    "External API calls failed fast because the service's circuit was open.",
+    ("service",),
+)
+
+NOTION_IDEMPOTENT_SKIPS = registry.counter(
+    f"{NAMESPACE}_notion_idempotent_skips_total",
+    "Notion page creates skipped because a page with the same idempotency key existed, "
+    "by table and where it was found (local index or Notion).",
+    ("table", "source"),
+)
+
+
+def _observe_span(span: Span) -> None:
+    """外部API呼び出しのスパンを呼び出し回数・所要時間として記録します。"""
+    if span.kind != SPAN_KIND_CLIENT:
+        return
+    service, _, method = span.name.partition(".")
+    status_code = span.attributes.get("status_code")
+    failed = bool(span.error) or (isinstance(status_code, int) and status_code >= 400)
+    CLIENT_CALLS.inc(
+        service=service, method=method, outcome="error" if failed else "success"
+    )
+    CLIENT_CALL_DURATION.observe(span.duration, service=service, method=method)
+
+
+tracer.add_listener(_observe_span)
+
+
+def record_preprocessing(result: "PreprocessingResult", flow: str) -> None:
+    """
+    PreprocessingResult を記録します。
+
+    Args:
+        result: プリプロセス結果
+        flow: 実行フロー（"weekly" / "daily"）
+    """
+    PREPROCESS_PROCESSED.set(result.processed_count, flow=flow)
+    PREPROCESS_CREATED.set(result.created_count, flow=flow)
+    PREPROCESS_ERRORS.set(len(result.errors), flow=flow)
+
+
+def record_menu_generation(result: "MenuGenerationResult") -> None:
+    """
+    MenuGenerationResult を記録します。
+
+    Args:
+        result: 献立生成結果
+    """
+    MENU_GENERATED.set(result.generated_count)
+    MENU_SKIPPED.set(int(result.skipped))
+    MENU_ERRORS.set(len(result.errors))
+
+
+def record_daily_reminder(result: "DailyReminderResult") -> None:
+    """
+    DailyReminderResult を記録します。
+
+    Args:
+        result: 日次リマインダーの結果
+    """
+    REMINDER_SENT.set(int(result.sent))
+    REMINDER_MENU_ITEMS.set(result.menu_count)
+    PREPROCESS_PROCESSED.set(result.preprocessed_count, flow="daily")
+    PREPROCESS_CREATED.set(result.structured_count, flow="daily")
+
+
+def record_model_task(task: str, tiered: bool, escalation: str | None) -> None:
+    """
+    OpenAI のタスクで使ったモデルの段階を記録します。
+
+    エスカレーション率は、タスクごとに model_escalations_total の合計を
+    model_tasks_total の合計で割って求めます。
+
+    Args:
+        task: タスク名（"structure" / "menu"）
+        tiered: 小さいモデルから依頼したか
+        escalation: 大きいモデルで依頼し直した理由（依頼し直していなければNone）
+    """
+    tier = "fast" if tiered and escalation is None else "main"
+    MODEL_TASKS.inc(task=task, tier=tier)
+    if escalation is not None:
+        MODEL_ESCALATIONS.inc(task=task, reason=escalation)
+
+
+def record_hedge(task: str, winner: str) -> None:
+    """
+    OpenAI への依頼をヘッジしたことを記録します。
+
+    Args:
+        task: タスク名（"structure" / "menu"）
+        winner: 先に有効な応答を返した依頼（"primary" / "hedge" / "none"）
+    """
+    OPENAI_HEDGES.inc(task=task, winner=winner)
+
+
+def record_retry(service: str, reason: str) -> None:
+    """
+    外部API呼び出しのリトライを記録します。
+
+    Args:
+        service: サービス名（"notion" / "openai" / "slack"）
+        reason: リトライした理由（"rate_limited" / "server_error" / "timeout" / "connection"）
+    """
+    CLIENT_RETRIES.inc(service=service, reason=reason)
+
+
+def record_circuit_open(service: str) -> None:
+    """サーキットブレーカーが開いたことを記録します。"""
+    CIRCUIT_OPENS.inc(service=service)
+
+
+def record_circuit_rejection(service: str) -> None:
+    """サーキットブレーカーが開いていて呼び出さなかったことを記録します。"""
+    CIRCUIT_REJECTIONS.inc(service=service)
+
+
+def record_idempotent_skip(table: str, source: str) -> None:
+    """
+    冪等キーが作成済みでページを作成しなかったことを記録します。
+
+    Args:
+        table: テーブル（"proposed" / "structured"）
+        source: 作成済みと判断した情報源（"index": 書き込みインデックス / "notion": 問い合わせ）
+    """
+    NOTION_IDEMPOTENT_SKIPS.inc(table=table, source=source)
+
+
+def record_run(command: str, seconds: float, exit_code: int) -> None:
+    """
+    コマンドの実行時間と成否を記録します。
+
+    Args:
+        command: サブコマンド名
+        seconds: 実行時間
+        exit_code: 終了コード
+    """
+    RUN_DURATION.set(seconds, command=command)
+    RUN_SUCCESS.set(int(exit_code == 0), command=command)
+    RUN_LAST_TIMESTAMP.set(time.time(), command=command)
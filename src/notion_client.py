@@ -7,21 +7,73 @@ Notion API クライアント
 - Structured_Actual_History: 実績履歴テーブル
 """
 
-from dataclasses import dataclass
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+import httpx
 from notion_client import Client
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+from notion_client.helpers import iterate_paginated_api
 
 from config.settings import (
     DB_ID_PROPOSED,
     DB_ID_RAW,
     DB_ID_STRUCTURED,
+    NOTION_IDEMPOTENCY_PROPERTY,
     NOTION_TOKEN,
+    NOTION_WRITE_RATE,
+    NOTION_WRITE_WORKERS,
+    WRITE_INDEX_PATH,
 )
+from src.idempotency import WriteIndex
+from src.metrics import record_idempotent_skip
+from src.rate_limiter import RateLimiter
+from src.resilience import Failure, ServiceGuard, classify_status
+from src.tracing import SPAN_KIND_CLIENT, traced
 
+if TYPE_CHECKING:
+    from src.history_store import HistoryColumns
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+def _classify_error(error: Exception) -> Failure | None:
+    """
+    Notion API の例外を分類します。
+
+    Args:
+        error: 呼び出しで発生した例外
+
+    Returns:
+        429・5xx・タイムアウト・接続エラーなら Failure、それ以外はNone
+    """
+    if isinstance(error, RequestTimeoutError | httpx.TimeoutException):
+        return Failure("timeout")
+    if isinstance(error, HTTPResponseError):
+        return classify_status(error.status, error.headers.get("retry-after"))
+    if isinstance(error, httpx.TransportError):
+        return Failure("connection")
+    return None
+
+
+# Notion API 呼び出しのリトライとサーキットブレーカー
+_guard = ServiceGuard("notion", _classify_error)
+
+
+def _table_of(record: "NotionRecord") -> str:
+    """メトリクスのラベルに使うテーブル名"""
+    if isinstance(record, ProposedDish):
+        return "proposed"
+    if isinstance(record, StructuredActualHistory):
+        return "structured"
+    return "raw"
+
+
+@dataclass(slots=True)
 class ProposedDish:
     """提案メニューテーブルのレコード"""
 
@@ -31,9 +83,11 @@ class ProposedDish:
     category: str  # 区分: 主菜/副菜/汁物/その他
     status: str  # ステータス: 提案/確定/外食・予定あり
     shopping_list: str = ""  # 買い物リスト
+    last_edited: str = ""  # 最終更新日時（Notion の last_edited_time）
+    idempotency_key: str = ""  # 冪等キー（同じキーのページは一度だけ作成）
 
 
-@dataclass
+@dataclass(slots=True)
 class RawActualInput:
     """実績入力テーブルのレコード"""
 
@@ -43,7 +97,7 @@ class RawActualInput:
     is_processed: bool = False  # 処理済みフラグ
 
 
-@dataclass
+@dataclass(slots=True)
 class StructuredActualHistory:
     """実績履歴テーブルのレコード"""
 
@@ -51,6 +105,20 @@ class StructuredActualHistory:
     dish_name: str  # 構造化された料理名
     date: date  # 食べた日
     category: str  # 区分: 主菜/副菜/その他
+    idempotency_key: str = ""  # 冪等キー（同じキーのページは一度だけ作成）
+
+
+NotionRecord = ProposedDish | RawActualInput | StructuredActualHistory
+
+
+@dataclass
+class BulkWriteResult:
+    """一括書き込みの結果"""
+
+    created: int = 0  # 作成に成功した件数
+    failed: int = 0  # 作成に失敗した件数
+    skipped: int = 0  # 冪等キーが作成済みとして記録されていて飛ばした件数
+    errors: list[str] = field(default_factory=list)  # エラーメッセージリスト
 
 
 class NotionClientWrapper:
@@ -59,6 +127,9 @@ class NotionClientWrapper:
     3つのデータベースへのCRUD操作を提供します。
     """
 
+    # 作成済みのページの冪等キー（WRITE_INDEX_PATH が空ならNone）
+    write_index: WriteIndex | None = None
+
     def __init__(self, token: str | None = None):
         """
         クライアントを初期化します。
@@ -77,10 +148,14 @@ class NotionClientWrapper:
         self.db_raw = DB_ID_RAW
         self.db_structured = DB_ID_STRUCTURED
 
+        if WRITE_INDEX_PATH:
+            self.write_index = WriteIndex(WRITE_INDEX_PATH)
+
     # =========================================================================
     # Proposed Dishes (提案メニューテーブル) Operations
     # =========================================================================
 
+    @traced("notion.get_proposed_dishes_by_date_range", kind=SPAN_KIND_CLIENT)
     def get_proposed_dishes_by_date_range(
         self, start_date: date, end_date: date
     ) -> list[ProposedDish]:
@@ -94,46 +169,26 @@ class NotionClientWrapper:
         Returns:
             提案メニューのリスト
         """
-        try:
-            # Notion SDK v2.x では query_paginated を使用
-            pages = list(self.client.databases.query_paginated(
-                database_id=self.db_proposed,
-                filter={
-                    "and": [
-                        {
-                            "property": "日付",
-                            "date": {"on_or_after": start_date.isoformat()},
-                        },
-                        {
-                            "property": "日付",
-                            "date": {"on_or_before": end_date.isoformat()},
-                        },
-                    ]
-                },
-                sorts=[{"property": "日付", "direction": "ascending"}],
-            ))
-        except AttributeError:
-            # フォールバック: query メソッドが存在する場合
-            response = self.client.databases.query(
-                database_id=self.db_proposed,
-                filter={
-                    "and": [
-                        {
-                            "property": "日付",
-                            "date": {"on_or_after": start_date.isoformat()},
-                        },
-                        {
-                            "property": "日付",
-                            "date": {"on_or_before": end_date.isoformat()},
-                        },
-                    ]
-                },
-                sorts=[{"property": "日付", "direction": "ascending"}],
-            )
-            pages = response["results"]
+        pages = list(self._query_database(
+            self.db_proposed,
+            filter={
+                "and": [
+                    {
+                        "property": "日付",
+                        "date": {"on_or_after": start_date.isoformat()},
+                    },
+                    {
+                        "property": "日付",
+                        "date": {"on_or_before": end_date.isoformat()},
+                    },
+                ]
+            },
+            sorts=[{"property": "日付", "direction": "ascending"}],
+        ))
 
         return [self._parse_proposed_dish(page) for page in pages]
 
+    @traced("notion.get_proposed_dishes_by_date", kind=SPAN_KIND_CLIENT)
     def get_proposed_dishes_by_date(self, target_date: date) -> list[ProposedDish]:
         """
         指定した日付の提案メニューを取得します。
@@ -144,22 +199,14 @@ class NotionClientWrapper:
         Returns:
             提案メニューのリスト
         """
-        try:
-            # Notion SDK v2.x では query_paginated を使用
-            pages = list(self.client.databases.query_paginated(
-                database_id=self.db_proposed,
-                filter={"property": "日付", "date": {"equals": target_date.isoformat()}},
-            ))
-        except AttributeError:
-            # フォールバック: query メソッドが存在する場合
-            response = self.client.databases.query(
-                database_id=self.db_proposed,
-                filter={"property": "日付", "date": {"equals": target_date.isoformat()}},
-            )
-            pages = response["results"]
+        pages = list(self._query_database(
+            self.db_proposed,
+            filter={"property": "日付", "date": {"equals": target_date.isoformat()}},
+        ))
 
         return [self._parse_proposed_dish(page) for page in pages]
 
+    @traced("notion.create_proposed_dish", kind=SPAN_KIND_CLIENT)
     def create_proposed_dish(self, dish: ProposedDish) -> str:
         """
         新しい提案メニューを作成します。
@@ -168,8 +215,12 @@ class NotionClientWrapper:
             dish: 作成する料理データ
 
         Returns:
-            作成されたページのID
+            作成されたページのID（冪等キーが作成済みならそのページのID）
         """
+        return self._written_page(dish) or self._create_page(dish)["id"]
+
+    def _build_proposed_properties(self, dish: ProposedDish) -> dict[str, Any]:
+        """ProposedDish を作成用のプロパティに変換"""
         properties: dict[str, Any] = {
             "料理名": {"title": [{"text": {"content": dish.dish_name}}]},
             "日付": {"date": {"start": dish.date.isoformat()}},
@@ -182,13 +233,9 @@ class NotionClientWrapper:
                 "rich_text": [{"text": {"content": dish.shopping_list}}]
             }
 
-        response = self.client.pages.create(
-            parent={"database_id": self.db_proposed},
-            properties=properties,
-        )
-
-        return response["id"]
+        return self._with_idempotency_key(properties, dish.idempotency_key)
 
+    @traced("notion.update_proposed_dish_status", kind=SPAN_KIND_CLIENT)
     def update_proposed_dish_status(self, page_id: str, new_status: str) -> None:
         """
         提案メニューのステータスを更新します。
@@ -197,11 +244,13 @@ class NotionClientWrapper:
             page_id: 更新するページのID
             new_status: 新しいステータス
         """
-        self.client.pages.update(
+        _guard.call(
+            self.client.pages.update,
             page_id=page_id,
             properties={"ステータス": {"multi_select": [{"name": new_status}]}},
         )
 
+    @traced("notion.delete_proposed_dishes_by_date_range", kind=SPAN_KIND_CLIENT)
     def delete_proposed_dishes_by_date_range(
         self, start_date: date, end_date: date, status_filter: str = "提案"
     ) -> tuple[int, int]:
@@ -220,12 +269,22 @@ class NotionClientWrapper:
         dishes = self.get_proposed_dishes_by_date_range(start_date, end_date)
 
         # 指定ステータスのみをフィルタ
-        target_dishes = [d for d in dishes if d.status == status_filter]
+        return self.delete_proposed_dishes([d for d in dishes if d.status == status_filter])
+
+    def delete_proposed_dishes(self, dishes: Iterable[ProposedDish]) -> tuple[int, int]:
+        """
+        取得済みの提案メニューを削除します。
+
+        Args:
+            dishes: 削除する提案メニュー
 
+        Returns:
+            (削除成功数, 削除失敗数)
+        """
         success = 0
         failed = 0
 
-        for dish in target_dishes:
+        for dish in dishes:
             if dish.id and self._archive_page(dish.id):
                 success += 1
             else:
@@ -280,12 +339,15 @@ class NotionClientWrapper:
             category=category,
             status=status,
             shopping_list=shopping_list,
+            last_edited=page.get("last_edited_time", ""),
+            idempotency_key=self._parse_idempotency_key(props),
         )
 
     # =========================================================================
     # Raw Actual Input (実績入力テーブル) Operations
     # =========================================================================
 
+    @traced("notion.get_unprocessed_raw_inputs", kind=SPAN_KIND_CLIENT)
     def get_unprocessed_raw_inputs(self) -> list[RawActualInput]:
         """
         処理済みでない実績入力を全取得します。
@@ -293,24 +355,15 @@ class NotionClientWrapper:
         Returns:
             未処理の実績入力リスト
         """
-        try:
-            # Notion SDK v2.x では query_paginated を使用
-            pages = list(self.client.databases.query_paginated(
-                database_id=self.db_raw,
-                filter={"property": "処理済み", "checkbox": {"equals": False}},
-                sorts=[{"property": "日付", "direction": "ascending"}],
-            ))
-        except AttributeError:
-            # フォールバック: query メソッドが存在する場合
-            response = self.client.databases.query(
-                database_id=self.db_raw,
-                filter={"property": "処理済み", "checkbox": {"equals": False}},
-                sorts=[{"property": "日付", "direction": "ascending"}],
-            )
-            pages = response["results"]
+        pages = list(self._query_database(
+            self.db_raw,
+            filter={"property": "処理済み", "checkbox": {"equals": False}},
+            sorts=[{"property": "日付", "direction": "ascending"}],
+        ))
 
         return [self._parse_raw_input(page) for page in pages]
 
+    @traced("notion.mark_raw_input_as_processed", kind=SPAN_KIND_CLIENT)
     def mark_raw_input_as_processed(self, page_id: str) -> None:
         """
         実績入力を処理済みにマークします。
@@ -318,11 +371,20 @@ class NotionClientWrapper:
         Args:
             page_id: 更新するページのID
         """
-        self.client.pages.update(
+        _guard.call(
+            self.client.pages.update,
             page_id=page_id,
             properties={"処理済み": {"checkbox": True}},
         )
 
+    def _build_raw_input_properties(self, raw: RawActualInput) -> dict[str, Any]:
+        """RawActualInput を作成用のプロパティに変換"""
+        return {
+            "食べたもの": {"title": [{"text": {"content": raw.food_eaten}}]},
+            "日付": {"date": {"start": raw.date.isoformat()}},
+            "処理済み": {"checkbox": raw.is_processed},
+        }
+
     def _parse_raw_input(self, page: dict[str, Any]) -> RawActualInput:
         """Notionページデータを RawActualInput に変換"""
         props = page["properties"]
@@ -352,6 +414,7 @@ class NotionClientWrapper:
     # Structured Actual History (実績履歴テーブル) Operations
     # =========================================================================
 
+    @traced("notion.get_structured_history_by_date_range", kind=SPAN_KIND_CLIENT)
     def get_structured_history_by_date_range(
         self, start_date: date, end_date: date
     ) -> list[StructuredActualHistory]:
@@ -365,46 +428,57 @@ class NotionClientWrapper:
         Returns:
             実績履歴のリスト
         """
-        try:
-            # Notion SDK v2.x では query_paginated を使用
-            pages = list(self.client.databases.query_paginated(
-                database_id=self.db_structured,
-                filter={
-                    "and": [
-                        {
-                            "property": "日付",
-                            "date": {"on_or_after": start_date.isoformat()},
-                        },
-                        {
-                            "property": "日付",
-                            "date": {"on_or_before": end_date.isoformat()},
-                        },
-                    ]
-                },
-                sorts=[{"property": "日付", "direction": "descending"}],
-            ))
-        except AttributeError:
-            # フォールバック: query メソッドが存在する場合
-            response = self.client.databases.query(
-                database_id=self.db_structured,
-                filter={
-                    "and": [
-                        {
-                            "property": "日付",
-                            "date": {"on_or_after": start_date.isoformat()},
-                        },
-                        {
-                            "property": "日付",
-                            "date": {"on_or_before": end_date.isoformat()},
-                        },
-                    ]
-                },
-                sorts=[{"property": "日付", "direction": "descending"}],
-            )
-            pages = response["results"]
+        return [
+            self._parse_structured_history(page)
+            for page in self._query_structured_history(start_date, end_date)
+        ]
+
+    @traced("notion.get_structured_history_columns", kind=SPAN_KIND_CLIENT)
+    def get_structured_history_columns(
+        self, start_date: date, end_date: date
+    ) -> "HistoryColumns":
+        """
+        指定した日付範囲の実績履歴を、列に詰めたコンパクトな形で取得します。
 
-        return [self._parse_structured_history(page) for page in pages]
+        ページは1件ずつ変換して列に追加するため、レスポンスやレコードの
+        リストを全件分保持しません。年単位の履歴を読む集計向けです。
+
+        Args:
+            start_date: 開始日
+            end_date: 終了日
+
+        Returns:
+            実績履歴の列（StructuredActualHistory のシーケンス）
+        """
+        from src.history_store import HistoryColumns
 
+        columns = HistoryColumns()
+        for page in self._query_structured_history(start_date, end_date):
+            columns.append(self._parse_structured_history(page))
+        return columns
+
+    def _query_structured_history(
+        self, start_date: date, end_date: date
+    ) -> Iterator[dict[str, Any]]:
+        """実績履歴を日付の新しい順にクエリします。"""
+        return self._query_database(
+            self.db_structured,
+            filter={
+                "and": [
+                    {
+                        "property": "日付",
+                        "date": {"on_or_after": start_date.isoformat()},
+                    },
+                    {
+                        "property": "日付",
+                        "date": {"on_or_before": end_date.isoformat()},
+                    },
+                ]
+            },
+            sorts=[{"property": "日付", "direction": "descending"}],
+        )
+
+    @traced("notion.create_structured_history", kind=SPAN_KIND_CLIENT)
     def create_structured_history(self, history: StructuredActualHistory) -> str:
         """
         新しい実績履歴を作成します。
@@ -413,20 +487,20 @@ class NotionClientWrapper:
             history: 作成する履歴データ
 
         Returns:
-            作成されたページのID
+            作成されたページのID（冪等キーが作成済みならそのページのID）
         """
+        return self._written_page(history) or self._create_page(history)["id"]
+
+    def _build_structured_properties(
+        self, history: StructuredActualHistory
+    ) -> dict[str, Any]:
+        """StructuredActualHistory を作成用のプロパティに変換"""
         properties = {
             "料理名": {"title": [{"text": {"content": history.dish_name}}]},
             "日付": {"date": {"start": history.date.isoformat()}},
             "区分": {"multi_select": [{"name": history.category}]},
         }
-
-        response = self.client.pages.create(
-            parent={"database_id": self.db_structured},
-            properties=properties,
-        )
-
-        return response["id"]
+        return self._with_idempotency_key(properties, history.idempotency_key)
 
     def _parse_structured_history(
         self, page: dict[str, Any]
@@ -456,12 +530,220 @@ class NotionClientWrapper:
             dish_name=dish_name,
             date=history_date,
             category=category,
+            idempotency_key=self._parse_idempotency_key(props),
+        )
+
+    # =========================================================================
+    # Bulk Operations
+    # =========================================================================
+
+    @traced("notion.bulk_create", kind=SPAN_KIND_CLIENT)
+    def bulk_create(
+        self,
+        records: Iterable[NotionRecord],
+        rate_per_second: float | None = None,
+        max_workers: int | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> BulkWriteResult:
+        """
+        複数のレコードを並列・レート制限付きで作成します。
+
+        レコードの型に応じて書き込み先のデータベースを選択します。
+        作成に成功したレコードには id が設定されます。
+        冪等キーが作成済みとして記録されているレコードはリクエストせずに飛ばし、
+        記録されているページの id を設定します。
+
+        Args:
+            records: 作成するレコード（イテレータ可）
+            rate_per_second: 1秒あたりの最大リクエスト数（省略時は設定値）
+            max_workers: 並列数（省略時は設定値）
+            on_progress: 1件完了するたびに (成功数の増分, 失敗数の増分) で呼ばれる
+
+        Returns:
+            一括書き込みの結果
+        """
+        limiter = RateLimiter(
+            rate_per_second if rate_per_second is not None else NOTION_WRITE_RATE,
+            burst=max_workers or NOTION_WRITE_WORKERS,
+        )
+        workers = max_workers or NOTION_WRITE_WORKERS
+        result = BulkWriteResult()
+
+        def create(record: NotionRecord) -> None:
+            response = self._create_page(record)
+            record.id = response["id"]
+            if isinstance(record, ProposedDish):
+                record.last_edited = response.get("last_edited_time", "")
+
+        def collect(done: set[Future], pending: dict[Future, NotionRecord]) -> None:
+            for future in done:
+                record = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    result.created += 1
+                else:
+                    result.failed += 1
+                    result.errors.append(f"{record.date}: {error}")
+                    logger.error(f"Failed to create page for {record}: {error}")
+                if on_progress:
+                    on_progress(int(error is None), int(error is not None))
+
+        pending: dict[Future, NotionRecord] = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for record in records:
+                if page_id := self._written_page(record):
+                    record.id = page_id
+                    result.skipped += 1
+                    if on_progress:
+                        on_progress(1, 0)
+                    continue
+                # 未完了のリクエストを並列数の2倍までに抑え、巨大な入力でもメモリを抑える
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done, pending)
+                limiter.acquire()
+                pending[executor.submit(create, record)] = record
+            done, _ = wait(pending)
+            collect(done, pending)
+
+        return result
+
+    def _build_create_request(
+        self, record: NotionRecord
+    ) -> tuple[str, dict[str, Any]]:
+        """レコードの型に応じて (database_id, properties) を返す"""
+        if isinstance(record, ProposedDish):
+            return self.db_proposed, self._build_proposed_properties(record)
+        if isinstance(record, StructuredActualHistory):
+            return self.db_structured, self._build_structured_properties(record)
+        if isinstance(record, RawActualInput):
+            return self.db_raw, self._build_raw_input_properties(record)
+        raise TypeError(f"Unsupported record type: {type(record).__name__}")
+
+    def _create_page(self, record: NotionRecord) -> dict[str, Any]:
+        """
+        レコードのページを作成し、冪等キーを書き込みインデックスに記録します。
+
+        冪等キーを Notion のプロパティに保存している場合は、タイムアウトなどで
+        結果が分からなかった作成もリトライします（リトライの前に、そのキーの
+        ページが作成済みかを確認します）。
+
+        Args:
+            record: 作成するレコード
+
+        Returns:
+            作成した（または作成済みだった）ページ
+        """
+        database_id, properties = self._build_create_request(record)
+        key = getattr(record, "idempotency_key", "")
+        verifiable = bool(key and NOTION_IDEMPOTENCY_PROPERTY)
+        attempts = 0
+
+        def create(**kwargs: Any) -> dict[str, Any]:
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1 and verifiable:
+                page = self._find_page_by_key(database_id, key)
+                if page is not None:
+                    logger.info(f"Page for idempotency key {key} already exists: {page['id']}")
+                    record_idempotent_skip(_table_of(record), "notion")
+                    return page
+            return self.client.pages.create(**kwargs)
+
+        response = _guard.call(
+            create,
+            idempotent=verifiable,
+            parent={"database_id": database_id},
+            properties=properties,
+        )
+        if key and self.write_index:
+            self.write_index.add(key, response["id"], database_id)
+        return response
+
+    def _written_page(self, record: NotionRecord) -> str | None:
+        """冪等キーが作成済みとして記録されていれば、そのページIDを返す"""
+        key = getattr(record, "idempotency_key", "")
+        if not key or not self.write_index:
+            return None
+        page_id = self.write_index.get(key)
+        if page_id:
+            logger.info(f"Skipping {record} (idempotency key {key} already written)")
+            record_idempotent_skip(_table_of(record), "index")
+        return page_id
+
+    def _find_page_by_key(self, database_id: str, key: str) -> dict[str, Any] | None:
+        """冪等キーのプロパティが一致するページを返す（なければNone）"""
+        response = self.client.databases.query(
+            database_id=database_id,
+            filter={"property": NOTION_IDEMPOTENCY_PROPERTY, "rich_text": {"equals": key}},
+            page_size=1,
         )
+        results = response.get("results", [])
+        return results[0] if results else None
+
+    @staticmethod
+    def _with_idempotency_key(properties: dict[str, Any], key: str) -> dict[str, Any]:
+        """冪等キーのプロパティを追加する（プロパティ名が未設定なら追加しない）"""
+        if key and NOTION_IDEMPOTENCY_PROPERTY:
+            properties[NOTION_IDEMPOTENCY_PROPERTY] = {
+                "rich_text": [{"text": {"content": key}}]
+            }
+        return properties
+
+    @staticmethod
+    def _parse_idempotency_key(props: dict[str, Any]) -> str:
+        """冪等キーのプロパティを読む（未設定・空なら空文字列）"""
+        if not NOTION_IDEMPOTENCY_PROPERTY:
+            return ""
+        texts = props.get(NOTION_IDEMPOTENCY_PROPERTY, {}).get("rich_text") or []
+        return texts[0]["plain_text"] if texts else ""
+
+    def iter_records(self, table: str) -> Iterator[NotionRecord]:
+        """
+        テーブルの全レコードを日付順にページ単位で取得しながら返します。
+
+        Args:
+            table: テーブル（"structured", "proposed", "raw"）
+
+        Returns:
+            レコードのイテレータ
+        """
+        sources = {
+            "structured": (self.db_structured, self._parse_structured_history),
+            "proposed": (self.db_proposed, self._parse_proposed_dish),
+            "raw": (self.db_raw, self._parse_raw_input),
+        }
+        database_id, parse = sources[table]
+        for page in self._query_database(
+            database_id, sorts=[{"property": "日付", "direction": "ascending"}]
+        ):
+            yield parse(page)
 
     # =========================================================================
     # Utility Methods
     # =========================================================================
 
+    def _query_database(
+        self, database_id: str, **kwargs: Any
+    ) -> Iterator[dict[str, Any]]:
+        """
+        データベースをクエリし、全ページを順に返します。
+
+        Notion APIは1回のレスポンスで最大100件しか返さないため、
+        next_cursor を辿って全件を取得します。
+
+        Args:
+            database_id: データベースID
+            **kwargs: filter, sorts などのクエリパラメータ
+
+        Returns:
+            ページデータのイテレータ
+        """
+        def query(**params: Any) -> Any:
+            return _guard.call(self.client.databases.query, **params)
+
+        return iterate_paginated_api(query, database_id=database_id, **kwargs)
+
     def get_database_url(self, database_id: str) -> str:
         """
         データベースのNotionURLを生成します。
@@ -484,6 +766,7 @@ class NotionClientWrapper:
         """実績入力テーブルのURLを取得"""
         return self.get_database_url(self.db_raw)
 
+    @traced("notion.test_connection", kind=SPAN_KIND_CLIENT)
     def test_connection(self) -> bool:
         """
         Notion APIへの接続をテストします。
@@ -493,9 +776,9 @@ class NotionClientWrapper:
         """
         try:
             # 各データベースへのアクセスをテスト
-            self.client.databases.retrieve(database_id=self.db_proposed)
-            self.client.databases.retrieve(database_id=self.db_raw)
-            self.client.databases.retrieve(database_id=self.db_structured)
+            _guard.call(self.client.databases.retrieve, database_id=self.db_proposed)
+            _guard.call(self.client.databases.retrieve, database_id=self.db_raw)
+            _guard.call(self.client.databases.retrieve, database_id=self.db_structured)
             return True
         except Exception:
             return False
@@ -514,18 +797,11 @@ class NotionClientWrapper:
         Returns:
             ページIDのリスト
         """
-        try:
-            pages = list(self.client.databases.query_paginated(
-                database_id=database_id,
-            ))
-        except AttributeError:
-            response = self.client.databases.query(
-                database_id=database_id,
-            )
-            pages = response["results"]
+        pages = self._query_database(database_id)
 
         return [page["id"] for page in pages]
 
+    @traced("notion.archive_page", kind=SPAN_KIND_CLIENT)
     def _archive_page(self, page_id: str) -> bool:
         """
         ページをアーカイブ（削除）します。
@@ -537,10 +813,13 @@ class NotionClientWrapper:
             成功ならTrue
         """
         try:
-            self.client.pages.update(page_id=page_id, archived=True)
-            return True
+            _guard.call(self.client.pages.update, page_id=page_id, archived=True)
         except Exception:
             return False
+        # 同じ冪等キーのページを作り直せるよう記録を消す
+        if self.write_index:
+            self.write_index.discard_pages([page_id])
+        return True
 
     def reset_proposed_dishes(self) -> tuple[int, int]:
         """
@@ -616,6 +895,7 @@ class NotionClientWrapper:
     # Test Data Creation Methods (検証環境専用)
     # =========================================================================
 
+    @traced("notion.create_test_raw_input", kind=SPAN_KIND_CLIENT)
     def create_test_raw_input(self, food_eaten: str, eaten_date: date) -> str:
         """
         テスト用の実績入力データを作成します。
@@ -627,15 +907,13 @@ class NotionClientWrapper:
         Returns:
             作成されたページのID
         """
-        properties = {
-            "食べたもの": {"title": [{"text": {"content": food_eaten}}]},
-            "日付": {"date": {"start": eaten_date.isoformat()}},
-            "処理済み": {"checkbox": False},
-        }
+        raw = RawActualInput(id=None, date=eaten_date, food_eaten=food_eaten)
 
-        response = self.client.pages.create(
+        response = _guard.call(
+            self.client.pages.create,
+            idempotent=False,
             parent={"database_id": self.db_raw},
-            properties=properties,
+            properties=self._build_raw_input_properties(raw),
         )
 
         return response["id"]
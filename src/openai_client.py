@@ -4,21 +4,61 @@ OpenAI API クライアント
 献立生成と実績データの構造化変換を担当します。
 """
 
+import contextvars
 import json
 import logging
+from collections.abc import Callable, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import date
+from typing import Any, TypeVar
 
+import openai
 from openai import OpenAI
 
-logger = logging.getLogger(__name__)
-
 from config.settings import (
     DISH_CATEGORIES,
     OPENAI_API_KEY,
+    OPENAI_HEDGE_AFTER_SECONDS,
+    OPENAI_MENU_MODEL,
     OPENAI_MODEL,
+    OPENAI_STRUCTURE_MODEL,
+    OPENAI_TIMEOUT_SECONDS,
     USER_DIETARY_PREFERENCES,
 )
+from src.deadline import remaining, timeout_for
+from src.ingredients import fold
+from src.metrics import record_hedge, record_model_task
+from src.resilience import Failure, ServiceGuard, classify_status
+from src.tracing import SPAN_KIND_CLIENT, set_attributes, traced
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _classify_error(error: Exception) -> Failure | None:
+    """
+    OpenAI API の例外を分類します。
+
+    Args:
+        error: 呼び出しで発生した例外
+
+    Returns:
+        429・5xx・タイムアウト・接続エラーなら Failure、それ以外はNone
+    """
+    # APITimeoutError は APIConnectionError のサブクラスなので先に判定する
+    if isinstance(error, openai.APITimeoutError):
+        return Failure("timeout")
+    if isinstance(error, openai.APIConnectionError):
+        return Failure("connection")
+    if isinstance(error, openai.APIStatusError):
+        return classify_status(error.status_code, error.response.headers.get("retry-after"))
+    return None
+
+
+# OpenAI API 呼び出しのリトライとサーキットブレーカー
+_guard = ServiceGuard("openai", _classify_error)
 
 
 @dataclass
@@ -44,32 +84,63 @@ class OpenAIClientWrapper:
     OpenAI APIとの通信を行うラッパークラス。
     - 実績データの構造化変換
     - 献立の生成
+
+    タスクごとのモデル（structure_model / menu_model）で先に依頼し、結果の
+    確認に通らなかった場合だけ model（大きいモデル）で依頼し直します。
+
+    各依頼のタイムアウトは実行の締め切り（src.deadline）までの残り時間で
+    打ち切り、hedge_after 秒を過ぎても応答がなければ同じ依頼をもう1件送ります。
     """
 
-    def __init__(self, api_key: str | None = None, model: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str | None = None,
+        structure_model: str | None = None,
+        menu_model: str | None = None,
+        timeout: float | None = None,
+        hedge_after: float | None = None,
+    ):
         """
         クライアントを初期化します。
 
         Args:
             api_key: OpenAI API キー。省略時は環境変数から取得。
-            model: 使用するモデル。省略時は設定から取得。
+            model: 使用するモデル（依頼し直す先）。省略時は設定から取得。
+            structure_model: 実績の構造化に最初に使うモデル。省略時は設定から取得。
+            menu_model: 献立の生成に最初に使うモデル。省略時は設定から取得。
+            timeout: 1回の依頼のタイムアウト（秒）。省略時は設定から取得。
+            hedge_after: もう1件送るまでの秒数（0ならヘッジしない）。省略時は設定から取得。
         """
         self.api_key = api_key or OPENAI_API_KEY
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
 
-        self.client = OpenAI(api_key=self.api_key)
+        self.timeout = timeout or OPENAI_TIMEOUT_SECONDS
+        self.hedge_after = OPENAI_HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after
+        # リトライは src.resilience で行う（予算とサーキットブレーカーを共有するため）
+        self.client = OpenAI(api_key=self.api_key, timeout=self.timeout, max_retries=0)
         self.model = model or OPENAI_MODEL
+        self.structure_model = structure_model or OPENAI_STRUCTURE_MODEL or self.model
+        self.menu_model = menu_model or OPENAI_MENU_MODEL or self.model
 
+    @traced("openai.structure_raw_input", kind=SPAN_KIND_CLIENT)
     def structure_raw_input(
-        self, raw_text: str, eaten_date: date
+        self,
+        raw_text: str,
+        eaten_date: date,
+        known_categories: Mapping[str, str] | None = None,
     ) -> list[StructuredDish]:
         """
         自由記述の実績を構造化された料理データに変換します。
 
+        structure_model の結果が空・区分が選択肢にない・記述にない料理名・
+        known_categories と区分が食い違う場合は、model で変換し直します。
+
         Args:
             raw_text: ユーザーの自由記述（例：「キムチ鍋、しめのラーメン」）
             eaten_date: 食べた日付
+            known_categories: 過去に記録した料理の区分（比較用キー -> 区分）
 
         Returns:
             構造化された料理データのリスト
@@ -105,22 +176,32 @@ JSON配列で出力してください。各料理について以下の形式で
 # 出力（JSON配列のみ）
 """
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "あなたは食事記録を構造化データに変換する専門家です。JSONのみを出力してください。",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        messages = [
+            {
+                "role": "system",
+                "content": "あなたは食事記録を構造化データに変換する専門家です。JSONのみを出力してください。",
+            },
+            {"role": "user", "content": prompt},
+        ]
+        dishes, _ = self._complete_tiered(
+            "structure",
+            self.structure_model,
+            messages,
             temperature=0.3,
-            response_format={"type": "json_object"},
+            parse=self._parse_dishes,
+            check=lambda parsed: _structuring_issue(raw_text, *parsed, known_categories),
         )
+        return dishes
+
+    def _parse_dishes(self, content: str | None) -> tuple[list[StructuredDish], int]:
+        """
+        構造化の応答を解析します。
 
-        content = response.choices[0].message.content
+        Returns:
+            (料理データのリスト, 区分が選択肢になかった料理の数)
+        """
         if not content:
-            return []
+            return [], 0
 
         logger.info(f"OpenAI response for structuring: {content}")
 
@@ -151,23 +232,27 @@ JSON配列で出力してください。各料理について以下の形式で
             logger.debug(f"Extracted dishes_data: {dishes_data}")
 
             result = []
+            invalid = 0
             for item in dishes_data:
                 dish_name = item.get("dish_name", "")
                 category = item.get("category", "その他")
                 if category not in DISH_CATEGORIES:
                     category = "その他"
+                    invalid += 1
                 if dish_name:
                     result.append(StructuredDish(dish_name=dish_name, category=category))
-            return result
-        except (json.JSONDecodeError, KeyError, TypeError):
-            return []
+            return result, invalid
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+            return [], 0
 
+    @traced("openai.generate_weekly_menu", kind=SPAN_KIND_CLIENT)
     def generate_weekly_menu(
         self,
         dates_to_fill: list[date],
         existing_plans: list[dict],
         recent_history: list[dict],
         dietary_preferences: str | None = None,
+        history_summary: str = "",
     ) -> list[GeneratedMenuItem]:
         """
         空いている日付の献立を生成します。
@@ -177,6 +262,7 @@ JSON配列で出力してください。各料理について以下の形式で
             existing_plans: 既存の予定（確定済み・外食等）
             recent_history: 直近の実績履歴
             dietary_preferences: 食事の好み（省略時は設定から取得）
+            history_summary: 実績の傾向のサマリー（頻度・しばらく食べていない料理など）
 
         Returns:
             生成された献立アイテムのリスト
@@ -209,6 +295,9 @@ JSON配列で出力してください。各料理について以下の形式で
 # 直近2週間の食事履歴（重複を避けてください）
 {history_str if history_str else "なし"}
 
+# 食事の傾向（偏りを避ける参考にしてください）
+{history_summary if history_summary else "なし"}
+
 # 出力形式
 JSON配列で出力してください：
 {{
@@ -233,20 +322,105 @@ JSON配列で出力してください：
 # 出力（JSONのみ）
 """
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "あなたは経験豊富な家庭料理の専門家です。バランスの良い献立を提案します。JSONのみを出力してください。",
-                },
-                {"role": "user", "content": prompt},
-            ],
+        messages = [
+            {
+                "role": "system",
+                "content": "あなたは経験豊富な家庭料理の専門家です。バランスの良い献立を提案します。JSONのみを出力してください。",
+            },
+            {"role": "user", "content": prompt},
+        ]
+        return self._complete_tiered(
+            "menu",
+            self.menu_model,
+            messages,
+            temperature=0.7,
+            parse=self._parse_menu,
+            check=lambda items: _missing_dates_issue(dates_to_fill, items),
+        )
+
+    @traced("openai.fill_menu_slots", kind=SPAN_KIND_CLIENT)
+    def fill_menu_slots(
+        self,
+        slots: list[tuple[date, str]],
+        planned: list[dict],
+        recent_history: list[dict],
+        dietary_preferences: str | None = None,
+    ) -> list[GeneratedMenuItem]:
+        """
+        カタログで埋められなかった枠だけの献立を生成します。
+
+        Args:
+            slots: 生成する (日付, 区分) のリスト
+            planned: 決まっている献立（既存の予定とカタログの候補）
+            recent_history: 直近の実績履歴
+            dietary_preferences: 食事の好み（省略時は設定から取得）
+
+        Returns:
+            生成された献立アイテムのリスト
+        """
+        if not slots:
+            return []
+
+        preferences = dietary_preferences or USER_DIETARY_PREFERENCES
+        planned_str = self._format_existing_plans(planned)
+        history_str = self._format_history(recent_history)
+        slots_str = "\n".join(
+            f"- {d.strftime('%Y-%m-%d (%a)')}: {category}" for d, category in slots
+        )
+
+        prompt = f"""あなたは家庭の献立を考える栄養士です。以下の枠の料理だけを考えてください。
+
+# 生成する枠
+{slots_str}
+
+# ユーザーの好み・要望
+{preferences}
+
+# 決まっている献立（重複を避け、組み合わせを考慮してください）
+{planned_str if planned_str else "なし"}
+
+# 直近2週間の食事履歴（重複を避けてください）
+{history_str if history_str else "なし"}
+
+# 出力形式
+{{
+  "menu": [
+    {{
+      "date": "YYYY-MM-DD",
+      "dish_name": "料理名",
+      "category": "区分",
+      "shopping_list": "必要な食材をカンマ区切りで"
+    }}
+  ]
+}}
+
+# ルール
+1. 生成する枠の日付・区分ごとに1品ずつ、枠の数だけ生成する
+2. メイン食材（鶏肉、豚肉、牛肉、魚など）が前後の日の主菜と連続しないようにする
+3. 決まっている献立・直近の履歴と同じ料理名は避ける
+4. 調理時間は30分以内で作れるものを優先する
+
+# 出力（JSONのみ）
+"""
+
+        messages = [
+            {
+                "role": "system",
+                "content": "あなたは経験豊富な家庭料理の専門家です。JSONのみを出力してください。",
+            },
+            {"role": "user", "content": prompt},
+        ]
+        return self._complete_tiered(
+            "menu",
+            self.menu_model,
+            messages,
             temperature=0.7,
-            response_format={"type": "json_object"},
+            parse=self._parse_menu,
+            check=lambda items: _missing_dates_issue([d for d, _ in slots], items),
         )
 
-        content = response.choices[0].message.content
+    def _parse_menu(self, content: str | None) -> list[GeneratedMenuItem]:
+        """献立生成の応答（{"menu": [...]}）を解析します。"""
         if not content:
             return []
 
@@ -277,6 +451,138 @@ JSON配列で出力してください：
         except (json.JSONDecodeError, KeyError, TypeError, ValueError):
             return []
 
+    def _complete_tiered(
+        self,
+        task: str,
+        first_model: str,
+        messages: list[dict[str, str]],
+        temperature: float,
+        parse: Callable[[str | None], T],
+        check: Callable[[T], str | None],
+    ) -> T:
+        """
+        first_model で依頼し、結果が確認に通らなければ model で依頼し直します。
+
+        Args:
+            task: タスク名（メトリクスのラベル）
+            first_model: 最初に使うモデル
+            messages: チャットのメッセージ
+            temperature: 温度
+            parse: 応答本文を結果に変換する関数
+            check: 結果の問題点を返す関数（問題なければNone）
+
+        Returns:
+            解析した結果
+        """
+        result = self._request(task, first_model, messages, temperature, parse, check)
+        tiered = first_model != self.model
+        reason = check(result) if tiered else None
+        if reason is not None:
+            logger.info(f"Escalating {task} from {first_model} to {self.model}: {reason}")
+            set_attributes(escalated=reason)
+            result = self._request(task, self.model, messages, temperature, parse, check)
+        record_model_task(task, tiered, reason)
+        return result
+
+    def _request(
+        self,
+        task: str,
+        model: str,
+        messages: list[dict[str, str]],
+        temperature: float,
+        parse: Callable[[str | None], T],
+        check: Callable[[T], str | None],
+    ) -> T:
+        """
+        1つのモデルに依頼します。hedge_after 秒を過ぎても応答がなければ同じ依頼を
+        もう1件送り、先に返った有効な（check に通る）応答を使います。
+
+        どちらの応答も有効でなければ先に返った応答を、どちらも失敗すれば
+        最後のエラーを返します。
+        """
+
+        def attempt() -> T:
+            return parse(self._complete(model, messages, temperature))
+
+        if self.hedge_after <= 0:
+            return attempt()
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            primary = executor.submit(contextvars.copy_context().run, attempt)
+            done, _ = wait([primary], timeout=self.hedge_after)
+            left = remaining()
+            if done or (left is not None and left <= 0):
+                return primary.result()
+
+            logger.info(
+                f"Hedging {task} ({model}): no response after {self.hedge_after:.1f}s, "
+                "sending a second request"
+            )
+            set_attributes(hedged=True)
+            hedge = executor.submit(contextvars.copy_context().run, attempt)
+            pending: dict[Future, str] = {primary: "primary", hedge: "hedge"}
+            fallback: list[T] = []
+            error: Exception | None = None
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    label = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if check(result) is None:
+                        logger.info(f"Hedged {task} ({model}): {label} answered first")
+                        record_hedge(task, label)
+                        return result
+                    fallback.append(result)
+            logger.info(f"Hedged {task} ({model}): no valid answer")
+            record_hedge(task, "none")
+            if fallback:
+                return fallback[0]
+            raise error  # type: ignore[misc]
+        finally:
+            # 遅い方の依頼は待たずに戻る（応答は捨てる）
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _complete(
+        self, model: str, messages: list[dict[str, str]], temperature: float
+    ) -> str | None:
+        """
+        チャットの応答本文を返します。
+
+        タイムアウトは実行の締め切りまでの残り時間で打ち切ります。一時的な
+        エラーのリトライは SDK ではなく src.resilience が行います。
+
+        Raises:
+            DeadlineExceeded: 締め切りを過ぎている場合
+        """
+
+        def create() -> Any:
+            return self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                response_format={"type": "json_object"},
+                timeout=timeout_for(self.timeout),
+            )
+
+        response = _guard.call(create)
+        self._record_usage(response, model)
+        return response.choices[0].message.content
+
+    def _record_usage(self, response: object, model: str) -> None:
+        """トークン使用量を現在のトレーシングスパンに記録します。"""
+        usage = getattr(response, "usage", None)
+        attributes: dict[str, Any] = {"model": model}
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            value = getattr(usage, key, None)
+            if isinstance(value, int):
+                attributes[key] = value
+        set_attributes(**attributes)
+
     def _format_existing_plans(self, plans: list[dict]) -> str:
         """既存の予定をプロンプト用の文字列に整形"""
         if not plans:
@@ -306,6 +612,7 @@ JSON配列で出力してください：
 
         return "\n".join(lines)
 
+    @traced("openai.test_connection", kind=SPAN_KIND_CLIENT)
     def test_connection(self) -> bool:
         """
         OpenAI APIへの接続をテストします。
@@ -318,7 +625,45 @@ JSON配列で出力してください：
                 model=self.model,
                 messages=[{"role": "user", "content": "Hello"}],
                 max_tokens=5,
+                timeout=timeout_for(self.timeout),
             )
             return response.choices[0].message.content is not None
         except Exception:
             return False
+
+
+def _structuring_issue(
+    raw_text: str,
+    dishes: list[StructuredDish],
+    invalid_categories: int,
+    known_categories: Mapping[str, str] | None,
+) -> str | None:
+    """
+    構造化の結果を確認します。
+
+    Returns:
+        問題点（empty / invalid_category / not_in_input / dictionary_mismatch、
+        問題なければNone）
+    """
+    if not dishes:
+        return "empty"
+    if invalid_categories:
+        return "invalid_category"
+    text = fold(raw_text)
+    for dish in dishes:
+        key = fold(dish.dish_name)
+        # 記述と2文字続けて一致する部分もない料理名は取り違えとみなす
+        if key not in text and not any(key[i : i + 2] in text for i in range(len(key) - 1)):
+            return "not_in_input"
+        if known_categories and known_categories.get(key, dish.category) != dish.category:
+            return "dictionary_mismatch"
+    return None
+
+
+def _missing_dates_issue(dates: list[date], items: list[GeneratedMenuItem]) -> str | None:
+    """献立が依頼したすべての日付を含むかを確認します。"""
+    if not items:
+        return "empty"
+    if set(dates) - {item.date for item in items}:
+        return "missing_dates"
+    return None
@@ -0,0 +1,416 @@
+"""
+通知アウトボックス
+
+Slack への通知を SQLite に永続化し、バックグラウンドで配信します。
+フロー本体はキューに積むだけで完了するため、Webhook が遅い・落ちている場合でも
+待たされず、通知も失われません（未配信分は次回の実行や deliver コマンドで再送）。
+
+同じ内容の通知は重複排除キーで一度だけキューに積まれます。配信済みの通知は
+DEDUP_WINDOW_SECONDS を過ぎると削除するため、次の実行の同じ内容の通知は配信されます。
+"""
+
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# 配信の最大試行回数。超えたメッセージは failed として残す（削除しない）
+MAX_ATTEMPTS = 8
+
+# 再送間隔の基準値と上限（秒）
+RETRY_BASE_SECONDS = 10.0
+RETRY_MAX_SECONDS = 3600.0
+
+# 配信中のメッセージを他のワーカーが再取得できるようになるまでの秒数
+LEASE_SECONDS = 120.0
+
+# 配信済みの通知を重複排除に使う秒数。過ぎた配信済みの行は削除する
+# （同じ実行の再実行では積み直さず、翌日の同じ内容の通知は配信する）
+DEDUP_WINDOW_SECONDS = 6 * 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedup_key TEXT NOT NULL UNIQUE,
+    webhook_url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+@dataclass
+class OutboxMessage:
+    """キューに積まれた通知"""
+
+    id: int
+    dedup_key: str
+    webhook_url: str
+    payload: dict[str, Any]
+    attempts: int
+
+
+@dataclass
+class DeliveryOutcome:
+    """1回の配信試行の結果"""
+
+    delivered: bool
+    retryable: bool = True  # 失敗時に再送するか
+    retry_after: float | None = None  # 再送までの秒数の指定（429 の Retry-After など）
+    error: str = ""
+
+
+@dataclass
+class DrainResult:
+    """キューの配信処理の結果"""
+
+    sent: int = 0
+    retried: int = 0  # 失敗して再送待ちにした数
+    failed: int = 0  # 再送を諦めた数
+
+
+def dedup_key_for(webhook_url: str, payload: dict[str, Any]) -> str:
+    """
+    送信先と内容から重複排除キーを計算します。
+
+    Args:
+        webhook_url: 送信先
+        payload: 送信するJSON
+
+    Returns:
+        SHA-256 の16進文字列
+    """
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(f"{webhook_url}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class NotificationOutbox:
+    """
+    SQLite による通知キュー。
+
+    操作ごとに接続を開くため、複数のスレッド・プロセスから同時に利用できます。
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        アウトボックスを開きます（なければ作成します）。
+
+        Args:
+            path: SQLite ファイルのパス
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(
+        self,
+        webhook_url: str,
+        payload: dict[str, Any],
+        dedup_key: str | None = None,
+        now: float | None = None,
+    ) -> bool:
+        """
+        通知をキューに積みます。
+
+        積む前に、DEDUP_WINDOW_SECONDS より前に配信済みになった通知を削除します。
+
+        Args:
+            webhook_url: 送信先
+            payload: 送信するJSON
+            dedup_key: 重複排除キー（省略時は送信先と内容から計算）
+            now: 現在時刻（テスト用）
+
+        Returns:
+            新たに積んだ場合はTrue、同じキーの未配信・最近配信済みの通知があればFalse
+        """
+        key = dedup_key or dedup_key_for(webhook_url, payload)
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?",
+                (now - DEDUP_WINDOW_SECONDS,),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO outbox "
+                "(dedup_key, webhook_url, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, webhook_url, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+            conn.execute("COMMIT")
+        if cursor.rowcount == 0:
+            logger.info(f"Skipped duplicate notification: {key[:12]}")
+            return False
+        return True
+
+    def claim(self, now: float | None = None) -> OutboxMessage | None:
+        """
+        配信期限を迎えたメッセージを1件取得し、配信中にします。
+
+        Args:
+            now: 現在時刻（テスト用）
+
+        Returns:
+            取得したメッセージ（なければNone）
+        """
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, dedup_key, webhook_url, payload, attempts FROM outbox "
+                "WHERE status IN ('pending', 'sending') AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            # 配信中の間はリース期限まで他のワーカーに取得されない
+            conn.execute(
+                "UPDATE outbox SET status = 'sending', next_attempt_at = ? WHERE id = ?",
+                (now + LEASE_SECONDS, row["id"]),
+            )
+            conn.execute("COMMIT")
+        return OutboxMessage(
+            id=row["id"],
+            dedup_key=row["dedup_key"],
+            webhook_url=row["webhook_url"],
+            payload=json.loads(row["payload"]),
+            attempts=row["attempts"],
+        )
+
+    def mark_sent(self, message_id: int, now: float | None = None) -> None:
+        """
+        メッセージを配信済みにします。
+
+        Args:
+            message_id: メッセージのID
+            now: 現在時刻（テスト用）
+        """
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (now, message_id),
+            )
+
+    def mark_failed(
+        self, message: OutboxMessage, outcome: DeliveryOutcome, now: float | None = None
+    ) -> bool:
+        """
+        配信失敗を記録し、再送を予約します。
+
+        Args:
+            message: 失敗したメッセージ
+            outcome: 配信結果
+            now: 現在時刻（テスト用）
+
+        Returns:
+            再送を予約した場合はTrue、諦めた（failed にした）場合はFalse
+        """
+        now = time.time() if now is None else now
+        attempts = message.attempts + 1
+        retry = outcome.retryable and attempts < MAX_ATTEMPTS
+        if outcome.retry_after is not None:
+            delay = outcome.retry_after
+        else:
+            delay = random.uniform(
+                0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2**message.attempts)
+            )
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, "
+                "last_error = ? WHERE id = ?",
+                (
+                    "pending" if retry else "failed",
+                    attempts,
+                    now + delay,
+                    outcome.error,
+                    message.id,
+                ),
+            )
+        return retry
+
+    def requeue_failed(self) -> int:
+        """
+        再送を諦めたメッセージを再び配信対象にします。
+
+        Returns:
+            対象にした件数
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? "
+                "WHERE status = 'failed'",
+                (time.time(),),
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict[str, int]:
+        """
+        ステータスごとの件数を返します。
+
+        Returns:
+            {"pending": n, "sending": n, "sent": n, "failed": n}
+        """
+        result = {"pending": 0, "sending": 0, "sent": 0, "failed": 0}
+        with self._connect() as conn:
+            for row in conn.execute(
+                "SELECT status, COUNT(*) AS n FROM outbox GROUP BY status"
+            ):
+                result[row["status"]] = row["n"]
+        return result
+
+    def due_count(self, now: float | None = None) -> int:
+        """
+        配信期限を迎えた（配信中を含む）メッセージ数を返します。
+
+        Args:
+            now: 現在時刻（テスト用）
+        """
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = 'sending' "
+                "OR (status = 'pending' AND next_attempt_at <= ?)",
+                (now,),
+            ).fetchone()
+        return row[0]
+
+    def drain(
+        self,
+        deliver: Callable[[OutboxMessage], DeliveryOutcome],
+        limit: int | None = None,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> DrainResult:
+        """
+        配信期限を迎えたメッセージを順に配信します。
+
+        Args:
+            deliver: 1件を配信する関数
+            limit: 最大処理件数（省略時は期限を迎えた全件）
+            should_stop: Trueを返したら次のメッセージを取得せずに終了する
+
+        Returns:
+            配信処理の結果
+        """
+        result = DrainResult()
+        while limit is None or result.sent + result.retried + result.failed < limit:
+            if should_stop and should_stop():
+                break
+            message = self.claim()
+            if message is None:
+                break
+            try:
+                outcome = deliver(message)
+            except Exception as e:
+                outcome = DeliveryOutcome(delivered=False, error=str(e))
+            if outcome.delivered:
+                self.mark_sent(message.id)
+                result.sent += 1
+            elif self.mark_failed(message, outcome):
+                logger.warning(
+                    f"Notification {message.id} delivery failed, will retry: {outcome.error}"
+                )
+                result.retried += 1
+            else:
+                logger.error(
+                    f"Notification {message.id} delivery gave up after "
+                    f"{message.attempts + 1} attempts: {outcome.error}"
+                )
+                result.failed += 1
+        return result
+
+
+class OutboxWorker:
+    """
+    アウトボックスをバックグラウンドスレッドで配信し続けるワーカー。
+    """
+
+    def __init__(
+        self,
+        outbox: NotificationOutbox,
+        deliver: Callable[[OutboxMessage], DeliveryOutcome],
+        poll_interval: float = 0.2,
+    ):
+        """
+        ワーカーを初期化します。
+
+        Args:
+            outbox: 配信するアウトボックス
+            deliver: 1件を配信する関数
+            poll_interval: キューを確認する間隔（秒）
+        """
+        self.outbox = outbox
+        self.deliver = deliver
+        self.poll_interval = poll_interval
+        self.result = DrainResult()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="outbox-worker", daemon=True
+        )
+
+    def start(self) -> None:
+        """配信を開始します。"""
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                drained = self.outbox.drain(self.deliver, should_stop=self._stop.is_set)
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}")
+                drained = DrainResult()
+            self.result.sent += drained.sent
+            self.result.retried += drained.retried
+            self.result.failed += drained.failed
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def stop(self, timeout: float) -> DrainResult:
+        """
+        最大 timeout 秒まで配信を続けてから停止します。
+
+        期限内に配信しきれなかったメッセージはキューに残り、
+        次回の実行や deliver コマンドで配信されます。
+
+        Args:
+            timeout: 配信を待つ最大秒数
+
+        Returns:
+            このワーカーが配信処理した結果
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.outbox.due_count() > 0:
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+        self._stop.set()
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        return self.result
@@ -0,0 +1,222 @@
+"""
+献立の日ごとの指紋
+
+前回の実行時点の予定を日ごとの指紋として SQLite に保存し、差分生成
+（weekly --incremental）で「前回から入力が変わった日」だけを作り直します。
+
+指紋は2つに分けて持ちます。
+
+- own: その日の予定（料理名・区分・ステータス・最終更新日時）
+- context: 前後の日の主菜のメイン食材（外食・予定ありの日は空）
+
+前後の日が外食になって食材の連続の制約が外れた、などで context だけが
+変わった「提案」の日を作り直します。own が変わった日は家族が手で直した
+予定とみなし、そのまま残します。
+"""
+
+import hashlib
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+from src.history_index import ROTATION_CATEGORIES, main_ingredient_of
+from src.notion_client import ProposedDish
+
+# 生成の対象外にするステータス（その日の予定が決まっている）
+CLOSED_STATUSES = ("確定", "外食・予定あり")
+
+# 前後の日の制約の対象外にするステータス（その日は家で食べない）
+EATING_OUT_STATUS = "外食・予定あり"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plan_days (
+    day TEXT PRIMARY KEY,
+    own TEXT NOT NULL,
+    context TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class DayFingerprint:
+    """1日分の予定の指紋"""
+
+    own: str  # その日の予定
+    context: str  # 前後の日の主菜のメイン食材
+
+
+@dataclass
+class IncrementalPlan:
+    """差分生成で作り直す日"""
+
+    fill: list[date] = field(default_factory=list)  # 予定がない日
+    regenerate: list[date] = field(default_factory=list)  # 前後の日が変わった「提案」の日
+    kept: list[date] = field(default_factory=list)  # そのまま残す日
+
+    @property
+    def dates_to_fill(self) -> list[date]:
+        return sorted(self.fill + self.regenerate)
+
+
+def _digest(parts: Iterable[str]) -> str:
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _by_day(dishes: Iterable[ProposedDish]) -> dict[date, list[ProposedDish]]:
+    days: dict[date, list[ProposedDish]] = {}
+    for dish in dishes:
+        days.setdefault(dish.date, []).append(dish)
+    return days
+
+
+def _mains(dishes: list[ProposedDish]) -> list[str]:
+    if any(dish.status == EATING_OUT_STATUS for dish in dishes):
+        return []
+    return sorted(
+        {
+            main
+            for dish in dishes
+            if dish.category in ROTATION_CATEGORIES
+            and (main := main_ingredient_of(dish.dish_name, dish.shopping_list))
+        }
+    )
+
+
+def fingerprint_days(
+    days: Iterable[date], dishes: Iterable[ProposedDish]
+) -> dict[date, DayFingerprint]:
+    """
+    日ごとの指紋を計算します。
+
+    Args:
+        days: 対象日
+        dishes: 予定（前後の日の分も含めて渡す）
+
+    Returns:
+        日付 -> 指紋
+    """
+    by_day = _by_day(dishes)
+    fingerprints = {}
+    for day in days:
+        own = sorted(
+            f"{d.category}\t{d.dish_name}\t{d.status}\t{d.last_edited}"
+            for d in by_day.get(day, [])
+        )
+        context = [
+            ",".join(_mains(by_day.get(neighbour, [])))
+            for neighbour in (day - timedelta(days=1), day + timedelta(days=1))
+        ]
+        fingerprints[day] = DayFingerprint(own=_digest(own), context=_digest(context))
+    return fingerprints
+
+
+def plan_incremental(
+    days: Iterable[date],
+    dishes: Iterable[ProposedDish],
+    previous: dict[date, DayFingerprint],
+) -> IncrementalPlan:
+    """
+    前回の指紋と比べて、作り直す日を決めます。
+
+    Args:
+        days: 対象日
+        dishes: 現在の予定（前後の日の分も含めて渡す）
+        previous: 前回保存した指紋
+
+    Returns:
+        予定がない日・作り直す日・残す日
+    """
+    dishes = list(dishes)
+    by_day = _by_day(dishes)
+    current = fingerprint_days(days, dishes)
+    plan = IncrementalPlan()
+    for day, fingerprint in current.items():
+        planned = by_day.get(day, [])
+        before = previous.get(day)
+        if not planned:
+            plan.fill.append(day)
+        elif any(d.status in CLOSED_STATUSES for d in planned):
+            plan.kept.append(day)
+        elif before is None or before.own != fingerprint.own:
+            # 前回の記録がない日・家族が手で直した日はそのまま残す
+            plan.kept.append(day)
+        elif before.context != fingerprint.context:
+            plan.regenerate.append(day)
+        else:
+            plan.kept.append(day)
+    return plan
+
+
+class PlanStateStore:
+    """
+    日ごとの指紋を保存する SQLite。
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        ストアを開きます（なければ作成します）。
+
+        Args:
+            path: SQLite ファイルのパス
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def load(self, days: Iterable[date]) -> dict[date, DayFingerprint]:
+        """
+        保存されている指紋を読み込みます。
+
+        Args:
+            days: 対象日
+
+        Returns:
+            日付 -> 指紋（記録がない日は含まない）
+        """
+        keys = [day.isoformat() for day in days]
+        if not keys:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT day, own, context FROM plan_days "
+                f"WHERE day IN ({', '.join('?' * len(keys))})",
+                keys,
+            ).fetchall()
+        return {
+            date.fromisoformat(day): DayFingerprint(own=own, context=context)
+            for day, own, context in rows
+        }
+
+    def save(self, fingerprints: dict[date, DayFingerprint]) -> None:
+        """
+        指紋を保存します（同じ日の記録は上書き）。
+
+        Args:
+            fingerprints: 日付 -> 指紋
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO plan_days (day, own, context, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (day.isoformat(), fp.own, fp.context, now)
+                    for day, fp in fingerprints.items()
+                ],
+            )
+            conn.execute("COMMIT")
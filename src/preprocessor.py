@@ -7,13 +7,19 @@ Structured_Actual_History テーブルに構造化して保存します。
 
 import logging
 from dataclasses import dataclass
+from datetime import date, timedelta
 
+from config.settings import HISTORY_SUMMARY_WEEKS
+from src.idempotency import idempotency_key
+from src.ingredients import fold
+from src.metrics import UNPROCESSED_BACKLOG
 from src.notion_client import (
     NotionClientWrapper,
     RawActualInput,
     StructuredActualHistory,
 )
 from src.openai_client import OpenAIClientWrapper
+from src.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +55,9 @@ class ActualDataPreprocessor:
         """
         self.notion = notion_client or NotionClientWrapper()
         self.openai = openai_client or OpenAIClientWrapper()
+        self._known_categories: dict[str, str] = {}
 
+    @traced("preprocess.process_all_unprocessed")
     def process_all_unprocessed(self) -> PreprocessingResult:
         """
         全ての未処理レコードを構造化して保存します。
@@ -72,6 +80,8 @@ class ActualDataPreprocessor:
                 errors=[f"Notionからのデータ取得に失敗: {e}"],
             )
 
+        UNPROCESSED_BACKLOG.set(len(unprocessed))
+
         if not unprocessed:
             logger.info("No unprocessed records found")
             return PreprocessingResult(
@@ -81,6 +91,7 @@ class ActualDataPreprocessor:
             )
 
         logger.info(f"Found {len(unprocessed)} unprocessed records")
+        self._known_categories = self._load_known_categories()
 
         # 各レコードを処理
         for record in unprocessed:
@@ -97,6 +108,30 @@ class ActualDataPreprocessor:
             errors=errors,
         )
 
+    def _load_known_categories(self) -> dict[str, str]:
+        """
+        直近の実績履歴から料理ごとの区分を集めます（構造化の結果の確認用）。
+
+        取得に失敗した場合は空の辞書を返し、辞書との照合を行いません。
+
+        Returns:
+            比較用キー -> 最後に記録した区分
+        """
+        today = date.today()
+        try:
+            history = self.notion.get_structured_history_columns(
+                today - timedelta(weeks=HISTORY_SUMMARY_WEEKS), today
+            )
+        except Exception as e:
+            logger.warning(f"Failed to fetch history for category checks: {e}")
+            return {}
+        known: dict[str, str] = {}
+        # 履歴は新しい順のため、最初に見つかった区分を使う
+        for record in history:
+            known.setdefault(fold(record.dish_name), record.category)
+        return known
+
+    @traced("preprocess.record")
     def _process_single_record(self, record: RawActualInput) -> "_SingleProcessResult":
         """
         単一のレコードを処理します。
@@ -132,6 +167,7 @@ class ActualDataPreprocessor:
             structured_dishes = self.openai.structure_raw_input(
                 raw_text=record.food_eaten,
                 eaten_date=record.date,
+                known_categories=self._known_categories,
             )
         except Exception as e:
             logger.error(f"OpenAI API error for record {record.id}: {e}")
@@ -158,13 +194,16 @@ class ActualDataPreprocessor:
 
         # Structured_Actual_History に保存
         created_items = 0
-        for dish in structured_dishes:
+        for position, dish in enumerate(structured_dishes):
             try:
                 history = StructuredActualHistory(
                     id=None,
                     dish_name=dish.dish_name,
                     date=record.date,
                     category=dish.category,
+                    # 構造化の結果（料理名・区分）は実行ごとに変わりうるため、キーには
+                    # 元の実績入力と何品目かだけを使う（処理済みにする前に中断した再実行でも同じキー）
+                    idempotency_key=idempotency_key("structured", record.id, position),
                 )
                 self.notion.create_structured_history(history)
                 created_items += 1
@@ -0,0 +1,85 @@
+"""
+進捗レポーター
+
+件数の多い一括処理の進捗・スループットを一定間隔でログに出力します。
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """
+    一括処理の進捗を集計し、一定間隔でログに出力します。
+    複数スレッドから update() を呼び出せます。
+    """
+
+    def __init__(self, label: str, total: int | None = None, interval: float = 5.0):
+        """
+        レポーターを初期化します。
+
+        Args:
+            label: ログに表示する処理名
+            total: 総件数（不明ならNone）
+            interval: ログ出力の間隔（秒）
+        """
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._lock = threading.Lock()
+
+    def update(self, done: int = 0, failed: int = 0, skipped: int = 0) -> None:
+        """
+        件数を加算し、前回の出力から interval 秒経過していればログに出力します。
+
+        Args:
+            done: 成功件数の増分
+            failed: 失敗件数の増分
+            skipped: スキップ件数の増分
+        """
+        with self._lock:
+            self.done += done
+            self.failed += failed
+            self.skipped += skipped
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self.report()
+
+    @property
+    def elapsed(self) -> float:
+        """開始からの経過秒数"""
+        return time.monotonic() - self._started
+
+    @property
+    def rate(self) -> float:
+        """1秒あたりの処理件数（成功 + 失敗 + スキップ）"""
+        elapsed = self.elapsed
+        processed = self.done + self.failed + self.skipped
+        return processed / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> None:
+        """現在の進捗をログに出力します。"""
+        processed = self.done + self.failed + self.skipped
+        rate = self.rate
+        if self.total:
+            remaining = max(0, self.total - processed)
+            eta = f", ETA {remaining / rate:.0f}s" if rate > 0 else ""
+            position = f"{processed}/{self.total}"
+        else:
+            eta = ""
+            position = str(processed)
+        logger.info(
+            f"{self.label}: {position} "
+            f"(ok={self.done}, failed={self.failed}, skipped={self.skipped}, "
+            f"{rate:.1f} rec/s{eta})"
+        )
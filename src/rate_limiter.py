@@ -0,0 +1,55 @@
+"""
+レートリミッター
+
+外部APIへのリクエスト間隔を制御するトークンバケットを提供します。
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    スレッドセーフなトークンバケット。
+
+    1秒あたり rate_per_second 個のトークンを補充し、
+    最大 burst 個まで溜めておけます。
+    """
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        """
+        レートリミッターを初期化します。
+
+        Args:
+            rate_per_second: 1秒あたりの許可数（0以下なら無制限）
+            burst: 連続して許可できる最大数
+        """
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        トークンを1つ取得します。足りない場合は補充されるまで待機します。
+
+        Returns:
+            待機した秒数
+        """
+        if self.rate_per_second <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._updated) * self.rate_per_second,
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
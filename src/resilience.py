@@ -0,0 +1,353 @@
+"""
+外部API呼び出しのリトライとサーキットブレーカー
+
+Notion・OpenAI・Slack の3つのクライアントで共有する、呼び出しの保護層です。
+
+- 一時的なエラー（429・5xx・タイムアウト・接続エラー）だけを、指数バックオフ
+  （フルジッター）でリトライします。429 は Retry-After を尊重します。
+- サービスごとのサーキットブレーカーで、連続して失敗しているサービスへの
+  呼び出しはしばらく送らずに失敗させます（一定時間後に1件だけ試します）。
+- 実行全体のリトライの予算を全サービスで共有し、障害時にリトライだけで
+  実行時間を使い切らないようにします。実行の締め切り（src.deadline）を
+  越える待機もしません。
+- 非冪等な呼び出し（ページ作成・Webhook 投稿）は、受理済みの可能性がある
+  タイムアウト・5xx ではリトライしません。
+
+エラーの分類は SDK ごとに異なるため、各クライアントが分類関数を渡します。
+"""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from config.settings import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    CLIENT_MAX_RETRIES,
+    RETRY_BUDGET_PER_RUN,
+)
+from src.deadline import remaining
+from src.metrics import record_circuit_open, record_circuit_rejection, record_retry
+from src.tracing import set_attributes
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# リトライ間隔の基準値と上限（秒）
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+# 相手が処理済みの可能性がある失敗（非冪等な呼び出しはリトライしない）。
+# Notion などは 502/504 を返す前に書き込みを確定していることがある
+AMBIGUOUS_REASONS = ("timeout", "server_error")
+
+# サーキットブレーカーの状態
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class Failure:
+    """リトライしてよい一時的なエラー"""
+
+    reason: str  # rate_limited / server_error / timeout / connection
+    retry_after: float | None = None  # サーバーが指定した待機秒数
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが開いているため呼び出さなかった"""
+
+
+def backoff(attempt: int) -> float:
+    """
+    指数バックオフ（フルジッター）の待機秒数を返します。
+
+    Args:
+        attempt: 何回目のリトライか（0始まり）
+
+    Returns:
+        待機秒数
+    """
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt))
+
+
+def classify_status(status: int, retry_after: str | None = None) -> Failure | None:
+    """
+    HTTP ステータスを分類します。
+
+    Args:
+        status: ステータスコード
+        retry_after: Retry-After ヘッダーの値
+
+    Returns:
+        429・5xx なら Failure、それ以外はNone
+    """
+    if status == 429:
+        return Failure("rate_limited", parse_retry_after(retry_after))
+    if status >= 500:
+        return Failure("server_error")
+    return None
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After ヘッダー（秒）を上限 BACKOFF_MAX_SECONDS で解析します。"""
+    try:
+        return min(max(0.0, float(value or "")), BACKOFF_MAX_SECONDS)
+    except ValueError:
+        return None
+
+
+class CircuitBreaker:
+    """
+    サービスごとのサーキットブレーカー。
+
+    failure_threshold 回続けて一時的なエラーになると開き、reset_seconds 秒後に
+    半開になって1件だけ呼び出しを通します。成功すれば閉じ、失敗すれば再び開きます。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            failure_threshold: 開くまでの連続失敗回数（0以下なら常に閉じたまま）
+            reset_seconds: 開いてから半開にするまでの秒数
+            clock: 時刻の取得関数（テスト用）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """現在の状態（closed / open / half_open）"""
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """呼び出してよいかを返します（半開なら1件だけ通します）。"""
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        """呼び出しの成功を記録します（閉じます）。"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """
+        一時的なエラーを記録します。
+
+        Returns:
+            この失敗で開いた場合True
+        """
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.failure_threshold <= 0:
+                return False
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                return True
+            return False
+
+
+class RetryBudget:
+    """
+    実行全体で共有するリトライの予算。
+    """
+
+    def __init__(self, retries: int = RETRY_BUDGET_PER_RUN):
+        """
+        Args:
+            retries: 実行全体で許すリトライの回数
+        """
+        self._remaining = retries
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        """残りのリトライ回数"""
+        return self._remaining
+
+    def try_acquire(self) -> bool:
+        """リトライを1回分使います（予算がなければFalse）。"""
+        with self._lock:
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            return True
+
+
+_lock = threading.Lock()
+_breakers: dict[str, CircuitBreaker] = {}
+_budget = RetryBudget()
+
+
+def circuit_breaker(service: str) -> CircuitBreaker:
+    """サービスのサーキットブレーカーを返します（なければ作成します）。"""
+    with _lock:
+        breaker = _breakers.get(service)
+        if breaker is None:
+            breaker = _breakers[service] = CircuitBreaker()
+        return breaker
+
+
+def retry_budget() -> RetryBudget:
+    """実行全体のリトライの予算を返します。"""
+    return _budget
+
+
+def reset(retries: int = RETRY_BUDGET_PER_RUN) -> None:
+    """
+    サーキットブレーカーとリトライの予算を初期状態に戻します（実行の開始時・テスト用）。
+
+    Args:
+        retries: リトライの予算
+    """
+    global _budget
+    with _lock:
+        _breakers.clear()
+        _budget = RetryBudget(retries)
+
+
+class ServiceGuard:
+    """
+    1つのサービスへの呼び出しを、リトライとサーキットブレーカーで保護します。
+    """
+
+    def __init__(
+        self,
+        service: str,
+        classify: Callable[[Exception], Failure | None],
+        max_retries: int = CLIENT_MAX_RETRIES,
+    ):
+        """
+        Args:
+            service: サービス名（サーキットブレーカーとメトリクスのラベル）
+            classify: 例外を分類する関数（リトライしない例外はNone）
+            max_retries: 1回の呼び出しあたりの最大リトライ回数
+        """
+        self.service = service
+        self.classify = classify
+        self.max_retries = max_retries
+
+    def call(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        max_retries: int | None = None,
+        idempotent: bool = True,
+        classify_result: Callable[[T], Failure | None] | None = None,
+        **kwargs: Any,
+    ) -> T:
+        """
+        fn(*args, **kwargs) を呼び出し、一時的なエラーであればリトライします。
+
+        Args:
+            fn: 呼び出す関数
+            max_retries: 最大リトライ回数（省略時はこのガードの設定）
+            idempotent: Falseの場合、タイムアウト・5xx は（受理済みの可能性があるため）
+                        リトライしない
+            classify_result: 戻り値を分類する関数（HTTP レスポンスを返す呼び出し用）
+
+        Returns:
+            fn の戻り値（戻り値の分類でリトライを諦めた場合は最後の戻り値）
+
+        Raises:
+            CircuitOpenError: サーキットブレーカーが開いている場合
+            Exception: fn の例外（リトライしない・諦めた場合）
+        """
+        retries = self.max_retries if max_retries is None else max_retries
+        breaker = circuit_breaker(self.service)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                record_circuit_rejection(self.service)
+                raise CircuitOpenError(f"{self.service} is unavailable (circuit open)")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                failure = self.classify(e)
+                if failure is None:
+                    breaker.record_success()
+                    raise
+                self._record_failure(breaker)
+                delay = self._retry_delay(failure, attempt, retries, idempotent, breaker)
+                if delay is None:
+                    raise
+                message = f"{failure.reason}: {e}"
+            else:
+                failure = classify_result(result) if classify_result else None
+                if failure is None:
+                    breaker.record_success()
+                    return result
+                self._record_failure(breaker)
+                delay = self._retry_delay(failure, attempt, retries, idempotent, breaker)
+                if delay is None:
+                    return result
+                message = failure.reason
+
+            attempt += 1
+            logger.warning(f"{self.service} {message}; retrying in {delay:.1f}s")
+            record_retry(self.service, failure.reason)
+            set_attributes(retries=attempt)
+            time.sleep(delay)
+
+    def _record_failure(self, breaker: CircuitBreaker) -> None:
+        if breaker.record_failure():
+            logger.warning(f"{self.service} circuit opened after repeated failures")
+            record_circuit_open(self.service)
+
+    def _retry_delay(
+        self,
+        failure: Failure,
+        attempt: int,
+        retries: int,
+        idempotent: bool,
+        breaker: CircuitBreaker,
+    ) -> float | None:
+        """リトライまでの待機秒数を返します（リトライしない場合はNone）。"""
+        if attempt >= retries or (failure.reason in AMBIGUOUS_REASONS and not idempotent):
+            return None
+        if breaker.state == OPEN:
+            return None
+        delay = failure.retry_after if failure.retry_after is not None else backoff(attempt)
+        left = remaining()
+        if left is not None and delay >= left:
+            logger.warning(f"{self.service} {failure.reason}; no time left to retry")
+            return None
+        if not retry_budget().try_acquire():
+            logger.warning(f"{self.service} {failure.reason}; retry budget exhausted")
+            return None
+        return delay
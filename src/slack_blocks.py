@@ -0,0 +1,263 @@
+"""
+Slack Block Kit メッセージビルダー
+
+テンプレートからブロックを組み立て、Slack の上限
+（1メッセージ50ブロック、セクション3000文字など）を超える場合は
+複数のメッセージに分割します。
+"""
+
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from string import Template
+from typing import Any
+
+# Slack の上限
+MAX_BLOCKS = 50
+MAX_SECTION_CHARS = 3000
+MAX_HEADER_CHARS = 150
+MAX_MESSAGE_CHARS = 40000
+
+# 曜日・ステータスの表示用テーブル
+WEEKDAY_NAMES = ("月", "火", "水", "木", "金", "土", "日")
+STATUS_EMOJIS = {
+    "提案": "💡",
+    "確定": "✅",
+    "外食・予定あり": "🍽️",
+}
+
+
+@dataclass
+class SlackMessage:
+    """送信する1通のメッセージ"""
+
+    text: str
+    blocks: list[dict] | None = None
+
+
+@dataclass
+class MessageSize:
+    """メッセージの大きさ"""
+
+    blocks: int
+    chars: int  # ブロック内テキストの合計文字数
+    max_section_chars: int
+    bytes: int  # JSON にしたときのバイト数
+
+
+class BlockTemplate:
+    """
+    プレースホルダー（$name）を含むブロック構造のテンプレート。
+
+    構造の走査と string.Template のコンパイルは生成時に一度だけ行い、
+    render() では値を埋めた新しい辞書を組み立てるだけにします。
+    """
+
+    def __init__(self, structure: dict[str, Any]):
+        self._build = _compile(structure)
+
+    def render(self, **values: str) -> dict[str, Any]:
+        """
+        値を埋めたブロックを返します。
+
+        Args:
+            **values: プレースホルダーに埋める値
+
+        Returns:
+            新しいブロック（テンプレートとは独立した辞書）
+        """
+        return self._build(values)
+
+
+def _compile(node: Any) -> Callable[[dict[str, str]], Any]:
+    if isinstance(node, dict):
+        items = [(key, _compile(value)) for key, value in node.items()]
+        return lambda values: {key: build(values) for key, build in items}
+    if isinstance(node, list):
+        builders = [_compile(value) for value in node]
+        return lambda values: [build(values) for build in builders]
+    if isinstance(node, str) and "$" in node:
+        template = Template(node)
+        return template.substitute
+    return lambda values: node
+
+
+HEADER = BlockTemplate(
+    {"type": "header", "text": {"type": "plain_text", "text": "$text", "emoji": True}}
+)
+SECTION = BlockTemplate({"type": "section", "text": {"type": "mrkdwn", "text": "$text"}})
+CONTEXT = BlockTemplate(
+    {"type": "context", "elements": [{"type": "mrkdwn", "text": "$text"}]}
+)
+DIVIDER = BlockTemplate({"type": "divider"})
+
+
+def truncate(text: str, limit: int) -> str:
+    """limit 文字を超える場合は末尾を「…」にして切り詰めます。"""
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def format_date(d: Any) -> str:
+    """日付を「MM/DD (曜)」形式にします。"""
+    return f"{d.strftime('%m/%d')} ({WEEKDAY_NAMES[d.weekday()]})"
+
+
+def split_text(text: str, limit: int = MAX_SECTION_CHARS) -> list[str]:
+    """
+    テキストを limit 文字以内の断片に分割します。
+    行の区切り、次に「, 」の区切りで分け、それでも長い場合は文字数で切ります。
+
+    Args:
+        text: 分割するテキスト
+        limit: 1断片の最大文字数
+
+    Returns:
+        分割したテキストのリスト
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks: list[str] = []
+    current = ""
+    for piece in _pieces(text, limit):
+        if current and len(current) + len(piece) > limit:
+            chunks.append(current.rstrip("\n"))
+            current = piece.lstrip()
+        else:
+            current += piece
+    if current.strip():
+        chunks.append(current.rstrip("\n"))
+    return chunks
+
+
+def _pieces(text: str, limit: int) -> list[str]:
+    """区切り文字を残したまま、limit 文字以内の部品に分けます。"""
+    pieces = []
+    for line in text.splitlines(keepends=True):
+        if len(line) <= limit:
+            pieces.append(line)
+            continue
+        for item in line.split(", "):
+            item = item + ", "
+            while len(item) > limit:
+                pieces.append(item[:limit])
+                item = item[limit:]
+            pieces.append(item)
+        pieces[-1] = pieces[-1].removesuffix(", ")
+    return pieces
+
+
+def measure(message: SlackMessage) -> MessageSize:
+    """
+    メッセージの大きさを測定します。
+
+    Args:
+        message: 測定するメッセージ
+
+    Returns:
+        ブロック数・文字数・バイト数
+    """
+    blocks = message.blocks or []
+    lengths = [_block_chars(block) for block in blocks]
+    sections = [
+        n for block, n in zip(blocks, lengths) if block.get("type") == "section"
+    ]
+    payload = {"text": message.text, "blocks": blocks}
+    return MessageSize(
+        blocks=len(blocks),
+        chars=sum(lengths),
+        max_section_chars=max(sections, default=0),
+        bytes=len(json.dumps(payload, ensure_ascii=False).encode("utf-8")),
+    )
+
+
+def _block_chars(block: dict[str, Any]) -> int:
+    text = block.get("text")
+    if isinstance(text, dict):
+        return len(text.get("text", ""))
+    return sum(len(e.get("text", "")) for e in block.get("elements", []))
+
+
+class MessageBuilder:
+    """
+    ブロックを順に追加し、上限に収まるメッセージ列を組み立てます。
+    """
+
+    def __init__(
+        self,
+        fallback_text: str,
+        max_blocks: int = MAX_BLOCKS,
+        max_chars: int = MAX_MESSAGE_CHARS,
+    ):
+        """
+        ビルダーを初期化します。
+
+        Args:
+            fallback_text: 通知に表示されるフォールバック用テキスト
+            max_blocks: 1メッセージの最大ブロック数
+            max_chars: 1メッセージのブロック内テキストの最大文字数
+        """
+        self.fallback_text = fallback_text
+        self.max_blocks = max_blocks
+        self.max_chars = max_chars
+        self.blocks: list[dict[str, Any]] = []
+
+    def header(self, text: str) -> "MessageBuilder":
+        """ヘッダーを追加します（長すぎる場合は切り詰めます）。"""
+        self.blocks.append(HEADER.render(text=truncate(text, MAX_HEADER_CHARS)))
+        return self
+
+    def section(self, text: str) -> "MessageBuilder":
+        """セクションを追加します（長すぎる場合は複数のセクションに分けます）。"""
+        for chunk in split_text(text):
+            self.blocks.append(SECTION.render(text=chunk))
+        return self
+
+    def context(self, text: str) -> "MessageBuilder":
+        """コンテキスト（補足テキスト）を追加します。"""
+        self.blocks.append(CONTEXT.render(text=truncate(text, MAX_SECTION_CHARS)))
+        return self
+
+    def divider(self) -> "MessageBuilder":
+        """区切り線を追加します。"""
+        self.blocks.append(DIVIDER.render())
+        return self
+
+    def build(self) -> list[SlackMessage]:
+        """
+        メッセージ列を組み立てます。
+
+        上限を超える場合は複数のメッセージに分け、2通目以降の先頭には
+        「続き」を示すコンテキストを付けます。Incoming Webhook では
+        スレッドに返信できないため、続きは順番に送る別メッセージになります。
+
+        Returns:
+            送信するメッセージのリスト（1通に収まれば要素は1つ）
+        """
+        # 続きの表示用に1ブロック分を空けておく
+        capacity = self.max_blocks - 1
+        chunks: list[list[dict[str, Any]]] = [[]]
+        chars = 0
+        for block in self.blocks:
+            size = _block_chars(block)
+            current = chunks[-1]
+            if current and (len(current) >= capacity or chars + size > self.max_chars):
+                chunks.append([])
+                chars = 0
+                current = chunks[-1]
+            if not current and block.get("type") == "divider" and len(chunks) > 1:
+                continue  # 続きのメッセージを区切り線から始めない
+            current.append(block)
+            chars += size
+
+        if len(chunks) == 1:
+            return [SlackMessage(self.fallback_text, chunks[0])]
+
+        total = len(chunks)
+        messages = [SlackMessage(self.fallback_text, chunks[0])]
+        for i, chunk in enumerate(chunks[1:], start=2):
+            marker = CONTEXT.render(text=f"（続き {i}/{total}）")
+            messages.append(
+                SlackMessage(f"{self.fallback_text}（続き {i}/{total}）", [marker] + chunk)
+            )
+        return messages
@@ -2,13 +2,100 @@
 Slack Webhook クライアント
 
 Slackへの通知を担当します。
+
+接続はプロセス全体で共有する keep-alive セッションで再利用し、
+429（Retry-After を尊重）・接続エラーはジッター付きでリトライします。
+読み取りタイムアウト・5xx は Slack 側で受理済みの可能性があるため、直接送信でも
+アウトボックスからの配信でも再送しません（二重投稿を避けるため、5xx の
+ジッター付きリトライは行いません）。
 """
 
+import asyncio
+import logging
+import threading
 from datetime import date
+from typing import TYPE_CHECKING
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import (
+    SLACK_MAX_CONCURRENCY,
+    SLACK_MAX_RETRIES,
+    SLACK_WEBHOOK_URL,
+)
+from src.ingredients import ShoppingList
+from src.outbox import DeliveryOutcome, OutboxMessage
+from src.resilience import (
+    AMBIGUOUS_REASONS,
+    CircuitOpenError,
+    Failure,
+    ServiceGuard,
+    backoff,
+    classify_status,
+    parse_retry_after,
+)
+from src.slack_blocks import (
+    STATUS_EMOJIS,
+    MessageBuilder,
+    SlackMessage,
+    format_date,
+    truncate,
+)
+from src.tracing import SPAN_KIND_CLIENT, set_attributes, traced
+
+if TYPE_CHECKING:
+    from src.outbox import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+# (接続, 読み取り) のタイムアウト秒数
+REQUEST_TIMEOUT = (5, 15)
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """
+    プロセス全体で共有する HTTP セッションを返します。
+
+    接続プールを SLACK_MAX_CONCURRENCY 本まで保持するため、
+    並列送信でも TLS ハンドシェイクはホストごとに初回のみで済みます。
+
+    Returns:
+        共有セッション
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=max(1, SLACK_MAX_CONCURRENCY),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _classify_error(error: Exception) -> Failure | None:
+    """送信時の例外を分類します（接続できなかった場合と読み取りタイムアウト）。"""
+    if isinstance(error, requests.ConnectionError):
+        return Failure("connection")
+    if isinstance(error, requests.Timeout):
+        return Failure("timeout")
+    return None
+
+
+def _classify_response(response: requests.Response) -> Failure | None:
+    """レスポンスを分類します（429 / 5xx）。"""
+    return classify_status(response.status_code, response.headers.get("Retry-After"))
 
-from config.settings import SLACK_WEBHOOK_URL
+
+# Webhook 送信のリトライとサーキットブレーカー
+_guard = ServiceGuard("slack", _classify_error)
 
 
 class SlackClientWrapper:
@@ -16,41 +103,189 @@ class SlackClientWrapper:
     Slack Webhookを使用した通知クライアント。
     """
 
-    def __init__(self, webhook_url: str | None = None):
+    def __init__(
+        self,
+        webhook_url: str | None = None,
+        session: requests.Session | None = None,
+        max_retries: int | None = None,
+        outbox: "NotificationOutbox | None" = None,
+    ):
         """
         クライアントを初期化します。
 
         Args:
             webhook_url: Slack Webhook URL。省略時は環境変数から取得。
+            session: HTTPセッション。省略時はプロセス共有のセッション。
+            max_retries: 最大リトライ回数。省略時は設定値。
+            outbox: 指定すると通知は即時送信せずアウトボックスに積む
         """
         self.webhook_url = webhook_url or SLACK_WEBHOOK_URL
         if not self.webhook_url:
             raise ValueError("Slack webhook URL is required")
+        self.session = session or shared_session()
+        self.max_retries = SLACK_MAX_RETRIES if max_retries is None else max_retries
+        self.outbox = outbox
 
     def send_message(self, text: str, blocks: list[dict] | None = None) -> bool:
         """
         Slackにメッセージを送信します。
+        アウトボックスが設定されている場合はキューに積むだけで戻ります。
 
         Args:
             text: フォールバック用テキスト
             blocks: Block Kit形式のメッセージ（オプション）
 
         Returns:
-            送信成功ならTrue
+            送信成功（アウトボックス利用時はキューへの登録成功）ならTrue
         """
         payload = {"text": text}
         if blocks:
             payload["blocks"] = blocks
 
+        if self.outbox is not None:
+            self.outbox.enqueue(self.webhook_url, payload)
+            return True
+
+        response = self._post_with_retry(payload)
+        return response is not None and response.status_code == 200
+
+    def deliver(self, message: OutboxMessage) -> DeliveryOutcome:
+        """
+        アウトボックスのメッセージを1回だけ送信します（再送はアウトボックスが管理）。
+
+        Args:
+            message: 送信するメッセージ
+
+        読み取りタイムアウト・5xx は受理済みの可能性があるため、再送しません。
+
+        Returns:
+            配信結果
+        """
         try:
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=30,
+            response = self._post(message.payload, message.webhook_url, max_retries=0)
+        except CircuitOpenError as e:
+            return DeliveryOutcome(delivered=False, error=str(e))
+        except requests.RequestException as e:
+            failure = _classify_error(e)
+            ambiguous = failure is not None and failure.reason in AMBIGUOUS_REASONS
+            return DeliveryOutcome(delivered=False, retryable=not ambiguous, error=str(e))
+        status = response.status_code
+        if status == 200:
+            return DeliveryOutcome(delivered=True)
+        if status == 429:
+            return DeliveryOutcome(
+                delivered=False,
+                retry_after=self._retry_after(response, message.attempts),
+                error="429 rate limited",
             )
-            return response.status_code == 200
-        except requests.RequestException:
-            return False
+        # 429 以外の 4xx（URL の誤りや不正なペイロード）は再送しても成功せず、
+        # 5xx は受理済みの可能性があるため再送しない
+        return DeliveryOutcome(delivered=False, retryable=False, error=f"HTTP {status}")
+
+    def _post_with_retry(
+        self,
+        payload: dict,
+        webhook_url: str | None = None,
+        max_retries: int | None = None,
+    ) -> requests.Response | None:
+        """
+        Webhook に POST し、一時的なエラーであればリトライします。
+
+        - 429: Retry-After ヘッダーの秒数だけ待機
+        - 接続エラー: 指数バックオフ（フルジッター）で待機
+
+        読み取りタイムアウト・5xx は Slack 側で受理済みの可能性があるため、
+        二重投稿を避けてリトライしません。リトライは実行全体の予算と
+        サーキットブレーカー（src.resilience）に従います。
+
+        Args:
+            payload: 送信するJSON
+            webhook_url: 送信先（省略時はこのクライアントの Webhook URL）
+            max_retries: 最大リトライ回数（省略時はこのクライアントの設定）
+
+        Returns:
+            最後のレスポンス（送信できなかった場合はNone）
+        """
+        try:
+            return self._post(payload, webhook_url, max_retries)
+        except CircuitOpenError as e:
+            logger.error(f"Slack webhook skipped: {e}")
+            return None
+        except requests.RequestException as e:
+            logger.error(f"Slack webhook request failed: {e}")
+            return None
+
+    @traced("slack.post_webhook", kind=SPAN_KIND_CLIENT)
+    def _post(
+        self,
+        payload: dict,
+        webhook_url: str | None = None,
+        max_retries: int | None = None,
+    ) -> requests.Response:
+        """
+        Webhook に POST します（リトライは _post_with_retry() と同じ方針）。
+
+        Raises:
+            CircuitOpenError: サーキットブレーカーが開いている場合
+            requests.RequestException: 送信できなかった場合
+        """
+        response = _guard.call(
+            self.session.post,
+            webhook_url or self.webhook_url,
+            json=payload,
+            timeout=REQUEST_TIMEOUT,
+            max_retries=self.max_retries if max_retries is None else max_retries,
+            idempotent=False,
+            classify_result=_classify_response,
+        )
+        set_attributes(status_code=response.status_code)
+        return response
+
+    def _retry_after(self, response: requests.Response, attempt: int) -> float:
+        """429 レスポンスの Retry-After（秒）。なければバックオフ値。"""
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        return backoff(attempt) if retry_after is None else retry_after
+
+    async def send_messages_async(
+        self, messages: list[SlackMessage], max_concurrency: int | None = None
+    ) -> list[bool]:
+        """
+        複数のメッセージを同時送信数を制限して並列に送信します。
+
+        各送信は共有セッションを使うスレッドで実行されるため、
+        接続は再利用され、リトライ中の送信が他をブロックしません。
+
+        Args:
+            messages: 送信するメッセージ
+            max_concurrency: 同時送信数（省略時は SLACK_MAX_CONCURRENCY）
+
+        Returns:
+            メッセージごとの送信結果（入力と同じ順序）
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or SLACK_MAX_CONCURRENCY))
+
+        async def send(message: SlackMessage) -> bool:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self.send_message, message.text, message.blocks
+                )
+
+        return list(await asyncio.gather(*(send(m) for m in messages)))
+
+    def send_messages(
+        self, messages: list[SlackMessage], max_concurrency: int | None = None
+    ) -> list[bool]:
+        """
+        send_messages_async() の同期版です（イベントループ外から呼び出す）。
+
+        Args:
+            messages: 送信するメッセージ
+            max_concurrency: 同時送信数（省略時は SLACK_MAX_CONCURRENCY）
+
+        Returns:
+            メッセージごとの送信結果（入力と同じ順序）
+        """
+        return asyncio.run(self.send_messages_async(messages, max_concurrency))
 
     def send_weekly_menu_notification(
         self,
@@ -73,7 +308,7 @@ class SlackClientWrapper:
         """
         # 日付ごとにグループ化
         menu_by_date: dict[str, list[dict]] = {}
-        shopping_items: set[str] = set()
+        shopping_list = ShoppingList()
 
         for item in menu_items:
             date_str = item.get("date", "")
@@ -81,89 +316,35 @@ class SlackClientWrapper:
                 menu_by_date[date_str] = []
             menu_by_date[date_str].append(item)
 
-            # 買い物リストを集約
+            # 買い物リストを集約（表記揺れを揃えて分量を合算）
             shopping = item.get("shopping_list", "")
             if shopping:
-                for ingredient in shopping.split(","):
-                    ingredient = ingredient.strip()
-                    if ingredient:
-                        shopping_items.add(ingredient)
-
-        # Block Kit メッセージを構築
-        blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": f"🍽️ 今週の献立 ({start_date.strftime('%m/%d')} - {end_date.strftime('%m/%d')})",
-                    "emoji": True,
-                },
-            },
-            {"type": "divider"},
-        ]
-
-        # 曜日の日本語マッピング
-        weekday_names = ["月", "火", "水", "木", "金", "土", "日"]
+                shopping_list.add_text(shopping)
+
+        week_range = f"{start_date.strftime('%m/%d')} - {end_date.strftime('%m/%d')}"
+        builder = MessageBuilder(f"今週の献立 ({week_range}) が準備できました")
+        builder.header(f"🍽️ 今週の献立 ({week_range})").divider()
 
         # 日付順にソートして表示
         for date_str in sorted(menu_by_date.keys()):
-            items = menu_by_date[date_str]
             try:
-                d = date.fromisoformat(date_str)
-                weekday = weekday_names[d.weekday()]
-                date_display = f"{d.strftime('%m/%d')} ({weekday})"
+                date_display = format_date(date.fromisoformat(date_str))
             except ValueError:
                 date_display = date_str
-
-            # その日の献立を整形
-            dishes = []
-            for item in items:
-                category = item.get("category", "")
-                dish_name = item.get("dish_name", "")
-                status = item.get("status", "提案")
-                status_emoji = self._get_status_emoji(status)
-                dishes.append(f"• {category}: {dish_name} {status_emoji}")
-
-            dishes_text = "\n".join(dishes)
-
-            blocks.append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*{date_display}*\n{dishes_text}",
-                    },
-                }
+            builder.section(
+                f"*{date_display}*\n{self._format_dishes(menu_by_date[date_str])}"
             )
 
         # 買い物リスト
-        if shopping_items:
-            blocks.append({"type": "divider"})
-            blocks.append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*🛒 買い物リスト*\n{', '.join(sorted(shopping_items))}",
-                    },
-                }
-            )
+        if shopping_list:
+            builder.divider()
+            builder.section("*🛒 買い物リスト*\n" + "\n".join(shopping_list.format_lines()))
 
         # Notionへのリンク
-        blocks.append({"type": "divider"})
-        blocks.append(
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"<{notion_url}|📝 Notionで確認・編集する>",
-                },
-            }
-        )
+        builder.divider()
+        builder.section(f"<{notion_url}|📝 Notionで確認・編集する>")
 
-        fallback_text = f"今週の献立 ({start_date.strftime('%m/%d')} - {end_date.strftime('%m/%d')}) が準備できました"
-
-        return self.send_message(fallback_text, blocks)
+        return self._send_all(builder.build())
 
     def send_daily_reminder(
         self,
@@ -182,86 +363,27 @@ class SlackClientWrapper:
         Returns:
             送信成功ならTrue
         """
-        weekday_names = ["月", "火", "水", "木", "金", "土", "日"]
-        weekday = weekday_names[today_date.weekday()]
-        date_display = f"{today_date.strftime('%m/%d')} ({weekday})"
-
-        blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": "🍴 今日の実績を記録してください",
-                    "emoji": True,
-                },
-            },
-            {"type": "divider"},
-        ]
+        date_display = format_date(today_date)
+
+        builder = MessageBuilder(f"今日 ({date_display}) のご飯の実績を記録してください")
+        builder.header("🍴 今日の実績を記録してください").divider()
 
         if today_menu:
-            dishes = []
-            for item in today_menu:
-                category = item.get("category", "")
-                dish_name = item.get("dish_name", "")
-                status = item.get("status", "提案")
-                status_emoji = self._get_status_emoji(status)
-                dishes.append(f"• {category}: {dish_name} {status_emoji}")
-
-            dishes_text = "\n".join(dishes)
-            blocks.append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*📋 {date_display} の予定メニュー*\n{dishes_text}",
-                    },
-                }
-            )
-            blocks.append(
-                {
-                    "type": "context",
-                    "elements": [
-                        {
-                            "type": "mrkdwn",
-                            "text": "💡 提案  ✅ 確定  🍽️ 外食・予定あり",
-                        }
-                    ],
-                }
+            builder.section(
+                f"*📋 {date_display} の予定メニュー*\n{self._format_dishes(today_menu)}"
             )
+            builder.context("💡 提案  ✅ 確定  🍽️ 外食・予定あり")
         else:
-            blocks.append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*{date_display}* の献立予定は登録されていません。",
-                    },
-                }
-            )
+            builder.section(f"*{date_display}* の献立予定は登録されていません。")
 
-        blocks.append({"type": "divider"})
-        blocks.append(
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": "予定通りでも、変更があっても、実際に食べたものを記録してください！\n次回の献立提案に活かされます。",
-                },
-            }
-        )
-        blocks.append(
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"<{notion_url}|📝 Notionで実績を入力する>",
-                },
-            }
+        builder.divider()
+        builder.section(
+            "予定通りでも、変更があっても、実際に食べたものを記録してください！\n"
+            "次回の献立提案に活かされます。"
         )
+        builder.section(f"<{notion_url}|📝 Notionで実績を入力する>")
 
-        fallback_text = f"今日 ({date_display}) のご飯の実績を記録してください"
-
-        return self.send_message(fallback_text, blocks)
+        return self._send_all(builder.build())
 
     def send_error_notification(self, error_message: str, context: str = "") -> bool:
         """
@@ -274,42 +396,16 @@ class SlackClientWrapper:
         Returns:
             送信成功ならTrue
         """
-        blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": "⚠️ Dinner-Aide エラー通知",
-                    "emoji": True,
-                },
-            },
-            {"type": "divider"},
-        ]
+        builder = MessageBuilder(f"Dinner-Aide でエラーが発生しました: {error_message}")
+        builder.header("⚠️ Dinner-Aide エラー通知").divider()
 
         if context:
-            blocks.append(
-                {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*発生箇所:* {context}",
-                    },
-                }
-            )
+            builder.section(f"*発生箇所:* {context}")
 
-        blocks.append(
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*エラー内容:*\n```{error_message}```",
-                },
-            }
-        )
-
-        fallback_text = f"Dinner-Aide でエラーが発生しました: {error_message}"
+        # コードブロックを分割すると表示が崩れるため、1セクションに収まるよう切り詰める
+        builder.section(f"*エラー内容:*\n```{truncate(error_message, 2900)}```")
 
-        return self.send_message(fallback_text, blocks)
+        return self._send_all(builder.build())
 
     def send_skip_notification(self, reason: str, week_range: str) -> bool:
         """
@@ -322,37 +418,33 @@ class SlackClientWrapper:
         Returns:
             送信成功ならTrue
         """
-        blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": "📌 献立生成スキップのお知らせ",
-                    "emoji": True,
-                },
-            },
-            {"type": "divider"},
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": f"*対象週:* {week_range}\n*理由:* {reason}",
-                },
-            },
-        ]
-
-        fallback_text = f"献立生成をスキップしました: {reason}"
-
-        return self.send_message(fallback_text, blocks)
+        builder = MessageBuilder(f"献立生成をスキップしました: {reason}")
+        builder.header("📌 献立生成スキップのお知らせ").divider()
+        builder.section(f"*対象週:* {week_range}\n*理由:* {reason}")
+
+        return self._send_all(builder.build())
+
+    def _format_dishes(self, items: list[dict]) -> str:
+        """献立アイテムを「• 区分: 料理名 絵文字」の行に整形する"""
+        return "\n".join(
+            f"• {item.get('category', '')}: {item.get('dish_name', '')} "
+            f"{self._get_status_emoji(item.get('status', '提案'))}"
+            for item in items
+        )
+
+    def _send_all(self, messages: list[SlackMessage]) -> bool:
+        """
+        分割されたメッセージを順番に送信します。
+
+        Returns:
+            すべて送信成功ならTrue
+        """
+        results = [self.send_message(m.text, m.blocks) for m in messages]
+        return all(results)
 
     def _get_status_emoji(self, status: str) -> str:
         """ステータスに応じた絵文字を返す"""
-        status_emojis = {
-            "提案": "💡",
-            "確定": "✅",
-            "外食・予定あり": "🍽️",
-        }
-        return status_emojis.get(status, "")
+        return STATUS_EMOJIS.get(status, "")
 
     def test_connection(self) -> bool:
         """
@@ -361,4 +453,8 @@ class SlackClientWrapper:
         Returns:
             接続成功ならTrue
         """
-        return self.send_message("🔧 Dinner-Aide 接続テスト: 正常に動作しています")
+        # 接続確認のため、アウトボックスを経由せずに直接送信する
+        response = self._post_with_retry(
+            {"text": "🔧 Dinner-Aide 接続テスト: 正常に動作しています"}
+        )
+        return response is not None and response.status_code == 200
@@ -0,0 +1,453 @@
+"""
+Notion データベースのスナップショット
+
+3つのデータベースを、ページ単位で取得しながらテーブルごとのファイルに書き出し
+（export）、書き出したファイルから一括書き込みで投入します（import）。
+
+スナップショットはディレクトリで、manifest.json にスキーマのバージョン・形式・
+テーブルごとのファイルと件数を記録します。manifest.json は全テーブルの書き出しが
+終わってから作るため、途中で止まった書き出しは読み込めません。
+
+- jsonl: 1行1レコードの JSON。zstd（zstandard がある場合）または gzip で圧縮
+- parquet: pyarrow が必要。列は zstd で圧縮し、スキーマのバージョンをメタデータにも記録
+
+取り込みは NotionClientWrapper.bulk_create（レート制限・並列）で行い、
+CHUNK_ROWS 件ごとに進み具合を .import-state.json に記録します。中断した取り込みは
+同じコマンドで再開でき、作成済みのレコードは作り直しません。
+"""
+
+import gzip
+import io
+import json
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any
+
+from src.notion_client import (
+    NotionClientWrapper,
+    NotionRecord,
+    ProposedDish,
+    RawActualInput,
+    StructuredActualHistory,
+)
+
+logger = logging.getLogger(__name__)
+
+# 行の形式を変えたら上げる（古いスナップショットは取り込み時に拒否する）
+SCHEMA_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+IMPORT_STATE_FILE = ".import-state.json"
+
+# 取り込み順（実績履歴 → 実績入力 → 提案）
+TABLES = ("structured", "raw", "proposed")
+
+RECORD_TYPES: dict[str, type] = {
+    "structured": StructuredActualHistory,
+    "raw": RawActualInput,
+    "proposed": ProposedDish,
+}
+
+FORMATS = ("jsonl", "parquet")
+COMPRESSIONS = ("auto", "zstd", "gzip", "none")
+
+# 取り込みで進み具合を記録する単位（件）と、parquet の書き込み単位（行）
+CHUNK_ROWS = 500
+PARQUET_BATCH_ROWS = 5000
+
+_SUFFIXES = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz", "none": ".jsonl"}
+
+
+class SnapshotError(Exception):
+    """スナップショットを読み書きできない"""
+
+
+@dataclass
+class SnapshotManifest:
+    """スナップショットの目録"""
+
+    schema_version: int
+    format: str
+    compression: str
+    created_at: str
+    tables: dict[str, dict[str, Any]] = field(default_factory=dict)  # table -> {file, rows}
+
+
+def _zstandard():
+    """zstandard を読み込みます（オプションの依存）。"""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise SnapshotError(
+            "zstd compression requires the zstandard package "
+            "(pip install zstandard, or use --compression gzip)"
+        ) from e
+    return zstandard
+
+
+def _pyarrow():
+    """pyarrow を読み込みます（オプションの依存）。"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise SnapshotError(
+            "parquet snapshots require the pyarrow package (pip install pyarrow)"
+        ) from e
+    return pyarrow
+
+
+def resolve_compression(compression: str) -> str:
+    """
+    "auto" を、zstandard があれば zstd、なければ gzip に解決します。
+
+    Args:
+        compression: 圧縮方式
+
+    Returns:
+        実際に使う圧縮方式
+    """
+    if compression != "auto":
+        return compression
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "gzip"
+    return "zstd"
+
+
+def to_row(record: NotionRecord) -> dict[str, Any]:
+    """レコードを書き出す行（日付は ISO 形式の文字列）に変換します。"""
+    return {
+        key: value.isoformat() if isinstance(value, date) else value
+        for key, value in asdict(record).items()
+    }
+
+
+def from_row(table: str, row: dict[str, Any]) -> NotionRecord:
+    """
+    書き出した行を、作成用のレコード（id なし）に戻します。
+
+    Args:
+        table: テーブル
+        row: 行
+
+    Returns:
+        レコード
+    """
+    values = dict(row)
+    if isinstance(values["date"], str):
+        values["date"] = date.fromisoformat(values["date"])
+    values["id"] = None
+    values.pop("last_edited", None)
+    return RECORD_TYPES[table](**values)
+
+
+# =============================================================================
+# Export
+# =============================================================================
+
+
+def export_snapshot(
+    notion: NotionClientWrapper,
+    output_dir: Path,
+    tables: Iterable[str] = TABLES,
+    fmt: str = "jsonl",
+    compression: str = "auto",
+    on_progress: Callable[[int], None] | None = None,
+) -> SnapshotManifest:
+    """
+    データベースをスナップショットに書き出します。
+
+    Args:
+        notion: 読み出し元のクライアント
+        output_dir: 出力ディレクトリ
+        tables: 書き出すテーブル
+        fmt: 形式（"jsonl" / "parquet"）
+        compression: jsonl の圧縮方式（"auto" / "zstd" / "gzip" / "none"）
+        on_progress: 1件書き出すたびに件数の増分で呼ばれる
+
+    Returns:
+        書き出したスナップショットの目録
+
+    Raises:
+        SnapshotError: 必要なパッケージがない場合
+    """
+    compression = "zstd" if fmt == "parquet" else resolve_compression(compression)
+    # 必要なパッケージがなければ何も書き出さずに失敗させる
+    if fmt == "parquet":
+        _pyarrow()
+    elif compression == "zstd":
+        _zstandard()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = SnapshotManifest(
+        schema_version=SCHEMA_VERSION,
+        format=fmt,
+        compression=compression,
+        created_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+
+    for table in tables:
+        rows = (to_row(record) for record in notion.iter_records(table))
+        if on_progress:
+            rows = _counting(rows, on_progress)
+        if fmt == "parquet":
+            name = f"{table}.parquet"
+            count = _write_parquet(output_dir / name, table, rows)
+        else:
+            name = f"{table}{_SUFFIXES[compression]}"
+            with _open_text(output_dir / name, "w", compression) as f:
+                count = 0
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    count += 1
+        manifest.tables[table] = {"file": name, "rows": count}
+        logger.info(f"Exported {count} {table} records to {output_dir / name}")
+
+    (output_dir / MANIFEST_FILE).write_text(
+        json.dumps(asdict(manifest), ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    return manifest
+
+
+def _counting(rows: Iterator[dict], on_progress: Callable[[int], None]) -> Iterator[dict]:
+    for row in rows:
+        on_progress(1)
+        yield row
+
+
+def _open_text(path: Path, mode: str, compression: str) -> IO[str]:
+    """圧縮方式に応じてテキストとして開きます（mode は "r" / "w"）。"""
+    if compression == "zstd":
+        zstandard = _zstandard()
+        if mode == "w":
+            raw = zstandard.ZstdCompressor().stream_writer(path.open("wb"))
+        else:
+            raw = zstandard.ZstdDecompressor().stream_reader(path.open("rb"))
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(path, f"{mode}t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def _parquet_schema(table: str):
+    pa = _pyarrow()
+    columns = {
+        "structured": [
+            ("dish_name", pa.string()),
+            ("category", pa.string()),
+            ("idempotency_key", pa.string()),
+        ],
+        "raw": [("food_eaten", pa.string()), ("is_processed", pa.bool_())],
+        "proposed": [
+            ("dish_name", pa.string()),
+            ("category", pa.string()),
+            ("status", pa.string()),
+            ("shopping_list", pa.string()),
+            ("last_edited", pa.string()),
+            ("idempotency_key", pa.string()),
+        ],
+    }[table]
+    return pa.schema(
+        [("id", pa.string()), ("date", pa.string()), *columns],
+        metadata={"dinner_aide_schema_version": str(SCHEMA_VERSION)},
+    )
+
+
+def _write_parquet(path: Path, table: str, rows: Iterator[dict]) -> int:
+    """行を PARQUET_BATCH_ROWS 件ずつ parquet に書き出します。"""
+    pa = _pyarrow()
+    schema = _parquet_schema(table)
+    count = 0
+    with pa.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        while batch := list(islice(rows, PARQUET_BATCH_ROWS)):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+# =============================================================================
+# Import
+# =============================================================================
+
+
+def read_manifest(snapshot_dir: Path) -> SnapshotManifest:
+    """
+    スナップショットの目録を読み込みます。
+
+    Args:
+        snapshot_dir: スナップショットのディレクトリ
+
+    Returns:
+        目録
+
+    Raises:
+        SnapshotError: 目録がない・スキーマのバージョンが異なる場合
+    """
+    path = snapshot_dir / MANIFEST_FILE
+    try:
+        manifest = SnapshotManifest(**json.loads(path.read_text(encoding="utf-8")))
+    except (OSError, ValueError, TypeError) as e:
+        raise SnapshotError(f"Cannot read snapshot manifest {path}: {e}") from e
+    if manifest.schema_version != SCHEMA_VERSION:
+        raise SnapshotError(
+            f"Unsupported snapshot schema version {manifest.schema_version} "
+            f"(expected {SCHEMA_VERSION})"
+        )
+    return manifest
+
+
+def iter_snapshot(
+    snapshot_dir: Path, table: str, manifest: SnapshotManifest | None = None
+) -> Iterator[NotionRecord]:
+    """
+    スナップショットのテーブルのレコード（id なし）を順に返します。
+
+    Args:
+        snapshot_dir: スナップショットのディレクトリ
+        table: テーブル
+        manifest: 読み込み済みの目録（省略時は読み込む）
+
+    Returns:
+        レコードのイテレータ（テーブルがなければ空）
+
+    Raises:
+        SnapshotError: 行を読み込めない場合（壊れた JSON・想定外の列）
+    """
+    manifest = manifest or read_manifest(snapshot_dir)
+    entry = manifest.tables.get(table)
+    if entry is None:
+        return
+    path = snapshot_dir / entry["file"]
+    if manifest.format == "parquet":
+        parquet_file = _pyarrow().parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS):
+            for row in batch.to_pylist():
+                yield from_row(table, row)
+        return
+    with _open_text(path, "r", manifest.compression) as f:
+        for line_num, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = from_row(table, json.loads(line))
+            except (ValueError, TypeError, KeyError) as e:
+                raise SnapshotError(f"{path}: line {line_num}: {e}") from e
+            yield record
+
+
+@dataclass
+class ImportResult:
+    """取り込みの結果"""
+
+    created: int = 0
+    failed: int = 0
+    skipped: int = 0  # 前回までに取り込み済みで飛ばした件数
+    errors: list[str] = field(default_factory=list)
+
+
+def import_snapshot(
+    notion: NotionClientWrapper,
+    snapshot_dir: Path,
+    tables: Iterable[str] = TABLES,
+    rate_per_second: float | None = None,
+    max_workers: int | None = None,
+    resume: bool = True,
+    on_progress: Callable[[int, int, int], None] | None = None,
+) -> ImportResult:
+    """
+    スナップショットをデータベースに取り込みます。
+
+    CHUNK_ROWS 件ごとに、作成できた行と失敗した行を .import-state.json に
+    記録します。再開時は作成済みの行を飛ばし、失敗した行だけを作り直します。
+    記録は取り込み先のデータベースIDごとなので、別のワークスペースへの取り込みは
+    最初から行います。
+
+    Args:
+        notion: 書き込み先のクライアント
+        snapshot_dir: スナップショットのディレクトリ
+        tables: 取り込むテーブル
+        rate_per_second: 1秒あたりの最大リクエスト数（省略時は設定値）
+        max_workers: 並列数（省略時は設定値）
+        resume: Falseの場合、前回の記録を無視して最初から取り込む
+        on_progress: (成功数, 失敗数, スキップ数) の増分で呼ばれる
+
+    Returns:
+        取り込みの結果
+
+    Raises:
+        SnapshotError: スナップショットを読み込めない場合
+    """
+    manifest = read_manifest(snapshot_dir)
+    state_path = snapshot_dir / IMPORT_STATE_FILE
+    state = _load_state(state_path) if resume else {}
+    result = ImportResult()
+    selected = set(tables)
+    database_ids = {
+        "structured": notion.db_structured,
+        "raw": notion.db_raw,
+        "proposed": notion.db_proposed,
+    }
+    report = (lambda ok, failed: on_progress(ok, failed, 0)) if on_progress else None
+
+    for table in (t for t in TABLES if t in selected):
+        key = f"{table}:{database_ids[table]}"
+        progress = state.setdefault(key, {"next_row": 0, "failed_rows": []})
+        retry = set(progress["failed_rows"])
+        rows = enumerate(iter_snapshot(snapshot_dir, table, manifest))
+
+        while chunk := list(islice(rows, CHUNK_ROWS)):
+            pending = [
+                (i, record)
+                for i, record in chunk
+                if i >= progress["next_row"] or i in retry
+            ]
+            skipped = len(chunk) - len(pending)
+            result.skipped += skipped
+            if on_progress and skipped:
+                on_progress(0, 0, skipped)
+            if not pending:
+                continue
+
+            written = notion.bulk_create(
+                (record for _, record in pending),
+                rate_per_second=rate_per_second,
+                max_workers=max_workers,
+                on_progress=report,
+            )
+            result.created += written.created
+            result.failed += written.failed
+            result.errors.extend(written.errors)
+
+            failed = {i for i, record in pending if not record.id}
+            retry = (retry - {i for i, _ in pending}) | failed
+            progress["next_row"] = max(progress["next_row"], chunk[-1][0] + 1)
+            progress["failed_rows"] = sorted(retry)
+            _save_state(state_path, state)
+
+        logger.info(
+            f"Imported {table}: next_row={progress['next_row']}, "
+            f"failed={len(progress['failed_rows'])}"
+        )
+
+    return result
+
+
+def _load_state(path: Path) -> dict[str, dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable import state {path}: {e}")
+        return {}
+
+
+def _save_state(path: Path, state: dict[str, dict[str, Any]]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    tmp.replace(path)
@@ -0,0 +1,293 @@
+"""
+トレーシング
+
+週次・日次フローの各ステージと外部API呼び出しの所要時間を
+スパンとして記録します。記録したスパンは OTLP 互換の JSON ファイルに
+書き出したり、フレームグラフ風のサマリーとして表示できます。
+
+トレーシングが無効でリスナーも登録されていない間（デフォルト）は
+span() / traced() はほぼ何もしません。
+"""
+
+import functools
+import json
+import secrets
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TypeVar
+
+SERVICE_NAME = "dinner-aide"
+
+# OTLP の SpanKind
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    """1つの処理区間"""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str = ""
+
+    @property
+    def duration(self) -> float:
+        """所要時間（秒）"""
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+class Tracer:
+    """
+    スパンを収集するトレーサー。
+
+    親子関係は contextvars で管理するため、スレッドをまたぐ場合は
+    contextvars.copy_context() で文脈を引き継いでください。
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: list[Span] = []
+        self._trace_id = secrets.token_hex(16)
+        self._current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[[Span], None]] = []
+
+    @property
+    def active(self) -> bool:
+        """スパンを計測するか（トレーシング有効、またはリスナーあり）"""
+        return self.enabled or bool(self._listeners)
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """
+        スパン終了時に呼ばれるリスナーを登録します。
+        トレーシングが無効でもリスナーには全スパンが渡されます。
+
+        Args:
+            listener: 終了したスパンを受け取る関数
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Span], None]) -> None:
+        """登録済みのリスナーを解除します。"""
+        self._listeners.remove(listener)
+
+    def enable(self) -> None:
+        """トレーシングを有効にし、新しいトレースを開始します。"""
+        with self._lock:
+            self.enabled = True
+            self.spans = []
+            self._trace_id = secrets.token_hex(16)
+
+    def disable(self) -> None:
+        """トレーシングを無効にします。収集済みのスパンは保持されます。"""
+        self.enabled = False
+
+    @contextmanager
+    def span(
+        self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any
+    ) -> Iterator[Span | None]:
+        """
+        ブロックの処理をスパンとして記録します。
+
+        Args:
+            name: スパン名（例: "notion.create_proposed_dish"）
+            kind: OTLP の SpanKind
+            **attributes: スパンの属性
+
+        Yields:
+            記録中のスパン（計測しない場合はNone）
+        """
+        if not self.active:
+            yield None
+            return
+
+        parent = self._current.get()
+        current = Span(
+            name=name,
+            trace_id=self._trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            attributes=dict(attributes),
+        )
+        token = self._current.set(current)
+        current.start_ns = time.time_ns()
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.end_ns = time.time_ns()
+            self._current.reset(token)
+            if self.enabled:
+                with self._lock:
+                    self.spans.append(current)
+            for listener in self._listeners:
+                listener(current)
+
+    def set_attributes(self, **attributes: Any) -> None:
+        """現在のスパンに属性を追加します（無効時は何もしません）。"""
+        current = self._current.get()
+        if current is not None:
+            current.attributes.update(attributes)
+
+    def traced(self, name: str, kind: int = SPAN_KIND_INTERNAL) -> Callable[[F], F]:
+        """
+        関数呼び出しをスパンとして記録するデコレータ。
+
+        Args:
+            name: スパン名
+            kind: OTLP の SpanKind
+        """
+
+        def decorator(func: F) -> F:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.active:
+                    return func(*args, **kwargs)
+                with self.span(name, kind=kind):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    # =========================================================================
+    # Export
+    # =========================================================================
+
+    def to_otlp(self) -> dict[str, Any]:
+        """収集したスパンを OTLP/JSON 形式の辞書に変換します。"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_otlp_attribute("service.name", SERVICE_NAME)]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "src.tracing"},
+                            "spans": [_otlp_span(s) for s in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export_json(self, path: str | Path) -> None:
+        """
+        収集したスパンを OTLP/JSON 形式のファイルに書き出します。
+
+        Args:
+            path: 出力先のパス
+        """
+        Path(path).write_text(
+            json.dumps(self.to_otlp(), ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+    def format_summary(self, width: int = 30) -> str:
+        """
+        スパンを呼び出し経路ごとに集計し、フレームグラフ風のツリーで返します。
+
+        Args:
+            width: 割合を示すバーの最大幅
+
+        Returns:
+            サマリー文字列
+        """
+        with self._lock:
+            spans = list(self.spans)
+        if not spans:
+            return "(no spans recorded)"
+
+        by_id = {s.span_id: s for s in spans}
+        totals: dict[tuple[str, ...], list[float]] = {}
+        for s in spans:
+            path = [s.name]
+            parent = by_id.get(s.parent_id) if s.parent_id else None
+            while parent is not None:
+                path.append(parent.name)
+                parent = by_id.get(parent.parent_id) if parent.parent_id else None
+            entry = totals.setdefault(tuple(reversed(path)), [0.0, 0, 0])
+            entry[0] += s.duration
+            entry[1] += 1
+            entry[2] += 1 if s.error else 0
+
+        root_total = sum(v[0] for k, v in totals.items() if len(k) == 1) or 1e-9
+        label_width = max(2 * (len(k) - 1) + len(k[-1]) for k in totals) + 6
+
+        lines = []
+        for path in sorted(totals, key=lambda k: _path_order(k, totals)):
+            seconds, count, errors = totals[path]
+            share = seconds / root_total
+            label = "  " * (len(path) - 1) + path[-1]
+            if count > 1:
+                label += f" ×{count}"
+            bar = "█" * max(1, round(share * width)) if share > 0 else ""
+            suffix = f" ({errors} errors)" if errors else ""
+            lines.append(
+                f"{label:<{label_width}} {seconds:8.3f}s {share * 100:6.1f}% {bar}{suffix}"
+            )
+        return "\n".join(lines)
+
+
+def _path_order(
+    path: tuple[str, ...], totals: dict[tuple[str, ...], list[float]]
+) -> tuple:
+    """親の直後に子が並び、兄弟は所要時間の降順になるソートキー"""
+    return tuple(
+        (-totals.get(path[: i + 1], [0.0])[0], path[i]) for i in range(len(path))
+    )
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+        # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+# プロセス全体で共有するトレーサー
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+set_attributes = tracer.set_attributes
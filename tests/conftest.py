@@ -0,0 +1,24 @@
+"""
+テスト共通のフィクスチャ
+"""
+
+import pytest
+
+from src import resilience
+from src.notion_client import BulkWriteResult
+
+
+@pytest.fixture(autouse=True)
+def reset_resilience():
+    """サーキットブレーカーとリトライの予算をテストごとに初期化する"""
+    resilience.reset()
+    yield
+    resilience.reset()
+
+
+def fake_bulk_create(records, **kwargs) -> BulkWriteResult:
+    """NotionClientWrapper.bulk_create の代わり（id を振って全件成功にする）"""
+    records = list(records)
+    for i, record in enumerate(records):
+        record.id = f"page-{i}"
+    return BulkWriteResult(created=len(records))
@@ -0,0 +1,155 @@
+"""
+実績履歴の集計のテスト
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from src.analytics import HistoryFrame
+from src.history_store import HistoryColumns
+from src.main import main
+from src.menu_generator import WeeklyMenuGenerator
+from src.notion_client import StructuredActualHistory
+
+REFERENCE = date(2024, 3, 31)
+
+
+def _history(days_ago: int, dish_name: str, category: str = "主菜") -> StructuredActualHistory:
+    return StructuredActualHistory(
+        id=None,
+        dish_name=dish_name,
+        date=REFERENCE - timedelta(days=days_ago),
+        category=category,
+    )
+
+
+@pytest.fixture
+def frame():
+    return HistoryFrame.from_records(
+        [
+            _history(0, "鮭の塩焼き"),
+            _history(0, "味噌汁", category="汁物"),
+            _history(2, "サバの味噌煮"),
+            _history(3, "鶏の唐揚げ"),
+            _history(9, "鮭の塩焼き"),
+            _history(70, "牛丼"),
+            _history(80, "牛丼"),
+            _history(90, "トンカツ"),
+        ]
+    )
+
+
+class TestHistoryFrame:
+    """列指向の集計のテスト"""
+
+    def test_columns_are_interned(self, frame):
+        """同じ料理名・区分は同じコードになる"""
+        assert len(frame) == 8
+        assert frame.days.dtype == np.int32
+        assert frame.labels("dish").count("鮭の塩焼き") == 1
+        assert frame.labels("category") == ["主菜", "汁物"]
+
+    def test_frequency(self, frame):
+        assert frame.frequency("main") == {"魚": 3, "牛肉": 2, "鶏肉": 1, "豚肉": 1}
+        assert frame.frequency("main", since=REFERENCE - timedelta(days=7)) == {"魚": 2, "鶏肉": 1}
+        assert list(frame.frequency("dish"))[:2] == ["鮭の塩焼き", "牛丼"]
+
+    def test_last_seen_and_stale(self, frame):
+        """最後に食べた日と、しばらく食べていない料理"""
+        assert frame.last_seen()["鮭の塩焼き"] == REFERENCE
+        assert frame.last_seen("main")["牛肉"] == REFERENCE - timedelta(days=70)
+        assert frame.stale(60, REFERENCE) == [
+            ("トンカツ", REFERENCE - timedelta(days=90)),
+            ("牛丼", REFERENCE - timedelta(days=70)),
+        ]
+        assert [name for name, _ in frame.stale(60, REFERENCE, min_count=2)] == ["牛丼"]
+
+    def test_rolling_counts(self, frame):
+        """窓内の回数を日ごとに返す"""
+        dates, counts = frame.rolling_counts(
+            "魚", window=7, start=REFERENCE - timedelta(days=10), end=REFERENCE
+        )
+
+        assert dates[0] == REFERENCE - timedelta(days=10) and dates[-1] == REFERENCE
+        expected = [
+            sum(1 for d in (0, 2, 9) if 0 <= i - (10 - d) < 7) for i in range(11)
+        ]
+        assert counts.tolist() == expected
+
+    def test_category_balance(self, frame):
+        assert frame.category_balance() == {"主菜": 7 / 8, "汁物": 1 / 8}
+
+    def test_summary(self, frame):
+        """プロンプト用のサマリー"""
+        summary = frame.summary(REFERENCE, weeks=2)
+
+        assert "メイン食材（直近2週）: 魚 3回、鶏肉 1回" in summary
+        assert "牛丼（01/21）" in summary
+
+    def test_columns_give_same_frame(self, frame):
+        """HistoryColumns からもレコードのリストと同じ集計になる"""
+        records = [
+            _history(0, "鮭の塩焼き"),
+            _history(0, "味噌汁", category="汁物"),
+            _history(2, "サバの味噌煮"),
+            _history(3, "鶏の唐揚げ"),
+            _history(9, "鮭の塩焼き"),
+            _history(70, "牛丼"),
+            _history(80, "牛丼"),
+            _history(90, "トンカツ"),
+        ]
+        columns = HistoryFrame.from_records(HistoryColumns.from_records(records))
+
+        np.testing.assert_array_equal(columns.days, frame.days)
+        for by in ("dish", "category", "main"):
+            assert columns.labels(by) == frame.labels(by)
+            assert columns.frequency(by) == frame.frequency(by)
+        assert columns.summary(REFERENCE, weeks=8) == frame.summary(REFERENCE, weeks=8)
+
+    def test_empty(self):
+        frame = HistoryFrame.from_records([])
+
+        assert frame.frequency() == {}
+        assert frame.summary(REFERENCE, weeks=8) == ""
+        assert frame.rolling_counts("魚")[1].size == 0
+
+
+class TestStatsCommand:
+    """stats コマンドのテスト"""
+
+    def test_stats_logs_summary(self, caplog, monkeypatch):
+        monkeypatch.setattr("src.main.validate_config", lambda services: [])
+        history = [_history(0, "鮭の塩焼き"), _history(75, "牛丼")]
+
+        with patch("src.notion_client.NotionClientWrapper") as notion, caplog.at_level(
+            "INFO", logger="src.main"
+        ):
+            notion.return_value.get_structured_history_columns.return_value = (
+                HistoryColumns.from_records(history)
+            )
+            exit_code = main(["stats", "--date", REFERENCE.isoformat(), "--weeks", "12"])
+
+        assert exit_code == 0
+        assert "(2 dishes)" in caplog.text
+        assert "Not eaten in 60 days: 1" in caplog.text
+
+
+def test_weekly_prompt_receives_summary():
+    """週間献立の生成に食事の傾向のサマリーが渡される"""
+    notion = MagicMock()
+    notion.delete_proposed_dishes_by_date_range.return_value = (0, 0)
+    notion.get_proposed_dishes_by_date_range.return_value = []
+    notion.get_structured_history_by_date_range.return_value = [_history(1, "鮭の塩焼き")]
+    openai = MagicMock()
+    openai.generate_weekly_menu.return_value = []
+    generator = WeeklyMenuGenerator(
+        notion_client=notion, openai_client=openai, slack_client=MagicMock()
+    )
+
+    generator.generate_for_next_week(REFERENCE)
+
+    summary = openai.generate_weekly_menu.call_args.kwargs["history_summary"]
+    assert summary.startswith("- メイン食材（直近8週）: 魚 1回")
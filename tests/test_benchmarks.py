@@ -0,0 +1,119 @@
+"""
+オフラインベンチマーク（フェイクサービス）のテスト
+"""
+
+from datetime import date
+
+from benchmarks.dataset import build_dataset
+from benchmarks.fakes import (
+    DB_ID_STRUCTURED,
+    CallRecorder,
+    FakeNotionClient,
+    FakeServiceConfig,
+)
+from benchmarks.memory import run_memory_benchmark
+from benchmarks.run import BenchmarkConfig, load_store, percentile, run_benchmark
+from config.settings import CIRCUIT_FAILURE_THRESHOLD
+from src.notion_client import NotionClientWrapper
+
+
+def _small_config(**overrides) -> BenchmarkConfig:
+    options = {"history_rows": 300, "backlog_records": 10, "iterations": 1}
+    return BenchmarkConfig(**{**options, **overrides})
+
+
+class TestFakeNotion:
+    """フェイク Notion のテスト"""
+
+    def test_history_is_read_across_pages(self):
+        """100件を超える履歴もページネーションで全件取得できる"""
+        dataset = build_dataset(history_rows=300, backlog_records=0)
+        store = load_store(dataset)
+        recorder = CallRecorder()
+
+        client = NotionClientWrapper(token="fake-token")
+        client.client = FakeNotionClient(store, FakeServiceConfig(), recorder)
+        client.db_structured = DB_ID_STRUCTURED
+
+        history = client.get_structured_history_by_date_range(
+            date(2000, 1, 1), date(2100, 1, 1)
+        )
+
+        assert len(history) == 300
+        assert len(recorder.records) == 3
+
+    def test_history_columns_match_records(self):
+        """列に詰めて取得した履歴はレコードのリストと同じ内容になる"""
+        store = load_store(build_dataset(history_rows=250, backlog_records=0))
+        client = NotionClientWrapper(token="fake-token")
+        client.client = FakeNotionClient(store, FakeServiceConfig(), CallRecorder())
+        client.db_structured = DB_ID_STRUCTURED
+        start, end = date(2000, 1, 1), date(2100, 1, 1)
+
+        columns = client.get_structured_history_columns(start, end)
+
+        assert list(columns) == client.get_structured_history_by_date_range(start, end)
+
+
+class TestRunBenchmark:
+    """ベンチマーク実行のテスト"""
+
+    def test_reports_both_flows(self):
+        """週次・日次の両フローを集計する"""
+        report = run_benchmark(_small_config())
+
+        weekly = report["flows"]["weekly"]
+        daily = report["flows"]["daily"]
+
+        assert weekly["exit_codes"] == [0]
+        assert daily["exit_codes"] == [0]
+        assert weekly["api_calls_per_run"]["openai.chat.completions.create"] == 11
+        assert daily["api_calls_per_run"]["openai.chat.completions.create"] == 10
+        assert daily["api_calls_per_run"]["slack.webhook.post"] == 1
+        assert weekly["duration_p99_ms"] >= weekly["duration_p50_ms"] > 0
+
+    def test_weekly_fills_empty_days(self):
+        """確定済み・外食予定の日を除く5日分の献立が作成される"""
+        report = run_benchmark(_small_config(backlog_records=0), flows=("weekly",))
+
+        assert report["flows"]["weekly"]["records_created_per_run"] == 15
+
+    def test_rate_limits_are_injected(self):
+        """429 の注入が呼び出し結果に反映され、続く失敗でサーキットブレーカーが開く"""
+        config = _small_config(
+            openai=FakeServiceConfig(rate_limit_ratio=1.0, retry_after_seconds=0)
+        )
+
+        report = run_benchmark(config, flows=("daily",))
+
+        outcomes = report["flows"]["daily"]["api_outcomes_per_run"]
+        # 1件目は3回リトライし、2件目の失敗で開いた後は呼び出さない
+        assert outcomes["openai.rate_limited"] == CIRCUIT_FAILURE_THRESHOLD
+        assert "openai.ok" not in outcomes
+
+    def test_results_are_deterministic(self):
+        """同じシードでは同じ API 呼び出し数になる"""
+        first = run_benchmark(_small_config(), flows=("weekly",))
+        second = run_benchmark(_small_config(), flows=("weekly",))
+
+        assert (
+            first["flows"]["weekly"]["api_calls_per_run"]
+            == second["flows"]["weekly"]["api_calls_per_run"]
+        )
+
+
+def test_memory_benchmark_columns_are_smallest():
+    """列に詰めた履歴はレコードのリストより小さい"""
+    layouts = run_memory_benchmark(history_rows=2_000)["layouts"]
+
+    assert layouts["columns"]["bytes"] < layouts["slots"]["bytes"] < layouts["plain"]["bytes"]
+    assert layouts["columns"]["bytes"] * 4 < layouts["plain"]["bytes"]
+
+
+def test_percentile_nearest_rank():
+    """パーセンタイルは最近傍順位法で計算する"""
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
@@ -0,0 +1,70 @@
+"""
+料理カタログのテスト
+"""
+
+from datetime import date, timedelta
+
+from src.catalog import DishCatalog, infer_seasons
+from src.notion_client import StructuredActualHistory
+
+
+def _history(d: date, dish_name: str, category: str = "主菜") -> StructuredActualHistory:
+    return StructuredActualHistory(id=None, dish_name=dish_name, date=d, category=category)
+
+
+class TestDishCatalog:
+    """カタログ作成のテスト"""
+
+    def test_curated_entries(self):
+        """コーパスの料理は区分・旬・調理時間・買い物リストを持つ"""
+        catalog = DishCatalog.build()
+
+        curry = catalog.get("カレーライス")
+        saury = catalog.get("さんまの塩焼き")
+
+        assert curry.category == "主菜"
+        assert curry.cook_minutes == 50
+        assert curry.main_ingredient == "牛肉"
+        assert "じゃがいも" in curry.shopping_list
+        assert saury.seasons == ("秋",)
+        assert all(d.category == "副菜" for d in catalog.by_category("副菜"))
+
+    def test_history_entries(self):
+        """履歴の料理が追加され、外食（その他）は除かれる"""
+        start = date(2023, 7, 1)
+        history = [_history(start + timedelta(days=7 * i), "冷やし中華") for i in range(6)]
+        history += [
+            _history(start, "寿司", category="その他"),
+            _history(start, "カレーライス"),
+        ]
+
+        catalog = DishCatalog.build(history)
+        noodles = catalog.get("冷やし中華")
+
+        assert noodles.seasons == ("夏",)
+        assert noodles.curated is False
+        assert catalog.get("寿司") is None
+        assert catalog.get("カレーライス").curated is True
+
+    def test_without_curated(self):
+        catalog = DishCatalog.build([_history(date(2024, 1, 1), "ビビンバ")], include_curated=False)
+
+        assert [d.name for d in catalog] == ["ビビンバ"]
+
+
+class TestInferSeasons:
+    """旬の推定のテスト"""
+
+    def test_too_few_samples(self):
+        assert infer_seasons([date(2024, 1, 1)]) == ()
+
+    def test_all_year(self):
+        """通年で食べている料理は旬なし"""
+        dates = [date(2023, month, 1) for month in range(1, 13)]
+
+        assert infer_seasons(dates) == ()
+
+    def test_two_seasons(self):
+        dates = [date(2023, m, 1) for m in (10, 11, 12, 1, 2, 11)]
+
+        assert infer_seasons(dates) == ("秋", "冬")
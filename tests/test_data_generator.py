@@ -0,0 +1,126 @@
+"""
+合成データ生成器のテスト
+"""
+
+import json
+from datetime import date
+
+from benchmarks.fakes import (
+    DB_ID_PROPOSED,
+    DB_ID_RAW,
+    DB_ID_STRUCTURED,
+    CallRecorder,
+    FakeNotionClient,
+    FakeNotionStore,
+    FakeServiceConfig,
+)
+from src.data_generator import (
+    DISH_CORPUS,
+    SyntheticDataGenerator,
+    write_local,
+)
+from src.notion_client import NotionClientWrapper, StructuredActualHistory
+
+MAIN_INGREDIENT = {dish.name: dish.main_ingredient for dish in DISH_CORPUS["主菜"]}
+
+
+class TestSyntheticDataGenerator:
+    """合成データ生成のテスト"""
+
+    def test_generation_is_deterministic(self):
+        """同じシードからは同じデータが生成される"""
+        first = SyntheticDataGenerator(seed=42).generate(date(2024, 1, 31), years=1)
+        second = SyntheticDataGenerator(seed=42).generate(date(2024, 1, 31), years=1)
+
+        assert first == second
+
+    def test_backlog_days_are_unprocessed(self):
+        """最後の数日分は未処理の実績入力のみになる"""
+        dataset = SyntheticDataGenerator(seed=1).generate(
+            date(2024, 1, 31), years=1, raw_backlog_days=5
+        )
+
+        unprocessed = [r for r in dataset.raw_inputs if not r.is_processed]
+        assert len(unprocessed) == 5
+        assert all(r.date >= date(2024, 1, 27) for r in unprocessed)
+        assert all(h.date < date(2024, 1, 27) for h in dataset.history)
+
+    def test_main_ingredient_not_repeated_on_consecutive_days(self):
+        """主菜のメイン食材が2日連続しない"""
+        dataset = SyntheticDataGenerator(seed=3).generate(date(2024, 1, 31), years=2)
+
+        mains = {
+            h.date: MAIN_INGREDIENT[h.dish_name]
+            for h in dataset.history
+            if h.category == "主菜"
+        }
+        for day, main in mains.items():
+            previous = mains.get(day.fromordinal(day.toordinal() - 1))
+            assert previous != main
+
+    def test_write_local(self, tmp_path):
+        """テーブルごとにJSONLへ書き出す"""
+        dataset = SyntheticDataGenerator(seed=0).generate(date(2024, 1, 31), years=0.1)
+
+        counts = write_local(dataset, tmp_path, ["structured", "raw"])
+
+        lines = (tmp_path / "structured.jsonl").read_text(encoding="utf-8").splitlines()
+        assert counts == {
+            "structured": len(dataset.history),
+            "raw": len(dataset.raw_inputs),
+        }
+        assert len(lines) == len(dataset.history)
+        assert set(json.loads(lines[0])) == {"dish_name", "date", "category"}
+        assert not (tmp_path / "proposed.jsonl").exists()
+
+
+class TestBulkCreate:
+    """一括書き込みのテスト"""
+
+    def _client(self, store: FakeNotionStore, rate_limit: float = 0.0):
+        client = NotionClientWrapper(token="fake-token")
+        client.client = FakeNotionClient(
+            store, FakeServiceConfig(rate_limit_ratio=rate_limit), CallRecorder()
+        )
+        client.db_proposed = DB_ID_PROPOSED
+        client.db_raw = DB_ID_RAW
+        client.db_structured = DB_ID_STRUCTURED
+        return client
+
+    def test_bulk_create_routes_records_by_type(self):
+        """レコードの型ごとに書き込み先が選ばれ、IDが設定される"""
+        dataset = SyntheticDataGenerator(seed=0).generate(date(2024, 1, 31), years=0.1)
+        store = FakeNotionStore()
+        client = self._client(store)
+        progress = []
+
+        result = client.bulk_create(
+            dataset.records(["structured", "proposed", "raw"]),
+            rate_per_second=0,
+            max_workers=4,
+            on_progress=lambda ok, failed: progress.append((ok, failed)),
+        )
+
+        assert result.failed == 0
+        assert result.created == dataset.count(["structured", "proposed", "raw"])
+        assert store.count(DB_ID_STRUCTURED) == len(dataset.history)
+        assert store.count(DB_ID_PROPOSED) == len(dataset.proposals)
+        assert store.count(DB_ID_RAW) == len(dataset.raw_inputs)
+        assert all(h.id for h in dataset.history)
+        assert len(progress) == result.created
+
+    def test_bulk_create_reports_failures(self):
+        """失敗したレコードは件数とエラーに記録される"""
+        records = [
+            StructuredActualHistory(
+                id=None, dish_name="カレーライス", date=date(2024, 1, d), category="主菜"
+            )
+            for d in range(1, 11)
+        ]
+        client = self._client(FakeNotionStore(), rate_limit=1.0)
+
+        result = client.bulk_create(records, rate_per_second=0, max_workers=2)
+
+        assert result.created == 0
+        assert result.failed == 10
+        assert len(result.errors) == 10
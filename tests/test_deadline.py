@@ -0,0 +1,61 @@
+"""
+実行の締め切りのテスト
+"""
+
+import contextvars
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.deadline import DeadlineExceeded, deadline_scope, remaining, timeout_for
+from src.main import main
+
+
+def test_no_deadline_by_default():
+    assert remaining() is None
+    assert timeout_for(60.0) == 60.0
+
+
+def test_timeout_is_capped_by_the_deadline():
+    with deadline_scope(5.0):
+        assert 4.0 < timeout_for(60.0) <= 5.0
+        assert timeout_for(1.0) == 1.0
+    assert remaining() is None
+
+
+def test_inner_scope_cannot_extend_the_deadline():
+    with deadline_scope(2.0):
+        with deadline_scope(100.0):
+            assert remaining() <= 2.0
+        with deadline_scope(1.0):
+            assert remaining() <= 1.0
+
+
+def test_exhausted_budget_raises():
+    with patch("src.deadline.time.monotonic", side_effect=[100.0, 200.0]):
+        with deadline_scope(10.0):
+            with pytest.raises(DeadlineExceeded):
+                timeout_for(60.0)
+
+
+def test_deadline_follows_copied_context_into_threads():
+    seen = []
+    with deadline_scope(30.0):
+        thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(lambda: seen.append(remaining()),)
+        )
+        thread.start()
+        thread.join()
+    assert seen[0] is not None and seen[0] <= 30.0
+
+
+def test_budget_option_sets_the_deadline():
+    seen = []
+    record = lambda target, dry_run: seen.append(remaining()) or 0  # noqa: E731
+    with patch("src.main.run_daily_reminder", side_effect=record):
+        assert main(["--budget", "120", "daily"]) == 0
+        assert main(["--budget", "0", "daily"]) == 0
+
+    assert 110.0 < seen[0] <= 120.0
+    assert seen[1] is None
@@ -0,0 +1,117 @@
+"""
+料理名の類似検出のテスト
+"""
+
+from datetime import date
+
+import pytest
+
+from src.dish_similarity import (
+    DishSimilarityIndex,
+    normalise,
+    shingles,
+    similarity,
+)
+from src.notion_client import StructuredActualHistory
+from src.openai_client import GeneratedMenuItem
+
+
+def _item(day: int, dish_name: str, category: str = "主菜") -> GeneratedMenuItem:
+    return GeneratedMenuItem(
+        date=date(2024, 1, day), dish_name=dish_name, category=category, shopping_list=""
+    )
+
+
+@pytest.fixture
+def index():
+    history = ["鶏の唐揚げ", "豚肉の生姜焼き", "カレーライス", "さばの味噌煮", "ハンバーグ"]
+    return DishSimilarityIndex.from_records(
+        StructuredActualHistory(id=None, dish_name=name, date=date(2024, 1, i + 1), category="主菜")
+        for i, name in enumerate(history)
+    )
+
+
+class TestSimilarity:
+    """類似度のテスト"""
+
+    def test_normalise(self):
+        """表記揺れ・助詞・括弧を取り除く"""
+        assert normalise("鶏の唐揚げ（甘酢）") == normalise("鶏唐揚げ(甘酢)")
+        assert normalise("サバの味噌煮") == normalise("さば 味噌煮")
+
+    def test_containment_scores_high(self):
+        """一方が他方を含む名前は類似度が高い"""
+        a = shingles(normalise("鶏の唐揚げ"))
+        b = shingles(normalise("唐揚げ"))
+
+        assert similarity(a, b) > 0.8
+        assert similarity(a, shingles("さらだ")) == 0.0
+
+
+class TestDishSimilarityIndex:
+    """インデックスのテスト"""
+
+    @pytest.mark.parametrize(
+        "dish_name, expected",
+        [
+            ("唐揚げ", "鶏の唐揚げ"),
+            ("豚の生姜焼き", "豚肉の生姜焼き"),
+            ("サバの味噌煮", "さばの味噌煮"),
+            ("煮込みハンバーグ", "ハンバーグ"),
+        ],
+    )
+    def test_near_duplicates_are_found(self, index, dish_name, expected):
+        assert index.query(dish_name).dish_name == expected
+
+    @pytest.mark.parametrize(
+        "dish_name", ["鶏の生姜焼き", "鮭の塩焼き", "とんかつ", "麻婆なす"]
+    )
+    def test_different_dishes_are_not_flagged(self, index, dish_name):
+        """メイン食材が違う料理・別の料理は検出しない"""
+        assert index.query(dish_name) is None
+
+    def test_exact_match_reports_last_date(self, index):
+        index.add("カレーライス", date(2024, 1, 20))
+
+        similar = index.query("カレーライス")
+
+        assert similar.similarity == 1.0
+        assert similar.date == date(2024, 1, 20)
+        assert len(index) == 5
+
+    def test_check_flags_main_dishes_and_repeats_within_week(self, index):
+        """主菜のみを検証し、同じ週の中の重複も検出する"""
+        duplicates = index.check(
+            [
+                _item(22, "唐揚げ"),
+                _item(22, "豆腐の味噌汁", category="汁物"),
+                _item(23, "ぶりの照り焼き"),
+                _item(25, "ぶり照り焼き"),
+            ]
+        )
+
+        assert [(d.date.day, d.similar.dish_name) for d in duplicates] == [
+            (22, "鶏の唐揚げ"),
+            (25, "ぶりの照り焼き"),
+        ]
+        assert "鶏の唐揚げ" in duplicates[0].message
+
+    def test_queries_compare_only_bucket_candidates(self):
+        """履歴が増えても比較するのは同じバケットの候補だけ"""
+        index = DishSimilarityIndex()
+        for i in range(2000):
+            index.add(f"料理{i:04d}番")
+        index.add("鶏の唐揚げ")
+
+        compared = []
+        original = index._entries.__getitem__
+
+        class Spy(dict):
+            def __getitem__(self, key):
+                compared.append(key)
+                return original(key)
+
+        index._entries = Spy(index._entries)
+
+        assert index.query("唐揚げ").dish_name == "鶏の唐揚げ"
+        assert len(compared) < 100
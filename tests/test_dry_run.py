@@ -0,0 +1,154 @@
+"""
+ドライランのテスト
+"""
+
+import json
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from benchmarks.dataset import ANCHOR_DATE, build_dataset
+from benchmarks.fakes import (
+    DB_ID_PROPOSED,
+    DB_ID_RAW,
+    DB_ID_STRUCTURED,
+    fake_environment,
+)
+from benchmarks.run import BenchmarkConfig, build_services
+from src.dry_run import DryRunNotion, DryRunPlan, DryRunStore
+from src.history_store import HistoryColumns
+from src.main import main
+from src.notion_client import ProposedDish, RawActualInput, StructuredActualHistory
+
+NEXT_MONDAY = date(2024, 1, 15)
+WRITES = {"pages.create", "pages.update", "webhook.post"}
+
+
+@pytest.fixture
+def services():
+    config = BenchmarkConfig(history_rows=200, backlog_records=5, iterations=1)
+    services = build_services(config, build_dataset(200, 5, seed=config.seed))
+    # 上書きされる前回の提案
+    services.store.insert(
+        DB_ID_PROPOSED,
+        {
+            "料理名": {"title": [{"text": {"content": "カレー"}}]},
+            "日付": {"date": {"start": (NEXT_MONDAY + timedelta(days=4)).isoformat()}},
+            "区分": {"multi_select": [{"name": "主菜"}]},
+            "ステータス": {"multi_select": [{"name": "提案"}]},
+            "買い物リスト": {"rich_text": []},
+        },
+    )
+    return services
+
+
+def _counts(services) -> dict[str, int]:
+    return {db: services.store.count(db) for db in (DB_ID_PROPOSED, DB_ID_RAW, DB_ID_STRUCTURED)}
+
+
+def _run(services, capsys, argv: list[str]) -> dict:
+    before = _counts(services)
+    with fake_environment(services):
+        assert main(argv) == 0
+
+    assert _counts(services) == before
+    assert not WRITES & {record.method for record in services.recorder.snapshot()}
+    return json.loads(capsys.readouterr().out)
+
+
+class TestCommands:
+    """--dry-run の実行のテスト"""
+
+    def test_weekly_plans_archives_creates_and_notification(self, services, capsys):
+        plan = _run(services, capsys, ["weekly", "--dry-run", "--date", ANCHOR_DATE.isoformat()])
+
+        ops = plan["operations"]
+        archived = [op for op in ops if op["action"] == "archive"]
+        assert [op["dish_name"] for op in archived] == ["カレー"]
+        created = [op for op in ops if op["action"] == "create" and op["table"] == "Proposed_Dishes"]
+        assert all(op["database_id"] == DB_ID_PROPOSED for op in created)
+        # 外食と確定済みの日を除き、アーカイブした提案の日も作り直す
+        dates = {op["properties"]["日付"]["date"]["start"] for op in created}
+        week = [(NEXT_MONDAY + timedelta(days=i)).isoformat() for i in range(7)]
+        assert dates == set(week) - {week[0], week[2]}
+        assert plan["summary"]["slack.post"] >= 1
+        assert plan["summary"]["notion.update"] == 5  # 実績入力を処理済みにする
+
+    def test_daily_plans_structuring_without_writes(self, services, capsys):
+        target = ANCHOR_DATE + timedelta(days=2)
+        plan = _run(services, capsys, ["daily", "--dry-run", "--date", target.isoformat()])
+
+        assert plan["command"] == "daily"
+        assert plan["summary"]["notion.update"] == 5
+        assert plan["summary"]["notion.create"] >= 5
+        posts = [op for op in plan["operations"] if op["service"] == "slack"]
+        assert len(posts) == 1
+        assert "blocks" in posts[0]["payload"]
+
+
+class TestDryRunNotion:
+    """書き込みの記録と読み取りへの反映のテスト"""
+
+    def test_reads_reflect_planned_writes(self):
+        kept = ProposedDish("p1", "親子丼", NEXT_MONDAY, "主菜", "確定")
+        stale = ProposedDish("p2", "カレー", NEXT_MONDAY, "主菜", "提案")
+        notion = MagicMock()
+        notion.get_proposed_dishes_by_date_range.return_value = [kept, stale]
+        notion.get_unprocessed_raw_inputs.return_value = [
+            RawActualInput("r1", NEXT_MONDAY, "カレー")
+        ]
+        notion._build_create_request.return_value = ("db", {"料理名": "牛丼"})
+        plan = DryRunPlan("weekly")
+        dry = DryRunNotion(notion, plan)
+
+        assert dry.delete_proposed_dishes_by_date_range(NEXT_MONDAY, NEXT_MONDAY) == (1, 0)
+        new = ProposedDish(None, "牛丼", NEXT_MONDAY, "主菜", "提案")
+        assert dry.bulk_create([new]).created == 1
+        dry.mark_raw_input_as_processed("r1")
+
+        assert dry.get_proposed_dishes_by_date_range(NEXT_MONDAY, NEXT_MONDAY) == [kept, new]
+        assert new.id == "dry-run-1"
+        assert dry.get_unprocessed_raw_inputs() == []
+        assert plan.summary() == {"notion.archive": 1, "notion.create": 1, "notion.update": 1}
+        notion.delete_proposed_dishes.assert_not_called()
+        notion.bulk_create.assert_not_called()
+
+    def test_history_columns_reflect_planned_creates(self):
+        old = StructuredActualHistory("h1", "カレー", NEXT_MONDAY - timedelta(days=7), "主菜")
+        notion = MagicMock()
+        notion.get_structured_history_columns.return_value = HistoryColumns.from_records([old])
+        notion._build_create_request.return_value = ("db", {})
+        dry = DryRunNotion(notion, DryRunPlan("daily"))
+
+        new = StructuredActualHistory(None, "親子丼", NEXT_MONDAY, "主菜")
+        dry.create_structured_history(new)
+        columns = dry.get_structured_history_columns(NEXT_MONDAY - timedelta(days=7), NEXT_MONDAY)
+
+        assert [r.dish_name for r in columns] == ["親子丼", "カレー"]
+
+    def test_unknown_methods_fail_closed(self):
+        notion = MagicMock()
+        notion.get_proposed_database_url.return_value = "https://notion.so/db"
+        dry = DryRunNotion(notion, DryRunPlan("weekly"))
+
+        assert dry.get_proposed_database_url() == "https://notion.so/db"
+        for name in ("archive_page", "reset_proposed_dishes", "create_test_raw_input", "notion"):
+            with pytest.raises(AttributeError, match="dry run"):
+                getattr(dry, name)
+        notion.archive_page.assert_not_called()
+
+    def test_local_state_is_not_written(self, tmp_path):
+        store = MagicMock()
+        store.path = tmp_path / "draft.json"
+        plan = DryRunPlan("daily")
+        dry = DryRunStore(store, "menu_draft", plan)
+
+        dry.load(NEXT_MONDAY)
+        dry.save(object())
+        dry.clear()
+
+        store.load.assert_called_once_with(NEXT_MONDAY)
+        store.save.assert_not_called()
+        store.clear.assert_not_called()
+        assert [op["action"] for op in plan.operations] == ["save", "clear"]
@@ -0,0 +1,179 @@
+"""
+食事履歴インデックスのテスト
+"""
+
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.history_index import HistoryIndex, main_ingredient_of
+from src.menu_generator import WeeklyMenuGenerator
+from src.notion_client import ProposedDish, StructuredActualHistory
+from src.openai_client import GeneratedMenuItem
+from tests.conftest import fake_bulk_create
+
+
+def _history(day: int, dish_name: str, category: str = "主菜") -> StructuredActualHistory:
+    return StructuredActualHistory(
+        id=None, dish_name=dish_name, date=date(2024, 1, day), category=category
+    )
+
+
+def _item(day: int, dish_name: str, shopping_list: str = "") -> GeneratedMenuItem:
+    return GeneratedMenuItem(
+        date=date(2024, 1, day),
+        dish_name=dish_name,
+        category="主菜",
+        shopping_list=shopping_list,
+    )
+
+
+class TestMainIngredient:
+    """メイン食材の推定のテスト"""
+
+    @pytest.mark.parametrize(
+        "dish_name, expected",
+        [
+            ("豚の生姜焼き", "豚肉"),
+            ("鶏の唐揚げ", "鶏肉"),
+            ("チキン南蛮", "鶏肉"),
+            ("麻婆豆腐", "ひき肉"),
+            ("ハンバーグ", "ひき肉"),
+            ("牛丼", "牛肉"),
+            ("サーモンのムニエル", "魚"),
+            ("さばの味噌煮", "魚"),
+            ("エビチリ", "魚介"),
+            ("揚げ出し豆腐", "豆腐"),
+            ("牛乳スープ", None),
+            ("鶏がらスープ", None),
+            ("野菜炒め", None),
+        ],
+    )
+    def test_from_dish_name(self, dish_name, expected):
+        assert main_ingredient_of(dish_name) == expected
+
+    def test_from_shopping_list(self):
+        """料理名で判定できなければ買い物リストの精肉・鮮魚から推定する"""
+        assert main_ingredient_of("野菜炒め", "キャベツ 1/4玉, 豚こま切れ肉 200g") == "豚肉"
+        assert main_ingredient_of("冷奴", "豆腐 1丁, かつお節") is None
+
+
+class TestHistoryIndex:
+    """インデックスのテスト"""
+
+    def test_last_eaten(self):
+        """メイン食材・料理名の最終日を引ける"""
+        index = HistoryIndex.from_records(
+            [
+                _history(10, "豚の生姜焼き"),
+                _history(3, "とんかつ"),
+                _history(12, "豚汁", category="汁物"),
+                _history(8, "鶏の唐揚げ"),
+            ]
+        )
+
+        assert index.last_eaten("豚肉") == date(2024, 1, 12)
+        assert index.last_eaten("鶏肉") == date(2024, 1, 8)
+        assert index.last_eaten("牛肉") is None
+        assert index.last_served("トンカツ") == date(2024, 1, 3)
+        assert index.dates_of("豚肉") == [date(2024, 1, d) for d in (3, 10, 12)]
+
+    def test_recently_served(self):
+        index = HistoryIndex.from_records([_history(10, "カレーライス")])
+
+        assert index.recently_served("カレーライス", since=date(2024, 1, 5)) is True
+        assert index.recently_served("カレーライス", since=date(2024, 1, 11)) is False
+        assert index.recently_served("オムライス", since=date(2024, 1, 1)) is False
+
+    def test_duplicates_are_ignored(self):
+        """同じ日・同じ料理は1件として数える"""
+        index = HistoryIndex()
+        index.add(date(2024, 1, 10), "豚の生姜焼き", "主菜")
+        index.add(date(2024, 1, 10), "豚の生姜焼き", "主菜")
+
+        assert len(index) == 1
+        assert index.dates_of("豚肉") == [date(2024, 1, 10)]
+
+    def test_rotation_uses_main_dishes_only(self):
+        """連続の判定は主菜のみが対象"""
+        index = HistoryIndex.from_records(
+            [_history(14, "豚汁", category="汁物"), _history(16, "鶏の照り焼き")]
+        )
+
+        assert index.main_ingredients_on(date(2024, 1, 14)) == set()
+        assert index.rotation_conflict(date(2024, 1, 15), "豚肉") is None
+        assert index.rotation_conflict(date(2024, 1, 15), "鶏肉") == date(2024, 1, 16)
+
+    def test_check_adds_items_incrementally(self):
+        """検証した献立は索引に追加され、続く日の検証に使われる"""
+        index = HistoryIndex.from_records([_history(14, "豚の生姜焼き")])
+
+        violations = index.check(
+            [
+                _item(17, "鶏の照り焼き"),
+                _item(15, "回鍋肉"),
+                _item(16, "チキンソテー"),
+            ]
+        )
+
+        assert [(v.date.day, v.ingredient, v.conflict_date.day) for v in violations] == [
+            (15, "豚肉", 14),
+            (17, "鶏肉", 16),
+        ]
+        assert index.last_eaten("鶏肉") == date(2024, 1, 17)
+        assert "豚肉" in violations[0].message
+
+
+class TestMenuGeneratorValidation:
+    """献立生成での検証のテスト"""
+
+    def test_violations_are_reported_as_warnings(self):
+        """メイン食材の連続は警告として返し、献立は保存する"""
+        notion = MagicMock()
+        notion.delete_proposed_dishes_by_date_range.return_value = (0, 0)
+        notion.get_proposed_dishes_by_date_range.return_value = [
+            ProposedDish(
+                id="p1",
+                dish_name="豚の角煮",
+                date=date(2024, 1, 15),
+                category="主菜",
+                status="確定",
+            )
+        ]
+        notion.get_structured_history_by_date_range.return_value = []
+        notion.bulk_create.side_effect = fake_bulk_create
+        openai = MagicMock()
+        openai.generate_weekly_menu.return_value = [
+            _item(16, "豚の生姜焼き"),
+            _item(17, "さばの味噌煮"),
+        ]
+        generator = WeeklyMenuGenerator(
+            notion_client=notion, openai_client=openai, slack_client=MagicMock()
+        )
+
+        result = generator.generate_for_next_week(date(2024, 1, 13))
+
+        assert result.generated_count == 2
+        assert len(result.warnings) == 1
+        assert "01/16 豚の生姜焼き" in result.warnings[0]
+
+    def test_near_duplicates_are_reported_as_warnings(self):
+        """最近の料理と似た主菜は警告として返す"""
+        notion = MagicMock()
+        notion.delete_proposed_dishes_by_date_range.return_value = (0, 0)
+        notion.get_proposed_dishes_by_date_range.return_value = []
+        notion.get_structured_history_by_date_range.return_value = [_history(10, "鶏の唐揚げ")]
+        notion.bulk_create.side_effect = fake_bulk_create
+        openai = MagicMock()
+        openai.generate_weekly_menu.return_value = [_item(16, "唐揚げ")]
+        generator = WeeklyMenuGenerator(
+            notion_client=notion, openai_client=openai, slack_client=MagicMock()
+        )
+
+        result = generator.generate_for_next_week(date(2024, 1, 13))
+
+        assert result.generated_count == 1
+        assert result.warnings == [
+            "01/16 唐揚げ: 最近の「鶏の唐揚げ」（01/10）と似ています（類似度 0.83）"
+        ]
@@ -0,0 +1,101 @@
+"""
+実績履歴のコンパクトな保持のテスト
+"""
+
+import pickle
+import uuid
+from dataclasses import asdict
+from datetime import date, timedelta
+
+import pytest
+
+from src.catalog import DishCatalog
+from src.dish_similarity import DishSimilarityIndex
+from src.history_index import HistoryIndex
+from src.history_store import HistoryColumns
+from src.notion_client import ProposedDish, RawActualInput, StructuredActualHistory
+
+START = date(2024, 1, 1)
+
+
+def _history(days: int, dish_name: str, category: str = "主菜", page_id=None):
+    return StructuredActualHistory(
+        id=page_id, dish_name=dish_name, date=START + timedelta(days=days), category=category
+    )
+
+
+@pytest.fixture
+def records():
+    return [
+        _history(0, "鮭の塩焼き", page_id=str(uuid.UUID(int=1))),
+        _history(0, "味噌汁", category="汁物", page_id="history-123"),
+        _history(1, "鶏の唐揚げ", page_id=str(uuid.UUID(int=2)).replace("-", "")),
+        _history(2, "鮭の塩焼き"),
+    ]
+
+
+class TestHistoryColumns:
+    """HistoryColumns のテスト"""
+
+    def test_round_trip(self, records):
+        """取り出したレコードは元のレコードと等しい（ID の表記も保つ）"""
+        columns = HistoryColumns.from_records(records)
+
+        assert len(columns) == 4
+        assert list(columns) == records
+        assert columns[1] == records[1]
+        assert columns[-1] == records[-1]
+        assert columns[1:3] == records[1:3]
+
+    def test_strings_are_interned(self, records):
+        """同じ料理名・区分は1つだけ持つ"""
+        columns = HistoryColumns.from_records(records)
+
+        assert columns.dish_names == ["鮭の塩焼き", "味噌汁", "鶏の唐揚げ"]
+        assert columns.categories == ["主菜", "汁物"]
+        assert list(columns.dish_codes) == [0, 1, 2, 0]
+        assert list(columns.days) == [START.toordinal()] * 2 + [
+            START.toordinal() + 1,
+            START.toordinal() + 2,
+        ]
+
+    def test_index_out_of_range(self, records):
+        columns = HistoryColumns.from_records(records)
+
+        with pytest.raises(IndexError):
+            columns[4]
+        with pytest.raises(IndexError):
+            columns[-5]
+
+    def test_records_are_copies(self, records):
+        """取り出したレコードを変更しても列は変わらない"""
+        columns = HistoryColumns.from_records(records)
+
+        columns[0].dish_name = "変更"
+
+        assert columns[0].dish_name == "鮭の塩焼き"
+
+    def test_consumers_accept_columns(self, records):
+        """索引・カタログ・類似度判定にリストの代わりに渡せる"""
+        columns = HistoryColumns.from_records(records)
+
+        index = HistoryIndex.from_records(columns)
+        assert index.last_served("鮭の塩焼き") == START + timedelta(days=2)
+        assert index.main_ingredients_on(START + timedelta(days=1)) == {"鶏肉"}
+        assert DishCatalog.build(columns, include_curated=False).get("鶏の唐揚げ")
+        assert DishSimilarityIndex.from_records(columns).query("鮭の塩焼き")
+        assert [h for h in columns if h.date >= START + timedelta(days=1)] == records[2:]
+
+
+def test_records_use_slots():
+    """Notion のレコードは __slots__ を持ち、属性を追加できない"""
+    for record in (
+        ProposedDish(id=None, dish_name="カレー", date=START, category="主菜", status="提案"),
+        RawActualInput(id=None, date=START, food_eaten="カレー"),
+        _history(0, "カレー"),
+    ):
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.extra = 1
+        assert asdict(record)
+        assert pickle.loads(pickle.dumps(record)) == record
@@ -0,0 +1,204 @@
+"""
+冪等キーと書き込みインデックスのテスト
+"""
+
+from datetime import date
+from unittest.mock import patch
+
+import httpx
+import pytest
+from notion_client.errors import APIErrorCode, APIResponseError
+
+from benchmarks.dataset import build_dataset
+from benchmarks.fakes import DB_ID_PROPOSED, DB_ID_STRUCTURED, fake_environment
+from benchmarks.run import BenchmarkConfig, build_services
+from src.idempotency import WriteIndex, idempotency_key, run_id
+from src.notion_client import NotionClientWrapper, ProposedDish, StructuredActualHistory
+
+DAY = date(2024, 1, 15)
+KEY_PROPERTY = "冪等キー"
+
+
+@pytest.fixture
+def services():
+    config = BenchmarkConfig(history_rows=0, backlog_records=0, iterations=1)
+    services = build_services(config, build_dataset(0, 0, seed=config.seed))
+    for pages in services.store.databases.values():
+        pages.clear()
+    return services
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = tmp_path / "write_index.db"
+    with patch("src.notion_client.WRITE_INDEX_PATH", str(path)):
+        yield path
+
+
+def _dishes(run: str = "run-1") -> list[ProposedDish]:
+    return [
+        ProposedDish(
+            None, name, DAY, category, "提案",
+            idempotency_key=idempotency_key("proposed", DAY, category, name, run),
+        )
+        for name, category in (("親子丼", "主菜"), ("おひたし", "副菜"))
+    ]
+
+
+def _creates(services) -> int:
+    return sum(1 for r in services.recorder.snapshot() if r.method == "pages.create")
+
+
+class TestKeys:
+    """冪等キーの計算のテスト"""
+
+    def test_deterministic_and_distinct(self):
+        assert idempotency_key("a", DAY, 1) == idempotency_key("a", DAY, 1)
+        assert idempotency_key("a", DAY, 1) != idempotency_key("a", DAY, 2)
+        # 区切り文字で値の境界が区別される
+        assert idempotency_key("ab", "c") != idempotency_key("a", "bc")
+        assert len(idempotency_key("a")) == 32
+
+    def test_run_id_prefers_setting(self):
+        with patch("src.idempotency.RUN_ID", "12345"):
+            assert run_id("week-2024-01-15") == "12345"
+        with patch("src.idempotency.RUN_ID", ""):
+            assert run_id("week-2024-01-15") == "week-2024-01-15"
+
+
+class TestWriteIndex:
+    """書き込みインデックスのテスト"""
+
+    def test_add_get_discard(self, tmp_path):
+        index = WriteIndex(tmp_path / "sub" / "index.db")
+        index.add("k1", "page-1", "db")
+        index.add("k2", "page-2", "db")
+
+        assert index.get("k1") == "page-1"
+        assert index.get("missing") is None
+        assert index.discard_pages(["page-1", "page-9"]) == 1
+        assert index.get("k1") is None
+        assert index.count() == 1
+
+
+class TestNotionWrites:
+    """NotionClientWrapper の冪等な作成のテスト"""
+
+    def test_rerun_skips_written_pages(self, services, index_path):
+        with fake_environment(services):
+            first = NotionClientWrapper().bulk_create(_dishes())
+            retried = _dishes()
+            second = NotionClientWrapper().bulk_create(retried)
+
+        assert (first.created, first.skipped) == (2, 0)
+        assert (second.created, second.skipped) == (0, 2)
+        assert all(dish.id for dish in retried)
+        assert services.store.count(DB_ID_PROPOSED) == 2
+        assert _creates(services) == 2
+
+    def test_other_run_creates_again(self, services, index_path):
+        with fake_environment(services):
+            NotionClientWrapper().bulk_create(_dishes("run-1"))
+            result = NotionClientWrapper().bulk_create(_dishes("run-2"))
+
+        assert result.created == 2
+        assert services.store.count(DB_ID_PROPOSED) == 4
+
+    def test_archived_pages_can_be_recreated(self, services, index_path):
+        with fake_environment(services):
+            notion = NotionClientWrapper()
+            dishes = _dishes()
+            notion.bulk_create(dishes)
+            assert notion.delete_proposed_dishes(dishes) == (2, 0)
+            result = notion.bulk_create(_dishes())
+
+        assert result.created == 2
+        assert services.store.count(DB_ID_PROPOSED) == 2
+
+    def test_without_index_every_create_is_sent(self, services):
+        with fake_environment(services):
+            NotionClientWrapper().bulk_create(_dishes())
+            NotionClientWrapper().bulk_create(_dishes())
+
+        assert _creates(services) == 4
+
+    def test_timed_out_create_is_verified_before_retry(self, services, index_path):
+        history = StructuredActualHistory(
+            None, "親子丼", DAY, "主菜", idempotency_key=idempotency_key("structured", "r1")
+        )
+        create = services.notion.pages.create
+
+        def create_then_time_out(**kwargs):
+            # 作成は受理されたが、応答がタイムアウトした
+            create(**kwargs)
+            raise httpx.ReadTimeout("timed out")
+
+        with (
+            fake_environment(services),
+            patch("src.notion_client.NOTION_IDEMPOTENCY_PROPERTY", KEY_PROPERTY),
+            patch("src.resilience.time.sleep"),
+            patch.object(services.notion.pages, "create", side_effect=create_then_time_out),
+        ):
+            notion = NotionClientWrapper()
+            page_id = notion.create_structured_history(history)
+            stored = notion.get_structured_history_by_date_range(DAY, DAY)
+
+        assert services.store.count(DB_ID_STRUCTURED) == 1
+        assert [h.id for h in stored] == [page_id]
+        assert stored[0].idempotency_key == history.idempotency_key
+        assert WriteIndex(index_path).get(history.idempotency_key) == page_id
+
+    def test_create_answered_with_502_is_not_duplicated(self, services, index_path):
+        """502 を返したが作成は確定していた場合、リトライで二重に作成しない"""
+        history = StructuredActualHistory(
+            None, "親子丼", DAY, "主菜", idempotency_key=idempotency_key("structured", "r1")
+        )
+        create = services.notion.pages.create
+        calls = []
+
+        def create_then_bad_gateway(**kwargs):
+            calls.append(kwargs)
+            page = create(**kwargs)
+            if len(calls) == 1:
+                raise APIResponseError(
+                    httpx.Response(502), "bad gateway", APIErrorCode.InternalServerError
+                )
+            return page
+
+        with (
+            fake_environment(services),
+            patch("src.resilience.time.sleep"),
+            patch.object(services.notion.pages, "create", side_effect=create_then_bad_gateway),
+        ):
+            with pytest.raises(APIResponseError):
+                NotionClientWrapper().create_structured_history(history)
+            assert services.store.count(DB_ID_STRUCTURED) == 1
+
+            # キーを Notion に保存していれば、作成済みのページを確認して成功にする
+            with patch("src.notion_client.NOTION_IDEMPOTENCY_PROPERTY", KEY_PROPERTY):
+                calls.clear()
+                retried = StructuredActualHistory(
+                    None, "親子丼", DAY, "主菜", idempotency_key=idempotency_key("structured", "r2")
+                )
+                page_id = NotionClientWrapper().create_structured_history(retried)
+
+        assert len(calls) == 1
+        assert services.store.count(DB_ID_STRUCTURED) == 2
+        assert WriteIndex(index_path).get(retried.idempotency_key) == page_id
+
+    def test_timed_out_create_without_property_is_not_retried(self, services):
+        history = StructuredActualHistory(
+            None, "親子丼", DAY, "主菜", idempotency_key=idempotency_key("structured", "r1")
+        )
+
+        with (
+            fake_environment(services),
+            patch("src.resilience.time.sleep"),
+            patch.object(
+                services.notion.pages, "create", side_effect=httpx.ReadTimeout("timed out")
+            ) as create,
+        ):
+            with pytest.raises(httpx.ReadTimeout):
+                NotionClientWrapper().create_structured_history(history)
+
+        assert create.call_count == 1
@@ -0,0 +1,157 @@
+"""
+実績入力の一括取り込みのテスト
+"""
+
+import json
+from datetime import date
+
+import pytest
+
+from benchmarks.dataset import build_dataset
+from benchmarks.fakes import DB_ID_RAW, fake_environment
+from benchmarks.run import BenchmarkConfig, build_services
+from src.ingest import IngestError, ingest_file, normalize_text, parse_date, read_rows
+from src.main import main
+from src.notion_client import NotionClientWrapper
+
+
+@pytest.fixture
+def services():
+    config = BenchmarkConfig(history_rows=0, backlog_records=0, iterations=1)
+    services = build_services(config, build_dataset(0, 0, seed=config.seed))
+    services.store.insert(
+        DB_ID_RAW,
+        {
+            "食べたもの": {"title": [{"text": {"content": "カレーライス"}}]},
+            "日付": {"date": {"start": "2024-01-10"}},
+            "処理済み": {"checkbox": True},
+        },
+    )
+    return services
+
+
+def _foods(services) -> list[tuple[str, str]]:
+    return sorted(
+        (
+            page["properties"]["日付"]["date"]["start"],
+            page["properties"]["食べたもの"]["title"][0]["plain_text"],
+        )
+        for page in services.store.databases[DB_ID_RAW].values()
+    )
+
+
+class TestIngestFile:
+    """ファイルの取り込みのテスト"""
+
+    def test_csv_skips_existing_and_in_file_duplicates(self, services, tmp_path):
+        path = tmp_path / "meals.csv"
+        path.write_text(
+            "﻿日付,食べたもの,メモ\n"
+            "2024/01/10,ｶﾚｰﾗｲｽ,既存と重複\n"
+            "2024/01/11,鮭の塩焼き　 味噌汁,\n"
+            "2024-01-11,鮭の塩焼き 味噌汁,ファイル内で重複\n"
+            "2024年1月12日,ハンバーグ,\n"
+            "不明,親子丼,\n"
+            "2024-01-13,,\n",
+            encoding="utf-8",
+        )
+        progress = []
+
+        with fake_environment(services):
+            result = ingest_file(
+                NotionClientWrapper(),
+                path,
+                max_workers=2,
+                on_progress=lambda *counts: progress.append(counts),
+            )
+
+        assert (result.read, result.created, result.duplicates, result.invalid) == (6, 2, 2, 2)
+        assert result.failed == 0
+        assert [e.split(":")[0] for e in result.errors] == ["line 6", "line 7"]
+        assert _foods(services) == [
+            ("2024-01-10", "カレーライス"),
+            ("2024-01-11", "鮭の塩焼き 味噌汁"),
+            ("2024-01-12", "ハンバーグ"),
+        ]
+        assert tuple(map(sum, zip(*progress))) == (2, 0, 4)
+
+    def test_rerun_creates_nothing(self, services, tmp_path):
+        path = tmp_path / "meals.jsonl"
+        path.write_text(
+            "\n".join(
+                json.dumps({"date": f"2024-02-0{day}", "food": f"料理{day}"}, ensure_ascii=False)
+                for day in range(1, 6)
+            ),
+            encoding="utf-8",
+        )
+
+        with fake_environment(services):
+            first = ingest_file(NotionClientWrapper(), path)
+            second = ingest_file(NotionClientWrapper(), path)
+
+        assert (first.created, first.duplicates) == (5, 0)
+        assert (second.created, second.duplicates) == (0, 5)
+        assert services.store.count(DB_ID_RAW) == 6
+
+    def test_csv_without_known_columns(self, services, tmp_path):
+        path = tmp_path / "meals.csv"
+        path.write_text("when,what\n2024-01-01,カレー\n", encoding="utf-8")
+
+        with fake_environment(services), pytest.raises(IngestError, match="date column"):
+            ingest_file(NotionClientWrapper(), path)
+
+        # 既存の実績入力を読む前に失敗する
+        assert not services.recorder.snapshot()
+
+
+class TestReadRows:
+    """形式の判定と行の読み込みのテスト"""
+
+    def test_json_array_and_lines(self, tmp_path):
+        array = tmp_path / "array.json"
+        array.write_text('[{"date": "2024-01-01", "text": "うどん"}, 3]', encoding="utf-8")
+        lines = tmp_path / "lines.json"
+        lines.write_text('{"date": "2024-01-01", "text": "うどん"}\n\nnot json\n', encoding="utf-8")
+
+        assert list(read_rows(array)) == [(1, {"date": "2024-01-01", "text": "うどん"}), (2, 3)]
+        assert list(read_rows(lines)) == [(1, {"date": "2024-01-01", "text": "うどん"}), (3, None)]
+
+    def test_unknown_extension(self, tmp_path):
+        path = tmp_path / "meals.txt"
+        path.write_text("", encoding="utf-8")
+
+        with pytest.raises(IngestError, match="--format"):
+            list(read_rows(path))
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("2024-01-05", date(2024, 1, 5)),
+            ("2024/1/5", date(2024, 1, 5)),
+            ("２０２４年１月５日", date(2024, 1, 5)),
+            ("2024-01-05T19:30:00+09:00", date(2024, 1, 5)),
+        ],
+    )
+    def test_parse_date(self, value, expected):
+        assert parse_date(value) == expected
+
+    def test_parse_date_rejects_invalid(self):
+        with pytest.raises(ValueError):
+            parse_date("2024-02-30")
+
+    def test_normalize_text(self):
+        assert normalize_text("  ｶﾚｰ　ﾗｲｽ\n ") == "カレー ライス"
+
+
+class TestCommand:
+    """ingest コマンドのテスト"""
+
+    def test_exit_code(self, services, tmp_path):
+        path = tmp_path / "meals.csv"
+        path.write_text("date,food_eaten\n2024-03-01,焼きそば\n", encoding="utf-8")
+
+        with fake_environment(services):
+            assert main(["ingest", "--input", str(path), "--rate", "0"]) == 0
+            assert main(["ingest", "--input", str(tmp_path / "missing.csv")]) == 1
+
+        assert ("2024-03-01", "焼きそば") in _foods(services)
@@ -0,0 +1,163 @@
+"""
+食材の正規化・集計のテスト
+"""
+
+from datetime import date
+from fractions import Fraction
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.ingredients import (
+    ShoppingList,
+    format_quantity,
+    parse_ingredient,
+    section_of,
+    split_shopping_list,
+)
+from src.slack_client import SlackClientWrapper
+
+
+class TestParse:
+    """表記の解析のテスト"""
+
+    @pytest.mark.parametrize(
+        "raw, name, quantity, unit",
+        [
+            ("鶏もも肉 300g", "鶏もも肉", Fraction(300), "g"),
+            ("鶏もも肉200g", "鶏もも肉", Fraction(200), "g"),
+            ("とりもも肉 0.5kg", "鶏もも肉", Fraction(500), "g"),
+            ("鶏もも肉　３００ｇ", "鶏もも肉", Fraction(300), "g"),
+            ("タマネギ 1/2個", "玉ねぎ", Fraction(1, 2), "個"),
+            ("にんじん 1と1/2本", "にんじん", Fraction(3, 2), "本"),
+            ("卵 3", "卵", Fraction(3), "個"),
+            ("しょうゆ 大さじ2", "醤油", Fraction(30), "ml"),
+            ("牛乳 1L", "牛乳", Fraction(1000), "ml"),
+            ("木綿豆腐（絹でも可） 1丁", "木綿豆腐", Fraction(1), "丁"),
+        ],
+    )
+    def test_quantities(self, raw, name, quantity, unit):
+        """分量・単位を解析し、同義語を代表名に揃える"""
+        ingredient = parse_ingredient(raw)
+
+        assert (ingredient.name, ingredient.quantity, ingredient.unit) == (
+            name,
+            quantity,
+            unit,
+        )
+
+    def test_without_quantity(self):
+        """分量のない表記"""
+        ingredient = parse_ingredient("塩 少々")
+
+        assert ingredient.name == "塩"
+        assert ingredient.quantity is None
+
+    def test_empty(self):
+        assert parse_ingredient(" 適量 ") is None
+
+    @pytest.mark.parametrize(
+        "name, section",
+        [
+            ("鶏もも肉", "精肉"),
+            ("豚ロース", "精肉"),
+            ("生鮭", "鮮魚"),
+            ("塩鮭", "鮮魚"),
+            ("玉ねぎ", "青果"),
+            ("卵", "乳製品・卵"),
+            ("油揚げ", "豆腐・日配"),
+            ("白菜キムチ", "豆腐・日配"),
+            ("トマト缶", "乾物・缶詰"),
+            ("かつお節", "乾物・缶詰"),
+            ("鶏がらスープの素", "調味料・粉類"),
+            ("塩", "調味料・粉類"),
+            ("謎の食材", "その他"),
+        ],
+    )
+    def test_sections(self, name, section):
+        """売り場の判定"""
+        assert section_of(name) == section
+
+    def test_split(self):
+        """カンマ・読点・改行で分割する"""
+        assert split_shopping_list("玉ねぎ 1個, にんじん、 卵\n牛乳,") == [
+            "玉ねぎ 1個",
+            "にんじん",
+            "卵",
+            "牛乳",
+        ]
+
+
+class TestFormatQuantity:
+    """分量の表示のテスト"""
+
+    @pytest.mark.parametrize(
+        "quantity, unit, expected",
+        [
+            (Fraction(500), "g", "500g"),
+            (Fraction(1200), "g", "1.2kg"),
+            (Fraction(30), "ml", "大さじ2"),
+            (Fraction(20), "ml", "大さじ1+小さじ1"),
+            (Fraction(300), "ml", "300ml"),
+            (Fraction(1500), "ml", "1.5L"),
+            (Fraction(3, 4), "個", "3/4個"),
+            (Fraction(7, 4), "個", "1と3/4個"),
+            (Fraction(2), "本", "2本"),
+        ],
+    )
+    def test_format(self, quantity, unit, expected):
+        assert format_quantity(quantity, unit) == expected
+
+
+class TestShoppingList:
+    """買い物リストの集計のテスト"""
+
+    def test_same_ingredient_is_summed(self):
+        """表記揺れのある同じ食材は合算される"""
+        shopping = ShoppingList()
+        shopping.extend(["鶏もも肉 300g, 玉ねぎ 1個", "鶏もも肉200g, たまねぎ 1/2個"])
+
+        items = {i.name: i.display() for s in shopping.by_section().values() for i in s}
+
+        assert len(shopping) == 2
+        assert items == {"鶏もも肉": "鶏もも肉 500g", "玉ねぎ": "玉ねぎ 1と1/2個"}
+
+    def test_incompatible_units_are_listed_separately(self):
+        """次元の異なる単位は別々に表示される"""
+        shopping = ShoppingList()
+        shopping.add_text("玉ねぎ 1個, 玉ねぎ 200g, 玉ねぎ")
+
+        item = shopping.by_section()["青果"][0]
+
+        assert item.display() == "玉ねぎ 1個 + 200g"
+        assert item.unquantified is True
+
+    def test_lines_follow_section_order(self):
+        """売り場の表示順に並ぶ"""
+        shopping = ShoppingList()
+        shopping.add_text("醤油 大さじ1, 豚バラ肉 100g, キャベツ 1/4玉, 生鮭 2切れ")
+
+        assert shopping.format_lines() == [
+            "*青果*: キャベツ 1/4玉",
+            "*精肉*: 豚バラ肉 100g",
+            "*鮮魚*: 生鮭 2切れ",
+            "*調味料・粉類*: 醤油 大さじ1",
+        ]
+
+    def test_weekly_notification_aggregates_shopping_list(self):
+        """週間献立の通知では買い物リストが集計される"""
+        client = SlackClientWrapper(webhook_url="https://hooks.slack.invalid", session=MagicMock())
+        client.send_message = MagicMock(return_value=True)
+        items = [
+            {"date": "2024-01-15", "dish_name": "照り焼き", "category": "主菜",
+             "status": "提案", "shopping_list": "鶏もも肉 300g"},
+            {"date": "2024-01-16", "dish_name": "唐揚げ", "category": "主菜",
+             "status": "提案", "shopping_list": "鶏もも肉200g"},
+        ]
+        client.send_weekly_menu_notification(
+            items, date(2024, 1, 15), date(2024, 1, 21), "https://notion.invalid"
+        )
+
+        blocks = client.send_message.call_args.args[1]
+        texts = [b["text"]["text"] for b in blocks if b["type"] == "section"]
+        assert "*🛒 買い物リスト*\n*精肉*: 鶏もも肉 500g" in texts
@@ -0,0 +1,119 @@
+"""
+CLIエントリーポイントのテスト
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.main import main
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# `import src.main` に許容する時間（秒）。外部SDKを読み込むと数百msかかる。
+STARTUP_BUDGET_SECONDS = 0.25
+
+HEAVY_MODULES = ["openai", "notion_client", "requests", "numpy"]
+
+
+def _run_python(code: str, env: dict[str, str] | None = None) -> str:
+    """新しいインタプリタでコードを実行し、標準出力を返す"""
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, **(env or {})},
+        check=True,
+    )
+    return completed.stdout
+
+
+class TestStartupTime:
+    """起動時間のテスト"""
+
+    def test_import_does_not_load_client_sdks(self):
+        """src.main のインポート時に外部SDKを読み込まない"""
+        code = (
+            "import sys, src.main\n"
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+
+        assert _run_python(code).strip() == ""
+
+    def test_startup_within_budget(self):
+        """src.main のインポートが予算内に収まる"""
+        code = (
+            "import time\n"
+            "start = time.perf_counter()\n"
+            "import src.main\n"
+            "print(time.perf_counter() - start)"
+        )
+
+        # 最良値で判定してCI上の揺らぎを吸収する
+        elapsed = min(float(_run_python(code)) for _ in range(3))
+
+        assert elapsed < STARTUP_BUDGET_SECONDS
+
+
+class TestStartupProfile:
+    """--startup-profile オプションのテスト"""
+
+    def test_profile_reports_only_requested_service(self):
+        """接続テストで指定したサービスのみインポートされる"""
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "src.main",
+                "--startup-profile",
+                "test",
+                "--services",
+                "slack",
+            ],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "SLACK_WEBHOOK_URL": "http://127.0.0.1:9/"},
+            timeout=60,
+        )
+
+        assert "Startup profile" in completed.stderr
+        assert "slack" in completed.stderr
+        assert "openai " not in completed.stderr
+        assert "notion " not in completed.stderr
+
+    def test_profile_without_command(self, caplog):
+        """コマンド未指定でもプロファイルを出力する"""
+        with caplog.at_level("INFO", logger="src.main"):
+            exit_code = main(["--startup-profile"])
+
+        assert exit_code == 1
+        assert "Startup profile" in caplog.text
+
+
+@pytest.mark.parametrize("services", [["slack"], ["notion", "openai"]])
+def test_validate_config_limits_services(services, monkeypatch):
+    """validate_config は指定サービスの設定のみ検証する"""
+    from config import settings
+
+    for name in [
+        "NOTION_TOKEN",
+        "DB_ID_PROPOSED",
+        "DB_ID_RAW",
+        "DB_ID_STRUCTURED",
+        "OPENAI_API_KEY",
+        "SLACK_WEBHOOK_URL",
+    ]:
+        monkeypatch.setattr(settings, name, "")
+
+    errors = settings.validate_config(services)
+
+    assert errors
+    if services == ["slack"]:
+        assert errors == ["SLACK_WEBHOOK_URL is not set"]
+    else:
+        assert "SLACK_WEBHOOK_URL is not set" not in errors
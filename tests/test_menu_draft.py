@@ -0,0 +1,170 @@
+"""
+次週の献立の下書きのテスト
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.main import _prepare_menu_draft
+from src.menu_draft import DraftCache, MenuDraft, fixed_plans_key
+from src.menu_generator import WeeklyMenuGenerator
+from src.notion_client import ProposedDish, StructuredActualHistory
+from src.openai_client import GeneratedMenuItem
+from tests.conftest import fake_bulk_create
+
+THURSDAY = date(2024, 1, 11)
+SATURDAY = date(2024, 1, 13)
+MONDAY = date(2024, 1, 15)
+WEEK = [MONDAY + timedelta(days=i) for i in range(7)]
+MAINS = ["鶏の照り焼き", "豚の生姜焼き", "鮭の塩焼き", "麻婆豆腐", "牛丼", "親子丼", "豚の角煮"]
+
+
+def _menu(dates_to_fill, **kwargs) -> list[GeneratedMenuItem]:
+    return [
+        GeneratedMenuItem(
+            date=d, dish_name=MAINS[(d - MONDAY).days], category="主菜", shopping_list=""
+        )
+        for d in dates_to_fill
+    ]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DraftCache(tmp_path / "draft.json")
+
+
+@pytest.fixture
+def generator(cache):
+    notion = MagicMock()
+    notion.delete_proposed_dishes_by_date_range.return_value = (0, 0)
+    notion.get_proposed_dishes_by_date_range.return_value = []
+    notion.get_structured_history_by_date_range.return_value = []
+    notion.bulk_create.side_effect = fake_bulk_create
+    openai = MagicMock()
+    openai.generate_weekly_menu.side_effect = _menu
+    return WeeklyMenuGenerator(
+        notion_client=notion,
+        openai_client=openai,
+        slack_client=MagicMock(),
+        use_catalog=False,
+        drafts=cache,
+    )
+
+
+class TestDraftCache:
+    """DraftCache のテスト"""
+
+    def test_round_trip(self, cache):
+        draft = MenuDraft(MONDAY, THURSDAY, "key", _menu(WEEK[:2]))
+
+        cache.save(draft)
+
+        assert cache.load(MONDAY) == draft
+        assert cache.load(MONDAY + timedelta(weeks=1)) is None
+        cache.clear()
+        assert cache.load(MONDAY) is None
+
+    def test_unreadable_file_is_ignored(self, cache):
+        cache.path.write_text("{broken", encoding="utf-8")
+
+        assert cache.load(MONDAY) is None
+
+    def test_fixed_plans_key_ignores_proposals(self):
+        eating_out = ProposedDish(None, "外食", WEEK[2], "その他", "外食・予定あり")
+        proposal = ProposedDish(None, "カレー", WEEK[3], "主菜", "提案")
+
+        assert fixed_plans_key([eating_out, proposal]) == fixed_plans_key([eating_out])
+        assert fixed_plans_key([eating_out]) != fixed_plans_key([])
+
+
+class TestPrepareDraft:
+    """日次の実行での下書き作成のテスト"""
+
+    def test_draft_is_saved_without_writing_to_notion(self, generator, cache):
+        draft = generator.prepare_draft(THURSDAY)
+
+        assert draft.week_start == MONDAY
+        assert [item.date for item in draft.items] == WEEK
+        assert cache.load(MONDAY) == draft
+        generator.notion.bulk_create.assert_not_called()
+
+        # 週の予定が変わっていなければ作り直さない
+        assert generator.prepare_draft(THURSDAY + timedelta(days=1)) is None
+        assert generator.openai.generate_weekly_menu.call_count == 1
+
+    def test_published_week_is_skipped(self, generator):
+        generator.notion.get_proposed_dishes_by_date_range.return_value = [
+            ProposedDish("p1", "カレー", MONDAY, "主菜", "提案")
+        ]
+
+        assert generator.prepare_draft(SATURDAY) is None
+        generator.openai.generate_weekly_menu.assert_not_called()
+
+
+class TestPublishDraft:
+    """週次の実行での下書きの利用のテスト"""
+
+    def test_valid_draft_is_published_without_generation(self, generator, cache):
+        generator.prepare_draft(THURSDAY)
+        generator.openai.generate_weekly_menu.reset_mock()
+
+        result = generator.generate_for_next_week(SATURDAY)
+
+        assert result.generated_count == 7
+        generator.openai.generate_weekly_menu.assert_not_called()
+        saved = generator.notion.bulk_create.call_args.args[0]
+        assert [d.dish_name for d in saved] == MAINS
+        assert cache.load(MONDAY) is None
+
+    def test_changed_fixed_plans_regenerate(self, generator):
+        generator.prepare_draft(THURSDAY)
+        generator.notion.get_proposed_dishes_by_date_range.return_value = [
+            ProposedDish("p1", "外食", WEEK[2], "その他", "外食・予定あり")
+        ]
+
+        result = generator.generate_for_next_week(SATURDAY)
+
+        assert result.generated_count == 6
+        assert generator.openai.generate_weekly_menu.call_count == 2
+
+    def test_dishes_eaten_after_the_draft_regenerate(self, generator):
+        """下書きの作成後に食べた料理と重複する場合は作り直す"""
+        generator.prepare_draft(THURSDAY)
+        generator.notion.get_structured_history_by_date_range.return_value = [
+            StructuredActualHistory(None, "鶏の照り焼き", SATURDAY - timedelta(days=1), "主菜")
+        ]
+
+        generator.generate_for_next_week(SATURDAY)
+
+        assert generator.openai.generate_weekly_menu.call_count == 2
+
+    def test_manual_runs_ignore_the_draft(self, generator, cache):
+        generator.prepare_draft(THURSDAY)
+
+        generator.generate_for_next_week(MONDAY, from_today=True)
+
+        assert generator.openai.generate_weekly_menu.call_count == 2
+        assert cache.load(MONDAY) is not None
+
+
+class TestDailyHook:
+    """日次の実行からの下書き作成のテスト"""
+
+    def test_draft_is_prepared_from_thursday(self, tmp_path):
+        with patch("src.main.MENU_DRAFT_PATH", str(tmp_path / "draft.json")), patch(
+            "src.menu_generator.WeeklyMenuGenerator.prepare_draft"
+        ) as prepare:
+            _prepare_menu_draft(MagicMock(), MagicMock(), MagicMock(), THURSDAY - timedelta(days=1))
+            prepare.assert_not_called()
+
+            _prepare_menu_draft(MagicMock(), MagicMock(), MagicMock(), THURSDAY)
+            prepare.assert_called_once_with(THURSDAY)
+
+    def test_failure_does_not_propagate(self, tmp_path):
+        with patch("src.main.MENU_DRAFT_PATH", str(tmp_path / "draft.json")), patch(
+            "src.menu_generator.WeeklyMenuGenerator.prepare_draft",
+            side_effect=RuntimeError("timeout"),
+        ):
+            _prepare_menu_draft(MagicMock(), MagicMock(), MagicMock(), THURSDAY)
@@ -2,13 +2,36 @@
 献立生成ロジックのテスト
 """
 
+import threading
+import time
 from datetime import date, timedelta
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from src.main import main
 from src.menu_generator import WeeklyMenuGenerator
 from src.notion_client import ProposedDish
+from src.openai_client import GeneratedMenuItem
+from tests.conftest import fake_bulk_create
+
+# 2024/1/13（土）を基準にすると次週は 1/15（月）から
+SATURDAY = date(2024, 1, 13)
+MONDAY = date(2024, 1, 15)
+
+
+def _menu_for(dates_to_fill, dish_names=None, **kwargs) -> list[GeneratedMenuItem]:
+    """日付ごとに1品返す（dish_names で指定した日は主菜、それ以外は副菜）"""
+    names = dish_names or {}
+    return [
+        GeneratedMenuItem(
+            date=d,
+            dish_name=names.get(d, f"副菜{d.isoformat()}"),
+            category="主菜" if d in names else "副菜",
+            shopping_list="",
+        )
+        for d in dates_to_fill
+    ]
 
 
 class TestWeekRangeCalculation:
@@ -125,3 +148,208 @@ class TestDatesWithPlans:
             dates = generator._get_dates_with_plans([])
 
             assert len(dates) == 0
+
+
+class TestMultiWeekGeneration:
+    """複数週の献立生成のテスト"""
+
+    def _generator(self, existing=None):
+        notion = MagicMock()
+        notion.delete_proposed_dishes_by_date_range.return_value = (0, 0)
+        notion.get_proposed_dishes_by_date_range.return_value = existing or []
+        notion.get_structured_history_by_date_range.return_value = []
+        notion.bulk_create.side_effect = fake_bulk_create
+        openai = MagicMock()
+        openai.generate_weekly_menu.side_effect = _menu_for
+        slack = MagicMock()
+        generator = WeeklyMenuGenerator(
+            notion_client=notion, openai_client=openai, slack_client=slack, use_catalog=False
+        )
+        return generator, notion, openai, slack
+
+    def test_fetches_once_and_generates_week_by_week(self):
+        """4週分でも取得・保存・通知は1回で、生成は週ごとに行う"""
+        generator, notion, openai, slack = self._generator()
+
+        result = generator.generate_for_next_week(SATURDAY, weeks=4)
+
+        assert result.generated_count == 28
+        last_day = MONDAY + timedelta(days=27)
+        notion.get_proposed_dishes_by_date_range.assert_called_once_with(MONDAY, last_day)
+        notion.get_structured_history_by_date_range.assert_called_once()
+        notion.delete_proposed_dishes_by_date_range.assert_called_once_with(
+            MONDAY, last_day, status_filter="提案"
+        )
+        notion.bulk_create.assert_called_once()
+        notion.create_proposed_dish.assert_not_called()
+        assert slack.send_weekly_menu_notification.call_count == 1
+        assert slack.send_weekly_menu_notification.call_args.kwargs["end_date"] == last_day
+
+        calls = openai.generate_weekly_menu.call_args_list
+        assert [c.kwargs["dates_to_fill"][0] for c in calls] == [
+            MONDAY + timedelta(weeks=w) for w in range(4)
+        ]
+        assert all(len(c.kwargs["dates_to_fill"]) == 7 for c in calls)
+        # 前の週に生成した献立は次の週の既存予定として渡す
+        planned = calls[1].kwargs["existing_plans"]
+        assert len(planned) == 7
+        assert planned[0]["status"] == "提案"
+
+    def test_rotation_is_checked_across_weeks(self):
+        """週の境目（日曜と月曜）のメイン食材の連続も警告する"""
+        generator, _, openai, _ = self._generator()
+        sunday = MONDAY + timedelta(days=6)
+        names = {sunday: "鶏の照り焼き", sunday + timedelta(days=1): "チキン南蛮"}
+        openai.generate_weekly_menu.side_effect = lambda dates_to_fill, **kw: _menu_for(
+            dates_to_fill, names
+        )
+
+        result = generator.generate_for_next_week(SATURDAY, weeks=2)
+
+        assert result.generated_count == 14
+        assert len(result.warnings) == 1
+        assert "01/22 チキン南蛮" in result.warnings[0]
+
+    def test_failed_week_keeps_other_weeks(self):
+        """1週分の生成に失敗しても他の週は保存する"""
+        generator, notion, openai, _ = self._generator()
+        responses = iter([_menu_for, RuntimeError("timeout"), _menu_for])
+
+        def generate(dates_to_fill, **kwargs):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response(dates_to_fill)
+
+        openai.generate_weekly_menu.side_effect = generate
+
+        result = generator.generate_for_next_week(SATURDAY, weeks=3)
+
+        assert not result.skipped
+        assert result.generated_count == 14
+        assert result.errors == ["献立生成に失敗: 2024-01-22〜 - timeout"]
+
+    def test_confirmed_days_are_skipped_in_each_week(self):
+        """確定済みの日はどの週でも生成しない"""
+        confirmed = MONDAY + timedelta(days=9)
+        generator, _, openai, _ = self._generator(
+            [ProposedDish(id="1", dish_name="外食", date=confirmed, category="その他", status="外食・予定あり")]
+        )
+
+        result = generator.generate_for_next_week(SATURDAY, weeks=2)
+
+        assert result.generated_count == 13
+        second_week = openai.generate_weekly_menu.call_args_list[1].kwargs["dates_to_fill"]
+        assert confirmed not in second_week
+
+
+class TestParallelGeneration:
+    """数日ずつの並列生成のテスト"""
+
+    def _generator(self, generate, parallel_days=2):
+        notion = MagicMock()
+        notion.delete_proposed_dishes_by_date_range.return_value = (0, 0)
+        notion.get_proposed_dishes_by_date_range.return_value = []
+        notion.get_structured_history_by_date_range.return_value = []
+        notion.bulk_create.side_effect = fake_bulk_create
+        openai = MagicMock()
+        openai.generate_weekly_menu.side_effect = generate
+        generator = WeeklyMenuGenerator(
+            notion_client=notion,
+            openai_client=openai,
+            slack_client=MagicMock(),
+            use_catalog=False,
+            parallel_days=parallel_days,
+        )
+        return generator, openai
+
+    def test_chunks_run_concurrently(self):
+        """1週分を2日ずつ同時に依頼し、1つの献立にまとめる"""
+        lock = threading.Lock()
+        running = [0, 0]  # 実行中の数, 最大
+
+        def generate(dates_to_fill, **kwargs):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return _menu_for(dates_to_fill)
+
+        generator, openai = self._generator(generate)
+
+        result = generator.generate_for_next_week(SATURDAY)
+
+        assert result.generated_count == 7
+        chunks = sorted(c.kwargs["dates_to_fill"] for c in openai.generate_weekly_menu.call_args_list)
+        assert [len(chunk) for chunk in chunks] == [2, 2, 2, 1]
+        assert running[1] > 1
+
+    def test_conflicts_between_chunks_are_regenerated(self):
+        """別々に生成した隣の日のメイン食材が連続したら、後の日だけを作り直す"""
+        tuesday, wednesday = MONDAY + timedelta(days=1), MONDAY + timedelta(days=2)
+        names = {tuesday: "鶏の照り焼き", wednesday: "チキン南蛮"}
+
+        def generate(dates_to_fill, existing_plans, **kwargs):
+            if len(dates_to_fill) == 1 and existing_plans:
+                return _menu_for(dates_to_fill, {wednesday: "鮭の塩焼き"})
+            return _menu_for(dates_to_fill, names)
+
+        generator, openai = self._generator(generate)
+
+        result = generator.generate_for_next_week(SATURDAY)
+
+        assert result.warnings == []
+        repair = openai.generate_weekly_menu.call_args
+        assert repair.kwargs["dates_to_fill"] == [wednesday]
+        # ほかの日の献立を予定として渡す
+        planned = repair.kwargs["existing_plans"]
+        assert {"date": tuesday.isoformat(), "dish_name": "鶏の照り焼き"}.items() <= planned[1].items()
+        saved = generator.notion.bulk_create.call_args.args[0]
+        assert [d.dish_name for d in saved if d.date == wednesday] == ["鮭の塩焼き"]
+
+    def test_failed_chunk_is_retried_and_stray_dates_dropped(self):
+        """失敗した依頼の日は作り直し、依頼していない日付の献立は捨てる"""
+        calls = []
+
+        def generate(dates_to_fill, **kwargs):
+            calls.append(dates_to_fill)
+            if dates_to_fill[0] == MONDAY and len(calls) <= 4:
+                raise RuntimeError("timeout")
+            # 依頼していない日付も返す
+            return _menu_for(dates_to_fill + [MONDAY + timedelta(days=10)])
+
+        generator, _ = self._generator(generate)
+
+        result = generator.generate_for_next_week(SATURDAY)
+
+        assert result.generated_count == 7
+        assert result.errors == []
+        assert calls[-1] == [MONDAY, MONDAY + timedelta(days=1)]
+
+    def test_all_chunks_failing_skips(self):
+        generator, _ = self._generator(MagicMock(side_effect=RuntimeError("timeout")))
+
+        result = generator.generate_for_next_week(SATURDAY)
+
+        assert result.skipped
+        assert result.skip_reason == "献立生成に失敗: timeout"
+
+
+class TestWeeksOption:
+    """weekly --weeks のテスト"""
+
+    def test_weeks_is_passed_to_the_flow(self):
+        with patch("src.main.run_weekly_generation", return_value=0) as run:
+            assert main(["weekly", "--weeks", "4", "--from-today"]) == 0
+
+        run.assert_called_once_with(
+            None, from_today=True, weeks=4, incremental=False, dry_run=False
+        )
+
+    def test_invalid_weeks(self):
+        with patch("src.main.run_weekly_generation") as run:
+            assert main(["weekly", "--weeks", "0"]) == 1
+
+        run.assert_not_called()
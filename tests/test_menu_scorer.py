@@ -0,0 +1,150 @@
+"""
+献立候補のスコアリングのテスト
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from src.catalog import CatalogDish, DishCatalog
+from src.history_index import HistoryIndex
+from src.menu_generator import WeeklyMenuGenerator
+from src.menu_scorer import CandidateScorer
+from src.notion_client import StructuredActualHistory
+from src.openai_client import GeneratedMenuItem
+from tests.conftest import fake_bulk_create
+
+MONDAY = date(2024, 1, 15)
+
+
+def _dish(name: str, main: str, seasons: tuple[str, ...] = (), minutes: int = 20) -> CatalogDish:
+    return CatalogDish(
+        name=name, category="主菜", main_ingredient=main, seasons=seasons, cook_minutes=minutes
+    )
+
+
+def _history(d: date, dish_name: str) -> StructuredActualHistory:
+    return StructuredActualHistory(id=None, dish_name=dish_name, date=d, category="主菜")
+
+
+class TestScores:
+    """スコアのテスト"""
+
+    def test_recently_eaten_dish_is_blocked(self):
+        index = HistoryIndex.from_records([_history(MONDAY - timedelta(days=3), "鶏の照り焼き")])
+        catalog = DishCatalog([_dish("鶏の照り焼き", "鶏肉"), _dish("鮭の塩焼き", "魚")])
+
+        scores = CandidateScorer(catalog, index).scores(MONDAY, "主菜")
+
+        names = [d.name for d in catalog.by_category("主菜")]
+        assert scores[names.index("鶏の照り焼き")] == -np.inf
+        assert np.isfinite(scores[names.index("鮭の塩焼き")])
+
+    def test_season_and_cook_time_raise_the_score(self):
+        catalog = DishCatalog(
+            [
+                _dish("ぶり大根", "魚", seasons=("冬",)),
+                _dish("かつおのたたき", "魚", seasons=("夏",)),
+                _dish("煮込み料理", "魚", minutes=90),
+                _dish("焼き魚", "魚"),
+            ]
+        )
+
+        scores = CandidateScorer(catalog, HistoryIndex()).scores(MONDAY, "主菜")
+
+        by_name = dict(zip([d.name for d in catalog.by_category("主菜")], scores))
+        assert by_name["ぶり大根"] > by_name["焼き魚"] > by_name["煮込み料理"]
+        assert by_name["焼き魚"] > by_name["かつおのたたき"]
+
+    def test_frequently_eaten_dish_is_preferred(self):
+        old = MONDAY - timedelta(days=100)
+        index = HistoryIndex.from_records(
+            [_history(old - timedelta(days=i), "肉じゃが") for i in range(5)]
+        )
+        catalog = DishCatalog([_dish("肉じゃが", "牛肉"), _dish("牛丼", "牛肉")])
+
+        scores = CandidateScorer(catalog, index).scores(MONDAY, "主菜")
+
+        by_name = dict(zip([d.name for d in catalog.by_category("主菜")], scores))
+        assert by_name["肉じゃが"] > by_name["牛丼"]
+
+
+class TestPropose:
+    """候補の割り当てのテスト"""
+
+    def test_week_respects_rotation_and_repeats(self):
+        """メイン食材を連続させず、同じ料理を週内で繰り返さない"""
+        catalog = DishCatalog.build()
+        index = HistoryIndex()
+        slots = [(MONDAY + timedelta(days=i), c) for i in range(7) for c in ("主菜", "副菜", "汁物")]
+
+        proposal = CandidateScorer(catalog, index).propose(slots)
+
+        assert proposal.open_slots == []
+        mains = [proposal.picks[(MONDAY + timedelta(days=i), "主菜")] for i in range(7)]
+        assert all(a.main_ingredient != b.main_ingredient for a, b in zip(mains, mains[1:]))
+        names = [d.name for d in proposal.picks.values()]
+        assert len(names) == len(set(names))
+
+    def test_deterministic_for_the_same_week(self):
+        slots = [(MONDAY + timedelta(days=i), "主菜") for i in range(7)]
+
+        first = CandidateScorer(DishCatalog.build(), HistoryIndex()).propose(slots)
+        second = CandidateScorer(DishCatalog.build(), HistoryIndex()).propose(slots)
+
+        assert [d.name for d in first.picks.values()] == [d.name for d in second.picks.values()]
+
+    def test_slots_without_candidates_are_left_open(self):
+        """候補がない枠はAIに任せる"""
+        catalog = DishCatalog([_dish("鶏の照り焼き", "鶏肉")])
+        slots = [(MONDAY, "主菜"), (MONDAY + timedelta(days=1), "主菜"), (MONDAY, "汁物")]
+
+        proposal = CandidateScorer(catalog, HistoryIndex()).propose(slots)
+
+        assert list(proposal.picks) == [(MONDAY, "主菜")]
+        assert proposal.open_slots == [(MONDAY, "汁物"), (MONDAY + timedelta(days=1), "主菜")]
+
+
+class TestMenuGeneratorWithCatalog:
+    """カタログを使った献立生成のテスト"""
+
+    def _generator(self, catalog_history):
+        notion = MagicMock()
+        notion.delete_proposed_dishes_by_date_range.return_value = (0, 0)
+        notion.get_proposed_dishes_by_date_range.return_value = []
+        notion.get_structured_history_by_date_range.return_value = catalog_history
+        notion.bulk_create.side_effect = fake_bulk_create
+        openai = MagicMock()
+        openai.fill_menu_slots.return_value = []
+        generator = WeeklyMenuGenerator(
+            notion_client=notion,
+            openai_client=openai,
+            slack_client=MagicMock(),
+            use_catalog=True,
+        )
+        return generator, notion, openai
+
+    def test_catalog_fills_the_week_without_full_generation(self):
+        """カタログで埋まればAIの全体生成は呼ばない"""
+        generator, notion, openai = self._generator([])
+
+        result = generator.generate_for_next_week(date(2024, 1, 13))
+
+        assert result.generated_count == 21
+        openai.generate_weekly_menu.assert_not_called()
+        openai.fill_menu_slots.assert_not_called()
+
+    def test_open_slots_are_sent_to_the_model(self, monkeypatch):
+        """候補がない枠だけをAIに依頼する"""
+        monkeypatch.setattr("src.menu_generator.DishCatalog.build", lambda history: DishCatalog())
+        generator, notion, openai = self._generator([])
+        openai.fill_menu_slots.return_value = [
+            GeneratedMenuItem(date=MONDAY, dish_name="ビビンバ", category="主菜", shopping_list="")
+        ]
+
+        result = generator.generate_for_next_week(date(2024, 1, 13))
+
+        slots = openai.fill_menu_slots.call_args.args[0]
+        assert len(slots) == 21
+        assert result.generated_count == 1
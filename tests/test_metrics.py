@@ -0,0 +1,180 @@
+"""
+メトリクスのテスト
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.metrics import MetricsRegistry, _observe_span
+from src.preprocessor import PreprocessingResult
+from src.tracing import SPAN_KIND_CLIENT, SPAN_KIND_INTERNAL, Span
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+class TestRegistry:
+    """メトリクスの記録と出力のテスト"""
+
+    def test_counter_render(self, registry):
+        """カウンターがラベル付きで出力される"""
+        calls = registry.counter("calls_total", "Calls.", ("service",))
+        calls.inc(service="notion")
+        calls.inc(2, service="notion")
+
+        text = registry.render()
+
+        assert "# HELP calls_total Calls.\n# TYPE calls_total counter\n" in text
+        assert 'calls_total{service="notion"} 3\n' in text
+
+    def test_counter_rejects_negative(self, registry):
+        """カウンターは減少できない"""
+        calls = registry.counter("calls_total", "Calls.")
+
+        with pytest.raises(ValueError):
+            calls.inc(-1)
+
+    def test_labels_must_match(self, registry):
+        """定義と異なるラベルはエラー"""
+        calls = registry.counter("calls_total", "Calls.", ("service",))
+
+        with pytest.raises(ValueError):
+            calls.inc(method="x")
+
+    def test_gauge_without_labels(self, registry):
+        """ラベルなしのゲージ"""
+        backlog = registry.gauge("backlog", "Backlog.")
+        backlog.set(12)
+        backlog.set(7)
+
+        assert "backlog 7\n" in registry.render()
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        """ヒストグラムのバケットは累積で出力される"""
+        duration = registry.histogram("duration_seconds", "Duration.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            duration.observe(value)
+
+        text = registry.render()
+
+        assert 'duration_seconds_bucket{le="0.1"} 1\n' in text
+        assert 'duration_seconds_bucket{le="1"} 2\n' in text
+        assert 'duration_seconds_bucket{le="+Inf"} 3\n' in text
+        assert "duration_seconds_sum 5.55\n" in text
+        assert "duration_seconds_count 3\n" in text
+
+    def test_label_values_are_escaped(self, registry):
+        """ラベル値のエスケープ"""
+        errors = registry.counter("errors_total", "Errors.", ("reason",))
+        errors.inc(reason='bad "quote"\n')
+
+        assert 'errors_total{reason="bad \\"quote\\"\\n"} 1' in registry.render()
+
+    def test_register_returns_existing(self, registry):
+        """同名の登録は既存のメトリクスを返し、型が異なればエラー"""
+        first = registry.gauge("backlog", "Backlog.")
+
+        assert registry.gauge("backlog", "Backlog.") is first
+        with pytest.raises(ValueError):
+            registry.counter("backlog", "Backlog.")
+
+    def test_unused_metrics_are_omitted(self, registry):
+        """値のないメトリクスは出力しない"""
+        registry.gauge("backlog", "Backlog.")
+
+        assert registry.render() == ""
+
+    def test_write_textfile(self, registry, tmp_path):
+        """textfile を書き出し、一時ファイルを残さない"""
+        registry.gauge("backlog", "Backlog.").set(3)
+        path = tmp_path / "textfile" / "dinner_aide.prom"
+
+        registry.write_textfile(path)
+
+        assert path.read_text(encoding="utf-8").endswith("backlog 3\n")
+        assert [p.name for p in path.parent.iterdir()] == ["dinner_aide.prom"]
+
+
+class TestClientCallMetrics:
+    """スパンからの外部API呼び出しメトリクスのテスト"""
+
+    def _span(self, name, kind=SPAN_KIND_CLIENT, error="", **attributes):
+        return Span(
+            name=name,
+            trace_id="t",
+            span_id="s",
+            parent_id=None,
+            kind=kind,
+            start_ns=0,
+            end_ns=200_000_000,
+            attributes=attributes,
+            error=error,
+        )
+
+    def test_client_span_is_recorded(self):
+        """CLIENT スパンは呼び出し数と所要時間として記録される"""
+        from src import metrics
+
+        before = metrics.CLIENT_CALLS.value(
+            service="notion", method="test_call", outcome="success"
+        )
+        _observe_span(self._span("notion.test_call"))
+
+        assert metrics.CLIENT_CALLS.value(
+            service="notion", method="test_call", outcome="success"
+        ) == before + 1
+        assert metrics.CLIENT_CALL_DURATION.count(service="notion", method="test_call") >= 1
+
+    def test_error_outcome(self):
+        """例外または4xx/5xxはエラーとして記録される"""
+        from src import metrics
+
+        _observe_span(self._span("openai.test_error", error="RateLimitError: 429"))
+        _observe_span(self._span("slack.test_error", status_code=500))
+
+        assert metrics.CLIENT_CALLS.value(
+            service="openai", method="test_error", outcome="error"
+        ) >= 1
+        assert metrics.CLIENT_CALLS.value(
+            service="slack", method="test_error", outcome="error"
+        ) >= 1
+
+    def test_internal_span_is_ignored(self):
+        """内部ステージのスパンは記録しない"""
+        from src import metrics
+
+        _observe_span(self._span("weekly.test_stage", kind=SPAN_KIND_INTERNAL))
+
+        assert metrics.CLIENT_CALL_DURATION.count(service="weekly", method="test_stage") == 0
+
+
+class TestRunMetrics:
+    """実行結果のメトリクスのテスト"""
+
+    def test_record_preprocessing(self):
+        """PreprocessingResult のフィールドが記録される"""
+        from src import metrics
+
+        metrics.record_preprocessing(
+            PreprocessingResult(processed_count=4, created_count=9, errors=["e"]),
+            flow="weekly",
+        )
+
+        assert metrics.PREPROCESS_PROCESSED.value(flow="weekly") == 4
+        assert metrics.PREPROCESS_CREATED.value(flow="weekly") == 9
+        assert metrics.PREPROCESS_ERRORS.value(flow="weekly") == 1
+
+    def test_metrics_file_written_on_exit(self, tmp_path):
+        """--metrics-file で終了時に実行時間と成否が書き出される"""
+        from src import main as main_module
+
+        path = tmp_path / "dinner_aide.prom"
+        with patch.object(main_module, "_dispatch", return_value=1):
+            main_module.main(["--metrics-file", str(path), "daily"])
+
+        text = path.read_text(encoding="utf-8")
+        assert 'dinner_aide_run_success{command="daily"} 0\n' in text
+        assert 'dinner_aide_run_duration_seconds{command="daily"}' in text
@@ -2,11 +2,14 @@
 OpenAIクライアントのテスト
 """
 
+import threading
 from datetime import date
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from src.deadline import DeadlineExceeded, deadline_scope
+from src.metrics import MODEL_ESCALATIONS, MODEL_TASKS, OPENAI_HEDGES
 from src.openai_client import OpenAIClientWrapper
 
 
@@ -28,7 +31,8 @@ class TestStructureRawInput:
             client = OpenAIClientWrapper()
             client.client = MagicMock()
             client.client.chat.completions.create.return_value = mock_response
-            client.model = "gpt-4o"
+            client.model = client.structure_model = client.menu_model = "gpt-4o"
+            client.timeout, client.hedge_after = 60.0, 0.0
 
             result = client.structure_raw_input("キムチ鍋", date(2024, 1, 15))
 
@@ -51,7 +55,8 @@ class TestStructureRawInput:
             client = OpenAIClientWrapper()
             client.client = MagicMock()
             client.client.chat.completions.create.return_value = mock_response
-            client.model = "gpt-4o"
+            client.model = client.structure_model = client.menu_model = "gpt-4o"
+            client.timeout, client.hedge_after = 60.0, 0.0
 
             result = client.structure_raw_input(
                 "キムチ鍋、しめのラーメン", date(2024, 1, 15)
@@ -76,7 +81,8 @@ class TestStructureRawInput:
             client = OpenAIClientWrapper()
             client.client = MagicMock()
             client.client.chat.completions.create.return_value = mock_response
-            client.model = "gpt-4o"
+            client.model = client.structure_model = client.menu_model = "gpt-4o"
+            client.timeout, client.hedge_after = 60.0, 0.0
 
             result = client.structure_raw_input("ケーキ", date(2024, 1, 15))
 
@@ -92,7 +98,8 @@ class TestStructureRawInput:
             client = OpenAIClientWrapper()
             client.client = MagicMock()
             client.client.chat.completions.create.return_value = mock_response
-            client.model = "gpt-4o"
+            client.model = client.structure_model = client.menu_model = "gpt-4o"
+            client.timeout, client.hedge_after = 60.0, 0.0
 
             result = client.structure_raw_input("何か", date(2024, 1, 15))
 
@@ -122,7 +129,8 @@ class TestGenerateWeeklyMenu:
             client = OpenAIClientWrapper()
             client.client = MagicMock()
             client.client.chat.completions.create.return_value = mock_response
-            client.model = "gpt-4o"
+            client.model = client.structure_model = client.menu_model = "gpt-4o"
+            client.timeout, client.hedge_after = 60.0, 0.0
 
             result = client.generate_weekly_menu(
                 dates_to_fill=[date(2024, 1, 15)],
@@ -141,7 +149,8 @@ class TestGenerateWeeklyMenu:
         with patch.object(OpenAIClientWrapper, "__init__", lambda x, **kwargs: None):
             client = OpenAIClientWrapper()
             client.client = MagicMock()
-            client.model = "gpt-4o"
+            client.model = client.structure_model = client.menu_model = "gpt-4o"
+            client.timeout, client.hedge_after = 60.0, 0.0
 
             result = client.generate_weekly_menu(
                 dates_to_fill=[],
@@ -151,6 +160,35 @@ class TestGenerateWeeklyMenu:
 
             assert result == []
 
+    def test_fill_menu_slots_only_asks_for_open_slots(self):
+        """空き枠だけを依頼し、決まっている献立はプロンプトに含める"""
+        mock_response = MagicMock()
+        mock_response.choices = [
+            MagicMock(
+                message=MagicMock(
+                    content='{"menu": [{"date": "2024-01-16", "dish_name": "けんちん汁", "category": "汁物", "shopping_list": "大根"}]}'
+                )
+            )
+        ]
+
+        with patch.object(OpenAIClientWrapper, "__init__", lambda x, **kwargs: None):
+            client = OpenAIClientWrapper()
+            client.client = MagicMock()
+            client.client.chat.completions.create.return_value = mock_response
+            client.model = client.structure_model = client.menu_model = "gpt-4o"
+            client.timeout, client.hedge_after = 60.0, 0.0
+
+            result = client.fill_menu_slots(
+                slots=[(date(2024, 1, 16), "汁物")],
+                planned=[{"date": "2024-01-16", "dish_name": "鮭の塩焼き", "category": "主菜", "status": "提案"}],
+                recent_history=[],
+            )
+
+            prompt = client.client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+            assert "- 2024-01-16 (Tue): 汁物" in prompt
+            assert "鮭の塩焼き" in prompt
+            assert [(r.date, r.dish_name) for r in result] == [(date(2024, 1, 16), "けんちん汁")]
+
 
 class TestFormatMethods:
     """フォーマットヘルパーメソッドのテスト"""
@@ -198,3 +236,141 @@ class TestFormatMethods:
             assert "2024-01-10" in result
             assert "カレーライス" in result
             assert "主菜" in result
+
+
+def _response(content: str) -> MagicMock:
+    return MagicMock(choices=[MagicMock(message=MagicMock(content=content))], usage=None)
+
+
+class TestModelTiering:
+    """小さいモデルから依頼し、確認に通らなければ大きいモデルで依頼し直すテスト"""
+
+    @pytest.fixture
+    def client(self):
+        with patch("src.openai_client.OpenAI"):
+            yield OpenAIClientWrapper(
+                api_key="sk-test", model="large", structure_model="small", menu_model="small"
+            )
+
+    def _models(self, client) -> list[str]:
+        return [c.kwargs["model"] for c in client.client.chat.completions.create.call_args_list]
+
+    def test_confident_result_uses_the_small_model(self, client):
+        client.client.chat.completions.create.return_value = _response(
+            '{"dishes": [{"dish_name": "キムチ鍋", "category": "主菜"}]}'
+        )
+        before = MODEL_TASKS.value(task="structure", tier="fast")
+
+        result = client.structure_raw_input("キムチ鍋", date(2024, 1, 15))
+
+        assert [d.dish_name for d in result] == ["キムチ鍋"]
+        assert self._models(client) == ["small"]
+        assert MODEL_TASKS.value(task="structure", tier="fast") == before + 1
+
+    @pytest.mark.parametrize(
+        "content, known, reason",
+        [
+            ('{"dishes": []}', None, "empty"),
+            ('{"dishes": [{"dish_name": "ケーキ", "category": "デザート"}]}', None, "invalid_category"),
+            ('{"dishes": [{"dish_name": "カレーライス", "category": "主菜"}]}', None, "not_in_input"),
+            ('{"dishes": [{"dish_name": "ケーキ", "category": "主菜"}]}', {"けーき": "その他"}, "dictionary_mismatch"),
+        ],
+    )
+    def test_failed_checks_escalate(self, client, content, known, reason):
+        client.client.chat.completions.create.side_effect = [
+            _response(content),
+            _response('{"dishes": [{"dish_name": "ケーキ", "category": "その他"}]}'),
+        ]
+        before = MODEL_ESCALATIONS.value(task="structure", reason=reason)
+
+        result = client.structure_raw_input("ケーキ", date(2024, 1, 15), known)
+
+        assert [(d.dish_name, d.category) for d in result] == [("ケーキ", "その他")]
+        assert self._models(client) == ["small", "large"]
+        assert MODEL_ESCALATIONS.value(task="structure", reason=reason) == before + 1
+
+    def test_menu_missing_dates_escalates(self, client):
+        item = '{"date": "2024-01-15", "dish_name": "鮭の塩焼き", "category": "主菜", "shopping_list": "鮭"}'
+        client.client.chat.completions.create.side_effect = [
+            _response(f'{{"menu": [{item}]}}'),
+            _response(f'{{"menu": [{item}, {item.replace("15", "16")}]}}'),
+        ]
+
+        result = client.generate_weekly_menu(
+            dates_to_fill=[date(2024, 1, 15), date(2024, 1, 16)],
+            existing_plans=[],
+            recent_history=[],
+        )
+
+        assert len(result) == 2
+        assert self._models(client) == ["small", "large"]
+
+    def test_same_model_never_escalates(self, client):
+        client.structure_model = "large"
+        client.client.chat.completions.create.return_value = _response('{"dishes": []}')
+
+        assert client.structure_raw_input("何か", date(2024, 1, 15)) == []
+        assert self._models(client) == ["large"]
+
+
+class TestDeadlineAndHedging:
+    """締め切りによるタイムアウトとヘッジのテスト"""
+
+    @pytest.fixture
+    def client(self):
+        with patch("src.openai_client.OpenAI"):
+            yield OpenAIClientWrapper(api_key="sk-test", model="gpt-4o", structure_model="gpt-4o")
+
+    def test_timeout_is_capped_by_the_run_budget(self, client):
+        client.client.chat.completions.create.return_value = _response('{"dishes": []}')
+        client.structure_raw_input("何か", date(2024, 1, 15))
+        assert client.client.chat.completions.create.call_args.kwargs["timeout"] == 60.0
+
+        with deadline_scope(5.0):
+            client.structure_raw_input("何か", date(2024, 1, 15))
+
+        assert client.client.chat.completions.create.call_args.kwargs["timeout"] <= 5.0
+
+    def test_exhausted_budget_does_not_call_the_api(self, client):
+        with patch("src.deadline.time.monotonic", side_effect=[100.0, 200.0, 200.0]):
+            with deadline_scope(10.0), pytest.raises(DeadlineExceeded):
+                client.structure_raw_input("何か", date(2024, 1, 15))
+
+        client.client.chat.completions.create.assert_not_called()
+
+    def test_slow_request_is_hedged(self, client):
+        """応答が遅い場合はもう1件送り、先に返った有効な応答を使う"""
+        client.hedge_after = 0.05
+        release = threading.Event()
+        answers = iter(
+            [
+                ("slow", '{"dishes": [{"dish_name": "遅い", "category": "主菜"}]}'),
+                ("fast", '{"dishes": [{"dish_name": "キムチ鍋", "category": "主菜"}]}'),
+            ]
+        )
+
+        def create(**kwargs):
+            label, content = next(answers)
+            if label == "slow":
+                release.wait(5)
+            return _response(content)
+
+        client.client.chat.completions.create.side_effect = create
+        before = OPENAI_HEDGES.value(task="structure", winner="hedge")
+
+        result = client.structure_raw_input("キムチ鍋", date(2024, 1, 15))
+        release.set()
+
+        assert [d.dish_name for d in result] == ["キムチ鍋"]
+        assert client.client.chat.completions.create.call_count == 2
+        assert OPENAI_HEDGES.value(task="structure", winner="hedge") == before + 1
+
+    def test_fast_request_is_not_hedged(self, client):
+        client.hedge_after = 5.0
+        client.client.chat.completions.create.return_value = _response(
+            '{"dishes": [{"dish_name": "キムチ鍋", "category": "主菜"}]}'
+        )
+
+        client.structure_raw_input("キムチ鍋", date(2024, 1, 15))
+
+        assert client.client.chat.completions.create.call_count == 1
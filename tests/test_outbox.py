@@ -0,0 +1,220 @@
+"""
+通知アウトボックスのテスト
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.outbox import (
+    DEDUP_WINDOW_SECONDS,
+    LEASE_SECONDS,
+    MAX_ATTEMPTS,
+    DeliveryOutcome,
+    NotificationOutbox,
+    OutboxWorker,
+)
+from src.slack_client import SlackClientWrapper
+
+URL = "https://hooks.slack.invalid"
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return NotificationOutbox(tmp_path / "outbox.db")
+
+
+class TestQueue:
+    """キュー操作のテスト"""
+
+    def test_enqueue_and_claim(self, outbox):
+        """積んだ通知を取得できる"""
+        assert outbox.enqueue(URL, {"text": "hello"}) is True
+
+        message = outbox.claim()
+
+        assert message.payload == {"text": "hello"}
+        assert message.webhook_url == URL
+        assert message.attempts == 0
+
+    def test_duplicates_are_ignored(self, outbox):
+        """同じ内容・同じキーの通知は一度だけ積まれる"""
+        outbox.enqueue(URL, {"text": "hello"})
+
+        assert outbox.enqueue(URL, {"text": "hello"}) is False
+        assert outbox.enqueue(URL, {"text": "other"}, dedup_key="k") is True
+        assert outbox.enqueue(URL, {"text": "changed"}, dedup_key="k") is False
+        assert outbox.counts()["pending"] == 2
+
+    def test_identical_notifications_of_later_runs_are_delivered(self, outbox):
+        """配信済みの通知は重複排除の期間を過ぎると、同じ内容でも再び配信する"""
+        delivered = []
+
+        def deliver(message):
+            delivered.append(message.payload["text"])
+            return DeliveryOutcome(delivered=True)
+
+        start = time.time()
+        for now in (start, start + 60, start + DEDUP_WINDOW_SECONDS + 60):
+            # 2回目は同じ実行の再実行、3回目は次の日の実行
+            with patch("src.outbox.time.time", return_value=now):
+                outbox.enqueue(URL, {"text": "今日の献立"})
+                outbox.drain(deliver)
+
+        assert delivered == ["今日の献立", "今日の献立"]
+        assert outbox.counts()["sent"] == 1
+
+    def test_claimed_message_is_leased(self, outbox):
+        """配信中のメッセージはリース期限まで再取得されない"""
+        outbox.enqueue(URL, {"text": "hello"})
+        now = time.time()
+
+        first = outbox.claim(now)
+
+        assert outbox.claim(now + 1) is None
+        assert outbox.claim(now + LEASE_SECONDS + 1).id == first.id
+
+    def test_failed_delivery_is_rescheduled(self, outbox):
+        """失敗したメッセージは再送待ちになり、Retry-After が尊重される"""
+        outbox.enqueue(URL, {"text": "hello"})
+        now = time.time()
+        message = outbox.claim(now)
+
+        retry = outbox.mark_failed(
+            message, DeliveryOutcome(delivered=False, retry_after=30), now=now
+        )
+
+        assert retry is True
+        assert outbox.claim(now + 29) is None
+        assert outbox.claim(now + 31).attempts == 1
+
+    def test_gives_up_after_max_attempts(self, outbox):
+        """最大試行回数に達したら failed として残す"""
+        outbox.enqueue(URL, {"text": "hello"})
+        message = outbox.claim()
+        message.attempts = MAX_ATTEMPTS - 1
+
+        assert outbox.mark_failed(message, DeliveryOutcome(delivered=False)) is False
+        assert outbox.counts()["failed"] == 1
+        assert outbox.requeue_failed() == 1
+        assert outbox.claim().attempts == 0
+
+    def test_drain(self, outbox):
+        """期限を迎えた通知を順に配信する"""
+        for i in range(3):
+            outbox.enqueue(URL, {"text": str(i)})
+        delivered = []
+
+        def deliver(message):
+            delivered.append(message.payload["text"])
+            if message.payload["text"] == "1":
+                return DeliveryOutcome(delivered=False, retryable=False, error="HTTP 404")
+            return DeliveryOutcome(delivered=True)
+
+        result = outbox.drain(deliver)
+
+        assert delivered == ["0", "1", "2"]
+        assert (result.sent, result.retried, result.failed) == (2, 0, 1)
+        assert outbox.counts() == {"pending": 0, "sending": 0, "sent": 2, "failed": 1}
+
+    def test_drain_survives_deliver_exception(self, outbox):
+        """配信関数の例外は再送待ちとして扱う"""
+        outbox.enqueue(URL, {"text": "hello"})
+
+        result = outbox.drain(MagicMock(side_effect=RuntimeError("boom")))
+
+        assert result.retried == 1
+        assert outbox.counts()["pending"] == 1
+
+
+class TestWorker:
+    """バックグラウンド配信のテスト"""
+
+    def test_worker_delivers_and_stops(self, outbox):
+        """ワーカーがキューを配信し、期限内に停止する"""
+        worker = OutboxWorker(
+            outbox, lambda m: DeliveryOutcome(delivered=True), poll_interval=0.01
+        )
+        worker.start()
+        for i in range(5):
+            outbox.enqueue(URL, {"text": str(i)})
+
+        result = worker.stop(timeout=2)
+
+        assert result.sent == 5
+        assert outbox.counts()["sent"] == 5
+
+    def test_stop_is_bounded_when_webhook_hangs(self, outbox):
+        """Webhook が応答しなくても停止は timeout で打ち切られ、通知は残る"""
+
+        def slow(message):
+            time.sleep(1)
+            return DeliveryOutcome(delivered=True)
+
+        worker = OutboxWorker(outbox, slow, poll_interval=0.01)
+        worker.start()
+        outbox.enqueue(URL, {"text": "a"})
+        outbox.enqueue(URL, {"text": "b"})
+
+        started = time.monotonic()
+        worker.stop(timeout=0.2)
+
+        assert time.monotonic() - started < 0.5
+        assert outbox.counts()["sent"] < 2
+
+
+class TestSlackIntegration:
+    """SlackClientWrapper との連携のテスト"""
+
+    def _response(self, status_code, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        return response
+
+    def test_send_message_enqueues(self, outbox):
+        """アウトボックス設定時は送信せずに積む"""
+        session = MagicMock()
+        client = SlackClientWrapper(webhook_url=URL, session=session, outbox=outbox)
+
+        assert client.send_message("hello") is True
+
+        session.post.assert_not_called()
+        assert outbox.counts()["pending"] == 1
+
+    def test_deliver_maps_responses(self, outbox):
+        """レスポンスに応じた配信結果"""
+        session = MagicMock()
+        client = SlackClientWrapper(webhook_url=URL, session=session)
+        outbox.enqueue(URL, {"text": "hello"})
+        message = outbox.claim()
+
+        session.post.return_value = self._response(200)
+        assert client.deliver(message).delivered is True
+
+        session.post.return_value = self._response(429, {"Retry-After": "12"})
+        outcome = client.deliver(message)
+        assert (outcome.delivered, outcome.retry_after) == (False, 12.0)
+
+        session.post.return_value = self._response(404)
+        assert client.deliver(message).retryable is False
+        assert session.post.call_count == 3
+
+    def test_deliver_does_not_resend_ambiguous_failures(self, outbox):
+        """受理済みの可能性がある失敗（5xx・読み取りタイムアウト）は再送しない"""
+        session = MagicMock()
+        client = SlackClientWrapper(webhook_url=URL, session=session)
+        outbox.enqueue(URL, {"text": "hello"})
+        message = outbox.claim()
+
+        session.post.return_value = self._response(503)
+        assert client.deliver(message).retryable is False
+
+        session.post.side_effect = requests.ReadTimeout("timed out")
+        assert client.deliver(message).retryable is False
+
+        # 接続できなかった場合は届いていないため再送する
+        session.post.side_effect = requests.ConnectionError("refused")
+        assert client.deliver(message).retryable is True
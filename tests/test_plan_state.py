@@ -0,0 +1,201 @@
+"""
+日ごとの指紋と差分生成のテスト
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.fakes import (
+    DB_ID_PROPOSED,
+    DB_ID_STRUCTURED,
+    CallRecorder,
+    FakeNotionClient,
+    FakeNotionStore,
+    FakeServiceConfig,
+)
+from src.idempotency import WriteIndex
+from src.menu_generator import WeeklyMenuGenerator
+from src.notion_client import NotionClientWrapper, ProposedDish
+from src.openai_client import GeneratedMenuItem
+from src.plan_state import (
+    DayFingerprint,
+    PlanStateStore,
+    fingerprint_days,
+    plan_incremental,
+)
+
+MONDAY = date(2024, 1, 15)
+WEEK = [MONDAY + timedelta(days=i) for i in range(7)]
+
+# 日ごとにメイン食材が連続しない主菜
+MAINS = ["鶏の照り焼き", "豚の生姜焼き", "鮭の塩焼き"]
+
+
+def _dish(day: date, name: str, status: str = "提案", edited: str = "t0") -> ProposedDish:
+    return ProposedDish(
+        id=f"{day.isoformat()}-{name}",
+        dish_name=name,
+        date=day,
+        category="主菜",
+        status=status,
+        last_edited=edited,
+    )
+
+
+def _week(**overrides) -> list[ProposedDish]:
+    return [overrides.get(d.strftime("%a"), _dish(d, MAINS[i % 3])) for i, d in enumerate(WEEK)]
+
+
+class TestPlanIncremental:
+    """作り直す日の判定のテスト"""
+
+    def test_unchanged_week_is_kept(self):
+        dishes = _week()
+        previous = fingerprint_days(WEEK, dishes)
+
+        plan = plan_incremental(WEEK, dishes, previous)
+
+        assert plan.dates_to_fill == []
+        assert plan.kept == WEEK
+
+    def test_empty_days_are_filled_without_history(self):
+        """記録がない日は、予定がなければ埋め、提案があれば残す"""
+        dishes = [d for d in _week() if d.date != WEEK[2]]
+
+        plan = plan_incremental(WEEK, dishes, {})
+
+        assert plan.fill == [WEEK[2]]
+        assert plan.regenerate == []
+
+    def test_eating_out_frees_neighbours(self):
+        """外食になった日の前後の「提案」の日だけを作り直す"""
+        before = _week()
+        previous = fingerprint_days(WEEK, before)
+        after = _week(Wed=_dish(WEEK[2], MAINS[2], status="外食・予定あり", edited="t1"))
+
+        plan = plan_incremental(WEEK, after, previous)
+
+        assert plan.regenerate == [WEEK[1], WEEK[3]]
+        assert WEEK[2] in plan.kept
+
+    def test_edited_day_is_kept(self):
+        """家族が手で直した日は作り直さない（前後の食材が変わらなければ隣も残す）"""
+        previous = fingerprint_days(WEEK, _week())
+        after = _week(Fri=_dish(WEEK[4], "豚の角煮", edited="t1"))
+
+        plan = plan_incremental(WEEK, after, previous)
+
+        assert plan.dates_to_fill == []
+
+    def test_confirming_a_neighbour_changes_nothing(self):
+        """前後の日の確定（料理が同じ）では作り直さない"""
+        previous = fingerprint_days(WEEK, _week())
+        after = _week(Tue=_dish(WEEK[1], MAINS[1], status="確定", edited="t1"))
+
+        assert plan_incremental(WEEK, after, previous).dates_to_fill == []
+
+
+def test_store_round_trip(tmp_path):
+    store = PlanStateStore(tmp_path / "state" / "plan.db")
+    fingerprints = {WEEK[0]: DayFingerprint("a", "b"), WEEK[1]: DayFingerprint("c", "d")}
+
+    store.save(fingerprints)
+    store.save({WEEK[1]: DayFingerprint("e", "f")})
+
+    assert store.load(WEEK) == {WEEK[0]: DayFingerprint("a", "b"), WEEK[1]: DayFingerprint("e", "f")}
+    assert store.load([]) == {}
+
+
+class TestIncrementalGeneration:
+    """フェイク Notion を使った差分生成のテスト"""
+
+    @pytest.fixture
+    def env(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.notion_client.NOTION_WRITE_RATE", 0.0)
+        store = FakeNotionStore()
+        recorder = CallRecorder()
+        notion = NotionClientWrapper(token="fake-token")
+        notion.client = FakeNotionClient(store, FakeServiceConfig(), recorder)
+        notion.db_proposed = DB_ID_PROPOSED
+        notion.db_structured = DB_ID_STRUCTURED
+
+        openai = MagicMock()
+        openai.generate_weekly_menu.side_effect = lambda dates_to_fill, **kwargs: [
+            GeneratedMenuItem(
+                date=d,
+                dish_name=MAINS[(d - MONDAY).days % 3],
+                category="主菜",
+                shopping_list="鶏もも肉 300g",
+            )
+            for d in dates_to_fill
+        ]
+        generator = WeeklyMenuGenerator(
+            notion_client=notion,
+            openai_client=openai,
+            slack_client=MagicMock(),
+            use_catalog=False,
+            plan_state=PlanStateStore(tmp_path / "plan.db"),
+        )
+        return generator, notion, openai, recorder
+
+    def _run(self, generator):
+        return generator.generate_for_next_week(MONDAY, from_today=True, incremental=True)
+
+    def _creates(self, recorder) -> int:
+        return sum(1 for r in recorder.records if r.method == "pages.create")
+
+    def test_only_changed_days_are_regenerated(self, env):
+        generator, notion, openai, recorder = env
+
+        first = self._run(generator)
+        assert first.generated_count == 7
+
+        # 何も変わっていなければ AI も Notion への書き込みも行わない
+        second = self._run(generator)
+        assert second.skipped
+        assert second.skip_reason == "前回から変わった日はありません"
+        assert openai.generate_weekly_menu.call_count == 1
+        assert self._creates(recorder) == 7
+
+        # 水曜が外食になったら、前後の火曜・木曜だけを作り直す
+        wednesday = notion.get_proposed_dishes_by_date(WEEK[2])[0]
+        notion.update_proposed_dish_status(wednesday.id, "外食・予定あり")
+
+        third = self._run(generator)
+
+        assert third.generated_count == 2
+        assert openai.generate_weekly_menu.call_args.kwargs["dates_to_fill"] == [WEEK[1], WEEK[3]]
+        dishes = notion.get_proposed_dishes_by_date_range(WEEK[0], WEEK[-1])
+        assert len(dishes) == 7
+        assert [d.status for d in dishes if d.date == WEEK[2]] == ["外食・予定あり"]
+
+        # 作り直した結果も記録されているため、続けて実行しても何もしない
+        assert self._run(generator).skipped
+
+    def test_regenerated_identical_dish_is_kept(self, env, tmp_path):
+        """作り直した日が同じ料理になり、冪等キーで元のページを使っても削除しない"""
+        generator, notion, openai, recorder = env
+        notion.write_index = WriteIndex(tmp_path / "write_index.db")
+
+        with patch("src.idempotency.RUN_ID", ""):
+            self._run(generator)
+            wednesday = notion.get_proposed_dishes_by_date(WEEK[2])[0]
+            notion.update_proposed_dish_status(wednesday.id, "外食・予定あり")
+            result = self._run(generator)
+
+        assert result.generated_count == 2
+        assert self._creates(recorder) == 7
+        dishes = notion.get_proposed_dishes_by_date_range(WEEK[0], WEEK[-1])
+        assert sorted(d.date for d in dishes) == WEEK
+
+    def test_incremental_requires_state(self):
+        generator = WeeklyMenuGenerator(
+            notion_client=MagicMock(), openai_client=MagicMock(), slack_client=MagicMock()
+        )
+
+        result = generator.generate_for_next_week(MONDAY, incremental=True)
+
+        assert result.skipped
+        generator.notion.delete_proposed_dishes_by_date_range.assert_not_called()
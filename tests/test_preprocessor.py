@@ -7,7 +7,16 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.notion_client import RawActualInput
+from benchmarks.dataset import build_dataset
+from benchmarks.fakes import DB_ID_RAW, DB_ID_STRUCTURED, fake_environment
+from benchmarks.run import BenchmarkConfig, build_services
+from src.history_store import HistoryColumns
+from src.ingredients import fold
+from src.notion_client import (
+    NotionClientWrapper,
+    RawActualInput,
+    StructuredActualHistory,
+)
 from src.openai_client import StructuredDish
 from src.preprocessor import ActualDataPreprocessor
 
@@ -139,3 +148,63 @@ class TestProcessAllUnprocessed:
         assert result.processed_count == 1
         assert result.created_count == 0
         mock_notion.mark_raw_input_as_processed.assert_called_once_with("raw-1")
+
+
+def test_rerun_after_crash_does_not_duplicate_history(tmp_path):
+    """処理済みにする前に中断した実績入力は、構造化の結果が変わっても重ねて作成しない"""
+    config = BenchmarkConfig(history_rows=0, backlog_records=0, iterations=1)
+    services = build_services(config, build_dataset(0, 0, seed=config.seed))
+    services.store.insert(
+        DB_ID_RAW,
+        {
+            "食べたもの": {"title": [{"text": {"content": "とりの照り焼き、みそ汁"}}]},
+            "日付": {"date": {"start": "2024-01-15"}},
+            "処理済み": {"checkbox": False},
+        },
+    )
+    openai = MagicMock()
+    openai.structure_raw_input.side_effect = [
+        [StructuredDish("鶏の照り焼き", "主菜"), StructuredDish("味噌汁", "汁物")],
+        [StructuredDish("照り焼きチキン", "主菜"), StructuredDish("豆腐の味噌汁", "汁物")],
+    ]
+    before = services.store.count(DB_ID_STRUCTURED)
+
+    with (
+        fake_environment(services),
+        patch("src.notion_client.WRITE_INDEX_PATH", str(tmp_path / "write_index.db")),
+    ):
+        notion = NotionClientWrapper()
+        with patch.object(
+            notion, "mark_raw_input_as_processed", side_effect=RuntimeError("crash")
+        ):
+            first = ActualDataPreprocessor(notion, openai).process_all_unprocessed()
+        second = ActualDataPreprocessor(notion, openai).process_all_unprocessed()
+
+    assert first.errors and not second.errors
+    assert services.store.count(DB_ID_STRUCTURED) == before + 2
+    creates = [r for r in services.recorder.snapshot() if r.method == "pages.create"]
+    assert len(creates) == 2
+    assert notion.get_unprocessed_raw_inputs() == []
+
+
+def test_known_categories_are_passed_to_structuring():
+    """直近の実績履歴の料理の区分を、構造化の結果の確認用に渡す"""
+    mock_notion = MagicMock()
+    mock_notion.get_unprocessed_raw_inputs.return_value = [
+        RawActualInput(id="raw-1", date=date(2024, 1, 15), food_eaten="豚汁", is_processed=False)
+    ]
+    mock_notion.get_structured_history_columns.return_value = HistoryColumns.from_records(
+        [
+            StructuredActualHistory("h2", "トン汁", date(2024, 1, 10), "汁物"),
+            StructuredActualHistory("h1", "とん汁", date(2024, 1, 3), "その他"),
+        ]
+    )
+    mock_openai = MagicMock()
+    mock_openai.structure_raw_input.return_value = []
+
+    ActualDataPreprocessor(
+        notion_client=mock_notion, openai_client=mock_openai
+    ).process_all_unprocessed()
+
+    known = mock_openai.structure_raw_input.call_args.kwargs["known_categories"]
+    assert known == {fold("トン汁"): "汁物"}
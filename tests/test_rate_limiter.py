@@ -0,0 +1,36 @@
+"""
+レートリミッターのテスト
+"""
+
+import time
+
+from src.rate_limiter import RateLimiter
+
+
+class TestRateLimiter:
+    """トークンバケットのテスト"""
+
+    def test_burst_is_not_throttled(self):
+        """バースト分は待機なしで取得できる"""
+        limiter = RateLimiter(rate_per_second=1, burst=3)
+
+        waits = [limiter.acquire() for _ in range(3)]
+
+        assert waits == [0.0, 0.0, 0.0]
+
+    def test_throttles_beyond_rate(self):
+        """レートを超えると待機する"""
+        limiter = RateLimiter(rate_per_second=50, burst=1)
+
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        elapsed = time.monotonic() - start
+
+        assert elapsed >= 0.09
+
+    def test_zero_rate_is_unlimited(self):
+        """レート0以下は無制限"""
+        limiter = RateLimiter(rate_per_second=0)
+
+        assert all(limiter.acquire() == 0.0 for _ in range(100))
@@ -0,0 +1,270 @@
+"""
+リトライとサーキットブレーカーのテスト
+"""
+
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import httpx
+import openai
+import pytest
+from notion_client.errors import APIResponseError, RequestTimeoutError
+
+from src import resilience
+from src.deadline import deadline_scope
+from src.metrics import CIRCUIT_REJECTIONS, CLIENT_RETRIES
+from src.notion_client import NotionClientWrapper
+from src.notion_client import _classify_error as classify_notion
+from src.openai_client import OpenAIClientWrapper
+from src.openai_client import _classify_error as classify_openai
+from src.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    Failure,
+    RetryBudget,
+    ServiceGuard,
+)
+
+
+class Transient(Exception):
+    """テスト用の一時的なエラー"""
+
+
+def _classify(error: Exception) -> Failure | None:
+    if isinstance(error, TimeoutError):
+        return Failure("timeout")
+    if isinstance(error, Transient):
+        return Failure("server_error")
+    return None
+
+
+@pytest.fixture
+def guard():
+    return ServiceGuard("test", _classify, max_retries=3)
+
+
+@pytest.fixture
+def sleep():
+    with patch("src.resilience.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
+class TestCircuitBreaker:
+    """サーキットブレーカーの状態遷移のテスト"""
+
+    def test_opens_after_consecutive_failures_and_probes_once(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=lambda: now[0])
+
+        assert breaker.record_failure() is False
+        breaker.record_success()
+        assert breaker.record_failure() is False
+        assert breaker.record_failure() is True
+        assert breaker.state == OPEN
+        assert breaker.allow() is False
+
+        now[0] = 10.0
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is True
+        assert breaker.allow() is False  # 半開では1件だけ通す
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow() is True
+
+    def test_failed_probe_reopens(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5, clock=lambda: now[0])
+        breaker.record_failure()
+
+        now[0] = 5.0
+        assert breaker.allow() is True
+        assert breaker.record_failure() is True
+        assert breaker.allow() is False
+
+    def test_zero_threshold_never_opens(self):
+        breaker = CircuitBreaker(failure_threshold=0)
+        for _ in range(10):
+            breaker.record_failure()
+        assert breaker.allow() is True
+
+
+def test_retry_budget_is_limited():
+    budget = RetryBudget(2)
+
+    assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+    assert budget.remaining == 0
+
+
+class TestServiceGuard:
+    """ServiceGuard のテスト"""
+
+    def test_transient_errors_are_retried_with_backoff(self, guard, sleep):
+        fn = MagicMock(side_effect=[Transient(), Transient(), "ok"])
+
+        assert guard.call(fn, 1, key="v") == "ok"
+        assert fn.call_count == 3
+        fn.assert_called_with(1, key="v")
+        delays = [c.args[0] for c in sleep.call_args_list]
+        assert 0 <= delays[0] <= 0.5
+        assert 0 <= delays[1] <= 1.0
+        assert CLIENT_RETRIES.value(service="test", reason="server_error") >= 2
+
+    def test_retry_after_is_honored(self, guard, sleep):
+        fn = MagicMock(side_effect=[Transient(), "ok"])
+        guard.classify = lambda e: Failure("rate_limited", retry_after=3.0)
+
+        guard.call(fn)
+
+        sleep.assert_called_once_with(3.0)
+
+    def test_other_errors_are_not_retried(self, guard, sleep):
+        fn = MagicMock(side_effect=ValueError("bad request"))
+
+        with pytest.raises(ValueError):
+            guard.call(fn)
+        assert fn.call_count == 1
+
+    def test_gives_up_after_max_retries(self, guard, sleep):
+        fn = MagicMock(side_effect=Transient())
+
+        with pytest.raises(Transient):
+            guard.call(fn, max_retries=1)
+        assert fn.call_count == 2
+
+    def test_timeout_of_non_idempotent_call_is_not_retried(self, guard, sleep):
+        fn = MagicMock(side_effect=[TimeoutError(), "ok"])
+
+        with pytest.raises(TimeoutError):
+            guard.call(fn, idempotent=False)
+        assert fn.call_count == 1
+
+        assert guard.call(MagicMock(side_effect=[TimeoutError(), "ok"])) == "ok"
+
+    def test_server_error_of_non_idempotent_call_is_not_retried(self, guard, sleep):
+        fn = MagicMock(side_effect=[Transient(), "ok"])
+
+        with pytest.raises(Transient):
+            guard.call(fn, idempotent=False)
+        assert fn.call_count == 1
+
+        results = MagicMock(side_effect=[503, 200])
+        assert guard.call(results, idempotent=False, classify_result=resilience.classify_status) == 503
+        assert results.call_count == 1
+
+    def test_results_can_be_retried(self, guard, sleep):
+        fn = MagicMock(side_effect=[503, 503, 200])
+        classify = resilience.classify_status
+
+        assert guard.call(fn, classify_result=classify) == 200
+        last = guard.call(MagicMock(return_value=503), max_retries=0, classify_result=classify)
+        assert last == 503
+
+    def test_retry_budget_is_shared_by_the_run(self, guard, sleep):
+        resilience.reset(retries=1)
+        other = ServiceGuard("other", _classify, max_retries=3)
+
+        with pytest.raises(Transient):
+            guard.call(MagicMock(side_effect=Transient()))
+        with pytest.raises(Transient):
+            other.call(MagicMock(side_effect=Transient()))
+
+        assert sleep.call_count == 1
+
+    def test_no_retry_past_the_deadline(self, guard, sleep):
+        guard.classify = lambda e: Failure("rate_limited", retry_after=10.0)
+        fn = MagicMock(side_effect=[Transient(), "ok"])
+
+        with deadline_scope(5.0), pytest.raises(Transient):
+            guard.call(fn)
+        sleep.assert_not_called()
+
+    def test_open_circuit_fails_fast(self, guard, sleep):
+        fn = MagicMock(side_effect=Transient())
+        with pytest.raises(Transient):
+            guard.call(fn, max_retries=10)
+        # 閾値に達した時点でリトライをやめる
+        assert fn.call_count == resilience.circuit_breaker("test").failure_threshold
+
+        fn.reset_mock()
+        with pytest.raises(CircuitOpenError):
+            guard.call(fn)
+        fn.assert_not_called()
+        assert CIRCUIT_REJECTIONS.value(service="test") >= 1
+
+
+class TestClassification:
+    """各 SDK の例外の分類のテスト"""
+
+    def test_notion_errors(self):
+        rate_limited = APIResponseError(
+            httpx.Response(429, headers={"retry-after": "2"}), "rate limited", "rate_limited"
+        )
+        server_error = APIResponseError(httpx.Response(502), "bad gateway", "internal_server_error")
+        invalid = APIResponseError(httpx.Response(400), "invalid", "validation_error")
+
+        assert classify_notion(rate_limited) == Failure("rate_limited", 2.0)
+        assert classify_notion(server_error) == Failure("server_error")
+        assert classify_notion(RequestTimeoutError()) == Failure("timeout")
+        assert classify_notion(httpx.ConnectError("reset")) == Failure("connection")
+        assert classify_notion(invalid) is None
+
+    def test_openai_errors(self):
+        request = httpx.Request("POST", "https://api.openai.invalid")
+        rate_limited = openai.RateLimitError(
+            "slow down", response=httpx.Response(429, request=request), body=None
+        )
+
+        assert classify_openai(rate_limited) == Failure("rate_limited")
+        assert classify_openai(openai.APITimeoutError(request)) == Failure("timeout")
+        assert classify_openai(openai.APIConnectionError(request=request)) == Failure("connection")
+        assert classify_openai(ValueError()) is None
+
+
+class TestClients:
+    """クライアントへの適用のテスト"""
+
+    def test_notion_page_creation_does_not_retry_timeouts(self, sleep):
+        with patch.object(NotionClientWrapper, "__init__", lambda x, y=None: None):
+            client = NotionClientWrapper()
+            client.client = MagicMock()
+            client.db_raw = "db-raw"
+        client.client.pages.create.side_effect = RequestTimeoutError()
+
+        with pytest.raises(RequestTimeoutError):
+            client.create_test_raw_input("カレー", date(2024, 1, 15))
+        assert client.client.pages.create.call_count == 1
+
+    def test_notion_page_creation_does_not_retry_server_errors(self, sleep):
+        with patch.object(NotionClientWrapper, "__init__", lambda x, y=None: None):
+            client = NotionClientWrapper()
+            client.client = MagicMock()
+            client.db_raw = "db-raw"
+        client.client.pages.create.side_effect = [
+            APIResponseError(httpx.Response(502), "bad gateway", "internal_server_error"),
+            {"id": "p1"},
+        ]
+
+        with pytest.raises(APIResponseError):
+            client.create_test_raw_input("カレー", date(2024, 1, 15))
+        assert client.client.pages.create.call_count == 1
+
+    def test_notion_query_is_retried(self, sleep):
+        with patch.object(NotionClientWrapper, "__init__", lambda x, y=None: None):
+            client = NotionClientWrapper()
+            client.client = MagicMock()
+        client.client.databases.query.side_effect = [
+            APIResponseError(httpx.Response(503), "unavailable", "service_unavailable"),
+            {"results": [{"id": "p1"}], "has_more": False, "next_cursor": None},
+        ]
+
+        assert [page["id"] for page in client._query_database("db")] == ["p1"]
+        assert client.client.databases.query.call_count == 2
+
+    def test_openai_sdk_retries_are_disabled(self):
+        with patch("src.openai_client.OpenAI") as sdk:
+            OpenAIClientWrapper(api_key="sk-test")
+        assert sdk.call_args.kwargs["max_retries"] == 0
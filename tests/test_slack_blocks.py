@@ -0,0 +1,173 @@
+"""
+Block Kit メッセージビルダーのテスト
+"""
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+from src.slack_blocks import (
+    MAX_BLOCKS,
+    MAX_SECTION_CHARS,
+    BlockTemplate,
+    MessageBuilder,
+    SlackMessage,
+    format_date,
+    measure,
+    split_text,
+)
+from src.slack_client import SlackClientWrapper
+
+
+class TestTemplate:
+    """テンプレートのテスト"""
+
+    def test_render_fills_placeholders(self):
+        """プレースホルダーが埋められる"""
+        template = BlockTemplate(
+            {"type": "section", "text": {"type": "mrkdwn", "text": "*$title*\n$body"}}
+        )
+
+        block = template.render(title="見出し", body="本文 $5")
+
+        assert block == {"type": "section", "text": {"type": "mrkdwn", "text": "*見出し*\n本文 $5"}}
+
+    def test_render_returns_independent_copies(self):
+        """描画結果はテンプレートや他の描画結果と独立している"""
+        template = BlockTemplate({"type": "context", "elements": [{"text": "$text"}]})
+
+        first = template.render(text="a")
+        first["elements"].append({"text": "x"})
+
+        assert template.render(text="b") == {"type": "context", "elements": [{"text": "b"}]}
+
+    def test_format_date(self):
+        """日付は曜日付きで表示される"""
+        assert format_date(date(2024, 1, 15)) == "01/15 (月)"
+
+
+class TestSplitText:
+    """テキスト分割のテスト"""
+
+    def test_short_text_is_kept(self):
+        assert split_text("abc", 10) == ["abc"]
+
+    def test_splits_on_lines(self):
+        """行単位で分割される"""
+        text = "\n".join(f"line{i}" for i in range(10))
+
+        chunks = split_text(text, 20)
+
+        assert all(len(c) <= 20 for c in chunks)
+        assert "\n".join(chunks) == text
+
+    def test_splits_long_comma_list(self):
+        """1行の長いリストは「, 」の区切りで分割される"""
+        items = [f"食材{i}" for i in range(200)]
+        text = ", ".join(items)
+
+        chunks = split_text(text, 100)
+
+        assert all(len(c) <= 100 for c in chunks)
+        rejoined = [i.strip() for c in chunks for i in c.split(",") if i.strip()]
+        assert rejoined == items
+
+    def test_hard_cut_without_separators(self):
+        """区切りがない場合は文字数で切る"""
+        chunks = split_text("x" * 250, 100)
+
+        assert [len(c) for c in chunks] == [100, 100, 50]
+
+
+class TestMessageBuilder:
+    """ビルダーのテスト"""
+
+    def test_single_message(self):
+        """上限内なら1通"""
+        messages = MessageBuilder("fallback").header("h").divider().section("s").build()
+
+        assert len(messages) == 1
+        assert messages[0].text == "fallback"
+        assert [b["type"] for b in messages[0].blocks] == ["header", "divider", "section"]
+
+    def test_long_section_is_split(self):
+        """長いセクションは複数のセクションになる"""
+        builder = MessageBuilder("fallback").section("\n".join(["あ" * 100] * 100))
+
+        sizes = [measure(m) for m in builder.build()]
+
+        assert sizes[0].blocks > 1
+        assert all(s.max_section_chars <= MAX_SECTION_CHARS for s in sizes)
+
+    def test_too_many_blocks_are_chunked(self):
+        """50ブロックを超えると続きのメッセージに分かれる"""
+        builder = MessageBuilder("fallback").header("h")
+        for i in range(120):
+            builder.section(f"day {i}")
+
+        messages = builder.build()
+
+        assert len(messages) == 3
+        assert all(measure(m).blocks <= MAX_BLOCKS for m in messages)
+        assert messages[1].text == "fallback（続き 2/3）"
+        assert messages[1].blocks[0]["elements"][0]["text"] == "（続き 2/3）"
+        sections = [b for m in messages for b in m.blocks if b["type"] == "section"]
+        assert [b["text"]["text"] for b in sections] == [f"day {i}" for i in range(120)]
+
+    def test_continuation_does_not_start_with_divider(self):
+        """続きのメッセージは区切り線から始まらない"""
+        builder = MessageBuilder("fallback", max_blocks=3)
+        builder.section("a").section("b").divider().section("c")
+
+        messages = builder.build()
+
+        assert [b["type"] for b in messages[1].blocks] == ["context", "section"]
+
+    def test_char_budget(self):
+        """文字数の上限でも分割される"""
+        builder = MessageBuilder("fallback", max_chars=5000)
+        for _ in range(4):
+            builder.section("x" * 2000)
+
+        messages = builder.build()
+
+        assert all(measure(m).chars <= 5000 + 20 for m in messages)
+        assert len(messages) == 2
+
+    def test_measure_bytes(self):
+        """バイト数は JSON の UTF-8 エンコード長"""
+        size = measure(SlackMessage("あ", [{"type": "divider"}]))
+
+        assert size.blocks == 1
+        assert size.bytes == len('{"text": "あ", "blocks": [{"type": "divider"}]}'.encode())
+
+
+class TestSlackClientChunking:
+    """Slack クライアントからの分割送信のテスト"""
+
+    def test_long_horizon_weekly_is_sent_in_chunks(self):
+        """長期間・大量の買い物リストでも上限内のメッセージに分けて送る"""
+        client = SlackClientWrapper(webhook_url="https://hooks.slack.invalid", session=MagicMock())
+        sent = []
+        client.send_message = lambda text, blocks=None: sent.append(SlackMessage(text, blocks)) or True
+        start = date(2024, 1, 1)
+        items = [
+            {
+                "date": (start + timedelta(days=i)).isoformat(),
+                "dish_name": f"料理{i}",
+                "category": "主菜",
+                "status": "提案",
+                "shopping_list": ", ".join(f"食材{i}-{j}" for j in range(30)),
+            }
+            for i in range(90)
+        ]
+
+        result = client.send_weekly_menu_notification(
+            items, start, start + timedelta(days=89), "https://notion.invalid"
+        )
+
+        assert result is True
+        assert len(sent) > 1
+        for message in sent:
+            size = measure(message)
+            assert size.blocks <= MAX_BLOCKS
+            assert size.max_section_chars <= MAX_SECTION_CHARS
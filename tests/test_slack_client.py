@@ -0,0 +1,173 @@
+"""
+Slackクライアントのテスト
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.slack_client import SlackClientWrapper, SlackMessage, shared_session
+
+
+def _response(status_code, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+@pytest.fixture
+def session():
+    return MagicMock()
+
+
+@pytest.fixture
+def client(session):
+    return SlackClientWrapper(
+        webhook_url="https://hooks.slack.invalid", session=session, max_retries=3
+    )
+
+
+@pytest.fixture
+def sleep():
+    with patch("src.resilience.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
+class TestSession:
+    """共有セッションのテスト"""
+
+    def test_shared_session_is_reused(self):
+        """共有セッションは同じインスタンスを返す"""
+        assert shared_session() is shared_session()
+
+    def test_client_uses_shared_session_by_default(self):
+        """セッション未指定なら共有セッションを使う"""
+        client = SlackClientWrapper(webhook_url="https://hooks.slack.invalid")
+
+        assert client.session is shared_session()
+
+    def test_send_message_posts_via_session(self, client, session, sleep):
+        """送信はセッション経由で行われる"""
+        session.post.return_value = _response(200)
+
+        assert client.send_message("hello", [{"type": "divider"}]) is True
+
+        _, kwargs = session.post.call_args
+        assert kwargs["json"] == {"text": "hello", "blocks": [{"type": "divider"}]}
+        sleep.assert_not_called()
+
+
+class TestRetry:
+    """リトライのテスト"""
+
+    def test_retry_after_is_honored(self, client, session, sleep):
+        """429 は Retry-After の秒数だけ待ってリトライする"""
+        session.post.side_effect = [
+            _response(429, {"Retry-After": "7"}),
+            _response(200),
+        ]
+
+        assert client.send_message("hello") is True
+        assert session.post.call_count == 2
+        sleep.assert_called_once_with(7.0)
+
+    def test_5xx_is_not_retried(self, client, session, sleep):
+        """5xx は受理済みの可能性があるため、二重投稿を避けてリトライしない"""
+        session.post.side_effect = [_response(502), _response(200)]
+
+        assert client.send_message("hello") is False
+        assert session.post.call_count == 1
+        sleep.assert_not_called()
+
+    def test_connection_errors_use_jittered_backoff(self, client, session, sleep):
+        """接続エラーはバックオフの範囲内でリトライする"""
+        session.post.side_effect = [
+            requests.ConnectionError("reset"),
+            requests.ConnectionError("reset"),
+            _response(200),
+        ]
+
+        assert client.send_message("hello") is True
+        assert session.post.call_count == 3
+        delays = [c.args[0] for c in sleep.call_args_list]
+        assert 0 <= delays[0] <= 0.5
+        assert 0 <= delays[1] <= 1.0
+
+    def test_gives_up_after_max_retries(self, client, session, sleep):
+        """最大回数を超えたら失敗を返す"""
+        session.post.return_value = _response(429, {"Retry-After": "0"})
+
+        assert client.send_message("hello") is False
+        assert session.post.call_count == 4
+
+    def test_4xx_is_not_retried(self, client, session, sleep):
+        """429 以外の 4xx はリトライしない"""
+        session.post.return_value = _response(404)
+
+        assert client.send_message("hello") is False
+        assert session.post.call_count == 1
+
+    def test_connection_error_is_retried(self, client, session, sleep):
+        """接続エラーはリトライする"""
+        session.post.side_effect = [requests.ConnectionError("reset"), _response(200)]
+
+        assert client.send_message("hello") is True
+        assert session.post.call_count == 2
+
+    def test_read_timeout_is_not_retried(self, client, session, sleep):
+        """読み取りタイムアウトは二重投稿を避けるためリトライしない"""
+        session.post.side_effect = requests.ReadTimeout("slow")
+
+        assert client.send_message("hello") is False
+        assert session.post.call_count == 1
+
+
+class TestSendMessages:
+    """並列送信のテスト"""
+
+    def test_results_keep_input_order(self, client, session):
+        """結果は入力と同じ順序で返る"""
+
+        def post(url, json, timeout):
+            return _response(500 if json["text"] == "bad" else 200)
+
+        session.post.side_effect = post
+        client.max_retries = 0
+
+        results = client.send_messages(
+            [SlackMessage("a"), SlackMessage("bad"), SlackMessage("c")]
+        )
+
+        assert results == [True, False, True]
+
+    def test_concurrency_is_bounded(self, client, session):
+        """同時送信数が上限を超えない"""
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def post(url, json, timeout):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return _response(200)
+
+        session.post.side_effect = post
+
+        results = asyncio.run(
+            client.send_messages_async(
+                [SlackMessage(str(i)) for i in range(10)], max_concurrency=3
+            )
+        )
+
+        assert all(results)
+        assert 1 < peak <= 3
@@ -0,0 +1,210 @@
+"""
+スナップショット（export / import）のテスト
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.dataset import build_dataset
+from benchmarks.fakes import (
+    DB_ID_PROPOSED,
+    DB_ID_RAW,
+    DB_ID_STRUCTURED,
+    fake_environment,
+)
+from benchmarks.run import BenchmarkConfig, build_services, load_snapshot_store
+from src.main import main
+from src.notion_client import BulkWriteResult, NotionClientWrapper
+from src.snapshot import (
+    IMPORT_STATE_FILE,
+    MANIFEST_FILE,
+    TABLES,
+    SnapshotError,
+    export_snapshot,
+    import_snapshot,
+    iter_snapshot,
+    read_manifest,
+    resolve_compression,
+    to_row,
+)
+
+DB_IDS = (DB_ID_STRUCTURED, DB_ID_RAW, DB_ID_PROPOSED)
+
+
+def _services(history_rows: int = 0, backlog: int = 0):
+    config = BenchmarkConfig(history_rows=history_rows, backlog_records=backlog, iterations=1)
+    return build_services(config, build_dataset(history_rows, backlog, seed=config.seed))
+
+
+@pytest.fixture
+def source():
+    return _services(history_rows=300, backlog=7)
+
+
+class TestRoundTrip:
+    """export したスナップショットを別のワークスペースに import するテスト"""
+
+    @pytest.mark.parametrize("compression", ["gzip", "none"])
+    def test_round_trip_preserves_all_tables(self, source, tmp_path, compression):
+        with fake_environment(source):
+            manifest = export_snapshot(NotionClientWrapper(), tmp_path, compression=compression)
+
+        assert manifest.compression == compression
+        assert {t: e["rows"] for t, e in manifest.tables.items()} == {
+            "structured": source.store.count(DB_ID_STRUCTURED),
+            "raw": source.store.count(DB_ID_RAW),
+            "proposed": source.store.count(DB_ID_PROPOSED),
+        }
+
+        target = _services()
+        for pages in target.store.databases.values():
+            pages.clear()  # 空のワークスペース
+        with fake_environment(target):
+            result = import_snapshot(NotionClientWrapper(), tmp_path, max_workers=4)
+
+        assert result.failed == 0
+        assert result.created == sum(e["rows"] for e in manifest.tables.values())
+        assert _records(target) == _records(source)
+
+    def test_snapshot_loads_as_benchmark_fixture(self, source, tmp_path):
+        with fake_environment(source):
+            export_snapshot(NotionClientWrapper(), tmp_path, compression="gzip")
+
+        store = load_snapshot_store(str(tmp_path))
+
+        for db_id in DB_IDS:
+            assert store.count(db_id) == source.store.count(db_id)
+
+    def test_selected_tables_only(self, source, tmp_path):
+        with fake_environment(source):
+            manifest = export_snapshot(
+                NotionClientWrapper(), tmp_path, tables=["raw"], compression="none"
+            )
+
+        assert list(manifest.tables) == ["raw"]
+        assert list(iter_snapshot(tmp_path, "structured")) == []
+        records = list(iter_snapshot(tmp_path, "raw"))
+        assert len(records) == 7
+        assert all(record.id is None for record in records)
+
+
+def _records(services) -> dict[str, list[tuple]]:
+    """テーブルごとのレコード（id・更新日時を除く）"""
+    with fake_environment(services):
+        notion = NotionClientWrapper()
+        return {
+            table: sorted(
+                tuple(v for k, v in sorted(to_row(r).items()) if k not in ("id", "last_edited"))
+                for r in notion.iter_records(table)
+            )
+            for table in TABLES
+        }
+
+
+class TestResume:
+    """中断した取り込みの再開のテスト"""
+
+    def _snapshot(self, source, tmp_path):
+        with fake_environment(source):
+            export_snapshot(NotionClientWrapper(), tmp_path, tables=["raw"], compression="none")
+
+    def _notion(self, fail_foods: set[str]) -> MagicMock:
+        notion = MagicMock()
+        notion.db_structured, notion.db_raw, notion.db_proposed = DB_IDS
+        created = []
+
+        def bulk_create(records, **kwargs):
+            result = BulkWriteResult()
+            for record in records:
+                if record.food_eaten in fail_foods:
+                    result.failed += 1
+                    result.errors.append(f"failed: {record.food_eaten}")
+                    continue
+                record.id = f"page-{len(created)}"
+                created.append(record.food_eaten)
+                result.created += 1
+            return result
+
+        notion.bulk_create.side_effect = bulk_create
+        notion.created = created
+        return notion
+
+    def test_resume_only_retries_failed_rows(self, source, tmp_path):
+        self._snapshot(source, tmp_path)
+        foods = [record.food_eaten for record in iter_snapshot(tmp_path, "raw")]
+
+        first = import_snapshot(self._notion({foods[2]}), tmp_path, tables=["raw"])
+        assert (first.created, first.failed) == (6, 1)
+        state = json.loads((tmp_path / IMPORT_STATE_FILE).read_text())
+        assert state[f"raw:{DB_ID_RAW}"] == {"next_row": 7, "failed_rows": [2]}
+
+        notion = self._notion(set())
+        second = import_snapshot(notion, tmp_path, tables=["raw"])
+
+        assert (second.created, second.failed, second.skipped) == (1, 0, 6)
+        assert notion.created == [foods[2]]
+
+    def test_restart_ignores_previous_state(self, source, tmp_path):
+        self._snapshot(source, tmp_path)
+        import_snapshot(self._notion(set()), tmp_path, tables=["raw"])
+
+        result = import_snapshot(self._notion(set()), tmp_path, tables=["raw"], resume=False)
+
+        assert (result.created, result.skipped) == (7, 0)
+
+    def test_other_workspace_starts_from_scratch(self, source, tmp_path):
+        self._snapshot(source, tmp_path)
+        import_snapshot(self._notion(set()), tmp_path, tables=["raw"])
+
+        notion = self._notion(set())
+        notion.db_raw = "another-raw-db"
+        result = import_snapshot(notion, tmp_path, tables=["raw"])
+
+        assert (result.created, result.skipped) == (7, 0)
+
+
+class TestManifest:
+    """目録と任意の依存パッケージのテスト"""
+
+    def test_rejects_other_schema_version(self, source, tmp_path):
+        with fake_environment(source):
+            export_snapshot(NotionClientWrapper(), tmp_path, tables=["raw"], compression="none")
+        manifest = json.loads((tmp_path / MANIFEST_FILE).read_text())
+        manifest["schema_version"] = 99
+        (tmp_path / MANIFEST_FILE).write_text(json.dumps(manifest))
+
+        with pytest.raises(SnapshotError, match="schema version 99"):
+            read_manifest(tmp_path)
+
+    @pytest.mark.parametrize(
+        "line", ['{"date": "2024-01-01", "food_eaten"', '{"date": "2024-01-01", "color": "red"}']
+    )
+    def test_corrupt_row_fails_with_its_line(self, source, tmp_path, line):
+        with fake_environment(source):
+            manifest = export_snapshot(
+                NotionClientWrapper(), tmp_path, tables=["raw"], compression="none"
+            )
+        with (tmp_path / manifest.tables["raw"]["file"]).open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+        with pytest.raises(SnapshotError, match="line 8"):
+            list(iter_snapshot(tmp_path, "raw"))
+        with fake_environment(source):
+            assert main(["import", "--input", str(tmp_path), "--rate", "0"]) == 1
+
+    def test_missing_manifest(self, tmp_path):
+        with pytest.raises(SnapshotError):
+            import_snapshot(MagicMock(), tmp_path)
+
+    def test_auto_falls_back_to_gzip_without_zstandard(self):
+        with patch.dict("sys.modules", {"zstandard": None}):
+            assert resolve_compression("auto") == "gzip"
+
+    def test_parquet_requires_pyarrow(self, source, tmp_path):
+        with patch.dict("sys.modules", {"pyarrow": None}):
+            with fake_environment(source), pytest.raises(SnapshotError, match="pyarrow"):
+                export_snapshot(NotionClientWrapper(), tmp_path, fmt="parquet")
+
+        assert not (tmp_path / MANIFEST_FILE).exists()
@@ -0,0 +1,129 @@
+"""
+トレーシングのテスト
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.tracing import SPAN_KIND_CLIENT, Tracer
+
+
+@pytest.fixture
+def tracer():
+    t = Tracer()
+    t.enable()
+    return t
+
+
+class TestTracer:
+    """スパンの記録のテスト"""
+
+    def test_disabled_tracer_records_nothing(self):
+        """無効時はスパンを記録しない"""
+        t = Tracer()
+
+        with t.span("stage") as current:
+            pass
+
+        assert current is None
+        assert t.spans == []
+
+    def test_nested_spans_have_parent(self, tracer):
+        """入れ子のスパンは親のIDを持つ"""
+        with tracer.span("outer") as outer:
+            with tracer.span("inner", items=3) as inner:
+                pass
+
+        assert inner.parent_id == outer.span_id
+        assert outer.parent_id is None
+        assert inner.attributes == {"items": 3}
+        assert inner.trace_id == outer.trace_id
+
+    def test_exception_marks_error(self, tracer):
+        """例外が発生したスパンはエラーとして記録される"""
+        with pytest.raises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+
+        assert tracer.spans[0].error == "ValueError: boom"
+        assert tracer.spans[0].end_ns >= tracer.spans[0].start_ns
+
+    def test_traced_decorator(self, tracer):
+        """デコレータで関数呼び出しが記録される"""
+
+        @tracer.traced("client.call", kind=SPAN_KIND_CLIENT)
+        def call(x):
+            tracer.set_attributes(x=x)
+            return x * 2
+
+        assert call(2) == 4
+        assert [s.name for s in tracer.spans] == ["client.call"]
+        assert tracer.spans[0].kind == SPAN_KIND_CLIENT
+        assert tracer.spans[0].attributes == {"x": 2}
+
+    def test_set_attributes_without_span_is_noop(self, tracer):
+        """スパン外での属性設定は無視される"""
+        tracer.set_attributes(x=1)
+
+        assert tracer.spans == []
+
+
+class TestExport:
+    """エクスポートとサマリーのテスト"""
+
+    def test_export_otlp_json(self, tracer, tmp_path):
+        """OTLP/JSON 形式で書き出せる"""
+        with tracer.span("outer"):
+            with tracer.span("inner", model="gpt-4o", tokens=10, ok=True):
+                pass
+
+        path = tmp_path / "trace.json"
+        tracer.export_json(path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+
+        spans = data["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [s["name"] for s in spans] == ["outer", "inner"]
+        assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+        assert "parentSpanId" not in spans[0]
+        assert len(spans[0]["traceId"]) == 32
+        assert spans[0]["status"] == {"code": 1}
+        assert {"key": "tokens", "value": {"intValue": "10"}} in spans[1]["attributes"]
+        assert {"key": "ok", "value": {"boolValue": True}} in spans[1]["attributes"]
+
+    def test_summary_aggregates_by_path(self, tracer):
+        """同じ経路のスパンは集計され、子は親の下にインデントされる"""
+        with tracer.span("root"):
+            for _ in range(3):
+                with tracer.span("child"):
+                    pass
+
+        lines = tracer.format_summary().splitlines()
+
+        assert lines[0].startswith("root")
+        assert "100.0%" in lines[0]
+        assert lines[1].startswith("  child ×3")
+
+    def test_summary_without_spans(self, tracer):
+        """スパンがない場合"""
+        assert tracer.format_summary() == "(no spans recorded)"
+
+
+class TestTraceFlag:
+    """--trace フラグのテスト"""
+
+    def test_trace_flag_writes_file(self, tmp_path):
+        """--trace で終了時にトレースファイルが書き出される"""
+        from src import main as main_module
+
+        path = tmp_path / "trace.json"
+        with patch.object(main_module, "_dispatch", return_value=0):
+            code = main_module.main(["--trace", "--trace-file", str(path), "test"])
+
+        assert code == 0
+        assert not main_module.tracer.enabled
+        spans = json.loads(path.read_text(encoding="utf-8"))["resourceSpans"][0][
+            "scopeSpans"
+        ][0]["spans"]
+        assert [s["name"] for s in spans] == ["command.test"]